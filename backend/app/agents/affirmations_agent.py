@@ -1,5 +1,5 @@
 from crewai import Agent, Task, Crew
-from crewai.llm import LLM
+from app.core.llm_gateway import create_llm
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain_community.document_loaders import PyPDFLoader
@@ -12,6 +12,7 @@ import hashlib
 from app.agents.crews.base_crew import BaseCrew
 from app.services.knowledge_base_manager import knowledge_base_manager
 from app.core.storage import StorageFactory
+from app.core.streaming import emit_event
 import logging
 import asyncio
 
@@ -29,7 +30,7 @@ class AffirmationsAgent(BaseCrew):
         # Use shared embeddings and vector store
         self.embeddings = knowledge_base_manager.get_embeddings()
         self.vector_store = knowledge_base_manager.get_vector_store()
-        self.llm = LLM(model="gpt-4o-mini", api_key=openai_api_key)
+        self.llm = create_llm("gpt-4o-mini", api_key=openai_api_key)
         
         # Collection name for affirmations
         self.collection = "affirmations"
@@ -151,6 +152,8 @@ class AffirmationsAgent(BaseCrew):
             
             # Get relevant context
             context = self._get_period_context(period_name, period_info)
+            emit_event("retrieval", period_name=period_name, context_length=len(context),
+                       context=context[:500] + "..." if len(context) > 500 else context)
             
             # Create task from YAML config
             task = self.create_task(
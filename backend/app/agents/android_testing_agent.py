@@ -17,7 +17,7 @@ from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain.schema import Document
 from app.agents.crews.base_crew import BaseCrew
-from crewai.llm import LLM
+from app.core.llm_gateway import create_llm
 
 
 class AndroidTestingAgent(BaseCrew):
@@ -26,7 +26,7 @@ class AndroidTestingAgent(BaseCrew):
     def __init__(self, openai_api_key: str, adb_path: str = "adb"):
         super().__init__()
         self.openai_api_key = openai_api_key
-        self.llm = LLM(model="gpt-4o-mini", api_key=openai_api_key)
+        self.llm = create_llm("gpt-4o-mini", api_key=openai_api_key, priority="batch")
         self.adb_path = adb_path
         self.device_serial = None  # Will be set when a device is selected
         
@@ -4,7 +4,7 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 
 from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
+from app.core.llm_gateway import create_llm
 
 from app.agents.crews.base_crew import BaseCrew
 from app.tools.mobile_analytics.app_store_scraper_tool import AppStoreScraperTool
@@ -39,7 +39,7 @@ class AppStoreAnalystAgent(BaseCrew):
     def create_agents(self) -> List[Agent]:
         """Create specialized agents for App Store analysis."""
         
-        llm = ChatOpenAI(model="gpt-4", temperature=0.1)
+        llm = create_llm("gpt-4", temperature=0.1)
         
         # Listing Analyzer Agent
         listing_analyzer = Agent(
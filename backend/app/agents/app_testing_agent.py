@@ -12,7 +12,7 @@ import tempfile
 import shutil
 import xml.etree.ElementTree as ET
 
-from langchain_openai import ChatOpenAI
+from app.core.llm_gateway import create_llm
 from crewai import Agent, Task, Crew
 from crewai.agent import Agent as CrewAgent
 
@@ -21,7 +21,6 @@ from app.agents.tools.android_testing_tools import AndroidTestingTools
 from app.agents.tools.ios_testing_tools import IOSTestingTools
 from app.core.storage import StorageFactory
 from app.agents.tools.image_analysis_tool import ImageAnalysisTool
-from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
@@ -60,11 +59,7 @@ class AppTestingAgent(BaseCrew):
             goal=self.agents_config['app_testing_agent']['goal'],
             backstory=self.agents_config['app_testing_agent']['backstory'],
             tools=[],  # Empty tools list for now
-            llm=ChatOpenAI(
-                model="gpt-4o",
-                temperature=0.1,
-                api_key=settings.OPENAI_API_KEY
-            ),
+            llm=create_llm("gpt-4o", temperature=0.1, priority="batch"),
             verbose=True,
             allow_delegation=False
         )
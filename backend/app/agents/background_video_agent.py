@@ -5,7 +5,7 @@ from datetime import datetime
 import hashlib
 from app.agents.crews.base_crew import BaseCrew
 from crewai import Agent, Task, Crew
-from crewai.llm import LLM
+from app.core.llm_gateway import create_llm
 from app.services.klingai_client import KlingAIClient
 from app.services.supabase_client import SupabaseClient
 import logging
@@ -21,7 +21,7 @@ class BackgroundVideoAgent(BaseCrew):
         self.openai_api_key = openai_api_key
         self.klingai_api_key = klingai_api_key or os.getenv("KLINGAI_API_KEY")
         self.klingai_provider = klingai_provider or os.getenv("KLINGAI_PROVIDER", "piapi")
-        self.llm = LLM(model="gpt-4o-mini", api_key=openai_api_key)
+        self.llm = create_llm("gpt-4o-mini", api_key=openai_api_key, priority="batch")
         
         # Initialize Supabase client
         self.supabase = supabase_client or SupabaseClient()
@@ -3,10 +3,14 @@ import json
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import hashlib
+import uuid
 from app.agents.crews.base_crew import BaseCrew
 from crewai import Agent, Task, Crew
-from crewai.llm import LLM
+from app.core.llm_gateway import create_llm
 from app.core.storage import StorageFactory
+from app.core.media_store import get_media_store
+from app.core.config import settings
+from app.core.workflow_graph import WorkflowGraph, WorkflowStep
 import asyncio
 
 # Import all the agents we'll be using
@@ -20,6 +24,63 @@ from app.agents.instagram_poster_agent import InstagramPosterAgent
 class ContentWorkflowAgent(BaseCrew):
     """Agent for orchestrating the complete content workflow from affirmation to scheduled posts and reels"""
     
+    # Each template runs the listed steps; the step graph is built by _build_workflow_graph
+    WORKFLOW_TEMPLATES = {
+        "full": {
+            "name": "Vollständiger Content-Workflow",
+            "description": "Generiert Affirmationen, erstellt visuelle Posts und Reels, fügt Hashtags hinzu und plant Posts",
+            "steps": ["affirmation_generation", "image_finding", "post_composition", "video_generation",
+                      "hashtag_research", "scheduling"],
+            "default_options": {
+                "affirmation_count": 5,
+                "image_count": 5,
+                "reel_count": 2,
+                "reel_duration": 15,
+                "include_voiceover": True,
+                "create_reels": True,
+                "schedule_posts": False,
+                "start_delay_days": 1,
+                "post_interval_hours": 24,
+                "reel_interval_hours": 48
+            }
+        },
+        "posts_only": {
+            "name": "Nur visuelle Posts",
+            "description": "Generiert Affirmationen und erstellt visuelle Posts mit Hashtags",
+            "steps": ["affirmation_generation", "image_finding", "post_composition", "hashtag_research"],
+            "default_options": {
+                "affirmation_count": 5,
+                "image_count": 5,
+                "create_reels": False,
+                "schedule_posts": False
+            }
+        },
+        "reels_only": {
+            "name": "Nur Instagram Reels",
+            "description": "Generiert Affirmationen und erstellt Instagram Reels mit Hashtags",
+            "steps": ["affirmation_generation", "video_generation", "hashtag_research"],
+            "default_options": {
+                "affirmation_count": 3,
+                "reel_count": 3,
+                "reel_duration": 15,
+                "include_voiceover": True,
+                "create_reels": True,
+                "schedule_posts": False
+            }
+        },
+        "minimal": {
+            "name": "Minimaler Workflow",
+            "description": "Generiert nur Affirmationen für die Periode",
+            "steps": ["affirmation_generation"],
+            "default_options": {
+                "affirmation_count": 5,
+                "image_count": 0,
+                "create_reels": False,
+                "schedule_posts": False
+            }
+        }
+    }
+    
     def __init__(self, openai_api_key: str, pexels_api_key: str = None, instagram_access_token: str = None):
         # Get storage adapter from factory for multi-tenant support
         storage_adapter = StorageFactory.get_adapter()
@@ -28,7 +89,7 @@ class ContentWorkflowAgent(BaseCrew):
         self.openai_api_key = openai_api_key
         self.pexels_api_key = pexels_api_key
         self.instagram_access_token = instagram_access_token
-        self.llm = LLM(model="gpt-4o-mini", api_key=openai_api_key)
+        self.llm = create_llm("gpt-4o-mini", api_key=openai_api_key, priority="batch")
         
         # Initialize all agents
         self.affirmations_agent = AffirmationsAgent(openai_api_key)
@@ -45,8 +106,12 @@ class ContentWorkflowAgent(BaseCrew):
         # Collection name for workflows
         self.collection = "workflows"
         
-        # Legacy storage for backward compatibility
-        self.storage_file = os.path.join(os.path.dirname(__file__), "../../static/workflows_storage.json")
+        # Workflows of the legacy storage file are kept in the local metadata store
+        get_media_store().migrate_json_file(
+            self.collection,
+            os.path.join(os.path.dirname(__file__), "../../static/workflows_storage.json"),
+            list_key="workflows"
+        )
         
         # Create the workflow orchestration agent
         self.workflow_agent = self.create_agent("content_workflow_agent", llm=self.llm)
@@ -70,8 +135,12 @@ class ContentWorkflowAgent(BaseCrew):
         if self.instagram_poster and hasattr(self.instagram_poster, 'set_context'):
             self.instagram_poster.set_context(self._context)
     
-    async def _save_workflow_to_storage(self, workflow_data: Dict[str, Any]) -> str:
-        """Save workflow to storage with multi-tenant support"""
+    async def _save_workflow_to_storage(self, workflow_data: Dict[str, Any], storage_id: Optional[str] = None) -> str:
+        """Save workflow to storage with multi-tenant support
+        
+        The step records (without their data, which is kept in the results) are
+        stored with the workflow so an unfinished run can be resumed.
+        """
         try:
             # Prepare data for storage
             storage_data = {
@@ -79,7 +148,11 @@ class ContentWorkflowAgent(BaseCrew):
                 "workflow_config": {
                     "period": workflow_data.get("period"),
                     "options": workflow_data.get("options", {}),
-                    "workflow_id": workflow_data.get("id")
+                    "workflow_id": workflow_data.get("id"),
+                    "steps": [
+                        {key: value for key, value in step.items() if key != "data"}
+                        for step in workflow_data.get("steps", [])
+                    ]
                 },
                 "status": workflow_data.get("status", "pending"),
                 "result": workflow_data.get("results", {}),
@@ -90,10 +163,10 @@ class ContentWorkflowAgent(BaseCrew):
             
             # Save to storage with context
             if self.validate_context():
-                workflow_id = await self.save_result(self.collection, storage_data)
+                workflow_id = await self.save_result(self.collection, storage_data, storage_id)
             else:
                 # Fallback to direct storage if no context
-                workflow_id = await self.storage_adapter.save(self.collection, storage_data)
+                workflow_id = await self.storage_adapter.save(self.collection, storage_data, storage_id)
             return workflow_id
         except Exception as e:
             print(f"Error saving workflow to storage: {e}")
@@ -103,7 +176,7 @@ class ContentWorkflowAgent(BaseCrew):
         """Get workflow from storage with multi-tenant support"""
         try:
             if self.validate_context():
-                workflow = await self.load_result(self.collection, workflow_id)
+                workflow = await self.get_result(self.collection, workflow_id)
             else:
                 # Fallback to direct storage if no context
                 workflow = await self.storage_adapter.load(self.collection, workflow_id)
@@ -112,43 +185,135 @@ class ContentWorkflowAgent(BaseCrew):
             print(f"Error loading workflow from storage: {e}")
             return None
         
-    def _load_workflows_storage(self) -> Dict[str, Any]:
-        """Load previously created workflows from legacy storage"""
-        try:
-            if os.path.exists(self.storage_file):
-                with open(self.storage_file, 'r') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"Error loading workflows storage: {e}")
-        return {"workflows": [], "by_hash": {}}
-    
-    def _save_workflows_storage(self, workflows_storage: Dict[str, Any]):
-        """Save workflows to legacy storage"""
-        try:
-            os.makedirs(os.path.dirname(self.storage_file), exist_ok=True)
-            with open(self.storage_file, 'w') as f:
-                json.dump(workflows_storage, f, indent=2)
-        except Exception as e:
-            print(f"Error saving workflows storage: {e}")
-    
     def _generate_workflow_hash(self, period: str, workflow_type: str, options: Dict[str, Any]) -> str:
         """Generate a hash for the workflow parameters"""
         workflow_key = f"{period}_{workflow_type}_{json.dumps(options, sort_keys=True)}"
         return hashlib.md5(workflow_key.encode()).hexdigest()
     
+    def _checkpoint_id(self, workflow_hash: str) -> str:
+        """Storage id of the checkpoint for a workflow hash, scoped to the organization"""
+        organization_id = self._context.organization_id if self._context else ""
+        checkpoint_key = f"{organization_id}_{workflow_hash}"
+        return str(uuid.UUID(hashlib.md5(checkpoint_key.encode()).hexdigest()))
+    
+    def _run_async(self, coroutine):
+        """Run a storage coroutine from the synchronous workflow code"""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+    
+    def _save_checkpoint(self, workflow_result: Dict[str, Any]):
+        """Store the workflow with the steps finished so far"""
+        storage_id = self._run_async(
+            self._save_workflow_to_storage(workflow_result, workflow_result["storage_id"])
+        )
+        if not storage_id:
+            print(f"Workflow {workflow_result['id']}: checkpoint could not be saved")
+    
+    @staticmethod
+    def _workflow_from_checkpoint(checkpoint: Dict[str, Any]) -> Dict[str, Any]:
+        """Rebuild the workflow result from a stored checkpoint"""
+        config = checkpoint.get("workflow_config") or {}
+        workflow_result = {
+            "id": config.get("workflow_id"),
+            "storage_id": checkpoint.get("id"),
+            "period": config.get("period"),
+            "workflow_type": checkpoint.get("workflow_type", "full"),
+            "options": config.get("options") or {},
+            "started_at": checkpoint.get("started_at"),
+            "steps": config.get("steps") or [],
+            "status": checkpoint.get("status"),
+            "results": checkpoint.get("result") or {}
+        }
+        if checkpoint.get("error_message"):
+            workflow_result["error"] = checkpoint["error_message"]
+        if checkpoint.get("completed_at"):
+            workflow_result["completed_at"] = checkpoint["completed_at"]
+        return workflow_result
+    
+    def _build_workflow_graph(self, period: str, workflow_type: str, options: Dict[str, Any]) -> WorkflowGraph:
+        """Build the step graph for a workflow template
+        
+        Image search doesn't depend on affirmations, reels only need the
+        affirmations, and reel captions don't wait for reel rendering, so those
+        branches run side by side. Steps missing from the template are left out
+        together with the dependencies on them.
+        """
+        template = self.WORKFLOW_TEMPLATES.get(workflow_type, self.WORKFLOW_TEMPLATES["full"])
+        included = set(template["steps"])
+        if not options.get("create_reels", True):
+            included.discard("video_generation")
+        if not (self.instagram_poster and options.get("schedule_posts", False)):
+            included.discard("scheduling")
+        
+        step_timeouts = options.get("step_timeouts", {})
+        reel_count = options.get("reel_count", 2) if "video_generation" in included else 0
+        candidates = [
+            ("affirmation_generation", (), "affirmations",
+             lambda results: self._execute_affirmation_step(period, options)),
+            ("image_finding", (), "background_images",
+             lambda results: self._execute_image_finding_step(period, options)),
+            ("post_composition", ("affirmation_generation", "image_finding"), "visual_posts",
+             lambda results: self._execute_post_composition_step(period, results, options)),
+            ("video_generation", ("affirmation_generation",), "reels",
+             lambda results: self._execute_video_generation_step(period, results, options)),
+            ("hashtag_research", ("affirmation_generation", "post_composition"), "social_content",
+             lambda results: self._execute_hashtag_research_step(period, results, options, reel_count)),
+            ("social_content_assembly", ("hashtag_research", "video_generation"), "social_content",
+             lambda results: self._execute_social_content_assembly_step(results)),
+            ("scheduling", ("social_content_assembly", "hashtag_research"), "scheduled_posts",
+             lambda results: self._execute_scheduling_step(period, results, options)),
+        ]
+        if "hashtag_research" in included and "video_generation" in included:
+            included.add("social_content_assembly")
+        
+        steps = []
+        for name, depends_on, result_key, run in candidates:
+            if name not in included:
+                continue
+            depends_on = tuple(dep for dep in depends_on if dep in included)
+            steps.append(WorkflowStep(
+                name=name,
+                run=run,
+                depends_on=depends_on,
+                result_key=result_key,
+                timeout=step_timeouts.get(name)
+            ))
+        return WorkflowGraph(steps)
+    
     def create_complete_content_workflow(self, period: str, workflow_type: str = "full", 
                                        options: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Create a complete content workflow from affirmation to scheduled posts and reels"""
+        """Create a complete content workflow from affirmation to scheduled posts and reels
+        
+        The steps of the workflow template run as a dependency graph: independent
+        steps run concurrently (options.max_concurrency, default
+        WORKFLOW_MAX_CONCURRENCY) and each step is limited to
+        options.step_timeouts[step] or WORKFLOW_STEP_TIMEOUT_SECONDS.
+        
+        Every finished step is checkpointed under the workflow hash. Creating a
+        workflow whose earlier run didn't complete continues that run instead of
+        starting over.
+        """
         try:
             # Propagate context to all sub-agents
             self._propagate_context_to_agents()
             
             workflow_options = options or {}
             workflow_hash = self._generate_workflow_hash(period, workflow_type, workflow_options)
+            storage_id = self._checkpoint_id(workflow_hash)
+            
+            checkpoint = self._run_async(self._get_workflow_from_storage(storage_id))
+            if checkpoint and checkpoint.get("status") != "completed":
+                print(f"Continuing workflow {workflow_hash} from its checkpoint")
+                return self._run_workflow(self._workflow_from_checkpoint(checkpoint))
             
             # Initialize workflow tracking
             workflow_result = {
                 "id": workflow_hash,
+                "storage_id": storage_id,
                 "period": period,
                 "workflow_type": workflow_type,
                 "options": workflow_options,
@@ -157,100 +322,98 @@ class ContentWorkflowAgent(BaseCrew):
                 "status": "in_progress",
                 "results": {}
             }
+            return self._run_workflow(workflow_result)
             
-            # Step 1: Generate Affirmations
-            step_result = self._execute_affirmation_step(period, workflow_options)
-            workflow_result["steps"].append(step_result)
-            
-            if not step_result["success"]:
-                workflow_result["status"] = "failed"
-                workflow_result["error"] = "Failed at affirmation generation step"
-                return workflow_result
-            
-            workflow_result["results"]["affirmations"] = step_result["data"]
-            
-            # Step 2: Find Background Images
-            step_result = self._execute_image_finding_step(period, workflow_options)
-            workflow_result["steps"].append(step_result)
-            
-            if not step_result["success"]:
-                workflow_result["status"] = "failed"
-                workflow_result["error"] = "Failed at image finding step"
-                return workflow_result
-            
-            workflow_result["results"]["background_images"] = step_result["data"]
-            
-            # Step 3: Create Visual Posts
-            step_result = self._execute_post_composition_step(period, workflow_result["results"], workflow_options)
-            workflow_result["steps"].append(step_result)
-            
-            if not step_result["success"]:
-                workflow_result["status"] = "failed"
-                workflow_result["error"] = "Failed at post composition step"
-                return workflow_result
-            
-            workflow_result["results"]["visual_posts"] = step_result["data"]
-            
-            # Step 4: Create Instagram Reels (if requested)
-            if workflow_options.get("create_reels", True):
-                step_result = self._execute_video_generation_step(period, workflow_result["results"], workflow_options)
-                workflow_result["steps"].append(step_result)
-                
-                if not step_result["success"]:
-                    workflow_result["status"] = "failed"
-                    workflow_result["error"] = "Failed at video generation step"
-                    return workflow_result
-                
-                workflow_result["results"]["reels"] = step_result["data"]
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "message": "Fehler beim Erstellen des Content-Workflows"
+            }
+    
+    def resume_workflow(self, workflow_id: str) -> Dict[str, Any]:
+        """Resume a failed or interrupted workflow from its checkpoint
+        
+        Steps that completed before are skipped and their stored results are
+        reused; only the failed step and the steps after it run again.
+        
+        Args:
+            workflow_id: Storage id of the workflow
+        """
+        try:
+            self._propagate_context_to_agents()
             
-            # Step 5: Generate Hashtags and Captions
-            step_result = self._execute_hashtag_research_step(period, workflow_result["results"], workflow_options)
-            workflow_result["steps"].append(step_result)
+            checkpoint = self._run_async(self._get_workflow_from_storage(workflow_id))
+            if not checkpoint:
+                return {
+                    "success": False,
+                    "error": "Workflow nicht gefunden"
+                }
             
-            if not step_result["success"]:
-                workflow_result["status"] = "failed"
-                workflow_result["error"] = "Failed at hashtag research step"
+            workflow_result = self._workflow_from_checkpoint(checkpoint)
+            if workflow_result["status"] == "completed":
+                workflow_result["success"] = True
                 return workflow_result
             
-            workflow_result["results"]["social_content"] = step_result["data"]
-            
-            # Step 6: Schedule Posts (if Instagram token is available)
-            if self.instagram_poster and workflow_options.get("schedule_posts", False):
-                step_result = self._execute_scheduling_step(period, workflow_result["results"], workflow_options)
-                workflow_result["steps"].append(step_result)
-                
-                if not step_result["success"]:
-                    workflow_result["status"] = "failed"
-                    workflow_result["error"] = "Failed at scheduling step"
-                    return workflow_result
-                
-                workflow_result["results"]["scheduled_posts"] = step_result["data"]
-            
-            # Complete workflow
-            workflow_result["status"] = "completed"
-            workflow_result["completed_at"] = datetime.now().isoformat()
-            workflow_result["success"] = True
-            
-            # Save workflow to Supabase
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                storage_id = loop.run_until_complete(
-                    self._save_workflow_to_storage(workflow_result)
-                )
-                workflow_result["storage_id"] = storage_id
-            finally:
-                loop.close()
-            
-            return workflow_result
+            return self._run_workflow(workflow_result)
             
         except Exception as e:
             return {
                 "success": False,
                 "error": str(e),
-                "message": "Fehler beim Erstellen des Content-Workflows"
+                "message": "Fehler beim Fortsetzen des Content-Workflows"
             }
     
+    def _run_workflow(self, workflow_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the steps of a workflow that haven't succeeded yet, checkpointing each one"""
+        workflow_type = workflow_result["workflow_type"]
+        
+        # Template defaults apply unless the caller overrides them
+        template = self.WORKFLOW_TEMPLATES.get(workflow_type, self.WORKFLOW_TEMPLATES["full"])
+        step_options = {**template["default_options"], **workflow_result["options"]}
+        graph = self._build_workflow_graph(workflow_result["period"], workflow_type, step_options)
+        
+        # Keep the records of steps that succeeded, failed steps run again
+        workflow_result["steps"] = [
+            step for step in workflow_result["steps"]
+            if step.get("success") and step["step"] in graph.steps
+        ]
+        completed = [step["step"] for step in workflow_result["steps"]]
+        workflow_result["status"] = "in_progress"
+        workflow_result.pop("error", None)
+        self._save_checkpoint(workflow_result)
+        
+        def checkpoint_step(record: Dict[str, Any]):
+            workflow_result["steps"].append(record)
+            self._save_checkpoint(workflow_result)
+        
+        graph.run(
+            workflow_result["results"],
+            max_concurrency=step_options.get("max_concurrency", settings.WORKFLOW_MAX_CONCURRENCY),
+            default_timeout=settings.WORKFLOW_STEP_TIMEOUT_SECONDS,
+            on_step_complete=checkpoint_step,
+            completed=completed
+        )
+        
+        failed_step = next((step for step in workflow_result["steps"] if not step["success"]), None)
+        if failed_step or len(workflow_result["steps"]) < len(graph.steps):
+            workflow_result["status"] = "failed"
+            workflow_result["error"] = (
+                f"Failed at {failed_step['step']} step: {failed_step.get('error')}" if failed_step
+                else "Workflow stopped before all steps ran"
+            )
+            # Keep the partial results for a later resume
+            self._save_checkpoint(workflow_result)
+            return workflow_result
+        
+        # Complete workflow
+        workflow_result["status"] = "completed"
+        workflow_result["completed_at"] = datetime.now().isoformat()
+        workflow_result["success"] = True
+        self._save_checkpoint(workflow_result)
+        
+        return workflow_result
+    
     def _execute_affirmation_step(self, period: str, options: Dict[str, Any]) -> Dict[str, Any]:
         """Execute affirmation generation step"""
         try:
@@ -356,22 +519,32 @@ class ContentWorkflowAgent(BaseCrew):
                     "message": "Vorherige Schritte müssen erfolgreich sein"
                 }
             
-            # Create visual posts
+            # Compose one post per affirmation/image pair as a single batch
+            pairs = [
+                (affirmation, image)
+                for affirmation, image in zip(affirmations, images)
+                if image.get("local_path")
+            ]
+            jobs = [
+                {
+                    "background_path": image["local_path"],
+                    "text": affirmation["text"],
+                    "period": period,
+                    "template_name": options.get("post_template", "default"),
+                    "post_format": options.get("post_format", "story")
+                }
+                for affirmation, image in pairs
+            ]
+            
+            batch = self.post_composition_agent.compose_posts(jobs)
+            
             visual_posts = []
-            for i, affirmation in enumerate(affirmations[:min(len(affirmations), len(images))]):
-                # Use post composition agent to create post
-                composition_result = self.post_composition_agent.create_visual_post(
-                    affirmation_text=affirmation["text"],
-                    background_image_url=images[i]["urls"]["large"],
-                    period=period,
-                    theme=affirmation.get("theme", period)
-                )
-                
+            for (affirmation, image), composition_result in zip(pairs, batch["results"]):
                 if composition_result["success"]:
                     visual_posts.append({
                         "affirmation": affirmation,
-                        "image": images[i],
-                        "post_data": composition_result["post_data"],
+                        "image": image,
+                        "post_data": composition_result["post"],
                         "created_at": datetime.now().isoformat()
                     })
             
@@ -440,14 +613,20 @@ class ContentWorkflowAgent(BaseCrew):
                 "message": "Fehler beim Erstellen der Instagram Reels"
             }
     
-    def _execute_hashtag_research_step(self, period: str, workflow_results: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute hashtag research and caption generation step"""
+    def _execute_hashtag_research_step(self, period: str, workflow_results: Dict[str, Any], options: Dict[str, Any],
+                                       reel_count: int = 0) -> Dict[str, Any]:
+        """Execute hashtag research and caption generation step
+        
+        Reel captions only need the affirmation text, so they are written for the
+        first reel_count affirmations while the reels are still rendering and
+        matched to the finished reels by _execute_social_content_assembly_step.
+        """
         try:
             print(f"Step 5: Generating hashtags and captions for period {period}")
             
             # Get content from previous steps
             visual_posts = workflow_results.get("visual_posts", [])
-            reels = workflow_results.get("reels", [])
+            reel_affirmations = workflow_results.get("affirmations", [])[:reel_count]
             
             # Generate hashtags and captions for posts
             social_content = {
@@ -472,16 +651,16 @@ class ContentWorkflowAgent(BaseCrew):
                     })
             
             # Process reels
-            for reel in reels:
+            for affirmation in reel_affirmations:
                 hashtag_result = self.hashtag_research_agent.generate_hashtags_and_caption(
                     content_type="reel",
                     theme=period,
-                    affirmation_text=reel["affirmation"]["text"]
+                    affirmation_text=affirmation["text"]
                 )
                 
                 if hashtag_result["success"]:
                     social_content["reels"].append({
-                        "reel": reel,
+                        "affirmation": affirmation,
                         "caption": hashtag_result["caption"],
                         "hashtags": hashtag_result["hashtags"],
                         "engagement_tips": hashtag_result.get("engagement_tips", [])
@@ -502,6 +681,38 @@ class ContentWorkflowAgent(BaseCrew):
                 "message": "Fehler beim Generieren der Hashtags und Captions"
             }
     
+    def _execute_social_content_assembly_step(self, workflow_results: Dict[str, Any]) -> Dict[str, Any]:
+        """Attach the rendered reels to their captions"""
+        try:
+            social_content = workflow_results.get("social_content", {})
+            captions = {entry["affirmation"]["text"]: entry for entry in social_content.get("reels", [])}
+            
+            reels = []
+            for reel in workflow_results.get("reels", []):
+                caption = captions.get(reel["affirmation"]["text"])
+                if caption:
+                    reels.append({
+                        "reel": reel,
+                        "caption": caption["caption"],
+                        "hashtags": caption["hashtags"],
+                        "engagement_tips": caption["engagement_tips"]
+                    })
+            
+            return {
+                "step": "social_content_assembly",
+                "success": True,
+                "data": {**social_content, "reels": reels},
+                "message": f"{len(reels)} Reels mit Captions verknüpft"
+            }
+            
+        except Exception as e:
+            return {
+                "step": "social_content_assembly",
+                "success": False,
+                "error": str(e),
+                "message": "Fehler beim Zusammenführen von Reels und Captions"
+            }
+    
     def _execute_scheduling_step(self, period: str, workflow_results: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
         """Execute post scheduling step"""
         try:
@@ -684,57 +895,12 @@ class ContentWorkflowAgent(BaseCrew):
             }
     
     def get_workflow_templates(self) -> Dict[str, Any]:
-        """Get available workflow templates"""
+        """Get available workflow templates with the step graph each one runs"""
+        templates = {}
+        for template_id, template in self.WORKFLOW_TEMPLATES.items():
+            graph = self._build_workflow_graph("", template_id, template["default_options"])
+            templates[template_id] = {**template, "graph": graph.describe()}
         return {
             "success": True,
-            "templates": {
-                "full": {
-                    "name": "Vollständiger Content-Workflow",
-                    "description": "Generiert Affirmationen, erstellt visuelle Posts und Reels, fügt Hashtags hinzu und plant Posts",
-                    "default_options": {
-                        "affirmation_count": 5,
-                        "image_count": 5,
-                        "reel_count": 2,
-                        "reel_duration": 15,
-                        "include_voiceover": True,
-                        "create_reels": True,
-                        "schedule_posts": False,
-                        "start_delay_days": 1,
-                        "post_interval_hours": 24,
-                        "reel_interval_hours": 48
-                    }
-                },
-                "posts_only": {
-                    "name": "Nur visuelle Posts",
-                    "description": "Generiert Affirmationen und erstellt visuelle Posts mit Hashtags",
-                    "default_options": {
-                        "affirmation_count": 5,
-                        "image_count": 5,
-                        "create_reels": False,
-                        "schedule_posts": False
-                    }
-                },
-                "reels_only": {
-                    "name": "Nur Instagram Reels",
-                    "description": "Generiert Affirmationen und erstellt Instagram Reels mit Hashtags",
-                    "default_options": {
-                        "affirmation_count": 3,
-                        "reel_count": 3,
-                        "reel_duration": 15,
-                        "include_voiceover": True,
-                        "create_reels": True,
-                        "schedule_posts": False
-                    }
-                },
-                "minimal": {
-                    "name": "Minimaler Workflow",
-                    "description": "Generiert nur Affirmationen für die Periode",
-                    "default_options": {
-                        "affirmation_count": 5,
-                        "image_count": 0,
-                        "create_reels": False,
-                        "schedule_posts": False
-                    }
-                }
-            }
-        }
\ No newline at end of file
+            "templates": templates
+        }
@@ -1,14 +1,24 @@
 from crewai import Agent, Task, Crew
 from crewai.agent import Agent
+from crewai.llms.base_llm import BaseLLM, call_stream_override
 from langchain_openai import ChatOpenAI
 from langchain.callbacks.base import BaseCallbackHandler
 import yaml
 import os
+from datetime import datetime
 from typing import Dict, Any, List, Optional
 import logging
+import threading
+from contextvars import ContextVar
 from uuid import UUID
 
-from app.core.cost_tracker import cost_tracker, TokenUsage
+from app.core.llm_cache import get_llm_cache
+from app.core.prompt_budget import fit_inputs, prompt_budget_metrics
+from app.core.workflow_graph import WorkflowGraph, WorkflowStep
+from app.core.config import settings
+from app.core.streaming import emit_event, is_streaming
+from app.core.cost_tracker import cost_tracker, cost_attribution, get_cost_attribution, TokenUsage, CostEstimate, CostRollup
+from app.core.llm_gateway import DEFAULT_MODEL, llm_gateway
 from app.models.auth import RequestContext
 from app.core.storage.base import StorageAdapter
 from app.services.credit_service import CreditService
@@ -16,6 +26,10 @@ from app.core.exceptions import InsufficientCreditsError
 
 logger = logging.getLogger(__name__)
 
+# Request context of each agent in the current request (or job), by agent id.
+# Agents are shared singletons, so the context can't live on the instance.
+_agent_contexts: ContextVar[Dict[int, RequestContext]] = ContextVar("agent_contexts", default={})
+
 
 class CrewOutput:
     """Simple output wrapper for crew results"""
@@ -26,11 +40,18 @@ class CrewOutput:
 
 
 class CostTrackingCallback(BaseCallbackHandler):
-    """Callback handler to track token usage for cost estimation"""
+    """Callback handler to track token usage for cost estimation
+    
+    Attached to langchain LLMs. Each completed call is reported to the owning
+    crew, which records it in the CostTracker.
+    """
     
-    def __init__(self, agent_name: str, task_description: Optional[str] = None):
+    def __init__(self, agent_name: str, task_description: Optional[str] = None,
+                 owner: Optional['BaseCrew'] = None, model: Optional[str] = None):
         self.agent_name = agent_name
         self.task_description = task_description
+        self.owner = owner
+        self.model = model
         self.token_usage = TokenUsage()
         
     def on_llm_end(self, response, **kwargs):
@@ -38,9 +59,16 @@ class CostTrackingCallback(BaseCallbackHandler):
         if hasattr(response, 'llm_output') and response.llm_output:
             usage = response.llm_output.get('token_usage', {})
             if usage:
-                self.token_usage.prompt_tokens += usage.get('prompt_tokens', 0)
-                self.token_usage.completion_tokens += usage.get('completion_tokens', 0)
-                self.token_usage.total_tokens += usage.get('total_tokens', 0)
+                call_usage = TokenUsage(
+                    prompt_tokens=usage.get('prompt_tokens', 0),
+                    completion_tokens=usage.get('completion_tokens', 0),
+                    total_tokens=usage.get('total_tokens', 0)
+                )
+                self.token_usage.add(call_usage)
+                
+                if self.owner:
+                    model = response.llm_output.get('model_name') or self.model
+                    self.owner.record_llm_usage(model, call_usage, agent_name=self.agent_name)
 
 
 class BaseCrew:
@@ -54,13 +82,17 @@ class BaseCrew:
         self.agents_config = self._load_yaml("agents.yaml")
         self.tasks_config = self._load_yaml("tasks.yaml")
         self.crews_config = self._load_yaml("crews.yaml")
-        self.cost_tracking_enabled = True
-        self.session_costs = []
+        self._init_cost_tracking()
         
         # Multi-tenant support
         self._context: Optional[RequestContext] = None
         self.storage_adapter = storage_adapter
         
+    def _init_cost_tracking(self):
+        """Initialize cost tracking state (also used by crews that skip BaseCrew.__init__)"""
+        self.cost_tracking_enabled = True
+        self.session_costs = CostRollup(max_recent=20)
+        
     def _load_yaml(self, filename: str) -> Dict[str, Any]:
         """Load a YAML configuration file"""
         filepath = os.path.join(self.config_dir, filename)
@@ -78,7 +110,7 @@ class BaseCrew:
         
         config = self.agents_config[agent_name]
         
-        return Agent(
+        agent = Agent(
             role=config.get("role"),
             goal=config.get("goal"),
             backstory=config.get("backstory"),
@@ -88,6 +120,8 @@ class BaseCrew:
             max_execution_time=config.get("max_execution_time", 300),
             llm=llm
         )
+        self.instrument_agent(agent, agent_name)
+        return agent
     
     def create_task(self, task_name: str, agent: Agent, **kwargs) -> Task:
         """Create a task from YAML configuration"""
@@ -96,14 +130,77 @@ class BaseCrew:
         
         config = self.tasks_config[task_name]
         
-        # Format description with provided kwargs
-        description = config.get("description", "").format(**kwargs)
+        # Format description with provided kwargs, fitted to the task's token budget
+        description = self.render_prompt(
+            task_name,
+            config.get("description", ""),
+            model=self._get_llm_model(agent.llm),
+            max_tokens=config.get("max_prompt_tokens", settings.PROMPT_BUDGET_DEFAULT_TOKENS),
+            **kwargs
+        )
         
-        return Task(
+        task = Task(
             description=description,
             expected_output=config.get("expected_output"),
             agent=agent
         )
+        self.configure_task(task, task_name, cache=config.get("cache", False), cache_ttl=config.get("cache_ttl"))
+        return task
+    
+    def render_prompt(self, task_name: str, template: str, model: Optional[str] = None,
+                      max_tokens: Optional[int] = None, **inputs) -> str:
+        """Render a prompt template with its inputs shortened to fit a token budget
+        
+        Args:
+            task_name: Name the prompt size is reported under
+            template: str.format template
+            model: Model the prompt is sent to, used for counting tokens
+            max_tokens: Token budget, None or 0 for no limit
+            **inputs: Template inputs; dicts and lists are rendered as compact JSON
+        """
+        values = self.fit_prompt_inputs(task_name, max_tokens, model=model, template=template, **inputs)
+        return template.format(**values)
+    
+    def fit_prompt_inputs(self, task_name: str, max_tokens: Optional[int], model: Optional[str] = None,
+                          template: str = "", **inputs) -> Dict[str, str]:
+        """Shorten prompt inputs to fit a token budget and report the prompt size
+        
+        For prompts that aren't rendered from tasks.yaml; `template` is the
+        fixed text around the inputs, if any.
+        """
+        values, report = fit_inputs(template, inputs, max_tokens, model)
+        if report["trimmed"]:
+            logger.info(
+                f"Prompt for '{task_name}' shortened by {report['tokens_removed']} tokens "
+                f"to {report['prompt_tokens']}/{max_tokens} (inputs: {', '.join(report['trimmed'])})"
+            )
+        prompt_budget_metrics.record(task_name, report)
+        return values
+    
+    @staticmethod
+    def _get_llm_model(llm: Any) -> Optional[str]:
+        """Model id of a crewai or langchain LLM"""
+        if llm is None:
+            return None
+        if isinstance(llm, str):
+            return llm
+        return getattr(llm, "model", None) or getattr(llm, "model_name", None)
+    
+    def configure_task(self, task: Task, task_name: str, cache: bool = False, cache_ttl: Optional[int] = None):
+        """Tag a task with its config name and response cache settings
+        
+        Args:
+            task: The task to configure
+            task_name: Name used for cost attribution and cache metrics
+            cache: Whether the task's response may be served from the LLM cache. Only
+                tasks whose result depends on their prompt alone opt in (`cache: true` in
+                tasks.yaml); tasks using tools or live data must not
+            cache_ttl: Optional TTL in seconds overriding LLM_CACHE_TTL_SECONDS
+        """
+        # Tasks are pydantic models, these are not crewai fields
+        object.__setattr__(task, "_config_task_name", task_name)
+        object.__setattr__(task, "_cache_enabled", cache)
+        object.__setattr__(task, "_cache_ttl", cache_ttl)
     
     def create_crew(self, crew_name: str, agents: List[Agent], tasks: List[Task]) -> Crew:
         """Create a crew from YAML configuration"""
@@ -112,40 +209,292 @@ class BaseCrew:
         
         config = self.crews_config[crew_name]
         
+        # Agents built directly with Agent(...) get instrumented here
+        for agent in agents:
+            self.instrument_agent(agent)
+        
+        # Parallel crews run each task as its own single-task crew, see run_tasks
+        process = config.get("process", "sequential")
+        
         return Crew(
             agents=agents,
             tasks=tasks,
-            process=config.get("process", "sequential"),
+            process="sequential" if process == "parallel" else process,
             verbose=config.get("verbose", True),
             memory=config.get("memory", False),
             cache=config.get("cache", True),
-            max_rpm=config.get("max_rpm", 10),
-            share_crew=config.get("share_crew", False)
+            # Request rates are limited process-wide by the LLM gateway
+            max_rpm=config.get("max_rpm"),
+            share_crew=config.get("share_crew", False),
+            step_callback=self._on_agent_step
+        )
+    
+    def run_tasks(self, crew_name: str, tasks: List[Task]) -> List[Any]:
+        """Run tasks as a crew and return their outputs in task order
+        
+        Tasks declare what they depend on through their `context` (the tasks
+        whose output they get). Crews with `process: parallel` in their YAML
+        config run tasks whose dependencies are done at the same time, up to
+        `max_concurrency`; other crews run the tasks one after another.
+        Dependencies outside `tasks` must already have been executed. In a
+        parallel crew a task without an explicit context gets no earlier output.
+        
+        Raises:
+            RuntimeError: If a task fails in a parallel crew
+        """
+        config = self.crews_config.get(crew_name, {})
+        if config.get("process") != "parallel" or len(tasks) < 2:
+            crew = self.create_crew(crew_name, agents=self._unique_agents(tasks), tasks=tasks)
+            crew.kickoff()
+            return [task.output for task in tasks]
+        
+        names = {id(task): f"{index}:{self._get_task_name(task)}" for index, task in enumerate(tasks)}
+        # Agents keep per-execution state, tasks of the same agent take turns
+        agent_locks = {id(task.agent): threading.Lock() for task in tasks}
+        
+        def run(task: Task):
+            def step(results: Dict[str, Any]) -> Dict[str, Any]:
+                with agent_locks[id(task.agent)]:
+                    crew = self.create_crew(crew_name, agents=[task.agent], tasks=[task])
+                    crew.kickoff()
+                return {"success": True, "data": task.output}
+            return step
+        
+        def dependencies(task: Task) -> tuple:
+            context = task.context if isinstance(task.context, list) else []
+            return tuple(names[id(dep)] for dep in context if id(dep) in names)
+        
+        graph = WorkflowGraph([
+            WorkflowStep(names[id(task)], run(task), depends_on=dependencies(task), result_key=names[id(task)])
+            for task in tasks
+        ])
+        outputs: Dict[str, Any] = {}
+        records = graph.run(outputs, max_concurrency=config.get("max_concurrency", 3))
+        
+        failed = next((record for record in records if not record.get("success")), None)
+        if failed:
+            raise RuntimeError(f"Task '{failed['step']}' of crew '{crew_name}' failed: {failed.get('error')}")
+        return [outputs[names[id(task)]] for task in tasks]
+    
+    @staticmethod
+    def _unique_agents(tasks: List[Task]) -> List[Agent]:
+        """Agents of the tasks, each once, in task order"""
+        agents = []
+        for task in tasks:
+            if task.agent is not None and all(task.agent is not agent for agent in agents):
+                agents.append(task.agent)
+        return agents
+    
+    @staticmethod
+    def _on_agent_step(step: Any):
+        """Forward intermediate agent steps (thoughts, tool calls) to streaming clients"""
+        if not is_streaming():
+            return
+        emit_event(
+            "agent_step",
+            status="step",
+            thought=getattr(step, "thought", None),
+            tool=getattr(step, "tool", None),
+            tool_input=getattr(step, "tool_input", None),
+            output=str(getattr(step, "result", None) or getattr(step, "output", None) or "")[:500] or None
+        )
+    
+    def instrument_agent(self, agent: Agent, agent_name: Optional[str] = None):
+        """Add cost tracking and response caching to an agent
+        
+        Every LLM call the agent makes is recorded in the CostTracker, attributed
+        to the agent, the task it is executing and the current organization/project.
+        Task results are served from the LLM response cache when possible.
+        """
+        if getattr(agent.execute_task, "_instrumented", False):
+            return
+        
+        name = agent_name or agent.role
+        original_execute_task = agent.execute_task
+        owner = self
+        
+        def execute_task(task, *args, **kwargs):
+            task_name = owner._get_task_name(task)
+            emit_event("agent_step", agent=name, task=task_name, status="started")
+            with cost_attribution(agent_name=name, task_name=task_name,
+                                  **owner._get_tenant_attribution()):
+                result = owner._execute_task_cached(agent, original_execute_task, task, *args, **kwargs)
+            emit_event("agent_step", agent=name, task=task_name, status="completed",
+                       output=str(result)[:500])
+            return result
+        
+        execute_task._instrumented = True
+        # Agents are pydantic models, bypass field validation for the wrapper
+        object.__setattr__(agent, "execute_task", execute_task)
+        
+        if agent.llm is not None:
+            self._instrument_llm(agent.llm, name)
+    
+    def _execute_task_cached(self, agent: Agent, execute, task: Task, *args, **kwargs) -> Any:
+        """Run a task through the LLM response cache if the task opted in"""
+        cache = get_llm_cache()
+        if cache is None or not getattr(task, "_cache_enabled", False):
+            return execute(task, *args, **kwargs)
+        
+        context = kwargs.get("context", args[0] if args else None)
+        task_name = self._get_task_name(task)
+        organization_id = self._get_tenant_attribution().get("organization_id")
+        key = cache.make_key(
+            model=self._get_llm_model(agent.llm),
+            description=f"{task.description}\n{task.expected_output}",
+            agent_config={
+                "role": agent.role,
+                "goal": agent.goal,
+                "backstory": agent.backstory,
+                "tools": sorted(tool.name for tool in agent.tools or [])
+            },
+            temperature=getattr(agent.llm, "temperature", None),
+            organization_id=organization_id,
+            context=str(context) if context else None
         )
+        
+        try:
+            cached = cache.get(key, task_name)
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            cached = None
+        if cached is not None:
+            return cached
+        
+        result = execute(task, *args, **kwargs)
+        
+        if isinstance(result, str) and result.strip():
+            try:
+                cache.set(key, result, task_name=task_name, organization_id=organization_id,
+                          ttl=getattr(task, "_cache_ttl", None))
+            except Exception as e:
+                logger.warning(f"LLM cache store failed: {e}")
+        return result
+    
+    def _instrument_llm(self, llm: Any, agent_name: str):
+        """Hook per-call usage reporting into a crewai or langchain LLM
+        
+        LLMs from the gateway report their usage already, others are routed
+        through it here.
+        """
+        if isinstance(llm, ChatOpenAI):
+            if any(isinstance(cb, CostTrackingCallback) for cb in llm.callbacks or []):
+                return
+            llm.callbacks = list(llm.callbacks or []) + [
+                CostTrackingCallback(agent_name, owner=self, model=llm.model_name)
+            ]
+            return
+        
+        if not hasattr(llm, "call"):
+            logger.warning(f"Cannot track costs for LLM of type {type(llm).__name__}")
+            return
+        
+        llm_gateway.wrap(llm, getattr(llm, "model", None) or DEFAULT_MODEL)
+        
+        if not isinstance(llm, BaseLLM) or getattr(llm.call, "_streaming", False):
+            return
+        
+        original_call = llm.call
+        
+        def call(*args, **kwargs):
+            # Streaming requests get token chunks; the call still returns the full text.
+            # The LLM is shared, so streaming is switched on for this call's context only.
+            if is_streaming() and llm.stream is False:
+                with call_stream_override(llm, True):
+                    return original_call(*args, **kwargs)
+            return original_call(*args, **kwargs)
+        
+        call._streaming = True
+        object.__setattr__(llm, "call", call)
+    
+    def _get_task_name(self, task: Any) -> Optional[str]:
+        """Name of a task as configured in tasks.yaml, falling back to crewai's"""
+        config_name = getattr(task, "_config_task_name", None)
+        if config_name:
+            return config_name
+        name = getattr(task, "name", None) or getattr(task, "description", None)
+        return name[:80] if name else None
+    
+    def _get_tenant_attribution(self) -> Dict[str, Optional[str]]:
+        """Organization/project ids of the current context for cost attribution"""
+        if not self._context:
+            return {}
+        return {
+            "organization_id": str(self._context.organization_id),
+            "project_id": str(self._context.project_id) if self._context.project_id else None
+        }
+    
+    def record_llm_usage(self, model: Optional[str], token_usage: TokenUsage,
+                         agent_name: Optional[str] = None) -> Optional[CostEstimate]:
+        """Record the token usage of a single call of a langchain LLM
+        
+        crewai LLMs are recorded by the LLM gateway.
+        """
+        if not self.cost_tracking_enabled or not token_usage.total_tokens:
+            return None
+        
+        # The agent executing the task wins over the agent the LLM was first attached to,
+        # since agents of one crew commonly share an LLM instance
+        attribution = get_cost_attribution()
+        with cost_attribution(**self._get_tenant_attribution()):
+            return cost_tracker.track_usage(
+                agent_name=attribution.get("agent_name") or agent_name or self.__class__.__name__,
+                model=model or "gpt-4",
+                token_usage=token_usage
+            )
     
     def track_crew_costs(self, crew_result: Any, agent_name: str, model: str = "gpt-4", 
-                        task_description: Optional[str] = None) -> Dict[str, Any]:
-        """Track costs for a crew execution"""
+                        task_description: Optional[str] = None,
+                        run_costs: Optional[CostRollup] = None) -> Dict[str, Any]:
+        """Summarize the costs of a crew execution
+        
+        The calls themselves are recorded as they happen. Pass the rollup of
+        a `collect_costs()` block around the kickoff as `run_costs`; without
+        it the usage crewai reports on the result is priced instead.
+        """
         if not self.cost_tracking_enabled:
             return {}
         
-        # Extract token usage from crew result if available
-        # This is a simplified version - actual implementation would need to 
-        # aggregate token usage from all agents in the crew
-        token_usage = TokenUsage(
-            prompt_tokens=1000,  # Placeholder - actual values would come from crew
-            completion_tokens=500,
-            total_tokens=1500
-        )
+        captured = run_costs
         
-        cost_estimate = cost_tracker.track_usage(
-            agent_name=agent_name,
-            model=model,
-            token_usage=token_usage,
-            task_description=task_description or "Crew execution"
-        )
+        if captured is not None and captured.requests:
+            token_usage = TokenUsage(
+                prompt_tokens=captured.prompt_tokens,
+                completion_tokens=captured.completion_tokens,
+                total_tokens=captured.total_tokens
+            )
+            
+            cost_estimate = CostEstimate(
+                model=next(iter(captured.models)) if len(captured.models) == 1 else model,
+                token_usage=token_usage,
+                estimated_cost=round(captured.total_cost, 6),
+                timestamp=datetime.now().isoformat(),
+                agent_name=agent_name,
+                task_description=task_description or "Crew execution",
+                **self._get_tenant_attribution()
+            )
+        else:
+            usage = getattr(crew_result, "token_usage", None)
+            if not usage or not getattr(usage, "total_tokens", 0):
+                return {}
+            
+            token_usage = TokenUsage(
+                prompt_tokens=usage.prompt_tokens,
+                completion_tokens=usage.completion_tokens,
+                total_tokens=usage.total_tokens
+            )
+            
+            cost_estimate = CostEstimate(
+                model=model,
+                token_usage=token_usage,
+                estimated_cost=cost_tracker.calculate_cost(model, token_usage),
+                timestamp=datetime.now().isoformat(),
+                agent_name=agent_name,
+                task_description=task_description or "Crew execution",
+                **self._get_tenant_attribution()
+            )
         
-        self.session_costs.append(cost_estimate)
+        self.session_costs.add(cost_estimate)
         
         return {
             "cost_estimate": cost_estimate.dict(),
@@ -154,16 +503,10 @@ class BaseCrew:
     
     def get_session_cost_summary(self) -> Dict[str, Any]:
         """Get cost summary for current session"""
-        if not self.session_costs:
-            return {"total_cost": 0.0, "total_tokens": 0, "requests": 0}
-        
-        total_cost = sum(cost.estimated_cost for cost in self.session_costs)
-        total_tokens = sum(cost.token_usage.total_tokens for cost in self.session_costs)
-        
         return {
-            "total_cost": round(total_cost, 4),
-            "total_tokens": total_tokens,
-            "requests": len(self.session_costs),
+            "total_cost": round(self.session_costs.total_cost, 6),
+            "total_tokens": self.session_costs.total_tokens,
+            "requests": self.session_costs.requests,
             "currency": "USD"
         }
     
@@ -173,8 +516,26 @@ class BaseCrew:
         logger.info(f"Cost tracking {'enabled' if enabled else 'disabled'} for {self.__class__.__name__}")
     
     # Multi-tenant support methods
+    @property
+    def _context(self) -> Optional[RequestContext]:
+        return _agent_contexts.get().get(id(self))
+    
+    @_context.setter
+    def _context(self, context: Optional[RequestContext]):
+        contexts = dict(_agent_contexts.get())
+        if context is None:
+            contexts.pop(id(self), None)
+        else:
+            contexts[id(self)] = context
+        _agent_contexts.set(contexts)
+    
     def set_context(self, context: RequestContext):
-        """Set organization/project context for the agent"""
+        """Set organization/project context for the agent
+        
+        The context only applies to the current request: it is kept in a
+        context variable, which threads started with the request's context
+        (run_in_threadpool, streaming calls, workflow steps) inherit.
+        """
         self._context = context
         logger.info(f"Context set for {self.__class__.__name__}: org={context.organization_id}, project={context.project_id}")
     
@@ -3,7 +3,7 @@
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 from crewai import Crew, Task, Agent
-from langchain_openai import ChatOpenAI
+from app.core.llm_gateway import create_llm
 from .base_crew import BaseCrew
 import logging
 import json
@@ -11,6 +11,10 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Token budgets for the variable parts of the prompts
+ANALYSIS_INPUT_TOKENS = 3000
+GOAL_INPUT_TOKENS = 2500
+
 
 class GoalSuggestionInput(BaseModel):
     project_description: str
@@ -48,19 +52,14 @@ class GoalSuggestionCrew(BaseCrew):
         self.agents_config = {}
         self.tasks_config = {}
         self.crews_config = {}
-        self.cost_tracking_enabled = True
-        self.session_costs = []
+        self._init_cost_tracking()
         self._context = None
         self.storage_adapter = None
         
         if not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY not configured")
         
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.3,
-            api_key=settings.OPENAI_API_KEY
-        )
+        self.llm = create_llm("gpt-4o-mini", temperature=0.3)
         
         # Create goal strategist agent
         self.goal_strategist = Agent(
@@ -91,6 +90,10 @@ class GoalSuggestionCrew(BaseCrew):
             allow_delegation=False,
             llm=self.llm
         )
+        
+        # Cost tracking and response caching for the directly built agents
+        for agent in (self.goal_strategist, self.methodology_expert, self.goal_refiner):
+            self.instrument_agent(agent)
     
     def _extract_json_from_output(self, output: str) -> Dict[str, Any]:
         """Extract JSON from agent output"""
@@ -119,6 +122,15 @@ class GoalSuggestionCrew(BaseCrew):
     def suggest_goals(self, input_data: GoalSuggestionInput) -> GoalSuggestionOutput:
         """Generate goal suggestions based on project context"""
         try:
+            model = self._get_llm_model(self.llm)
+            analysis_inputs = self.fit_prompt_inputs(
+                "goal_analysis",
+                ANALYSIS_INPUT_TOKENS,
+                model=model,
+                knowledge=input_data.knowledge_files_content or "",
+                user_feedback=input_data.user_feedback or ""
+            )
+            
             # Task 1: Analyze project and extract key themes
             analysis_task = Task(
                 description=f"""
@@ -130,9 +142,9 @@ class GoalSuggestionCrew(BaseCrew):
                 
                 {f"Organization Purpose: {input_data.organization_purpose}" if input_data.organization_purpose else ""}
                 
-                {f"Available Knowledge Base Content: {input_data.knowledge_files_content[:2000]}..." if input_data.knowledge_files_content else ""}
+                {f"Available Knowledge Base Content: {analysis_inputs['knowledge']}" if input_data.knowledge_files_content else ""}
                 
-                {f"User Feedback on Previous Suggestions: {input_data.user_feedback}" if input_data.user_feedback else ""}
+                {f"User Feedback on Previous Suggestions: {analysis_inputs['user_feedback']}" if input_data.user_feedback else ""}
                 
                 Identify 3-5 key areas where goals should be set. Consider both short-term milestones and long-term objectives.
                 """,
@@ -172,6 +184,13 @@ class GoalSuggestionCrew(BaseCrew):
                 - Aligning with user expectations
                 """
             
+            goal_inputs = self.fit_prompt_inputs(
+                "goal_generation",
+                GOAL_INPUT_TOKENS,
+                model=model,
+                previous_goals=input_data.previous_goals or []
+            )
+            
             # Use custom prompt if provided, otherwise use default
             if input_data.custom_prompt:
                 goal_description = f"""
@@ -181,7 +200,7 @@ class GoalSuggestionCrew(BaseCrew):
                 
                 {feedback_context}
                 
-                {f"Previous goals to improve upon: {json.dumps(input_data.previous_goals, indent=2)}" if input_data.previous_goals else ""}
+                {f"Previous goals to improve upon: {goal_inputs['previous_goals']}" if input_data.previous_goals else ""}
                 
                 For each goal, ensure you provide:
                 - A clear, concise title (max 100 characters)
@@ -214,7 +233,7 @@ class GoalSuggestionCrew(BaseCrew):
                 
                 {feedback_context}
                 
-                {f"Previous goals to improve upon: {json.dumps(input_data.previous_goals, indent=2)}" if input_data.previous_goals else ""}
+                {f"Previous goals to improve upon: {goal_inputs['previous_goals']}" if input_data.previous_goals else ""}
                 
                 For each goal, provide:
                 - A clear, concise title (max 100 characters)
@@ -77,13 +77,14 @@ class IdeaAssistantCrew(BaseCrew):
     def _create_agent_from_config(self, agent_name: str, config: Dict[str, Any]) -> Any:
         """Create an agent from configuration"""
         from crewai import Agent
-        from langchain_openai import ChatOpenAI
-        from app.core.config import settings
+        from app.core.llm_gateway import create_llm
         
-        llm = ChatOpenAI(
-            model=config.get('llm', {}).get('model', 'gpt-4o-mini'),
-            temperature=config.get('llm', {}).get('temperature', 0.7),
-            api_key=settings.OPENAI_API_KEY
+        # Idea refinement is a conversation, its calls go before batch work
+        llm_config = config.get('llm', {})
+        llm = create_llm(
+            llm_config.get('model', 'gpt-4o-mini'),
+            temperature=llm_config.get('temperature', 0.7),
+            priority=llm_config.get('priority', 'interactive')
         )
         
         return Agent(
@@ -96,16 +97,11 @@ class IdeaAssistantCrew(BaseCrew):
             max_iter=config.get('max_iter', 5)
         )
     
-    def refine_idea(self, input_data: IdeaRefinementInput) -> CrewOutput:
-        """
-        Refine a raw idea through conversational interaction
-        """
-        logger.info(f"Refining idea: {input_data.idea_description[:100]}...")
-        
+    def _refine_task(self, input_data: IdeaRefinementInput) -> Task:
+        """Task that continues the conversation about an idea"""
         # Build conversation context
         conversation_text = self._format_conversation_history(input_data.conversation_history)
         
-        # Create the refinement task
         refine_task = Task(
             description=f"""
             Current idea: {input_data.idea_description}
@@ -124,21 +120,80 @@ class IdeaAssistantCrew(BaseCrew):
             agent=self.agents['idea_refiner'],
             expected_output=self.tasks['refine_idea']['expected_output']
         )
-        
-        crew = self.create_crew(
-            crew_name='idea_assistant_crew',
-            agents=[self.agents['idea_refiner']],
-            tasks=[refine_task]
+        self.configure_task(refine_task, 'refine_idea', cache=self.tasks['refine_idea'].get('cache', False))
+        return refine_task
+    
+    def _validate_task(self, context: Dict[str, Any], refined_idea: Optional[str] = None,
+                       depends_on: Optional[List[Task]] = None) -> Task:
+        """Task that validates an idea, given as text or as the output of `depends_on`"""
+        idea = refined_idea if refined_idea is not None else "the refined idea from the previous step"
+        validate_task = Task(
+            description=f"""
+            Validate this idea: {idea}
+            
+            Organization context:
+            - Name: {context.get('organization_name', 'N/A')}
+            - Industry: {context.get('industry', 'N/A')}
+            - Size: {context.get('company_size', 'N/A')}
+            - Goals: {json.dumps(context.get('goals', []))}
+            
+            Project context (if applicable):
+            - Name: {context.get('project_name', 'N/A')}
+            - Budget: {context.get('budget', 'N/A')}
+            - Timeline: {context.get('timeline', 'N/A')}
+            - Resources: {json.dumps(context.get('resources', []))}
+            
+            Provide a comprehensive validation with scoring.
+            """,
+            agent=self.agents['idea_validator'],
+            expected_output=self.tasks['validate_idea']['expected_output'],
+            context=depends_on
+        )
+        self.configure_task(validate_task, 'validate_idea', cache=self.tasks['validate_idea'].get('cache', False))
+        return validate_task
+    
+    def _generate_task(self, project_context: Dict[str, Any], validated_idea: Optional[str] = None,
+                       validation_score: Optional[float] = None,
+                       depends_on: Optional[List[Task]] = None) -> Task:
+        """Task that breaks an idea, given as text or as the output of `depends_on`, into tasks"""
+        idea = validated_idea if validated_idea is not None else "the refined idea from the previous step"
+        score = f"Validation score: {validation_score}" if validation_score is not None else ""
+        generate_task = Task(
+            description=f"""
+            Convert this validated idea into actionable tasks:
+            {idea}
+            
+            {score}
+            
+            Project constraints:
+            - Timeline: {project_context.get('timeline', 'Flexible')}
+            - Budget: {project_context.get('budget', 'To be determined')}
+            - Team size: {project_context.get('team_size', 'Unknown')}
+            - Existing tasks: {len(project_context.get('existing_tasks', []))}
+            
+            Create a comprehensive task breakdown with all required details.
+            """,
+            agent=self.agents['task_generator'],
+            expected_output=self.tasks['generate_tasks']['expected_output'],
+            context=depends_on
         )
+        self.configure_task(generate_task, 'generate_tasks', cache=self.tasks['generate_tasks'].get('cache', False))
+        return generate_task
+    
+    def refine_idea(self, input_data: IdeaRefinementInput) -> CrewOutput:
+        """
+        Refine a raw idea through conversational interaction
+        """
+        logger.info(f"Refining idea: {input_data.idea_description[:100]}...")
         
-        result = crew.kickoff()
+        output = self.run_tasks('idea_assistant_crew', [self._refine_task(input_data)])[0].raw
         
         return CrewOutput(
             success=True,
             result={
                 'task': 'refine_idea',
-                'output': result.raw,
-                'questions': self._extract_questions(result.raw)
+                'output': output,
+                'questions': self._extract_questions(output)
             },
             message="Idea refined successfully"
         )
@@ -149,44 +204,17 @@ class IdeaAssistantCrew(BaseCrew):
         """
         logger.info("Validating refined idea...")
         
-        validate_task = Task(
-            description=f"""
-            Validate this idea: {input_data.refined_idea}
-            
-            Organization context:
-            - Name: {input_data.context.get('organization_name', 'N/A')}
-            - Industry: {input_data.context.get('industry', 'N/A')}
-            - Size: {input_data.context.get('company_size', 'N/A')}
-            - Goals: {json.dumps(input_data.context.get('goals', []))}
-            
-            Project context (if applicable):
-            - Name: {input_data.context.get('project_name', 'N/A')}
-            - Budget: {input_data.context.get('budget', 'N/A')}
-            - Timeline: {input_data.context.get('timeline', 'N/A')}
-            - Resources: {json.dumps(input_data.context.get('resources', []))}
-            
-            Provide a comprehensive validation with scoring.
-            """,
-            agent=self.agents['idea_validator'],
-            expected_output=self.tasks['validate_idea']['expected_output']
-        )
-        
-        crew = self.create_crew(
-            crew_name='idea_assistant_crew',
-            agents=[self.agents['idea_validator']],
-            tasks=[validate_task]
-        )
-        
-        result = crew.kickoff()
+        validate_task = self._validate_task(input_data.context, refined_idea=input_data.refined_idea)
+        output = self.run_tasks('idea_assistant_crew', [validate_task])[0].raw
         
         # Extract validation score and reasons
-        validation_data = self._parse_validation_result(result.raw)
+        validation_data = self._parse_validation_result(output)
         
         return CrewOutput(
             success=True,
             result={
                 'task': 'validate_idea',
-                'output': result.raw,
+                'output': output,
                 'validation_score': validation_data['score'],
                 'validation_reasons': validation_data['reasons']
             },
@@ -199,41 +227,21 @@ class IdeaAssistantCrew(BaseCrew):
         """
         logger.info("Generating tasks from validated idea...")
         
-        generate_task = Task(
-            description=f"""
-            Convert this validated idea into actionable tasks:
-            {input_data.validated_idea}
-            
-            Validation score: {input_data.validation_score}
-            
-            Project constraints:
-            - Timeline: {input_data.project_context.get('timeline', 'Flexible')}
-            - Budget: {input_data.project_context.get('budget', 'To be determined')}
-            - Team size: {input_data.project_context.get('team_size', 'Unknown')}
-            - Existing tasks: {len(input_data.project_context.get('existing_tasks', []))}
-            
-            Create a comprehensive task breakdown with all required details.
-            """,
-            agent=self.agents['task_generator'],
-            expected_output=self.tasks['generate_tasks']['expected_output']
+        generate_task = self._generate_task(
+            input_data.project_context,
+            validated_idea=input_data.validated_idea,
+            validation_score=input_data.validation_score
         )
-        
-        crew = self.create_crew(
-            crew_name='idea_assistant_crew',
-            agents=[self.agents['task_generator']],
-            tasks=[generate_task]
-        )
-        
-        result = crew.kickoff()
+        output = self.run_tasks('idea_assistant_crew', [generate_task])[0].raw
         
         # Parse tasks from the result
-        tasks = self._parse_generated_tasks(result.raw)
+        tasks = self._parse_generated_tasks(output)
         
         return CrewOutput(
             success=True,
             result={
                 'task': 'generate_tasks',
-                'output': result.raw,
+                'output': output,
                 'generated_tasks': tasks
             },
             message="Tasks generated successfully"
@@ -247,61 +255,72 @@ class IdeaAssistantCrew(BaseCrew):
     ) -> CrewOutput:
         """
         Process an idea through the complete workflow
+        
+        Validation and task generation both build on the refined idea. With
+        `process: parallel` in the crew config they run at the same time and
+        the generated tasks are discarded if the idea doesn't pass validation;
+        otherwise tasks are only generated once the idea has passed.
         """
         logger.info("Starting complete idea workflow...")
         
-        # Step 1: Refine the idea
-        refinement_input = IdeaRefinementInput(
+        refine_task = self._refine_task(IdeaRefinementInput(
             idea_description=idea_description,
             conversation_history=[],
             context=context
-        )
-        refinement_result = self.refine_idea(refinement_input)
-        refined_idea = refinement_result.tasks_output[0]['output']
+        ))
+        validate_task = None if skip_validation else self._validate_task(context, depends_on=[refine_task])
+        generate_task = self._generate_task(context, depends_on=[refine_task])
         
-        # Step 2: Validate the idea (unless skipped)
-        if not skip_validation:
-            validation_input = IdeaValidationInput(
-                refined_idea=refined_idea,
-                context=context
-            )
-            validation_result = self.validate_idea(validation_input)
-            validation_score = validation_result.tasks_output[0]['validation_score']
+        parallel = self.crews_config.get('idea_assistant_crew', {}).get('process') == 'parallel'
+        first_round = [refine_task] + ([validate_task] if validate_task else [])
+        if parallel or not validate_task:
+            first_round.append(generate_task)
+        self.run_tasks('idea_assistant_crew', first_round)
+        
+        refined_idea = refine_task.output.raw
+        outputs = [{'task': 'refine_idea', 'output': refined_idea}]
+        
+        if validate_task:
+            validation_data = self._parse_validation_result(validate_task.output.raw)
+            validation_score = validation_data['score']
+            outputs.append({
+                'task': 'validate_idea',
+                'output': validate_task.output.raw,
+                'validation_score': validation_score,
+                'validation_reasons': validation_data['reasons']
+            })
             
             # Only proceed to task generation if validation score is high enough
             if validation_score < 0.6:
                 return CrewOutput(
-                    raw=f"Idea validation failed with score {validation_score}",
-                    tasks_output=[
-                        refinement_result.tasks_output[0],
-                        validation_result.tasks_output[0]
-                    ]
+                    success=False,
+                    result={'refined_idea': refined_idea, 'validation_score': validation_score, 'tasks_output': outputs},
+                    message=f"Idea validation failed with score {validation_score}"
                 )
         else:
             validation_score = 0.8  # Default score if validation is skipped
-            validation_result = None
         
-        # Step 3: Generate tasks
-        task_input = TaskGenerationInput(
-            validated_idea=refined_idea,
-            validation_score=validation_score,
-            project_context=context
-        )
-        task_result = self.generate_tasks(task_input)
+        if generate_task.output is None:
+            # Sequential crews generate tasks only for ideas that passed validation
+            generate_task.context = [refine_task, validate_task]
+            self.run_tasks('idea_assistant_crew', [generate_task])
         
-        # Combine all results
-        all_outputs = [refinement_result.tasks_output[0]]
-        if validation_result:
-            all_outputs.append(validation_result.tasks_output[0])
-        all_outputs.append(task_result.tasks_output[0])
+        generated_tasks = self._parse_generated_tasks(generate_task.output.raw)
+        outputs.append({
+            'task': 'generate_tasks',
+            'output': generate_task.output.raw,
+            'generated_tasks': generated_tasks
+        })
         
         return CrewOutput(
-            raw=json.dumps({
+            success=True,
+            result={
                 'refined_idea': refined_idea,
                 'validation_score': validation_score,
-                'generated_tasks': task_result.tasks_output[0]['generated_tasks']
-            }),
-            tasks_output=all_outputs
+                'generated_tasks': generated_tasks,
+                'tasks_output': outputs
+            },
+            message="Idea workflow completed successfully"
         )
     
     def _format_conversation_history(self, history: List[Dict[str, str]]) -> str:
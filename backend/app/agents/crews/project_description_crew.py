@@ -1,6 +1,6 @@
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
-from langchain_openai import ChatOpenAI
+from app.core.llm_gateway import create_llm
 from crewai import Agent, Task, Crew
 from .base_crew import BaseCrew, CrewOutput
 # Tools removed - not needed for this agent
@@ -55,11 +55,7 @@ class ProjectDescriptionCrew(BaseCrew):
         if not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY not configured")
         
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini", 
-            temperature=0.3,
-            api_key=settings.OPENAI_API_KEY
-        )
+        self.llm = create_llm("gpt-4o-mini", temperature=0.3)
         
     def _create_agents(self) -> List[Agent]:
         """Create the project planning specialist agent"""
@@ -3,7 +3,7 @@
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 from crewai import Crew, Task, Agent
-from langchain_openai import ChatOpenAI
+from app.core.llm_gateway import create_llm
 from .base_crew import BaseCrew
 import logging
 import json
@@ -11,6 +11,10 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Token budgets for the variable parts of the prompts
+BREAKDOWN_INPUT_TOKENS = 2500
+SEQUENCING_INPUT_TOKENS = 1000
+
 
 class TaskSuggestionInput(BaseModel):
     goal_title: str
@@ -48,19 +52,14 @@ class TaskSuggestionCrew(BaseCrew):
         self.agents_config = {}
         self.tasks_config = {}
         self.crews_config = {}
-        self.cost_tracking_enabled = True
-        self.session_costs = []
+        self._init_cost_tracking()
         self._context = None
         self.storage_adapter = None
         
         if not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY not configured")
         
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.3,
-            api_key=settings.OPENAI_API_KEY
-        )
+        self.llm = create_llm("gpt-4o-mini", temperature=0.3)
         
         # Create task breakdown specialist agent
         self.task_breakdown_specialist = Agent(
@@ -91,6 +90,10 @@ class TaskSuggestionCrew(BaseCrew):
             allow_delegation=False,
             llm=self.llm
         )
+        
+        # Cost tracking and response caching for the directly built agents
+        for agent in (self.task_breakdown_specialist, self.execution_strategist, self.task_refiner):
+            self.instrument_agent(agent)
     
     def _extract_json_from_output(self, output: str) -> Dict[str, Any]:
         """Extract JSON from agent output"""
@@ -119,12 +122,20 @@ class TaskSuggestionCrew(BaseCrew):
     def suggest_tasks(self, input_data: TaskSuggestionInput) -> TaskSuggestionOutput:
         """Generate task suggestions based on a goal"""
         try:
+            model = self._get_llm_model(self.llm)
+            breakdown_inputs = self.fit_prompt_inputs(
+                "task_breakdown",
+                BREAKDOWN_INPUT_TOKENS,
+                model=model,
+                existing_tasks=input_data.existing_tasks or []
+            )
+            
             # Task 1: Analyze goal and break down into tasks
             existing_context = ""
             if input_data.existing_tasks:
                 existing_context = f"""
                 Existing tasks for this goal:
-                {json.dumps(input_data.existing_tasks, indent=2)}
+                {breakdown_inputs['existing_tasks']}
                 
                 Consider these when suggesting new tasks to avoid duplication and ensure comprehensive coverage.
                 """
@@ -174,11 +185,18 @@ class TaskSuggestionCrew(BaseCrew):
                 - Logically sequenced with clear dependencies
                 """
             
+            sequencing_inputs = self.fit_prompt_inputs(
+                "task_sequencing",
+                SEQUENCING_INPUT_TOKENS,
+                model=model,
+                feedback=feedback_context
+            )
+            
             sequencing_task = Task(
                 description=f"""
                 Based on the task breakdown, optimize the sequencing and priorities:
                 
-                {feedback_context}
+                {sequencing_inputs['feedback']}
                 
                 Consider:
                 1. Task dependencies and prerequisites
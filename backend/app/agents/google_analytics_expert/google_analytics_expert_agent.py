@@ -4,7 +4,7 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 
 from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
+from app.core.llm_gateway import create_llm
 
 from app.agents.crews.base_crew import BaseCrew
 from app.tools.mobile_analytics.google_analytics_tool import GoogleAnalyticsTool
@@ -39,7 +39,7 @@ class GoogleAnalyticsExpertAgent(BaseCrew):
     def create_agents(self) -> List[Agent]:
         """Create specialized agents for Google Analytics analysis."""
         
-        llm = ChatOpenAI(model="gpt-4", temperature=0.1)
+        llm = create_llm("gpt-4", temperature=0.1)
         
         # User Behavior Analyst
         behavior_analyst = Agent(
@@ -1,5 +1,6 @@
 from crewai import Agent
 from textwrap import dedent
+from app.core.llm_gateway import create_llm
 
 class ImageCreatorAgent:
     def create_agent(self):
@@ -15,7 +16,8 @@ class ImageCreatorAgent:
             """),
             verbose=True,
             allow_delegation=False,
-            max_iter=3
+            max_iter=3,
+            llm=create_llm()
         )
     
     def get_tasks(self):
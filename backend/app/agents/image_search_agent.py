@@ -6,7 +6,7 @@ from datetime import datetime
 import hashlib
 from app.agents.crews.base_crew import BaseCrew
 from crewai import Agent, Task, Crew
-from crewai.llm import LLM
+from app.core.llm_gateway import create_llm
 from app.core.storage import StorageFactory
 import asyncio
 
@@ -17,7 +17,7 @@ class ImageSearchAgent(BaseCrew):
         super().__init__()
         self.openai_api_key = openai_api_key
         self.pexels_api_key = pexels_api_key or os.getenv('PEXELS_API_KEY')
-        self.llm = LLM(model="gpt-4o-mini", api_key=openai_api_key)
+        self.llm = create_llm("gpt-4o-mini", api_key=openai_api_key)
         
         # Initialize storage adapter for caching
         self.storage = StorageFactory.get_adapter()
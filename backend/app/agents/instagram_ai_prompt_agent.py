@@ -1,5 +1,5 @@
 from crewai import Agent, Task, Crew
-from crewai.llm import LLM
+from app.core.llm_gateway import create_llm
 import os
 import json
 from typing import Dict, Any, List
@@ -19,7 +19,7 @@ class InstagramAIPromptAgent(BaseCrew):
     def __init__(self, openai_api_key: str):
         super().__init__()
         self.openai_api_key = openai_api_key
-        self.llm = LLM(model="gpt-4o-mini", api_key=openai_api_key)
+        self.llm = create_llm("gpt-4o-mini", api_key=openai_api_key)
         
         # Initialize image generator
         self.image_generator = ImageGenerator(openai_api_key)
@@ -1,5 +1,5 @@
 from crewai import Agent, Task, Crew
-from crewai.llm import LLM
+from app.core.llm_gateway import create_llm
 import os
 import json
 import requests
@@ -7,9 +7,12 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 import hashlib
 import re
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 from app.agents.crews.base_crew import BaseCrew
 from app.core.storage import StorageFactory
+from app.core.config import settings
 import asyncio
 
 class InstagramAnalyzerAgent(BaseCrew):
@@ -18,7 +21,7 @@ class InstagramAnalyzerAgent(BaseCrew):
     def __init__(self, openai_api_key: str):
         super().__init__()
         self.openai_api_key = openai_api_key
-        self.llm = LLM(model="gpt-4o-mini", api_key=openai_api_key)
+        self.llm = create_llm("gpt-4o-mini", api_key=openai_api_key)
         
         # Initialize storage adapter
         self.storage = StorageFactory.get_adapter()
@@ -65,8 +68,14 @@ class InstagramAnalyzerAgent(BaseCrew):
             print(f"Error saving analysis to storage: {e}")
             return ""
     
-    async def _get_analysis_from_storage(self, account_username: str) -> Optional[Dict[str, Any]]:
-        """Get analysis from Supabase storage"""
+    async def _get_analysis_from_storage(self, account_username: str,
+                                         max_age_hours: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Get the latest analysis of an account from Supabase storage
+        
+        Args:
+            account_username: Account as stored, e.g. "@name"
+            max_age_hours: Ignore analyses older than this, None accepts any age
+        """
         try:
             # Query by account username
             analyses = await self.storage.list(
@@ -77,9 +86,18 @@ class InstagramAnalyzerAgent(BaseCrew):
                 limit=1
             )
             
-            if analyses and len(analyses) > 0:
-                return analyses[0]
-            return None
+            if not analyses:
+                return None
+            
+            if max_age_hours is not None:
+                analyzed_at = analyses[0].get("analyzed_at")
+                try:
+                    age = datetime.now() - datetime.fromisoformat(str(analyzed_at)).replace(tzinfo=None)
+                except ValueError:
+                    return None
+                if age.total_seconds() > max_age_hours * 3600:
+                    return None
+            return analyses[0]
         except Exception as e:
             print(f"Error getting analysis from storage: {e}")
             return None
@@ -161,9 +179,21 @@ class InstagramAnalyzerAgent(BaseCrew):
         return url_or_username.strip()
     
     def analyze_instagram_account(self, account_url_or_username: str, 
-                                analysis_focus: str = "comprehensive") -> Dict[str, Any]:
-        """Analyze an Instagram account for success factors"""
+                                analysis_focus: str = "comprehensive",
+                                max_age_hours: Optional[float] = None,
+                                analyzer_agent: Optional[Agent] = None) -> Dict[str, Any]:
+        """Analyze an Instagram account for success factors
+        
+        Args:
+            account_url_or_username: Account URL, @handle or username
+            analysis_focus: Focus of the analysis
+            max_age_hours: Only reuse stored analyses younger than this
+            analyzer_agent: Agent to run the analysis with; concurrent analyses
+                each need their own, crews can't share an agent
+        """
         try:
+            analyzer_agent = analyzer_agent or self.analyzer_agent
+            
             # Normalize the account identifier
             username = self._normalize_instagram_url(account_url_or_username)
             
@@ -172,7 +202,7 @@ class InstagramAnalyzerAgent(BaseCrew):
             asyncio.set_event_loop(loop)
             try:
                 existing = loop.run_until_complete(
-                    self._get_analysis_from_storage(f"@{username}")
+                    self._get_analysis_from_storage(f"@{username}", max_age_hours)
                 )
             finally:
                 loop.close()
@@ -298,12 +328,12 @@ class InstagramAnalyzerAgent(BaseCrew):
                 }}
                 """,
                 expected_output="JSON formatted comprehensive Instagram account analysis",
-                agent=self.analyzer_agent
+                agent=analyzer_agent
             )
             
             # Create and execute crew
             crew = Crew(
-                agents=[self.analyzer_agent],
+                agents=[analyzer_agent],
                 tasks=[task],
                 verbose=True
             )
@@ -598,17 +628,86 @@ class InstagramAnalyzerAgent(BaseCrew):
                 "message": "Error generating strategy from analysis"
             }
     
+    def _summarize_analysis(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Compact view of an account analysis for the comparative prompt
+        
+        Keeps the fields the comparison works with, at most a few entries per
+        list, instead of the full analysis JSON.
+        """
+        def pick(section: str, *keys: str) -> Dict[str, Any]:
+            section_data = analysis.get(section)
+            if not isinstance(section_data, dict):
+                return {}
+            values = {}
+            for key in keys:
+                value = section_data.get(key)
+                if isinstance(value, list):
+                    value = value[:4]
+                elif isinstance(value, str):
+                    value = value[:160]
+                if value not in (None, "", []):
+                    values[key] = value
+            return values
+        
+        summary = {
+            "account": analysis.get("account_username", "unknown"),
+            "content": pick("content_analysis", "primary_content_types", "content_themes", "recurring_formats"),
+            "engagement": pick("engagement_strategies", "engagement_rate_estimate", "primary_cta_types",
+                               "interaction_methods"),
+            "posting": pick("posting_patterns", "frequency", "consistency"),
+            "hashtags": pick("hashtag_strategy", "average_hashtag_count", "hashtag_mix"),
+            "branding": pick("visual_branding", "design_consistency", "color_scheme"),
+            "tonality": pick("tonality", "writing_style", "caption_length"),
+            "success_factors": pick("success_factors", "key_differentiators", "engagement_drivers"),
+            "assessment": pick("overall_assessment", "success_level", "competitive_advantages")
+        }
+        if "raw_analysis" in analysis:
+            # The analysis couldn't be parsed, pass a short excerpt instead
+            summary["notes"] = str(analysis["raw_analysis"])[:600]
+        return {key: value for key, value in summary.items() if value}
+    
     def analyze_multiple_accounts(self, account_list: List[str], 
-                                analysis_focus: str = "comprehensive") -> Dict[str, Any]:
-        """Analyze multiple Instagram accounts and create comparative insights"""
+                                analysis_focus: str = "comprehensive",
+                                max_concurrency: Optional[int] = None) -> Dict[str, Any]:
+        """Analyze multiple Instagram accounts and create comparative insights
+        
+        Accounts are analyzed concurrently, up to max_concurrency at a time
+        (at most INSTAGRAM_ANALYSIS_CONCURRENCY, the default). Stored analyses younger than
+        INSTAGRAM_ANALYSIS_MAX_AGE_HOURS are reused instead of running the crew
+        again, and the comparison works from compact per-account summaries.
+        """
         try:
+            # Each account once, in the order given
+            accounts = list(dict.fromkeys(
+                self._normalize_instagram_url(account) for account in account_list if account.strip()
+            ))
+            limit = settings.INSTAGRAM_ANALYSIS_CONCURRENCY
+            max_concurrency = max(1, min(max_concurrency or limit, limit))
+            
+            def analyze(account: str) -> Dict[str, Any]:
+                return self.analyze_instagram_account(
+                    account,
+                    analysis_focus,
+                    max_age_hours=settings.INSTAGRAM_ANALYSIS_MAX_AGE_HOURS,
+                    analyzer_agent=self._create_analyzer_agent()
+                )
+            
+            # Copy the context per call so costs stay attributed to the request
+            with ThreadPoolExecutor(max_workers=min(max_concurrency, len(accounts) or 1),
+                                    thread_name_prefix="instagram-analysis") as executor:
+                futures = [
+                    executor.submit(contextvars.copy_context().run, analyze, account)
+                    for account in accounts
+                ]
+                results = [future.result() for future in futures]
+            
             analyses = []
             failed_analyses = []
-            
-            for account in account_list:
-                result = self.analyze_instagram_account(account, analysis_focus)
+            reused_count = 0
+            for account, result in zip(accounts, results):
                 if result["success"]:
                     analyses.append(result["analysis"])
+                    reused_count += result.get("source") == "existing"
                 else:
                     failed_analyses.append({"account": account, "error": result["error"]})
             
@@ -619,13 +718,15 @@ class InstagramAnalyzerAgent(BaseCrew):
                     "failed_analyses": failed_analyses
                 }
             
+            summaries = [self._summarize_analysis(analysis) for analysis in analyses]
+            
             # Create comparative analysis task
             task = Task(
                 description=f"""
                 Führe eine vergleichende Analyse von {len(analyses)} erfolgreichen Instagram-Accounts durch.
                 
-                ACCOUNT-ANALYSEN:
-                {json.dumps(analyses, indent=2)}
+                ACCOUNT-ZUSAMMENFASSUNGEN:
+                {json.dumps(summaries, ensure_ascii=False, separators=(",", ":"))}
                 
                 VERGLEICHENDE ANALYSE:
                 
@@ -719,6 +820,7 @@ class InstagramAnalyzerAgent(BaseCrew):
             comparative_data["created_at"] = datetime.now().isoformat()
             comparative_data["analysis_count"] = len(analyses)
             comparative_data["failed_count"] = len(failed_analyses)
+            comparative_data["reused_count"] = reused_count
             
             return {
                 "success": True,
@@ -1,5 +1,6 @@
 from crewai import Agent, Task, Crew
-from crewai.llm import LLM
+from app.core.llm_gateway import create_llm
+from app.core.media_store import get_media_store
 import os
 import json
 import requests
@@ -17,14 +18,20 @@ class InstagramPosterAgent(BaseCrew):
         self.openai_api_key = openai_api_key
         self.instagram_access_token = instagram_access_token or os.getenv("INSTAGRAM_ACCESS_TOKEN")
         self.instagram_business_account_id = instagram_business_account_id or os.getenv("INSTAGRAM_BUSINESS_ACCOUNT_ID")
-        self.llm = LLM(model="gpt-4o-mini", api_key=openai_api_key)
+        self.llm = create_llm("gpt-4o-mini", api_key=openai_api_key)
         
         # Instagram Graph API base URL
         self.graph_api_base = "https://graph.facebook.com/v18.0"
         
         # Storage for posted content
-        self.storage_file = os.path.join(os.path.dirname(__file__), "../../static/instagram_posts_history.json")
-        self.posts_history = self._load_posts_history()
+        self.collection = "instagram_posts_history"
+        self.media_store = get_media_store()
+        self.media_store.migrate_json_file(
+            self.collection,
+            os.path.join(os.path.dirname(__file__), "../../static/instagram_posts_history.json"),
+            list_key="posts",
+            extra_keys=("by_date", "failed_posts")
+        )
         
         # Create the Instagram posting agent
         self.poster_agent = self._create_poster_agent()
@@ -36,25 +43,6 @@ class InstagramPosterAgent(BaseCrew):
         # Posting status tracking
         self.posting_status = {}
     
-    def _load_posts_history(self) -> Dict[str, Any]:
-        """Load posting history"""
-        try:
-            if os.path.exists(self.storage_file):
-                with open(self.storage_file, 'r') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"Error loading posts history: {e}")
-        return {"posts": [], "by_date": {}, "failed_posts": []}
-    
-    def _save_posts_history(self):
-        """Save posting history to storage"""
-        try:
-            os.makedirs(os.path.dirname(self.storage_file), exist_ok=True)
-            with open(self.storage_file, 'w') as f:
-                json.dump(self.posts_history, f, indent=2)
-        except Exception as e:
-            print(f"Error saving posts history: {e}")
-    
     def _create_poster_agent(self) -> Agent:
         """Create the Instagram posting agent"""
         return Agent(
@@ -320,8 +308,7 @@ class InstagramPosterAgent(BaseCrew):
                 "status": "published"
             }
             
-            self.posts_history["posts"].append(post_record)
-            self._save_posts_history()
+            self.media_store.put(self.collection, post_record)
             
             return {
                 "success": True,
@@ -401,8 +388,7 @@ class InstagramPosterAgent(BaseCrew):
                 "status": "published"
             }
             
-            self.posts_history["posts"].append(story_record)
-            self._save_posts_history()
+            self.media_store.put(self.collection, story_record)
             
             return {
                 "success": True,
@@ -544,18 +530,13 @@ class InstagramPosterAgent(BaseCrew):
     def get_posting_history(self, limit: int = 50) -> Dict[str, Any]:
         """Get posting history"""
         try:
-            posts = self.posts_history.get("posts", [])
-            
-            # Sort by posted_at descending
-            sorted_posts = sorted(posts, key=lambda x: x.get("posted_at", ""), reverse=True)
-            
-            # Limit results
-            limited_posts = sorted_posts[:limit]
+            # Newest first
+            limited_posts = self.media_store.list(self.collection, limit=limit, newest_first=True)
             
             return {
                 "success": True,
                 "posts": limited_posts,
-                "total_count": len(posts),
+                "total_count": self.media_store.count(self.collection),
                 "returned_count": len(limited_posts)
             }
             
@@ -582,7 +563,7 @@ class InstagramPosterAgent(BaseCrew):
                 "last_post_time": datetime.fromtimestamp(self.last_post_time).isoformat() if self.last_post_time > 0 else None,
                 "api_credentials_valid": validation_result["success"],
                 "account_info": validation_result.get("account_info"),
-                "total_posts": len(self.posts_history.get("posts", [])),
+                "total_posts": self.media_store.count(self.collection),
                 "rate_limit_interval": self.min_post_interval
             }
             
@@ -4,7 +4,7 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 
 from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
+from app.core.llm_gateway import create_llm
 
 from app.agents.crews.base_crew import BaseCrew
 from app.tools.mobile_analytics.meta_ads_tool import MetaAdsTool
@@ -38,7 +38,7 @@ class MetaAdsAnalystAgent(BaseCrew):
     def create_agents(self) -> List[Agent]:
         """Create specialized agents for Meta Ads analysis."""
         
-        llm = ChatOpenAI(model="gpt-4", temperature=0.1)
+        llm = create_llm("gpt-4", temperature=0.1)
         
         # Campaign Performance Analyst
         campaign_analyst = Agent(
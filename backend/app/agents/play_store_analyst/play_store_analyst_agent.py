@@ -7,7 +7,8 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 
 from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
+from app.core.cost_tracker import collect_costs
+from app.core.llm_gateway import create_llm
 
 from app.agents.crews.base_crew import BaseCrew
 from app.tools.mobile_analytics.play_store_api_tool import PlayStoreAPITool
@@ -43,7 +44,7 @@ class PlayStoreAnalystAgent(BaseCrew):
     def create_agents(self) -> List[Agent]:
         """Create specialized agents for Play Store analysis."""
         
-        llm = ChatOpenAI(model="gpt-4", temperature=0.1)
+        llm = create_llm("gpt-4", temperature=0.1)
         
         # Listing Analyzer Agent
         listing_analyzer = Agent(
@@ -167,14 +168,16 @@ class PlayStoreAnalystAgent(BaseCrew):
                 verbose=True
             )
             
-            result = crew.kickoff()
+            with collect_costs() as run_costs:
+                result = crew.kickoff()
             
             # Track costs for this analysis
             cost_info = self.track_crew_costs(
                 crew_result=result,
                 agent_name="PlayStoreAnalystAgent",
                 model="gpt-4",
-                task_description=f"Play Store analysis for {app_info.get('package_name', 'unknown app')}"
+                task_description=f"Play Store analysis for {app_info.get('package_name', 'unknown app')}",
+                run_costs=run_costs
             )
             
             # Parse and structure the results
@@ -1,13 +1,19 @@
 import os
-import json
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from datetime import datetime
+from concurrent.futures import as_completed
 import hashlib
-from PIL import Image, ImageDraw, ImageFont, ImageFilter
+from PIL import Image, ImageFont
 from app.agents.crews.base_crew import BaseCrew
 from crewai import Agent, Task, Crew
-from crewai.llm import LLM
+from app.core.llm_gateway import create_llm
 from app.tools.video_template_tools import VideoTemplateProcessor
+from app.tools.post_renderer import PostRenderer, fit_cover, font_size, get_render_pool, render_post_file
+from app.tools.text_layout import load_font, wrap_text
+from app.core.config import settings
+from app.core.media_cache import get_media_cache, media_key
+from app.core.media_store import get_media_store
+from app.core.streaming import emit_event
 from app.core.storage import StorageFactory
 import requests
 import tempfile
@@ -25,14 +31,21 @@ class PostCompositionAgent(BaseCrew):
         super().__init__(storage_adapter=storage_adapter)
         
         self.openai_api_key = openai_api_key
-        self.llm = LLM(model="gpt-4o-mini", api_key=openai_api_key)
+        self.llm = create_llm("gpt-4o-mini", api_key=openai_api_key)
         
         # Collection name for composed posts
         self.collection = "composed_posts"
         
-        # Legacy storage for backward compatibility
-        self.storage_file = os.path.join(os.path.dirname(__file__), "../../static/composed_posts_storage.json")
-        self.posts_storage = self._load_posts_storage()
+        # Local metadata of composed posts, indexed by composition hash
+        self.media_store = get_media_store()
+        self.media_store.migrate_json_file(
+            self.collection,
+            os.path.join(os.path.dirname(__file__), "../../static/composed_posts_storage.json"),
+            list_key="posts"
+        )
+        
+        # Rendered files shared with the other workers, by content
+        self.media_cache = get_media_cache()
         
         # Output directory for composed images
         self.output_dir = os.path.join(os.path.dirname(__file__), "../../static/composed")
@@ -40,6 +53,7 @@ class PostCompositionAgent(BaseCrew):
         
         # Initialize video template processor for advanced templates
         self.video_processor = VideoTemplateProcessor()
+        self.preview_dir = os.path.join(self.output_dir, "previews")
         
         # Create the post composition agent
         self.composer_agent = self.create_agent("post_composition_agent", llm=self.llm)
@@ -55,6 +69,9 @@ class PostCompositionAgent(BaseCrew):
             "Umsicht": "#9C27B0"       # Purple
         }
         
+        # Picture template renderer, caches fonts and period overlays across posts
+        self.renderer = PostRenderer(self.period_colors)
+        
         # Instagram dimensions
         self.story_width = 1080
         self.story_height = 1920
@@ -73,36 +90,24 @@ class PostCompositionAgent(BaseCrew):
         
         return loop.run_until_complete(coro)
         
-    def _load_posts_storage(self) -> Dict[str, Any]:
-        """Load previously composed posts"""
-        try:
-            if os.path.exists(self.storage_file):
-                with open(self.storage_file, 'r') as f:
-                    data = json.load(f)
-                    # If the data has the old visual_posts_storage.json format, convert it
-                    if "posts" in data and "by_period" in data:
-                        return {
-                            "posts": data["posts"],
-                            "by_hash": data.get("by_period", {})
-                        }
-                    return data
-        except Exception as e:
-            print(f"Error loading posts storage: {e}")
-        return {"posts": [], "by_hash": {}}
-    
-    def _save_posts_storage(self):
-        """Save composed posts to storage"""
-        try:
-            os.makedirs(os.path.dirname(self.storage_file), exist_ok=True)
-            with open(self.storage_file, 'w') as f:
-                json.dump(self.posts_storage, f, indent=2)
-        except Exception as e:
-            print(f"Error saving posts storage: {e}")
+    def _generate_composition_hash(self, background_path: str, text: str, period: str, template_name: str,
+                                   post_format: str = "story", custom_options: Optional[Dict[str, Any]] = None) -> str:
+        """Generate a hash for the composition parameters, format and options included"""
+        return media_key("composition", {
+            "background_path": background_path,
+            "text": text,
+            "period": period,
+            "template_name": template_name,
+            "post_format": post_format,
+            "custom_options": custom_options or {}
+        })
     
-    def _generate_composition_hash(self, background_path: str, text: str, period: str, template_name: str) -> str:
-        """Generate a hash for the composition parameters"""
-        composition_key = f"{background_path}_{text}_{period}_{template_name}"
-        return hashlib.md5(composition_key.encode()).hexdigest()
+    def _existing_post(self, composition_hash: str) -> Optional[Dict[str, Any]]:
+        """Previously composed post with this hash whose file still exists"""
+        existing_post = self.media_store.get(self.collection, composition_hash)
+        if existing_post and os.path.exists(existing_post["file_path"]):
+            return existing_post
+        return None
     
     def compose_post(self, background_path: str, text: str, period: str, 
                     template_name: str = "default", post_format: str = "story", 
@@ -110,17 +115,18 @@ class PostCompositionAgent(BaseCrew):
         """Compose a visual post using a template"""
         try:
             # Check if composition already exists
-            composition_hash = self._generate_composition_hash(background_path, text, period, template_name)
+            composition_hash = self._generate_composition_hash(
+                background_path, text, period, template_name, post_format, custom_options
+            )
             
-            if not force_new and composition_hash in self.posts_storage.get("by_hash", {}):
-                existing_post = self.posts_storage["by_hash"][composition_hash]
-                if os.path.exists(existing_post["file_path"]):
-                    return {
-                        "success": True,
-                        "post": existing_post,
-                        "source": "existing",
-                        "message": "Bestehende Komposition abgerufen"
-                    }
+            existing_post = None if force_new else self._existing_post(composition_hash)
+            if existing_post:
+                return {
+                    "success": True,
+                    "post": existing_post,
+                    "source": "existing",
+                    "message": "Bestehende Komposition abgerufen"
+                }
             
             # Validate background image exists
             if not os.path.exists(background_path):
@@ -143,43 +149,10 @@ class PostCompositionAgent(BaseCrew):
             if not composition_result["success"]:
                 return composition_result
             
-            # Store composition information
-            post_info = {
-                "id": composition_hash,
-                "text": text,
-                "period": period,
-                "tags": [],  # Add empty tags array for compatibility
-                "template_name": template_name,
-                "post_format": post_format,
-                "period_color": self.period_colors.get(period, "#808080"),
-                "image_style": "composed",  # Mark as composed image
-                "background_path": background_path,
-                "file_path": composition_result["output_path"],
-                "file_url": composition_result["output_url"],
-                "background_image": {},  # Add empty background_image for compatibility
-                "custom_options": custom_options or {},
-                "created_at": datetime.now().isoformat(),
-                "dimensions": {
-                    "width": self.post_width if post_format == "post" else self.story_width,
-                    "height": self.post_height if post_format == "post" else self.story_height
-                }
-            }
-            
-            # Save to multi-tenant storage
-            if self.validate_context():
-                post_id = self._run_async(
-                    self.save_result(self.collection, post_info)
-                )
-            else:
-                post_id = self._run_async(
-                    self.storage_adapter.save(self.collection, post_info)
-                )
-            post_info["id"] = post_id
-            
-            # Also save to legacy storage for backward compatibility
-            self.posts_storage["posts"].append(post_info)
-            self.posts_storage["by_hash"][composition_hash] = post_info
-            self._save_posts_storage()
+            post_info = self._save_composed_post(
+                composition_hash, background_path, text, period, template_name,
+                post_format, custom_options, composition_result
+            )
             
             return {
                 "success": True,
@@ -195,466 +168,277 @@ class PostCompositionAgent(BaseCrew):
                 "message": "Fehler beim Komponieren des Posts"
             }
     
-    def _compose_with_template(self, background_path: str, text: str, period: str, 
-                              template_name: str, post_format: str, custom_options: Dict[str, Any]) -> Dict[str, Any]:
-        """Compose post using specified template"""
-        try:
-            # Check if this is a video template
-            if template_name.startswith("video:"):
-                return self._apply_video_template(
-                    background_path, text, period, template_name, post_format, custom_options
-                )
-            
-            # Load background image for PIL templates
-            background = Image.open(background_path)
-            
-            # Resize to appropriate Instagram format
-            if post_format == "post":
-                background = self._resize_to_post_format(background)
-                canvas_width, canvas_height = self.post_width, self.post_height
-            else:
-                background = self._resize_to_story_format(background)
-                canvas_width, canvas_height = self.story_width, self.story_height
-            
-            # Apply template based on template_name
-            if template_name == "minimal":
-                composed_image = self._apply_minimal_template(background, text, period, custom_options)
-            elif template_name == "dramatic":
-                composed_image = self._apply_dramatic_template(background, text, period, custom_options)
-            elif template_name == "gradient":
-                composed_image = self._apply_gradient_template(background, text, period, custom_options)
-            elif template_name == "quote_card":
-                composed_image = self._apply_quote_card_template(background, text, period, custom_options)
-            elif template_name == "period_branding":
-                composed_image = self._apply_period_branding_template(background, text, period, custom_options)
-            else:
-                # Default template
-                composed_image = self._apply_default_template(background, text, period, custom_options)
-            
-            # Convert to RGB for JPEG
-            composed_image = composed_image.convert('RGB')
-            
-            # Generate output filename
-            format_suffix = "post" if post_format == "post" else "story"
-            composition_hash = self._generate_composition_hash(background_path, text, period, template_name)
-            output_filename = f"{period.lower()}_{template_name}_{format_suffix}_{composition_hash[:8]}.jpg"
-            output_path = os.path.join(self.output_dir, output_filename)
-            
-            # Save final image
-            composed_image.save(output_path, 'JPEG', quality=95)
-            
-            # Create URL for frontend access
-            output_url = f"/static/composed/{output_filename}"
-            
-            return {
-                "success": True,
-                "output_path": output_path,
-                "output_url": output_url,
-                "filename": output_filename
-            }
-            
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "message": "Fehler beim Anwenden des Templates"
-            }
-    
-    def _apply_minimal_template(self, background: Image.Image, text: str, period: str, options: Dict[str, Any]) -> Image.Image:
-        """Apply minimal template with light overlay and simple text"""
-        canvas_width, canvas_height = background.size
-        
-        # Create overlay
-        overlay = Image.new('RGBA', (canvas_width, canvas_height), (0, 0, 0, 0))
-        
-        # Light color overlay
-        color_overlay = self._create_color_overlay(period, "minimal", canvas_width, canvas_height)
-        overlay = Image.alpha_composite(overlay, color_overlay)
-        
-        # Simple text overlay
-        text_overlay = self._create_text_overlay(text, period, "minimal", canvas_width, canvas_height, options)
-        overlay = Image.alpha_composite(overlay, text_overlay)
-        
-        # Combine with background
-        if background.mode != 'RGBA':
-            background = background.convert('RGBA')
-        
-        return Image.alpha_composite(background, overlay)
-    
-    def _apply_dramatic_template(self, background: Image.Image, text: str, period: str, options: Dict[str, Any]) -> Image.Image:
-        """Apply dramatic template with strong overlay and bold text"""
-        canvas_width, canvas_height = background.size
-        
-        # Create overlay
-        overlay = Image.new('RGBA', (canvas_width, canvas_height), (0, 0, 0, 0))
+    def compose_posts(self, jobs: List[Dict[str, Any]], force_new: bool = False) -> Dict[str, Any]:
+        """Compose a batch of posts, rendered in parallel
         
-        # Strong color overlay
-        color_overlay = self._create_color_overlay(period, "dramatic", canvas_width, canvas_height)
-        overlay = Image.alpha_composite(overlay, color_overlay)
+        Each job has the arguments of `compose_post` (background_path, text, period
+        and optionally template_name, post_format, custom_options). Every finished
+        post is reported as a `post_composed` event to streaming requests.
         
-        # Bold text overlay
-        text_overlay = self._create_text_overlay(text, period, "dramatic", canvas_width, canvas_height, options)
-        overlay = Image.alpha_composite(overlay, text_overlay)
+        Returns:
+            Dict[str, Any]: One result per job, in job order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+        for index, result in self.iter_compose_posts(jobs, force_new):
+            results[index] = result
+            emit_event("post_composed", index=index, result=result)
         
-        # Combine with background
-        if background.mode != 'RGBA':
-            background = background.convert('RGBA')
+        counts = {"generated": 0, "existing": 0, "failed": 0}
+        for result in results:
+            counts["failed" if not result["success"] else result["source"]] += 1
         
-        return Image.alpha_composite(background, overlay)
+        return {
+            "success": counts["failed"] < len(jobs) or not jobs,
+            "results": results,
+            **counts,
+            "message": f"{counts['generated']} Posts komponiert, {counts['existing']} wiederverwendet"
+        }
     
-    def _apply_gradient_template(self, background: Image.Image, text: str, period: str, options: Dict[str, Any]) -> Image.Image:
-        """Apply gradient template with gradient overlay"""
-        canvas_width, canvas_height = background.size
-        
-        # Create overlay
-        overlay = Image.new('RGBA', (canvas_width, canvas_height), (0, 0, 0, 0))
-        
-        # Gradient overlay
-        gradient_overlay = self._create_gradient_overlay(period, canvas_width, canvas_height)
-        overlay = Image.alpha_composite(overlay, gradient_overlay)
-        
-        # Text overlay
-        text_overlay = self._create_text_overlay(text, period, "gradient", canvas_width, canvas_height, options)
-        overlay = Image.alpha_composite(overlay, text_overlay)
-        
-        # Combine with background
-        if background.mode != 'RGBA':
-            background = background.convert('RGBA')
+    def iter_compose_posts(self, jobs: List[Dict[str, Any]], force_new: bool = False) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Compose a batch of posts and yield (job index, result) as each one finishes
+        
+        Jobs are deduplicated by composition hash before any rendering is
+        scheduled: posts that already exist are returned right away and
+        identical jobs in the batch are rendered once. Picture templates are
+        rendered in the shared process pool, video templates in this thread.
+        """
+        # Composition hash -> indexes of the jobs waiting for it
+        waiting: Dict[str, List[int]] = {}
+        pending: List[Tuple[str, Dict[str, Any]]] = []
+        
+        for index, job in enumerate(jobs):
+            job = {
+                "template_name": "default",
+                "post_format": "story",
+                **{key: value for key, value in job.items() if value is not None},
+                "custom_options": job.get("custom_options") or {}
+            }
+            composition_hash = self._generate_composition_hash(
+                job["background_path"], job["text"], job["period"], job["template_name"],
+                job["post_format"], job["custom_options"]
+            )
+            
+            existing_post = None if force_new else self._existing_post(composition_hash)
+            if existing_post:
+                yield index, {
+                    "success": True,
+                    "post": existing_post,
+                    "source": "existing",
+                    "message": "Bestehende Komposition abgerufen"
+                }
+            elif composition_hash in waiting:
+                waiting[composition_hash].append(index)
+            elif not os.path.exists(job["background_path"]):
+                yield index, {
+                    "success": False,
+                    "error": "Background image not found",
+                    "message": "Hintergrundbild nicht gefunden"
+                }
+            else:
+                waiting[composition_hash] = [index]
+                pending.append((composition_hash, job))
+        
+        picture_jobs = [(h, job) for h, job in pending if not job["template_name"].startswith("video:")]
+        video_jobs = [(h, job) for h, job in pending if job["template_name"].startswith("video:")]
+        
+        futures = {}
+        if len(picture_jobs) > 1:
+            pool = get_render_pool(settings.POST_RENDER_WORKERS)
+            for composition_hash, job in picture_jobs:
+                output_filename, output_path = self._composition_output(job)
+                cache_key = self._composition_cache_key(job)
+                if self.media_cache.fetch(cache_key, output_path):
+                    yield from self._finish_batch_job(
+                        composition_hash, job, self._composition_result(output_filename, output_path), waiting
+                    )
+                    continue
+                future = pool.submit(
+                    render_post_file, job["background_path"], output_path, job["template_name"],
+                    job["text"], job["period"], self._canvas_size(job["post_format"]),
+                    job["custom_options"], self.period_colors
+                )
+                futures[future] = (composition_hash, job, cache_key, output_filename, output_path)
+        else:
+            # A single post is not worth the round trip to a worker process
+            video_jobs = picture_jobs + video_jobs
         
-        return Image.alpha_composite(background, overlay)
+        for composition_hash, job in video_jobs:
+            composition_result = self._compose_with_template(
+                job["background_path"], job["text"], job["period"],
+                job["template_name"], job["post_format"], job["custom_options"]
+            )
+            yield from self._finish_batch_job(composition_hash, job, composition_result, waiting)
+        
+        for future in as_completed(futures):
+            composition_hash, job, cache_key, output_filename, output_path = futures[future]
+            try:
+                future.result()
+                self.media_cache.put(cache_key, output_path)
+                composition_result = self._composition_result(output_filename, output_path)
+            except Exception as e:
+                composition_result = {
+                    "success": False,
+                    "error": str(e),
+                    "message": "Fehler beim Anwenden des Templates"
+                }
+            yield from self._finish_batch_job(composition_hash, job, composition_result, waiting)
     
-    def _apply_quote_card_template(self, background: Image.Image, text: str, period: str, options: Dict[str, Any]) -> Image.Image:
-        """Apply quote card template with card background"""
-        canvas_width, canvas_height = background.size
-        
-        # Create overlay
-        overlay = Image.new('RGBA', (canvas_width, canvas_height), (0, 0, 0, 0))
-        
-        # Create card background
-        card_overlay = self._create_card_overlay(period, canvas_width, canvas_height)
-        overlay = Image.alpha_composite(overlay, card_overlay)
-        
-        # Quote text overlay
-        text_overlay = self._create_quote_text_overlay(text, period, canvas_width, canvas_height, options)
-        overlay = Image.alpha_composite(overlay, text_overlay)
-        
-        # Combine with background
-        if background.mode != 'RGBA':
-            background = background.convert('RGBA')
+    def _finish_batch_job(self, composition_hash: str, job: Dict[str, Any], composition_result: Dict[str, Any],
+                          waiting: Dict[str, List[int]]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Store a rendered batch job and yield its result for every job that asked for it"""
+        if composition_result["success"]:
+            try:
+                post_info = self._save_composed_post(
+                    composition_hash, job["background_path"], job["text"], job["period"],
+                    job["template_name"], job["post_format"], job["custom_options"], composition_result
+                )
+                result = {
+                    "success": True,
+                    "post": post_info,
+                    "source": "generated",
+                    "message": f"Post für {job['period']} komponiert"
+                }
+            except Exception as e:
+                result = {
+                    "success": False,
+                    "error": str(e),
+                    "message": "Fehler beim Komponieren des Posts"
+                }
+        else:
+            result = composition_result
         
-        return Image.alpha_composite(background, overlay)
+        first, *duplicates = waiting[composition_hash]
+        yield first, result
+        for index in duplicates:
+            yield index, {**result, "source": "existing"} if result["success"] else result
     
-    def _apply_period_branding_template(self, background: Image.Image, text: str, period: str, options: Dict[str, Any]) -> Image.Image:
-        """Apply period branding template with period-specific elements"""
-        canvas_width, canvas_height = background.size
-        
-        # Create overlay
-        overlay = Image.new('RGBA', (canvas_width, canvas_height), (0, 0, 0, 0))
-        
-        # Period branding overlay
-        branding_overlay = self._create_period_branding_overlay(period, canvas_width, canvas_height)
-        overlay = Image.alpha_composite(overlay, branding_overlay)
-        
-        # Branded text overlay
-        text_overlay = self._create_branded_text_overlay(text, period, canvas_width, canvas_height, options)
-        overlay = Image.alpha_composite(overlay, text_overlay)
-        
-        # Combine with background
-        if background.mode != 'RGBA':
-            background = background.convert('RGBA')
+    def _save_composed_post(self, composition_hash: str, background_path: str, text: str, period: str,
+                            template_name: str, post_format: str, custom_options: Optional[Dict[str, Any]],
+                            composition_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Store composition information of a rendered post"""
+        width, height = self._canvas_size(post_format)
+        post_info = {
+            "id": composition_hash,
+            "text": text,
+            "period": period,
+            "tags": [],  # Add empty tags array for compatibility
+            "template_name": template_name,
+            "post_format": post_format,
+            "period_color": self.period_colors.get(period, "#808080"),
+            "image_style": "composed",  # Mark as composed image
+            "background_path": background_path,
+            "file_path": composition_result["output_path"],
+            "file_url": composition_result["output_url"],
+            "background_image": {},  # Add empty background_image for compatibility
+            "custom_options": custom_options or {},
+            "created_at": datetime.now().isoformat(),
+            "dimensions": {
+                "width": width,
+                "height": height
+            }
+        }
         
-        return Image.alpha_composite(background, overlay)
-    
-    def _apply_default_template(self, background: Image.Image, text: str, period: str, options: Dict[str, Any]) -> Image.Image:
-        """Apply default template"""
-        return self._apply_minimal_template(background, text, period, options)
-    
-    def _create_color_overlay(self, period: str, style: str, width: int, height: int) -> Image.Image:
-        """Create color overlay based on period and style"""
-        overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        
-        # Get period color
-        period_color = self.period_colors.get(period, "#808080")
-        color_rgb = tuple(int(period_color[i:i+2], 16) for i in (1, 3, 5))
-        
-        # Define overlay styles
-        if style == "minimal":
-            overlay_color = color_rgb + (76,)  # 30% opacity
-        elif style == "dramatic":
-            overlay_color = color_rgb + (127,)  # 50% opacity
+        # Save to multi-tenant storage
+        if self.validate_context():
+            post_id = self._run_async(
+                self.save_result(self.collection, post_info)
+            )
         else:
-            overlay_color = color_rgb + (102,)  # 40% opacity
+            post_id = self._run_async(
+                self.storage_adapter.save(self.collection, post_info)
+            )
+        post_info["id"] = post_id
         
-        # Create solid color overlay
-        color_layer = Image.new('RGBA', (width, height), overlay_color)
-        return color_layer
-    
-    def _create_gradient_overlay(self, period: str, width: int, height: int) -> Image.Image:
-        """Create gradient overlay"""
-        overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
-        
-        # Get period color
-        period_color = self.period_colors.get(period, "#808080")
-        color_rgb = tuple(int(period_color[i:i+2], 16) for i in (1, 3, 5))
-        
-        # Create vertical gradient
-        for y in range(height):
-            # Stronger at top and bottom, lighter in middle
-            if y < height // 3:
-                alpha = int(127 * (1 - y / (height // 3)))
-            elif y > 2 * height // 3:
-                alpha = int(127 * (y - 2 * height // 3) / (height // 3))
-            else:
-                alpha = 51  # Light overlay in middle
-            
-            color = color_rgb + (alpha,)
-            draw.line([(0, y), (width, y)], fill=color)
+        # Also keep the local metadata for hash lookups
+        self.media_store.put(self.collection, post_info, key=composition_hash)
         
-        return overlay
+        return post_info
     
-    def _create_card_overlay(self, period: str, width: int, height: int) -> Image.Image:
-        """Create card background overlay"""
-        overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
-        
-        # Card dimensions
-        card_margin = 100
-        card_x = card_margin
-        card_y = height // 4
-        card_width = width - 2 * card_margin
-        card_height = height // 2
-        
-        # Draw card background
-        draw.rounded_rectangle(
-            [card_x, card_y, card_x + card_width, card_y + card_height],
-            radius=20,
-            fill=(255, 255, 255, 200)
-        )
-        
-        # Draw card border
-        period_color = self.period_colors.get(period, "#808080")
-        color_rgb = tuple(int(period_color[i:i+2], 16) for i in (1, 3, 5))
-        draw.rounded_rectangle(
-            [card_x, card_y, card_x + card_width, card_y + card_height],
-            radius=20,
-            outline=color_rgb + (255,),
-            width=5
-        )
-        
-        return overlay
+    def _canvas_size(self, post_format: str) -> Tuple[int, int]:
+        if post_format == "post":
+            return self.post_width, self.post_height
+        return self.story_width, self.story_height
     
-    def _create_period_branding_overlay(self, period: str, width: int, height: int) -> Image.Image:
-        """Create period-specific branding overlay"""
-        overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
-        
-        # Get period color
-        period_color = self.period_colors.get(period, "#808080")
-        color_rgb = tuple(int(period_color[i:i+2], 16) for i in (1, 3, 5))
-        
-        # Create branded header
-        header_height = 100
-        draw.rectangle([0, 0, width, header_height], fill=color_rgb + (200,))
-        
-        # Create branded footer
-        footer_height = 80
-        draw.rectangle([0, height - footer_height, width, height], fill=color_rgb + (150,))
-        
-        return overlay
+    def _composition_output(self, job: Dict[str, Any]) -> Tuple[str, str]:
+        """Output filename and path of a picture composition"""
+        format_suffix = "post" if job["post_format"] == "post" else "story"
+        composition_hash = self._generate_composition_hash(
+            job["background_path"], job["text"], job["period"], job["template_name"],
+            job["post_format"], job["custom_options"]
+        )
+        output_filename = f"{job['period'].lower()}_{job['template_name']}_{format_suffix}_{composition_hash[:8]}.jpg"
+        return output_filename, os.path.join(self.output_dir, output_filename)
     
-    def _create_text_overlay(self, text: str, period: str, style: str, width: int, height: int, options: Dict[str, Any]) -> Image.Image:
-        """Create text overlay"""
-        overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
-        
-        # Get font
-        font = self._get_font(style, width, height, len(text))
-        
-        # Calculate text positioning
-        margin = options.get("text_margin", 150)
-        text_lines = self._wrap_text(text, font, width - margin)
-        
-        # Calculate total text height
-        line_height = options.get("line_height", font.size + 10)
-        total_height = len(text_lines) * line_height
-        
-        # Center vertically
-        start_y = (height - total_height) // 2
-        
-        # Draw text with shadow
-        for i, line in enumerate(text_lines):
-            bbox = draw.textbbox((0, 0), line, font=font)
-            text_width = bbox[2] - bbox[0]
-            
-            x = (width - text_width) // 2
-            y = start_y + i * line_height
-            
-            # Draw shadow
-            shadow_offset = options.get("shadow_offset", 3)
-            draw.text((x + shadow_offset, y + shadow_offset), line, font=font, fill=(0, 0, 0, 128))
-            
-            # Draw main text
-            text_color = options.get("text_color", (255, 255, 255, 255))
-            draw.text((x, y), line, font=font, fill=text_color)
-        
-        return overlay
+    def _composition_cache_key(self, job: Dict[str, Any]) -> str:
+        """Media cache key of a picture composition"""
+        return media_key("composed_post", {
+            "template_name": job["template_name"],
+            "text": job["text"],
+            "period": job["period"],
+            "period_color": self.period_colors.get(job["period"]),
+            "size": list(self._canvas_size(job["post_format"])),
+            "custom_options": job.get("custom_options") or {}
+        }, files=[job["background_path"]])
     
-    def _create_quote_text_overlay(self, text: str, period: str, width: int, height: int, options: Dict[str, Any]) -> Image.Image:
-        """Create quote-style text overlay"""
-        overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
-        
-        # Get font
-        font = self._get_font("quote", width, height, len(text))
-        
-        # Add quote marks
-        quote_text = f'"{text}"'
-        
-        # Calculate text positioning
-        margin = 150
-        text_lines = self._wrap_text(quote_text, font, width - margin)
-        
-        # Calculate total text height
-        line_height = font.size + 15
-        total_height = len(text_lines) * line_height
-        
-        # Center vertically
-        start_y = (height - total_height) // 2
-        
-        # Draw text
-        for i, line in enumerate(text_lines):
-            bbox = draw.textbbox((0, 0), line, font=font)
-            text_width = bbox[2] - bbox[0]
-            
-            x = (width - text_width) // 2
-            y = start_y + i * line_height
-            
-            # Draw shadow
-            draw.text((x + 3, y + 3), line, font=font, fill=(0, 0, 0, 128))
-            
-            # Draw main text
-            draw.text((x, y), line, font=font, fill=(50, 50, 50, 255))
-        
-        return overlay
+    @staticmethod
+    def _composition_result(output_filename: str, output_path: str) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "output_path": output_path,
+            "output_url": f"/static/composed/{output_filename}",
+            "filename": output_filename
+        }
     
-    def _create_branded_text_overlay(self, text: str, period: str, width: int, height: int, options: Dict[str, Any]) -> Image.Image:
-        """Create branded text overlay with period name"""
-        overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
-        
-        # Get fonts
-        title_font = self._get_font("title", width, height, len(period))
-        text_font = self._get_font("text", width, height, len(text))
-        
-        # Draw period name in header
-        period_bbox = draw.textbbox((0, 0), period, font=title_font)
-        period_width = period_bbox[2] - period_bbox[0]
-        period_x = (width - period_width) // 2
-        period_y = 30
-        
-        draw.text((period_x, period_y), period, font=title_font, fill=(255, 255, 255, 255))
-        
-        # Draw main text
-        margin = 150
-        text_lines = self._wrap_text(text, text_font, width - margin)
-        
-        # Calculate text positioning
-        available_height = height - 200  # Account for header and footer
-        line_height = text_font.size + 10
-        total_height = len(text_lines) * line_height
-        start_y = 150 + (available_height - total_height) // 2
-        
-        for i, line in enumerate(text_lines):
-            bbox = draw.textbbox((0, 0), line, font=text_font)
-            text_width = bbox[2] - bbox[0]
+    def _compose_with_template(self, background_path: str, text: str, period: str, 
+                              template_name: str, post_format: str, custom_options: Dict[str, Any]) -> Dict[str, Any]:
+        """Compose post using specified template"""
+        try:
+            # Check if this is a video template
+            if template_name.startswith("video:"):
+                return self._apply_video_template(
+                    background_path, text, period, template_name, post_format, custom_options
+                )
             
-            x = (width - text_width) // 2
-            y = start_y + i * line_height
+            job = {
+                "background_path": background_path,
+                "text": text,
+                "period": period,
+                "template_name": template_name,
+                "post_format": post_format,
+                "custom_options": custom_options
+            }
+            output_filename, output_path = self._composition_output(job)
+            
+            cache_key = self._composition_cache_key(job)
+            if not self.media_cache.fetch(cache_key, output_path):
+                # Resize the background to the Instagram format, apply the template and save
+                render_post_file(
+                    background_path, output_path, template_name, text, period,
+                    self._canvas_size(post_format), custom_options, self.period_colors,
+                    renderer=self.renderer
+                )
+                self.media_cache.put(cache_key, output_path)
             
-            # Draw shadow
-            draw.text((x + 2, y + 2), line, font=text_font, fill=(0, 0, 0, 128))
+            return self._composition_result(output_filename, output_path)
             
-            # Draw main text
-            draw.text((x, y), line, font=text_font, fill=(255, 255, 255, 255))
-        
-        return overlay
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "message": "Fehler beim Anwenden des Templates"
+            }
     
     def _get_font(self, style: str, width: int, height: int, text_length: int) -> ImageFont.ImageFont:
         """Get appropriate font based on style and dimensions"""
-        # Determine base font size
-        if style == "title":
-            base_size = 80
-        elif style == "quote":
-            base_size = 60
-        else:
-            if text_length < 50:
-                base_size = 72 if height > 1500 else 64
-            elif text_length < 100:
-                base_size = 60 if height > 1500 else 52
-            else:
-                base_size = 48 if height > 1500 else 42
-        
-        # Try to load system fonts
-        font_paths = [
-            "/System/Library/Fonts/Helvetica.ttc",  # macOS
-            "/Windows/Fonts/arial.ttf",  # Windows
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",  # Linux
-        ]
-        
-        for font_path in font_paths:
-            if os.path.exists(font_path):
-                try:
-                    return ImageFont.truetype(font_path, base_size)
-                except:
-                    continue
-        
-        return ImageFont.load_default()
+        return load_font(font_size(style, height, text_length))
     
     def _wrap_text(self, text: str, font: ImageFont.ImageFont, max_width: int) -> List[str]:
         """Wrap text to fit within max width"""
-        words = text.split(' ')
-        lines = []
-        current_line = []
-        
-        for word in words:
-            test_line = ' '.join(current_line + [word])
-            bbox = font.getbbox(test_line)
-            test_width = bbox[2] - bbox[0]
-            
-            if test_width <= max_width:
-                current_line.append(word)
-            else:
-                if current_line:
-                    lines.append(' '.join(current_line))
-                    current_line = [word]
-                else:
-                    lines.append(word)
-        
-        if current_line:
-            lines.append(' '.join(current_line))
-        
-        return lines
+        return wrap_text(text, font, max_width)
     
     def _resize_to_story_format(self, image: Image.Image) -> Image.Image:
         """Resize image to Instagram Story format (1080x1920)"""
-        img_ratio = image.width / image.height
-        story_ratio = self.story_width / self.story_height
-        
-        if img_ratio > story_ratio:
-            new_height = self.story_height
-            new_width = int(new_height * img_ratio)
-            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            left = (new_width - self.story_width) // 2
-            image = image.crop((left, 0, left + self.story_width, self.story_height))
-        else:
-            new_width = self.story_width
-            new_height = int(new_width / img_ratio)
-            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            top = (new_height - self.story_height) // 2
-            image = image.crop((0, top, self.story_width, top + self.story_height))
-        
-        return image
+        return fit_cover(image, self.story_width, self.story_height)
     
     def _apply_video_template(self, background_path: str, text: str, period: str, 
                              template_name: str, post_format: str, custom_options: Dict[str, Any]) -> Dict[str, Any]:
@@ -662,44 +446,17 @@ class PostCompositionAgent(BaseCrew):
         try:
             # Extract template ID
             template_id = template_name.replace("video:", "")
-            
-            # Prepare replacements based on template and custom options
-            replacements = {
-                "background_color": custom_options.get("background_color", self.period_colors.get(period, "#000000")),
-                "text_main_text": custom_options.get("main_text", text),
-                "text_subtitle": custom_options.get("subtitle", f"7 Cycles - {period}"),
-                "text_period_name": period,
-                "text_period_description": custom_options.get("period_description", ""),
-                "color_primary_overlay": self.period_colors.get(period, "#808080"),
-                "color_period_color": self.period_colors.get(period, "#808080")
-            }
-            
-            # Add custom text replacements
-            if "text_replacements" in custom_options:
-                for key, value in custom_options["text_replacements"].items():
-                    replacements[f"text_{key}"] = value
-            
-            # Add custom color replacements
-            if "color_replacements" in custom_options:
-                for key, value in custom_options["color_replacements"].items():
-                    replacements[f"color_{key}"] = value
-            
-            # Add video replacements
-            if "video_replacements" in custom_options:
-                for key, value in custom_options["video_replacements"].items():
-                    replacements[f"video_{key}"] = value
+            replacements = self._video_template_replacements(text, period, custom_options)
             
             # Generate output filename
-            composition_hash = self._generate_composition_hash(background_path, text, period, template_name)
+            composition_hash = self._generate_composition_hash(
+                background_path, text, period, template_name, post_format, custom_options
+            )
             output_filename = f"{period.lower()}_video_{template_id}_{composition_hash[:8]}.mp4"
             output_path = os.path.join(self.output_dir, output_filename)
             
             # Create video from template
-            result = self.video_processor.create_video_from_template(
-                template_id,
-                replacements,
-                output_path
-            )
+            result = self._render_video_template(template_id, replacements, output_path)
             
             if not result["success"]:
                 return {
@@ -727,25 +484,88 @@ class PostCompositionAgent(BaseCrew):
                 "message": f"Fehler beim Anwenden des Video-Templates: {str(e)}"
             }
     
+    def _render_video_template(self, template_id: str, replacements: Dict[str, Any], output_path: str) -> Dict[str, Any]:
+        """Render a video template, or copy an identical earlier render from the media cache"""
+        template = self.video_processor.templates.get(template_id)
+        if not template:
+            return self.video_processor.create_video_from_template(template_id, replacements, output_path)
+        
+        cache_key = self.video_processor.media_key(template_id, replacements)
+        if self.media_cache.fetch(cache_key, output_path):
+            return {"success": True, "output_path": output_path, "template": template_id, "duration": template.duration}
+        
+        result = self.video_processor.create_video_from_template(template_id, replacements, output_path)
+        if result["success"]:
+            self.media_cache.put(cache_key, output_path)
+        return result
+    
+    def _video_template_replacements(self, text: str, period: str, custom_options: Dict[str, Any]) -> Dict[str, Any]:
+        """Template replacements of a composed video post"""
+        # Prepare replacements based on template and custom options
+        replacements = {
+            "background_color": custom_options.get("background_color", self.period_colors.get(period, "#000000")),
+            "text_main_text": custom_options.get("main_text", text),
+            "text_subtitle": custom_options.get("subtitle", f"7 Cycles - {period}"),
+            "text_period_name": period,
+            "text_period_description": custom_options.get("period_description", ""),
+            "color_primary_overlay": self.period_colors.get(period, "#808080"),
+            "color_period_color": self.period_colors.get(period, "#808080")
+        }
+        replacements.update(self._content_replacements(custom_options))
+        return replacements
+    
+    @staticmethod
+    def _content_replacements(content: Dict[str, Any]) -> Dict[str, Any]:
+        """Text, color and video replacements given as {"text_replacements": {zone: value}, ...}"""
+        replacements = {}
+        for kind in ("text", "color", "video"):
+            for key, value in (content.get(f"{kind}_replacements") or {}).items():
+                replacements[f"{kind}_{key}"] = value
+        return replacements
+    
+    def compose_video_preview(self, text: str, period: str, template_name: str,
+                              custom_options: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Quick low resolution preview of a video template post
+        
+        Nothing is stored as a post; the full video is created with `compose_post`.
+        """
+        replacements = self._video_template_replacements(text, period, custom_options or {})
+        return self._video_preview(template_name.replace("video:", ""), replacements)
+    
+    def create_video_reel_preview(self, template_id: str, content_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Quick low resolution preview of a reel
+        
+        Nothing is stored as a reel; the full video is created with `create_video_reel`.
+        """
+        return self._video_preview(template_id, self._reel_replacements(content_data))
+    
+    def _video_preview(self, template_id: str, replacements: Dict[str, Any]) -> Dict[str, Any]:
+        """Cached preview video and poster of a template with its URLs"""
+        result = self.video_processor.create_preview(template_id, replacements, self.preview_dir)
+        if not result["success"]:
+            return {
+                "success": False,
+                "error": result.get("error", "Unknown error"),
+                "message": f"Fehler beim Erstellen der Videovorschau: {result.get('error', 'Unknown error')}"
+            }
+        
+        return {
+            "success": True,
+            "preview": {
+                "id": result["preview_id"],
+                "template": template_id,
+                "video_url": f"/static/composed/previews/{os.path.basename(result['video_path'])}",
+                "poster_url": f"/static/composed/previews/{os.path.basename(result['poster_path'])}",
+                "duration": result["duration"],
+                "dimensions": result["dimensions"],
+                "fps": result["fps"]
+            },
+            "source": result["source"]
+        }
+    
     def _resize_to_post_format(self, image: Image.Image) -> Image.Image:
         """Resize image to Instagram Post format (4:5 ratio - 1080x1350)"""
-        img_ratio = image.width / image.height
-        post_ratio = self.post_width / self.post_height
-        
-        if img_ratio > post_ratio:
-            new_height = self.post_height
-            new_width = int(new_height * img_ratio)
-            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            left = (new_width - self.post_width) // 2
-            image = image.crop((left, 0, left + self.post_width, self.post_height))
-        else:
-            new_width = self.post_width
-            new_height = int(new_width / img_ratio)
-            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            top = (new_height - self.post_height) // 2
-            image = image.crop((0, top, self.post_width, top + self.post_height))
-        
-        return image
+        return fit_cover(image, self.post_width, self.post_height)
     
     def get_composed_posts(self, period: str = None, template: str = None) -> Dict[str, Any]:
         """Get all composed posts, optionally filtered by period or template"""
@@ -777,14 +597,9 @@ class PostCompositionAgent(BaseCrew):
                     )
                 )
             
-            # Also check legacy storage for backward compatibility
-            if not posts and self.posts_storage.get("posts"):
-                legacy_posts = self.posts_storage.get("posts", [])
-                if period:
-                    legacy_posts = [post for post in legacy_posts if post.get("period") == period]
-                if template:
-                    legacy_posts = [post for post in legacy_posts if post.get("template_name") == template]
-                posts.extend(legacy_posts)
+            # Also check the local metadata for backward compatibility
+            if not posts:
+                posts.extend(self.media_store.list(self.collection, filters=filters))
             
             return {
                 "success": True,
@@ -803,13 +618,7 @@ class PostCompositionAgent(BaseCrew):
     def delete_composed_post(self, post_id: str) -> Dict[str, Any]:
         """Delete a composed post"""
         try:
-            posts = self.posts_storage.get("posts", [])
-            post_to_delete = None
-            
-            for i, post in enumerate(posts):
-                if post["id"] == post_id:
-                    post_to_delete = posts.pop(i)
-                    break
+            post_to_delete = self.media_store.delete(self.collection, post_id)
             
             if not post_to_delete:
                 return {
@@ -818,17 +627,10 @@ class PostCompositionAgent(BaseCrew):
                     "message": "Post nicht gefunden"
                 }
             
-            # Remove from hash index
-            if post_id in self.posts_storage.get("by_hash", {}):
-                del self.posts_storage["by_hash"][post_id]
-            
             # Delete file
             if os.path.exists(post_to_delete["file_path"]):
                 os.remove(post_to_delete["file_path"])
             
-            # Save updated storage
-            self._save_posts_storage()
-            
             return {
                 "success": True,
                 "message": "Post erfolgreich gelöscht"
@@ -928,29 +730,7 @@ class PostCompositionAgent(BaseCrew):
     def create_video_reel(self, template_id: str, content_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a reel/video using a video template"""
         try:
-            # Prepare replacements
-            replacements = {}
-            
-            # Add text replacements
-            if "text_replacements" in content_data:
-                for key, value in content_data["text_replacements"].items():
-                    replacements[f"text_{key}"] = value
-            
-            # Add color replacements
-            if "color_replacements" in content_data:
-                for key, value in content_data["color_replacements"].items():
-                    replacements[f"color_{key}"] = value
-            
-            # Add video replacements
-            if "video_replacements" in content_data:
-                for key, value in content_data["video_replacements"].items():
-                    replacements[f"video_{key}"] = value
-            
-            # Add period information if provided
-            if "period" in content_data:
-                period = content_data["period"]
-                replacements["color_period_color"] = self.period_colors.get(period, "#808080")
-                replacements["text_period_name"] = period
+            replacements = self._reel_replacements(content_data)
             
             # Generate output filename
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -958,11 +738,7 @@ class PostCompositionAgent(BaseCrew):
             output_path = os.path.join(self.output_dir, output_filename)
             
             # Create video
-            result = self.video_processor.create_video_from_template(
-                template_id,
-                replacements,
-                output_path
-            )
+            result = self._render_video_template(template_id, replacements, output_path)
             
             if not result["success"]:
                 return {
@@ -986,8 +762,7 @@ class PostCompositionAgent(BaseCrew):
                 "content_data": content_data
             }
             
-            self.posts_storage["posts"].append(post_info)
-            self._save_posts_storage()
+            self.media_store.put(self.collection, post_info)
             
             return {
                 "success": True,
@@ -1000,4 +775,16 @@ class PostCompositionAgent(BaseCrew):
                 "success": False,
                 "error": str(e),
                 "message": f"Fehler beim Erstellen des Video-Reels: {str(e)}"
-            }
\ No newline at end of file
+            }
+    
+    def _reel_replacements(self, content_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Template replacements of a reel"""
+        replacements = self._content_replacements(content_data)
+        
+        # Add period information if provided
+        if "period" in content_data:
+            period = content_data["period"]
+            replacements["color_period_color"] = self.period_colors.get(period, "#808080")
+            replacements["text_period_name"] = period
+        
+        return replacements
@@ -1,12 +1,16 @@
-from crewai.llm import LLM
+from app.core.llm_gateway import create_llm
 from langchain_community.vectorstores import FAISS
 from typing import List, Dict, Any, Optional
 from app.agents.crews.base_crew import BaseCrew
 from app.services.knowledge_base_manager import knowledge_base_manager
 from app.services.knowledge_base_service import KnowledgeBaseService
+from app.services.qa_answer_cache import qa_answer_cache
+from app.core.config import settings
+from app.core.streaming import emit_event
 from app.core.storage import StorageFactory
 import asyncio
 from datetime import datetime
+import hashlib
 import logging
 import uuid
 
@@ -23,7 +27,7 @@ class QAAgent(BaseCrew):
         # Use shared embeddings and vector store as default
         self.embeddings = knowledge_base_manager.get_embeddings()
         self.vector_store = knowledge_base_manager.get_vector_store()
-        self.llm = LLM(model="gpt-4o-mini", api_key=openai_api_key)
+        self.llm = create_llm("gpt-4o-mini", api_key=openai_api_key, priority="interactive")
 
         # Knowledge base service for project-specific KBs
         self.kb_service = KnowledgeBaseService()
@@ -60,8 +64,88 @@ class QAAgent(BaseCrew):
             logger.error(f"Fehler beim Abrufen des Kontexts: {e}")
             return "Fehler beim Abrufen des Kontexts"
 
+    def _get_applicable_knowledge_bases(self) -> List[Dict[str, Any]]:
+        """Get knowledge bases applicable to the current context"""
+        if not self.validate_context():
+            return []
+        try:
+            return self._run_async(self.kb_service.get_applicable_knowledge_bases(
+                organization_id=self._context.organization_id,
+                project_id=self._context.project_id,
+                department_id=None,
+                agent_type='qa_agent',
+                user_id=self._context.user_id
+            )) or []
+        except Exception as e:
+            logger.error(f"Error getting applicable knowledge bases: {e}")
+            return []
+
+    def _get_answer_cache_scope(self, applicable_kbs: List[Dict[str, Any]]):
+        """Cache scope for the current tenant and knowledge base version
+
+        The version covers the default knowledge base and every applicable custom
+        one, so reindexing any of them starts a fresh scope.
+        """
+        fingerprint = hashlib.sha256(knowledge_base_manager.get_version().encode())
+        for kb in sorted(applicable_kbs, key=lambda kb: str(kb.get('id'))):
+            fingerprint.update(
+                f"|{kb.get('id')}:{kb.get('updated_at') or kb.get('created_at')}:{kb.get('vector_store_id')}".encode()
+            )
+        kb_version = fingerprint.hexdigest()[:16]
+
+        if self.validate_context():
+            return qa_answer_cache.make_scope(self._context.organization_id, self._context.project_id, kb_version)
+        return qa_answer_cache.make_scope(None, None, kb_version)
+
+    def _warm_answer_cache(self, scope) -> None:
+        """Load recent answered questions of this scope from qa_interactions once per process"""
+        if qa_answer_cache.is_loaded(scope):
+            return
+
+        organization_id, project_id, kb_version = scope
+        try:
+            interactions = self._run_async(self.get_recent_interactions(limit=settings.QA_SEMANTIC_CACHE_WARM_LIMIT))
+        except Exception as e:
+            logger.warning(f"Could not warm Q&A answer cache: {e}")
+            interactions = []
+
+        entries = []
+        for interaction in reversed(interactions):
+            metadata = interaction.get("metadata") or {}
+            if metadata.get("kb_version") != kb_version or not metadata.get("question_embedding"):
+                continue
+            # Unscoped storage returns every tenant's interactions
+            if str(interaction.get("organization_id") or "") != organization_id:
+                continue
+            if str(interaction.get("project_id") or "") != project_id:
+                continue
+            entries.append({
+                "embedding": metadata["question_embedding"],
+                "interaction_id": interaction.get("id"),
+                "question": interaction.get("question"),
+                "answer": interaction.get("answer"),
+                "context": interaction.get("context", ""),
+                "relevance_score": interaction.get("relevance_score")
+            })
+
+        qa_answer_cache.load(scope, entries)
+        logger.info(f"Warmed Q&A answer cache with {len(entries)} interactions")
+
+    def _find_cached_answer(self, scope, question_embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """Look up a previously answered question above the similarity threshold"""
+        try:
+            self._warm_answer_cache(scope)
+            return qa_answer_cache.find(scope, question_embedding, settings.QA_SEMANTIC_CACHE_THRESHOLD)
+        except Exception as e:
+            logger.warning(f"Q&A answer cache lookup failed: {e}")
+            return None
+
     def answer_question(self, question: str) -> Dict[str, Any]:
-        """Answer a question using the knowledge base"""
+        """Answer a question using the knowledge base
+
+        Near-identical questions already answered for the same tenant and
+        knowledge base version are served from the semantic answer cache.
+        """
         try:
             # Consume credits for this action
             if self.validate_context():
@@ -73,11 +157,40 @@ class QAAgent(BaseCrew):
                     }
                 ))
 
+            applicable_kbs = self._get_applicable_knowledge_bases()
+
+            # Check the semantic answer cache before retrieval and the LLM call
+            cache_scope = None
+            question_embedding = None
+            if settings.QA_SEMANTIC_CACHE_ENABLED:
+                try:
+                    cache_scope = self._get_answer_cache_scope(applicable_kbs)
+                    question_embedding = self.embeddings.embed_query(question)
+                except Exception as e:
+                    logger.warning(f"Q&A answer cache unavailable: {e}")
+                    cache_scope = None
+
+                cached = self._find_cached_answer(cache_scope, question_embedding) if cache_scope else None
+                if cached:
+                    logger.info(f"Q&A answer cache hit (similarity {cached['similarity']})")
+                    cached_context = cached.get("context") or ""
+                    return {
+                        "success": True,
+                        "answer": cached["answer"],
+                        "context_used": cached_context[:500] + "..." if len(cached_context) > 500 else cached_context,
+                        "interaction_id": cached.get("interaction_id"),
+                        "relevance_score": cached.get("relevance_score"),
+                        "cached": True,
+                        "similarity": cached["similarity"]
+                    }
+
             # Get relevant context - use scoped if context is available
             if self.validate_context():
-                context = self._get_relevant_context_scoped(question)
+                context = self._get_relevant_context_scoped(question, applicable_kbs=applicable_kbs)
             else:
                 context = self._get_relevant_context(question)
+            emit_event("retrieval", context_length=len(context),
+                       context=context[:500] + "..." if len(context) > 500 else context)
 
             # Create task from YAML config
             task = self.create_task(
@@ -114,6 +227,9 @@ class QAAgent(BaseCrew):
                     "answer_length": len(answer)
                 }
             }
+            if cache_scope:
+                interaction_data["metadata"]["kb_version"] = cache_scope[2]
+                interaction_data["metadata"]["question_embedding"] = [round(x, 6) for x in question_embedding]
 
             # Run async save operation with context
             loop = asyncio.new_event_loop()
@@ -132,12 +248,22 @@ class QAAgent(BaseCrew):
             finally:
                 loop.close()
 
+            if cache_scope:
+                qa_answer_cache.add(cache_scope, question_embedding, {
+                    "interaction_id": interaction_id,
+                    "question": question,
+                    "answer": answer,
+                    "context": interaction_data["context"],
+                    "relevance_score": relevance_score
+                })
+
             return {
                 "success": True,
                 "answer": answer,
                 "context_used": context[:500] + "..." if len(context) > 500 else context,
                 "interaction_id": interaction_id,
-                "relevance_score": relevance_score
+                "relevance_score": relevance_score,
+                "cached": False
             }
 
         except Exception as e:
@@ -393,7 +519,8 @@ class QAAgent(BaseCrew):
             logger.error(f"Error loading scoped knowledge base: {e}")
             return self.vector_store
 
-    def _get_relevant_context_scoped(self, question: str, k: int = 5) -> str:
+    def _get_relevant_context_scoped(self, question: str, k: int = 5,
+                                     applicable_kbs: Optional[List[Dict[str, Any]]] = None) -> str:
         """Retrieve relevant context using organization-specific knowledge base"""
         if not self.validate_context():
             return self._get_relevant_context(question, k)
@@ -403,15 +530,16 @@ class QAAgent(BaseCrew):
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             try:
-                applicable_kbs = loop.run_until_complete(
-                    self.kb_service.get_applicable_knowledge_bases(
-                        organization_id=self._context.organization_id,
-                        project_id=self._context.project_id,
-                        department_id=None,
-                        agent_type='qa_agent',
-                        user_id=self._context.user_id
+                if applicable_kbs is None:
+                    applicable_kbs = loop.run_until_complete(
+                        self.kb_service.get_applicable_knowledge_bases(
+                            organization_id=self._context.organization_id,
+                            project_id=self._context.project_id,
+                            department_id=None,
+                            agent_type='qa_agent',
+                            user_id=self._context.user_id
+                        )
                     )
-                )
 
                 if not applicable_kbs:
                     # Fall back to default knowledge base
@@ -1,6 +1,7 @@
 from crewai import Agent
 from crewai_tools import DirectoryReadTool, FileReadTool
 from textwrap import dedent
+from app.core.llm_gateway import create_llm
 from app.core.storage import StorageFactory
 import asyncio
 import json
@@ -31,7 +32,8 @@ class ResearcherAgent:
             tools=[self.directory_tool, self.file_read_tool],
             verbose=True,
             allow_delegation=False,
-            max_iter=3
+            max_iter=3,
+            llm=create_llm()
         )
     
     def get_tasks(self):
@@ -2,17 +2,35 @@ import os
 import json
 import subprocess
 import shutil
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from datetime import datetime
 import hashlib
+import uuid
+from dataclasses import dataclass
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 import tempfile
 from app.agents.crews.base_crew import BaseCrew
 from crewai import Agent, Task, Crew
-from crewai.llm import LLM
+from app.core.config import settings
+from app.core.llm_gateway import create_llm
 from app.core.storage import StorageFactory
+from app.core.media_cache import get_media_cache, media_key
+from app.core.media_store import get_media_store
+from app.services.ffmpeg_service import ffmpeg_service, render_workspace
+from app.tools.video_frames import crossfade_frames, encoder_args, image_frame, preview_size, rawvideo_input
 import asyncio
 
+
+@dataclass
+class RenderJob:
+    """Scratch directory, frame size and encoder preset of one render"""
+    workspace: str
+    width: int
+    height: int
+    quality: str = "final"
+
+
 class VideoGenerationAgent(BaseCrew):
     """Agent for creating Instagram Reels videos from one or more images"""
     
@@ -22,20 +40,31 @@ class VideoGenerationAgent(BaseCrew):
         super().__init__(storage_adapter=storage_adapter)
         
         self.openai_api_key = openai_api_key
-        self.llm = LLM(model="gpt-4o-mini", api_key=openai_api_key)
+        self.llm = create_llm("gpt-4o-mini", api_key=openai_api_key, priority="batch")
         
         # Collection name for videos
         self.collection = "videos"
         
-        # Legacy storage for backward compatibility
-        self.storage_file = os.path.join(os.path.dirname(__file__), "../../static/videos_storage.json")
-        self.videos_storage = self._load_videos_storage()
+        # Local metadata of created videos, indexed by video hash
+        self.media_store = get_media_store()
+        self.media_store.migrate_json_file(
+            self.collection,
+            os.path.join(os.path.dirname(__file__), "../../static/videos_storage.json"),
+            list_key="videos"
+        )
         
         # Output directory for created videos
         self.output_dir = os.path.join(os.path.dirname(__file__), "../../static/videos")
         os.makedirs(self.output_dir, exist_ok=True)
         
-        # Temp directory for processing
+        # Cached previews, named by the hash of their inputs
+        self.preview_dir = os.path.join(self.output_dir, "previews")
+        os.makedirs(self.preview_dir, exist_ok=True)
+        
+        # Rendered videos shared with other workers, by content of the inputs
+        self.media_cache = get_media_cache()
+        
+        # Leftovers of older versions; render jobs now get their own workspace
         self.temp_dir = os.path.join(os.path.dirname(__file__), "../../static/temp")
         os.makedirs(self.temp_dir, exist_ok=True)
         
@@ -66,30 +95,11 @@ class VideoGenerationAgent(BaseCrew):
     def _check_ffmpeg(self) -> bool:
         """Check if ffmpeg is available"""
         try:
-            result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
+            result = subprocess.run([ffmpeg_service.binary, '-version'], capture_output=True, text=True)
             return result.returncode == 0
         except FileNotFoundError:
             return False
     
-    def _load_videos_storage(self) -> Dict[str, Any]:
-        """Load previously created videos"""
-        try:
-            if os.path.exists(self.storage_file):
-                with open(self.storage_file, 'r') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"Error loading videos storage: {e}")
-        return {"videos": [], "by_hash": {}}
-    
-    def _save_videos_storage(self):
-        """Save created videos to storage"""
-        try:
-            os.makedirs(os.path.dirname(self.storage_file), exist_ok=True)
-            with open(self.storage_file, 'w') as f:
-                json.dump(self.videos_storage, f, indent=2)
-        except Exception as e:
-            print(f"Error saving videos storage: {e}")
-    
     def _generate_video_hash(self, image_paths: List[str], video_type: str, options: Dict[str, Any]) -> str:
         """Generate a hash for the video parameters"""
         video_key = f"{','.join(sorted(image_paths))}_{video_type}_{json.dumps(options, sort_keys=True)}"
@@ -116,20 +126,16 @@ class VideoGenerationAgent(BaseCrew):
                 }
             
             # Check if all images exist
-            for img_path in image_paths:
-                if not os.path.exists(img_path):
-                    return {
-                        "success": False,
-                        "error": f"Image not found: {img_path}",
-                        "message": f"Bild nicht gefunden: {img_path}"
-                    }
+            missing = self._missing_image(image_paths)
+            if missing:
+                return missing
             
             # Check if video already exists
             video_options = options or {}
             video_hash = self._generate_video_hash(image_paths, video_type, video_options)
             
-            if not force_new and video_hash in self.videos_storage.get("by_hash", {}):
-                existing_video = self.videos_storage["by_hash"][video_hash]
+            existing_video = None if force_new else self.media_store.get(self.collection, video_hash)
+            if existing_video:
                 if os.path.exists(existing_video["file_path"]):
                     return {
                         "success": True,
@@ -138,28 +144,28 @@ class VideoGenerationAgent(BaseCrew):
                         "message": "Bestehendes Video abgerufen"
                     }
             
-            # Generate video based on type
-            if video_type == "slideshow":
-                video_result = self._create_slideshow_video(image_paths, duration, fps, video_options)
-            elif video_type == "ken_burns":
-                video_result = self._create_ken_burns_video(image_paths, duration, fps, video_options)
-            elif video_type == "transition":
-                video_result = self._create_transition_video(image_paths, duration, fps, video_options)
-            elif video_type == "zoom_in":
-                video_result = self._create_zoom_video(image_paths, duration, fps, video_options, zoom_type="in")
-            elif video_type == "zoom_out":
-                video_result = self._create_zoom_video(image_paths, duration, fps, video_options, zoom_type="out")
-            elif video_type == "parallax":
-                video_result = self._create_parallax_video(image_paths, duration, fps, video_options)
-            else:
-                return {
-                    "success": False,
-                    "error": f"Unknown video type: {video_type}",
-                    "message": f"Unbekannter Videotyp: {video_type}"
-                }
-            
-            if not video_result["success"]:
-                return video_result
+            output_filename, output_path = self._output_file(video_type)
+            cache_key = self._media_key(image_paths, video_type, duration, fps, video_options,
+                                        self.reel_width, self.reel_height, "final")
+            video_result = {"success": True}
+            
+            # Generate video based on type, in a scratch directory of its own
+            if not self.media_cache.fetch(cache_key, output_path):
+                with render_workspace(prefix="video-") as workspace:
+                    job = RenderJob(workspace, self.reel_width, self.reel_height)
+                    video_result = self._render(image_paths, video_type, duration, fps, video_options, job)
+                    if not video_result["success"]:
+                        return video_result
+                    
+                    shutil.move(video_result["encoded_path"], output_path)
+                self.media_cache.put(cache_key, output_path)
+            
+            video_result.update({
+                "output_path": output_path,
+                "output_url": f"/static/videos/{output_filename}",
+                "filename": output_filename,
+                "file_size": os.path.getsize(output_path)
+            })
             
             # Store video information
             video_info = {
@@ -191,10 +197,8 @@ class VideoGenerationAgent(BaseCrew):
                 )
             video_info["id"] = video_id
             
-            # Also save to legacy storage for backward compatibility
-            self.videos_storage["videos"].append(video_info)
-            self.videos_storage["by_hash"][video_hash] = video_info
-            self._save_videos_storage()
+            # Also keep the local metadata for hash lookups
+            self.media_store.put(self.collection, video_info, key=video_hash)
             
             return {
                 "success": True,
@@ -210,75 +214,147 @@ class VideoGenerationAgent(BaseCrew):
                 "message": "Fehler beim Erstellen des Videos"
             }
     
-    def _create_slideshow_video(self, image_paths: List[str], duration: int, fps: int, options: Dict[str, Any]) -> Dict[str, Any]:
-        """Create a slideshow video with transitions"""
+    def create_video_preview(self, image_paths: List[str], video_type: str = "slideshow",
+                             duration: int = 15, options: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Quick low resolution preview of a video, with a poster image
+        
+        Rendered at the preview size and frame rate with the fastest encoder
+        preset, and cached by its inputs; nothing is stored as a video. The
+        full video is created with `create_video`.
+        """
         try:
-            # Calculate duration per image
-            duration_per_image = duration / len(image_paths)
-            
-            # Prepare images for video
-            prepared_images = []
-            for img_path in image_paths:
-                prepared_path = self._prepare_image_for_video(img_path)
-                if prepared_path:
-                    prepared_images.append(prepared_path)
-            
-            if not prepared_images:
+            if not self.ffmpeg_available:
                 return {
                     "success": False,
-                    "error": "Failed to prepare images",
-                    "message": "Fehler beim Vorbereiten der Bilder"
+                    "error": "FFmpeg not available",
+                    "message": "FFmpeg ist nicht verfügbar. Bitte installieren Sie FFmpeg."
                 }
             
-            # Create video using ffmpeg
-            output_filename = f"slideshow_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
-            output_path = os.path.join(self.output_dir, output_filename)
-            
-            # Build ffmpeg command for slideshow
-            cmd = [
-                'ffmpeg',
-                '-y',  # Overwrite output file
-                '-framerate', f'1/{duration_per_image}',  # Duration per image
-                '-pattern_type', 'sequence',
-                '-i', os.path.join(self.temp_dir, 'slide_%d.jpg'),
-                '-vf', f'fps={fps}',
-                '-c:v', 'libx264',
-                '-pix_fmt', 'yuv420p',
-                '-t', str(duration),
-                output_path
-            ]
+            if not image_paths:
+                return {
+                    "success": False,
+                    "error": "No images provided",
+                    "message": "Keine Bilder bereitgestellt"
+                }
             
-            # Copy images to temp directory with sequence names
-            for i, img_path in enumerate(prepared_images):
-                temp_path = os.path.join(self.temp_dir, f'slide_{i+1}.jpg')
-                shutil.copy2(img_path, temp_path)
+            missing = self._missing_image(image_paths)
+            if missing:
+                return missing
             
-            # Run ffmpeg
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            width, height = preview_size(self.reel_width, self.reel_height)
+            fps = settings.VIDEO_PREVIEW_FPS
+            video_options = options or {}
+            preview_hash = self._media_key(image_paths, video_type, duration, fps, video_options,
+                                           width, height, "preview")
+            video_path = os.path.join(self.preview_dir, f"{preview_hash}.mp4")
+            poster_path = os.path.join(self.preview_dir, f"{preview_hash}.jpg")
+            preview = {
+                "id": preview_hash,
+                "video_type": video_type,
+                "video_url": f"/static/videos/previews/{preview_hash}.mp4",
+                "poster_url": f"/static/videos/previews/{preview_hash}.jpg",
+                "dimensions": {"width": width, "height": height},
+                "fps": fps,
+                "duration": duration
+            }
             
-            # Clean up temp files
-            for i in range(len(prepared_images)):
-                temp_path = os.path.join(self.temp_dir, f'slide_{i+1}.jpg')
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
+            if os.path.exists(video_path) and os.path.exists(poster_path):
+                return {"success": True, "preview": preview, "source": "cache"}
+            # Rendered by another worker
+            if self.media_cache.fetch(preview_hash, poster_path) and self.media_cache.fetch(preview_hash, video_path):
+                return {"success": True, "preview": preview, "source": "cache"}
+            
+            with render_workspace(prefix="preview-") as workspace:
+                job = RenderJob(workspace, width, height, quality="preview")
+                video_result = self._render(image_paths, video_type, duration, fps, video_options, job)
+                if not video_result["success"]:
+                    return video_result
+                
+                # Both files appear atomically, the poster first: a cached preview needs both
+                poster = Image.fromarray(image_frame(image_paths[0], width, height))
+                poster.save(poster_path + ".tmp", "JPEG", quality=85)
+                os.replace(poster_path + ".tmp", poster_path)
+                shutil.move(video_result["encoded_path"], video_path + ".tmp")
+                os.replace(video_path + ".tmp", video_path)
+            self.media_cache.put(preview_hash, poster_path)
+            self.media_cache.put(preview_hash, video_path)
+            
+            return {"success": True, "preview": preview, "source": "generated"}
             
-            if result.returncode != 0:
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "message": "Fehler beim Erstellen der Videovorschau"
+            }
+    
+    def _media_key(self, image_paths: List[str], video_type: str, duration: int, fps: int,
+                   options: Dict[str, Any], width: int, height: int, quality: str) -> str:
+        """Content address of a render: its parameters and the images' contents"""
+        return media_key("generated_video", {
+            "video_type": video_type,
+            "duration": duration,
+            "fps": fps,
+            "options": options,
+            "size": [width, height],
+            "encoder": encoder_args(quality)
+        }, files=image_paths)
+    
+    def _missing_image(self, image_paths: List[str]) -> Optional[Dict[str, Any]]:
+        """Error result for the first image that does not exist"""
+        for img_path in image_paths:
+            if not os.path.exists(img_path):
+                return {
+                    "success": False,
+                    "error": f"Image not found: {img_path}",
+                    "message": f"Bild nicht gefunden: {img_path}"
+                }
+        return None
+    
+    def _render(self, image_paths: List[str], video_type: str, duration: int, fps: int,
+                options: Dict[str, Any], job: RenderJob) -> Dict[str, Any]:
+        """Render a video of the given type into the job's workspace"""
+        if video_type == "slideshow":
+            return self._create_slideshow_video(image_paths, duration, fps, options, job)
+        elif video_type == "ken_burns":
+            return self._create_ken_burns_video(image_paths, duration, fps, options, job)
+        elif video_type == "transition":
+            return self._create_transition_video(image_paths, duration, fps, options, job)
+        elif video_type == "zoom_in":
+            return self._create_zoom_video(image_paths, duration, fps, options, job, zoom_type="in")
+        elif video_type == "zoom_out":
+            return self._create_zoom_video(image_paths, duration, fps, options, job, zoom_type="out")
+        elif video_type == "parallax":
+            return self._create_parallax_video(image_paths, duration, fps, options, job)
+        return {
+            "success": False,
+            "error": f"Unknown video type: {video_type}",
+            "message": f"Unbekannter Videotyp: {video_type}"
+        }
+    
+    def _create_slideshow_video(self, image_paths: List[str], duration: int, fps: int, options: Dict[str, Any],
+                                job: RenderJob) -> Dict[str, Any]:
+        """Create a slideshow video with transitions"""
+        try:
+            # Prepare images for video
+            frames = self._load_frames(image_paths, job.width, job.height)
+            if not frames:
                 return {
                     "success": False,
-                    "error": f"FFmpeg error: {result.stderr}",
-                    "message": "Fehler beim Erstellen des Slideshow-Videos"
+                    "error": "Failed to prepare images",
+                    "message": "Fehler beim Vorbereiten der Bilder"
                 }
             
-            # Get file size
-            file_size = os.path.getsize(output_path) if os.path.exists(output_path) else 0
+            # Calculate duration per image
+            duration_per_image = duration / len(frames)
             
-            return {
-                "success": True,
-                "output_path": output_path,
-                "output_url": f"/static/videos/{output_filename}",
-                "filename": output_filename,
-                "file_size": file_size
-            }
+            # Every image is piped once, shown for its share of the duration
+            cmd = rawvideo_input(job.width, job.height, f'1/{duration_per_image}') + [
+                '-vf', f'fps={fps}',
+            ]
+            
+            return self._encode(cmd, frames, job, duration,
+                                "Fehler beim Erstellen des Slideshow-Videos")
             
         except Exception as e:
             return {
@@ -287,61 +363,32 @@ class VideoGenerationAgent(BaseCrew):
                 "message": "Fehler beim Erstellen des Slideshow-Videos"
             }
     
-    def _create_ken_burns_video(self, image_paths: List[str], duration: int, fps: int, options: Dict[str, Any]) -> Dict[str, Any]:
+    def _create_ken_burns_video(self, image_paths: List[str], duration: int, fps: int, options: Dict[str, Any],
+                                job: RenderJob) -> Dict[str, Any]:
         """Create a Ken Burns effect video (zoom and pan)"""
         try:
             # For Ken Burns, we'll use the first image or combine multiple
-            main_image = image_paths[0]
-            prepared_image = self._prepare_image_for_video(main_image)
-            
-            if not prepared_image:
+            frames = self._load_frames(image_paths[:1], job.width, job.height)
+            if not frames:
                 return {
                     "success": False,
                     "error": "Failed to prepare image",
                     "message": "Fehler beim Vorbereiten des Bildes"
                 }
             
-            output_filename = f"ken_burns_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
-            output_path = os.path.join(self.output_dir, output_filename)
-            
             # Ken Burns effect: zoom in and pan
             zoom_start = options.get("zoom_start", 1.0)
             zoom_end = options.get("zoom_end", 1.2)
             pan_start = options.get("pan_start", "0:0")
             pan_end = options.get("pan_end", "100:100")
             
-            cmd = [
-                'ffmpeg',
-                '-y',
-                '-loop', '1',
-                '-i', prepared_image,
-                '-vf', f'scale={self.reel_width}:{self.reel_height}:force_original_aspect_ratio=increase,'
-                       f'crop={self.reel_width}:{self.reel_height},'
-                       f'zoompan=z\'min(zoom+0.0015,{zoom_end})\':d={fps*duration}:x\'iw/2-(iw/zoom/2)\':y\'ih/2-(ih/zoom/2)\':s={self.reel_width}x{self.reel_height}',
-                '-c:v', 'libx264',
-                '-pix_fmt', 'yuv420p',
-                '-t', str(duration),
-                output_path
+            # zoompan turns the single input frame into the whole clip
+            cmd = rawvideo_input(job.width, job.height, fps) + [
+                '-vf', f'zoompan=z=\'min(zoom+0.0015,{zoom_end})\':d={fps*duration}:x=\'iw/2-(iw/zoom/2)\':y=\'ih/2-(ih/zoom/2)\':s={job.width}x{job.height}:fps={fps}',
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                return {
-                    "success": False,
-                    "error": f"FFmpeg error: {result.stderr}",
-                    "message": "Fehler beim Erstellen des Ken Burns Videos"
-                }
-            
-            file_size = os.path.getsize(output_path) if os.path.exists(output_path) else 0
-            
-            return {
-                "success": True,
-                "output_path": output_path,
-                "output_url": f"/static/videos/{output_filename}",
-                "filename": output_filename,
-                "file_size": file_size
-            }
+            return self._encode(cmd, frames, job, duration,
+                                "Fehler beim Erstellen des Ken Burns Videos")
             
         except Exception as e:
             return {
@@ -350,7 +397,8 @@ class VideoGenerationAgent(BaseCrew):
                 "message": "Fehler beim Erstellen des Ken Burns Videos"
             }
     
-    def _create_transition_video(self, image_paths: List[str], duration: int, fps: int, options: Dict[str, Any]) -> Dict[str, Any]:
+    def _create_transition_video(self, image_paths: List[str], duration: int, fps: int, options: Dict[str, Any],
+                                 job: RenderJob) -> Dict[str, Any]:
         """Create a video with smooth transitions between images"""
         try:
             if len(image_paths) < 2:
@@ -361,72 +409,20 @@ class VideoGenerationAgent(BaseCrew):
                 }
             
             # Prepare images
-            prepared_images = []
-            for img_path in image_paths:
-                prepared_path = self._prepare_image_for_video(img_path)
-                if prepared_path:
-                    prepared_images.append(prepared_path)
-            
-            if len(prepared_images) < 2:
+            frames = self._load_frames(image_paths, job.width, job.height)
+            if len(frames) < 2:
                 return {
                     "success": False,
                     "error": "Failed to prepare enough images",
                     "message": "Fehler beim Vorbereiten der Bilder"
                 }
             
-            output_filename = f"transition_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
-            output_path = os.path.join(self.output_dir, output_filename)
-            
-            # Build complex filter for transitions
-            duration_per_image = duration / len(prepared_images)
+            # Crossfades are blended here, only the fading frames are computed
             transition_duration = options.get("transition_duration", 1.0)
+            cmd = rawvideo_input(job.width, job.height, fps)
             
-            # Create input arguments
-            inputs = []
-            for img in prepared_images:
-                inputs.extend(['-loop', '1', '-t', str(duration_per_image + transition_duration), '-i', img])
-            
-            # Create filter complex for crossfade transitions
-            filter_complex = ""
-            for i in range(len(prepared_images) - 1):
-                if i == 0:
-                    filter_complex += f"[0:v][1:v]xfade=transition=fade:duration={transition_duration}:offset={duration_per_image}[v01];"
-                else:
-                    filter_complex += f"[v{i-1}{i}][{i+1}:v]xfade=transition=fade:duration={transition_duration}:offset={duration_per_image*(i+1)}[v{i}{i+1}];"
-            
-            # Final output
-            final_output = f"v{len(prepared_images)-2}{len(prepared_images)-1}" if len(prepared_images) > 2 else "v01"
-            
-            cmd = [
-                'ffmpeg',
-                '-y'
-            ] + inputs + [
-                '-filter_complex', filter_complex,
-                '-map', f'[{final_output}]',
-                '-c:v', 'libx264',
-                '-pix_fmt', 'yuv420p',
-                '-t', str(duration),
-                output_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                return {
-                    "success": False,
-                    "error": f"FFmpeg error: {result.stderr}",
-                    "message": "Fehler beim Erstellen des Übergangs-Videos"
-                }
-            
-            file_size = os.path.getsize(output_path) if os.path.exists(output_path) else 0
-            
-            return {
-                "success": True,
-                "output_path": output_path,
-                "output_url": f"/static/videos/{output_filename}",
-                "filename": output_filename,
-                "file_size": file_size
-            }
+            return self._encode(cmd, crossfade_frames(frames, duration, fps, transition_duration), job,
+                                duration, "Fehler beim Erstellen des Übergangs-Videos")
             
         except Exception as e:
             return {
@@ -435,22 +431,18 @@ class VideoGenerationAgent(BaseCrew):
                 "message": "Fehler beim Erstellen des Übergangs-Videos"
             }
     
-    def _create_zoom_video(self, image_paths: List[str], duration: int, fps: int, options: Dict[str, Any], zoom_type: str = "in") -> Dict[str, Any]:
+    def _create_zoom_video(self, image_paths: List[str], duration: int, fps: int, options: Dict[str, Any],
+                           job: RenderJob, zoom_type: str = "in") -> Dict[str, Any]:
         """Create a zoom in/out video effect"""
         try:
-            main_image = image_paths[0]
-            prepared_image = self._prepare_image_for_video(main_image)
-            
-            if not prepared_image:
+            frames = self._load_frames(image_paths[:1], job.width, job.height)
+            if not frames:
                 return {
                     "success": False,
                     "error": "Failed to prepare image",
                     "message": "Fehler beim Vorbereiten des Bildes"
                 }
             
-            output_filename = f"zoom_{zoom_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
-            output_path = os.path.join(self.output_dir, output_filename)
-            
             # Zoom settings
             if zoom_type == "in":
                 zoom_start = options.get("zoom_start", 1.0)
@@ -459,38 +451,12 @@ class VideoGenerationAgent(BaseCrew):
                 zoom_start = options.get("zoom_start", 1.5)
                 zoom_end = options.get("zoom_end", 1.0)
             
-            cmd = [
-                'ffmpeg',
-                '-y',
-                '-loop', '1',
-                '-i', prepared_image,
-                '-vf', f'scale={self.reel_width}:{self.reel_height}:force_original_aspect_ratio=increase,'
-                       f'crop={self.reel_width}:{self.reel_height},'
-                       f'zoompan=z\'min(max(zoom,{zoom_start}),{zoom_end})\':d={fps*duration}:x\'iw/2-(iw/zoom/2)\':y\'ih/2-(ih/zoom/2)\':s={self.reel_width}x{self.reel_height}',
-                '-c:v', 'libx264',
-                '-pix_fmt', 'yuv420p',
-                '-t', str(duration),
-                output_path
+            cmd = rawvideo_input(job.width, job.height, fps) + [
+                '-vf', f'zoompan=z=\'min(max(zoom,{zoom_start}),{zoom_end})\':d={fps*duration}:x=\'iw/2-(iw/zoom/2)\':y=\'ih/2-(ih/zoom/2)\':s={job.width}x{job.height}:fps={fps}',
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                return {
-                    "success": False,
-                    "error": f"FFmpeg error: {result.stderr}",
-                    "message": f"Fehler beim Erstellen des Zoom-{zoom_type} Videos"
-                }
-            
-            file_size = os.path.getsize(output_path) if os.path.exists(output_path) else 0
-            
-            return {
-                "success": True,
-                "output_path": output_path,
-                "output_url": f"/static/videos/{output_filename}",
-                "filename": output_filename,
-                "file_size": file_size
-            }
+            return self._encode(cmd, frames, job, duration,
+                                f"Fehler beim Erstellen des Zoom-{zoom_type} Videos")
             
         except Exception as e:
             return {
@@ -499,22 +465,18 @@ class VideoGenerationAgent(BaseCrew):
                 "message": f"Fehler beim Erstellen des Zoom-{zoom_type} Videos"
             }
     
-    def _create_parallax_video(self, image_paths: List[str], duration: int, fps: int, options: Dict[str, Any]) -> Dict[str, Any]:
+    def _create_parallax_video(self, image_paths: List[str], duration: int, fps: int, options: Dict[str, Any],
+                               job: RenderJob) -> Dict[str, Any]:
         """Create a parallax effect video"""
         try:
-            main_image = image_paths[0]
-            prepared_image = self._prepare_image_for_video(main_image)
-            
-            if not prepared_image:
+            frames = self._load_frames(image_paths[:1], job.width, job.height)
+            if not frames:
                 return {
                     "success": False,
                     "error": "Failed to prepare image",
                     "message": "Fehler beim Vorbereiten des Bildes"
                 }
             
-            output_filename = f"parallax_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
-            output_path = os.path.join(self.output_dir, output_filename)
-            
             # Parallax movement
             move_direction = options.get("direction", "right")  # right, left, up, down
             move_speed = options.get("speed", 2)
@@ -528,38 +490,16 @@ class VideoGenerationAgent(BaseCrew):
             else:  # down
                 move_filter = f"crop=iw*0.8:ih*0.8:0:t*{move_speed}"
             
-            cmd = [
-                'ffmpeg',
-                '-y',
-                '-loop', '1',
-                '-i', prepared_image,
-                '-vf', f'scale={self.reel_width*1.2}:{self.reel_height*1.2}:force_original_aspect_ratio=increase,'
+            # The single piped frame is looped by ffmpeg for the moving crop
+            cmd = rawvideo_input(job.width, job.height, fps) + [
+                '-vf', f'loop=loop=-1:size=1:start=0,setpts=N/({fps}*TB),'
+                       f'scale={job.width*1.2}:{job.height*1.2}:force_original_aspect_ratio=increase,'
                        f'{move_filter},'
-                       f'scale={self.reel_width}:{self.reel_height}',
-                '-c:v', 'libx264',
-                '-pix_fmt', 'yuv420p',
-                '-t', str(duration),
-                output_path
+                       f'scale={job.width}:{job.height},fps={fps}',
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                return {
-                    "success": False,
-                    "error": f"FFmpeg error: {result.stderr}",
-                    "message": "Fehler beim Erstellen des Parallax-Videos"
-                }
-            
-            file_size = os.path.getsize(output_path) if os.path.exists(output_path) else 0
-            
-            return {
-                "success": True,
-                "output_path": output_path,
-                "output_url": f"/static/videos/{output_filename}",
-                "filename": output_filename,
-                "file_size": file_size
-            }
+            return self._encode(cmd, frames, job, duration,
+                                "Fehler beim Erstellen des Parallax-Videos")
             
         except Exception as e:
             return {
@@ -568,56 +508,44 @@ class VideoGenerationAgent(BaseCrew):
                 "message": "Fehler beim Erstellen des Parallax-Videos"
             }
     
-    def _prepare_image_for_video(self, image_path: str) -> Optional[str]:
-        """Prepare image for video processing (resize to reel dimensions)"""
-        try:
-            # Load image
-            img = Image.open(image_path)
-            
-            # Resize to reel dimensions
-            img_resized = self._resize_to_reel_format(img)
-            
-            # Convert to RGB if needed
-            if img_resized.mode != 'RGB':
-                img_resized = img_resized.convert('RGB')
-            
-            # Save to temp directory
-            temp_filename = f"temp_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.jpg"
-            temp_path = os.path.join(self.temp_dir, temp_filename)
-            img_resized.save(temp_path, 'JPEG', quality=95)
-            
-            return temp_path
-            
-        except Exception as e:
-            print(f"Error preparing image {image_path}: {e}")
-            return None
-    
-    def _resize_to_reel_format(self, image: Image.Image) -> Image.Image:
-        """Resize image to Instagram Reel format (9:16 - 1080x1920)"""
-        # Calculate aspect ratios
-        img_ratio = image.width / image.height
-        reel_ratio = self.reel_width / self.reel_height
+    def _encode(self, input_args: List[str], frames: Iterable[Any], job: RenderJob,
+                duration: int, error_message: str) -> Dict[str, Any]:
+        """Encode piped frames to H.264 in the job's workspace
+        
+        The caller moves the finished file out of the workspace, so partly
+        written videos never show up in the output directory.
+        """
+        encoded_path = os.path.join(job.workspace, "video.mp4")
         
-        if img_ratio > reel_ratio:
-            # Image is wider than reel format - crop width
-            new_height = self.reel_height
-            new_width = int(new_height * img_ratio)
-            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
-            # Center crop
-            left = (new_width - self.reel_width) // 2
-            image = image.crop((left, 0, left + self.reel_width, self.reel_height))
-        else:
-            # Image is taller than reel format - crop height
-            new_width = self.reel_width
-            new_height = int(new_width / img_ratio)
-            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
-            # Center crop
-            top = (new_height - self.reel_height) // 2
-            image = image.crop((0, top, self.reel_width, top + self.reel_height))
+        cmd = ['-y'] + input_args + encoder_args(job.quality) + ['-t', str(duration), encoded_path]
+        result = ffmpeg_service.run_sync(cmd, duration=duration, frames=frames)
         
-        return image
+        if result.returncode != 0:
+            return {
+                "success": False,
+                "error": f"FFmpeg error: {result.stderr}",
+                "message": error_message
+            }
+        
+        return {
+            "success": True,
+            "encoded_path": encoded_path
+        }
+    
+    def _output_file(self, prefix: str) -> Tuple[str, str]:
+        """Unique filename and path in the output directory"""
+        output_filename = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.mp4"
+        return output_filename, os.path.join(self.output_dir, output_filename)
+    
+    def _load_frames(self, image_paths: List[str], width: int, height: int) -> List[np.ndarray]:
+        """Images scaled to the frame size as RGB frames, decoded once; unreadable images are skipped"""
+        frames = []
+        for image_path in image_paths:
+            try:
+                frames.append(image_frame(image_path, width, height))
+            except Exception as e:
+                print(f"Error preparing image {image_path}: {e}")
+        return frames
     
     def get_videos(self, video_type: str = None) -> Dict[str, Any]:
         """Get all videos, optionally filtered by type"""
@@ -647,12 +575,9 @@ class VideoGenerationAgent(BaseCrew):
                     )
                 )
             
-            # Also check legacy storage for backward compatibility
-            if not videos and self.videos_storage.get("videos"):
-                legacy_videos = self.videos_storage.get("videos", [])
-                if video_type:
-                    legacy_videos = [video for video in legacy_videos if video.get("video_type") == video_type]
-                videos.extend(legacy_videos)
+            # Also check the local metadata for backward compatibility
+            if not videos:
+                videos.extend(self.media_store.list(self.collection, filters=filters))
             
             return {
                 "success": True,
@@ -672,13 +597,7 @@ class VideoGenerationAgent(BaseCrew):
         """Delete a video"""
         try:
             # Find and remove from storage
-            videos = self.videos_storage.get("videos", [])
-            video_to_delete = None
-            
-            for i, video in enumerate(videos):
-                if video["id"] == video_id:
-                    video_to_delete = videos.pop(i)
-                    break
+            video_to_delete = self.media_store.delete(self.collection, video_id)
             
             if not video_to_delete:
                 return {
@@ -687,17 +606,10 @@ class VideoGenerationAgent(BaseCrew):
                     "message": "Video nicht gefunden"
                 }
             
-            # Remove from hash index
-            if video_id in self.videos_storage.get("by_hash", {}):
-                del self.videos_storage["by_hash"][video_id]
-            
             # Delete file
             if os.path.exists(video_to_delete["file_path"]):
                 os.remove(video_to_delete["file_path"])
             
-            # Save updated storage
-            self._save_videos_storage()
-            
             return {
                 "success": True,
                 "message": "Video erfolgreich gelöscht"
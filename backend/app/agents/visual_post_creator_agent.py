@@ -8,7 +8,7 @@ import requests
 from io import BytesIO
 from app.agents.crews.base_crew import BaseCrew
 from crewai import Agent, Task, Crew
-from crewai.llm import LLM
+from app.core.llm_gateway import create_llm
 from app.agents.image_search_agent import ImageSearchAgent
 from app.core.storage import StorageFactory
 import asyncio
@@ -23,7 +23,7 @@ class VisualPostCreatorAgent(BaseCrew):
         
         self.openai_api_key = openai_api_key
         self.pexels_api_key = pexels_api_key
-        self.llm = LLM(model="gpt-4o-mini", api_key=openai_api_key)
+        self.llm = create_llm("gpt-4o-mini", api_key=openai_api_key)
         
         # Initialize image search agent
         self.image_search_agent = ImageSearchAgent(openai_api_key, pexels_api_key)
@@ -8,7 +8,11 @@ from datetime import datetime
 import hashlib
 from app.agents.crews.base_crew import BaseCrew
 from crewai import Agent, Task, Crew
-from crewai.llm import LLM
+from app.core.llm_gateway import create_llm
+from app.core.media_cache import get_media_cache, media_key
+from app.core.media_store import get_media_store
+from app.services.ffmpeg_service import ffmpeg_service
+from app.tools.text_layout import wrap_words
 import webvtt
 import srt
 from datetime import timedelta
@@ -20,11 +24,19 @@ class VoiceOverAgent(BaseCrew):
         super().__init__()
         self.openai_api_key = openai_api_key
         self.elevenlabs_api_key = elevenlabs_api_key
-        self.llm = LLM(model="gpt-4o-mini", api_key=openai_api_key)
+        self.llm = create_llm("gpt-4o-mini", api_key=openai_api_key, priority="batch")
         
-        # Storage for voice overs
-        self.storage_file = os.path.join(os.path.dirname(__file__), "../../static/voice_overs_storage.json")
-        self.voice_storage = self._load_voice_storage()
+        # Storage for voice overs, indexed by voice hash
+        self.collection = "voice_overs"
+        self.media_store = get_media_store()
+        self.media_store.migrate_json_file(
+            self.collection,
+            os.path.join(os.path.dirname(__file__), "../../static/voice_overs_storage.json"),
+            list_key="voice_overs"
+        )
+        
+        # Voice overs, transcriptions and videos shared with the other workers, by content
+        self.media_cache = get_media_cache()
         
         # Output directories
         self.audio_output_dir = os.path.join(os.path.dirname(__file__), "../../static/voice_overs")
@@ -116,30 +128,11 @@ class VoiceOverAgent(BaseCrew):
     def _check_ffmpeg(self) -> bool:
         """Check if ffmpeg is available"""
         try:
-            result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
+            result = subprocess.run([ffmpeg_service.binary, '-version'], capture_output=True, text=True)
             return result.returncode == 0
         except FileNotFoundError:
             return False
     
-    def _load_voice_storage(self) -> Dict[str, Any]:
-        """Load previously created voice overs"""
-        try:
-            if os.path.exists(self.storage_file):
-                with open(self.storage_file, 'r') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"Error loading voice storage: {e}")
-        return {"voice_overs": [], "by_hash": {}}
-    
-    def _save_voice_storage(self):
-        """Save voice overs to storage"""
-        try:
-            os.makedirs(os.path.dirname(self.storage_file), exist_ok=True)
-            with open(self.storage_file, 'w') as f:
-                json.dump(self.voice_storage, f, indent=2)
-        except Exception as e:
-            print(f"Error saving voice storage: {e}")
-    
     def _generate_voice_hash(self, text: str, voice: str, language: str = "en") -> str:
         """Generate a hash for the voice over parameters"""
         voice_key = f"{text}_{voice}_{language}"
@@ -243,8 +236,8 @@ class VoiceOverAgent(BaseCrew):
             # Check if voice over already exists
             voice_hash = self._generate_voice_hash(text, voice, language)
             
-            if voice_hash in self.voice_storage.get("by_hash", {}):
-                existing_voice = self.voice_storage["by_hash"][voice_hash]
+            existing_voice = self.media_store.get(self.collection, voice_hash)
+            if existing_voice:
                 if os.path.exists(existing_voice["file_path"]):
                     return {
                         "success": True,
@@ -269,17 +262,23 @@ class VoiceOverAgent(BaseCrew):
             headers = self.elevenlabs_headers.copy()
             headers["Accept"] = f"audio/{output_format.split('_')[0]}"
             
-            # Make API request
-            response = requests.post(url, json=payload, headers=headers)
+            audio_filename = f"voice_over_{voice}_{voice_hash[:8]}.mp3"
+            audio_path = os.path.join(self.audio_output_dir, audio_filename)
+            cache_key = media_key("voice_over", {**payload, "voice_id": voice_id, "output_format": output_format})
             
-            if response.status_code == 200:
-                # Save audio file
-                audio_filename = f"voice_over_{voice}_{voice_hash[:8]}.mp3"
-                audio_path = os.path.join(self.audio_output_dir, audio_filename)
-                
-                with open(audio_path, 'wb') as f:
-                    f.write(response.content)
-                
+            if self.media_cache.fetch(cache_key, audio_path):
+                # Synthesized before, e.g. by another worker
+                response = None
+            else:
+                # Make API request
+                response = requests.post(url, json=payload, headers=headers)
+                if response.status_code == 200:
+                    # Save audio file
+                    with open(audio_path, 'wb') as f:
+                        f.write(response.content)
+                    self.media_cache.put(cache_key, audio_path)
+            
+            if response is None or response.status_code == 200:
                 # Get audio duration
                 duration = self._get_audio_duration(audio_path)
                 
@@ -298,9 +297,7 @@ class VoiceOverAgent(BaseCrew):
                 }
                 
                 # Save to storage
-                self.voice_storage["voice_overs"].append(voice_info)
-                self.voice_storage["by_hash"][voice_hash] = voice_info
-                self._save_voice_storage()
+                self.media_store.put(self.collection, voice_info, key=voice_hash)
                 
                 return {
                     "success": True,
@@ -401,7 +398,21 @@ class VoiceOverAgent(BaseCrew):
             }
     
     def _transcribe_audio(self, audio_path: str, language: str) -> Dict[str, Any]:
-        """Transcribe audio using OpenAI Whisper API"""
+        """Transcribe audio using OpenAI Whisper API
+        
+        Transcriptions are kept in the media cache by audio content and language.
+        """
+        cache_key = media_key("transcription", {"model": "whisper-1", "language": language}, files=[audio_path])
+        cached = self.media_cache.get_bytes(cache_key, ".json")
+        if cached is not None:
+            return json.loads(cached)
+        
+        transcription = self._request_transcription(audio_path, language)
+        if transcription["success"]:
+            self.media_cache.put_bytes(cache_key, json.dumps(transcription).encode(), ".json")
+        return transcription
+    
+    def _request_transcription(self, audio_path: str, language: str) -> Dict[str, Any]:
         try:
             # Use OpenAI Whisper for transcription
             headers = {
@@ -571,27 +582,7 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
     
     def _wrap_text(self, text: str, max_chars: int) -> str:
         """Wrap text to maximum characters per line"""
-        words = text.split()
-        lines = []
-        current_line = []
-        current_length = 0
-        
-        for word in words:
-            word_length = len(word) + (1 if current_line else 0)
-            
-            if current_length + word_length <= max_chars:
-                current_line.append(word)
-                current_length += word_length
-            else:
-                if current_line:
-                    lines.append(" ".join(current_line))
-                current_line = [word]
-                current_length = len(word)
-        
-        if current_line:
-            lines.append(" ".join(current_line))
-        
-        return "\n".join(lines)
+        return "\n".join(wrap_words(text, max_chars))
     
     def add_voice_over_to_video(self, video_path: str, audio_path: str, 
                                volume: float = 1.0, fade_in: float = 0.5, 
@@ -623,9 +614,20 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             output_filename = f"video_with_voice_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
             output_path = os.path.join(self.video_output_dir, output_filename)
             
+            cache_key = media_key(
+                "video_with_voice", {"volume": volume, "fade_in": fade_in, "fade_out": fade_out},
+                files=[video_path, audio_path]
+            )
+            if self.media_cache.fetch(cache_key, output_path):
+                return {
+                    "success": True,
+                    "output_path": output_path,
+                    "output_url": f"/static/videos_with_voice/{output_filename}",
+                    "message": "Voice-Over erfolgreich hinzugefügt"
+                }
+            
             # Build ffmpeg command
             cmd = [
-                'ffmpeg',
                 '-y',
                 '-i', video_path,
                 '-i', audio_path,
@@ -639,7 +641,7 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             ]
             
             # Run ffmpeg
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = ffmpeg_service.run_sync(cmd)
             
             if result.returncode != 0:
                 return {
@@ -647,6 +649,7 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
                     "error": f"FFmpeg error: {result.stderr}",
                     "message": "Fehler beim Hinzufügen der Voice-Over"
                 }
+            self.media_cache.put(cache_key, output_path)
             
             return {
                 "success": True,
@@ -691,12 +694,25 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             output_filename = f"video_with_captions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
             output_path = os.path.join(self.video_output_dir, output_filename)
             
+            cache_key = media_key("video_with_captions", {
+                "burn_in": burn_in,
+                "style": self.caption_styles.get(style, self.caption_styles["minimal"]),
+                "subtitle_format": os.path.splitext(subtitle_path)[1]
+            }, files=[video_path, subtitle_path])
+            if self.media_cache.fetch(cache_key, output_path):
+                return {
+                    "success": True,
+                    "output_path": output_path,
+                    "output_url": f"/static/videos_with_voice/{output_filename}",
+                    "burn_in": burn_in,
+                    "message": "Untertitel erfolgreich hinzugefügt"
+                }
+            
             if burn_in:
                 # Burn subtitles into video
                 if subtitle_path.endswith('.ass'):
                     # Use ASS file directly
                     cmd = [
-                        'ffmpeg',
                         '-y',
                         '-i', video_path,
                         '-vf', f"ass='{subtitle_path}'",
@@ -707,7 +723,6 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
                     # Convert to ASS for styling
                     style_info = self.caption_styles.get(style, self.caption_styles["minimal"])
                     cmd = [
-                        'ffmpeg',
                         '-y',
                         '-i', video_path,
                         '-vf', f"subtitles={subtitle_path}:force_style='FontName={style_info['font']},FontSize={style_info['font_size']},PrimaryColour=&H00FFFFFF,OutlineColour=&H00000000,BorderStyle=1,Outline={style_info['outline_width']},MarginV={style_info['margin']}'",
@@ -717,7 +732,6 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             else:
                 # Add subtitles as a separate stream
                 cmd = [
-                    'ffmpeg',
                     '-y',
                     '-i', video_path,
                     '-i', subtitle_path,
@@ -728,7 +742,7 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
                 ]
             
             # Run ffmpeg
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = ffmpeg_service.run_sync(cmd)
             
             if result.returncode != 0:
                 return {
@@ -736,6 +750,7 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
                     "error": f"FFmpeg error: {result.stderr}",
                     "message": "Fehler beim Hinzufügen der Untertitel"
                 }
+            self.media_cache.put(cache_key, output_path)
             
             return {
                 "success": True,
@@ -829,10 +844,11 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
     def get_voice_overs(self) -> Dict[str, Any]:
         """Get all generated voice overs"""
         try:
+            voice_overs = self.media_store.list(self.collection)
             return {
                 "success": True,
-                "voice_overs": self.voice_storage.get("voice_overs", []),
-                "count": len(self.voice_storage.get("voice_overs", []))
+                "voice_overs": voice_overs,
+                "count": len(voice_overs)
             }
         except Exception as e:
             return {
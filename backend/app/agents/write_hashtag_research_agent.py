@@ -1,5 +1,5 @@
 from crewai import Agent, Task, Crew
-from crewai.llm import LLM
+from app.core.llm_gateway import create_llm
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain_community.document_loaders import PyPDFLoader
@@ -14,6 +14,7 @@ from app.agents.crews.base_crew import BaseCrew
 from app.services.knowledge_base_manager import knowledge_base_manager
 from app.services.supabase_client import SupabaseClient
 from app.core.storage import StorageFactory
+from app.core.streaming import emit_event
 import asyncio
 import logging
 
@@ -29,7 +30,7 @@ class WriteHashtagResearchAgent(BaseCrew):
         # Use shared embeddings and vector store
         self.embeddings = knowledge_base_manager.get_embeddings()
         self.vector_store = knowledge_base_manager.get_vector_store()
-        self.llm = LLM(model="gpt-4o-mini", api_key=openai_api_key)
+        self.llm = create_llm("gpt-4o-mini", api_key=openai_api_key)
         
         # Collection name for hashtag research
         self.collection = "instagram_posts"
@@ -39,6 +40,7 @@ class WriteHashtagResearchAgent(BaseCrew):
         
         # Create the agent
         self.write_hashtag_agent = self._create_write_hashtag_agent()
+        self.instrument_agent(self.write_hashtag_agent)
     
     async def _save_to_database(self, post_data: Dict[str, Any]) -> Optional[str]:
         """Save Instagram post to multi-tenant storage"""
@@ -248,6 +250,8 @@ class WriteHashtagResearchAgent(BaseCrew):
             # Get period information and context
             period_info = self._get_period_info(period_name)
             context = self._get_period_context(period_name)
+            emit_event("retrieval", period_name=period_name, context_length=len(context),
+                       context=context[:500] + "..." if len(context) > 500 else context)
             
             # Check for existing content in database
             content_hash = hashlib.md5(f"{affirmation}_{period_name}_{style}".encode()).hexdigest()
@@ -328,7 +332,8 @@ class WriteHashtagResearchAgent(BaseCrew):
             crew = Crew(
                 agents=[self.write_hashtag_agent],
                 tasks=[task],
-                verbose=True
+                verbose=True,
+                step_callback=self._on_agent_step
             )
             
             result = crew.kickoff()
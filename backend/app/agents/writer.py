@@ -1,5 +1,6 @@
 from crewai import Agent
 from textwrap import dedent
+from app.core.llm_gateway import create_llm
 from app.core.storage import StorageFactory
 import asyncio
 import json
@@ -27,7 +28,8 @@ class WriterAgent:
             """),
             verbose=True,
             allow_delegation=False,
-            max_iter=3
+            max_iter=3,
+            llm=create_llm()
         )
     
     def get_tasks(self):
@@ -6,7 +6,7 @@ import asyncio
 
 from app.agents.crews.base_crew import BaseCrew
 from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
+from app.core.llm_gateway import create_llm
 from app.core.storage import StorageFactory
 
 
@@ -15,10 +15,7 @@ class XAnalysisAgent(BaseCrew):
     
     def __init__(self):
         super().__init__()
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.7
-        )
+        self.llm = create_llm("gpt-4o-mini", temperature=0.7)
         
         # Initialize storage adapter
         self.storage = StorageFactory.get_adapter()
@@ -267,7 +264,7 @@ class XAnalysisAgent(BaseCrew):
         """Check if the X analysis agent is functioning properly."""
         try:
             # Test LLM connection
-            test_response = self.llm.invoke("Test X analysis agent connection")
+            test_response = self.llm.call("Test X analysis agent connection")
             
             return {
                 "status": "healthy",
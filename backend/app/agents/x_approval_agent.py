@@ -6,7 +6,7 @@ import uuid
 
 from app.agents.crews.base_crew import BaseCrew
 from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
+from app.core.llm_gateway import create_llm
 
 
 class XApprovalAgent(BaseCrew):
@@ -14,10 +14,7 @@ class XApprovalAgent(BaseCrew):
     
     def __init__(self):
         super().__init__()
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.3  # Lower temperature for consistent quality checks
-        )
+        self.llm = create_llm("gpt-4o-mini", temperature=0.3)  # Lower temperature for consistent quality checks
         self.results_path = Path("storage/x_approvals")
         self.results_path.mkdir(parents=True, exist_ok=True)
         self.pending_approvals = []
@@ -284,7 +281,7 @@ class XApprovalAgent(BaseCrew):
         """Check if the X approval agent is functioning properly."""
         try:
             # Test LLM connection
-            test_response = self.llm.invoke("Test X approval agent connection")
+            test_response = self.llm.call("Test X approval agent connection")
             
             return {
                 "status": "healthy",
@@ -7,7 +7,7 @@ from app.agents.crews.base_crew import BaseCrew
 from app.agents.x_analysis_agent import XAnalysisAgent
 from app.services.supabase_client import get_all_activities
 from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
+from app.core.llm_gateway import create_llm
 
 
 class XContentStrategyAgent(BaseCrew):
@@ -15,10 +15,7 @@ class XContentStrategyAgent(BaseCrew):
     
     def __init__(self):
         super().__init__()
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.7
-        )
+        self.llm = create_llm("gpt-4o-mini", temperature=0.7)
         self.results_path = Path("storage/x_strategy")
         self.results_path.mkdir(parents=True, exist_ok=True)
         self.analysis_agent = XAnalysisAgent()
@@ -273,7 +270,7 @@ class XContentStrategyAgent(BaseCrew):
         """Check if the X content strategy agent is functioning properly."""
         try:
             # Test LLM connection
-            test_response = self.llm.invoke("Test X strategy agent connection")
+            test_response = self.llm.call("Test X strategy agent connection")
             
             return {
                 "status": "healthy",
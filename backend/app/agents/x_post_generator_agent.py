@@ -7,7 +7,7 @@ from app.agents.crews.base_crew import BaseCrew
 from app.agents.x_content_strategy_agent import XContentStrategyAgent
 from app.services.supabase_client import get_activities_by_period
 from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
+from app.core.llm_gateway import create_llm
 
 
 class XPostGeneratorAgent(BaseCrew):
@@ -15,10 +15,7 @@ class XPostGeneratorAgent(BaseCrew):
     
     def __init__(self):
         super().__init__()
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.8
-        )
+        self.llm = create_llm("gpt-4o-mini", temperature=0.8)
         self.results_path = Path("storage/x_posts")
         self.results_path.mkdir(parents=True, exist_ok=True)
         self.strategy_agent = XContentStrategyAgent()
@@ -251,7 +248,7 @@ class XPostGeneratorAgent(BaseCrew):
         """Check if the X post generator agent is functioning properly."""
         try:
             # Test LLM connection
-            test_response = self.llm.invoke("Test X post generator connection")
+            test_response = self.llm.call("Test X post generator connection")
             
             return {
                 "status": "healthy",
@@ -8,7 +8,7 @@ from zoneinfo import ZoneInfo
 from app.agents.crews.base_crew import BaseCrew
 from app.services.supabase_client import supabase
 from crewai import Agent, Task, Crew
-from langchain_openai import ChatOpenAI
+from app.core.llm_gateway import create_llm
 
 
 class XSchedulerAgent(BaseCrew):
@@ -16,10 +16,7 @@ class XSchedulerAgent(BaseCrew):
     
     def __init__(self):
         super().__init__()
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.5
-        )
+        self.llm = create_llm("gpt-4o-mini", temperature=0.5)
         self.results_path = Path("storage/x_schedules")
         self.results_path.mkdir(parents=True, exist_ok=True)
         self.scheduled_posts = []
@@ -349,7 +346,7 @@ class XSchedulerAgent(BaseCrew):
         """Check if the X scheduler agent is functioning properly."""
         try:
             # Test LLM connection
-            test_response = self.llm.invoke("Test X scheduler connection")
+            test_response = self.llm.call("Test X scheduler connection")
             
             # Count scheduled vs published
             scheduled_count = sum(1 for p in self.scheduled_posts if p["status"] == "scheduled")
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from app.models.content import AffirmationRequest
 from app.core.dependencies import get_agent
+from app.core.streaming import wants_stream, stream_agent_call, sse_response
 from app.core.auth import get_current_user
 from app.models.auth import User
 from app.core.middleware import RequestContext
@@ -20,12 +21,29 @@ PERIODS = {
     "Umsicht": {"description": "Practice wisdom and reflection", "color": "#B4A0E5"}
 }
 
+def _affirmations_response(result: dict, period_name: str) -> dict:
+    """Shape a generate_affirmations result into the endpoint's response body"""
+    if not result.get("success", False):
+        raise HTTPException(status_code=500, detail=result.get("error", "Failed to generate affirmations"))
+    
+    return {
+        "status": "success",
+        "period": period_name,
+        "affirmations": result.get("affirmations", []),
+        "count": len(result.get("affirmations", [])),
+        "message": result.get("message", "Affirmations generated successfully")
+    }
+
 @router.post("/generate-affirmations")
 async def generate_affirmations(
     request: AffirmationRequest,
+    http_request: Request,
     current_user: User = Depends(get_current_user)
 ):
-    """Generate affirmations for a specific period (requires authentication)"""
+    """Generate affirmations for a specific period (requires authentication)
+    
+    Supports Server-Sent Events streaming via `?stream=true` or `Accept: text/event-stream`.
+    """
     affirmations_agent = get_agent('affirmations_agent')
     logger.info(f"Affirmations agent status: {affirmations_agent}")
     logger.info(f"Affirmations agent type: {type(affirmations_agent)}")
@@ -49,23 +67,22 @@ async def generate_affirmations(
         
         period_info = PERIODS.get(request.period_name, request.period_info)
         
+        if wants_stream(http_request):
+            return sse_response(stream_agent_call(
+                affirmations_agent.generate_affirmations,
+                period_name=request.period_name,
+                period_info=period_info,
+                count=request.count,
+                result_transform=lambda result: _affirmations_response(result, request.period_name)
+            ))
+        
         result = await affirmations_agent.generate_affirmations(
             period_name=request.period_name,
             period_info=period_info,
             count=request.count
         )
         
-        # Check if generation was successful
-        if not result.get("success", False):
-            raise HTTPException(status_code=500, detail=result.get("error", "Failed to generate affirmations"))
-        
-        return {
-            "status": "success",
-            "period": request.period_name,
-            "affirmations": result.get("affirmations", []),
-            "count": len(result.get("affirmations", [])),
-            "message": result.get("message", "Affirmations generated successfully")
-        }
+        return _affirmations_response(result, request.period_name)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1,6 +1,6 @@
 """API Router for unified App Testing (iOS and Android)"""
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, BackgroundTasks
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, BackgroundTasks, Header, Request
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel, Field
 import os
@@ -9,7 +9,10 @@ import shutil
 from datetime import datetime
 import hashlib
 
+from app.core.auth import require_job_owner
 from app.core.dependencies import get_agent
+from app.core.job_queue import enqueue_job, job_accepted
+from app.services.agent_jobs import agent_call_payload
 from app.agents.app_testing_agent import AppTestingAgent
 import logging
 
@@ -178,7 +181,10 @@ async def upload_app_for_testing(
 @router.post("/", response_model=AppTestResponse)
 async def create_app_test(
     request: AppTestRequest,
+    http_request: Request,
     app_path: str,
+    background: bool = False,
+    idempotency_key: Optional[str] = Header(None),
     agent: AppTestingAgent = Depends(lambda: get_agent("app_testing"))
 ):
     """
@@ -188,12 +194,28 @@ async def create_app_test(
     - **app_path**: Path to the app file (from upload endpoint)
     - **device_id**: Optional specific device/simulator to use
     - **test_config**: Optional test configuration
+    - **background**: Run the test as a background job and return its job id
     """
+    owner_id = require_job_owner(http_request) if background else None
     try:
         # Validate app path exists
         if not os.path.exists(app_path):
             raise HTTPException(status_code=404, detail="App file not found")
         
+        if background:
+            job = enqueue_job(
+                "app_testing",
+                agent_call_payload("app_testing", "test_app", {
+                    "platform": request.platform,
+                    "app_path": app_path,
+                    "device_id": request.device_id,
+                    "test_config": request.test_config
+                }),
+                idempotency_key=idempotency_key,
+                owner_id=owner_id
+            )
+            return job_accepted(job)
+        
         # Start test
         result = await agent.test_app(
             platform=request.platform,
@@ -21,6 +21,7 @@ from app.core.auth import (
 )
 from jose import JWTError
 from app.core.dependencies import get_supabase_client
+from app.core.access import access_resolver
 from app.core.security.api_keys import APIKeyManager
 
 
@@ -126,6 +127,7 @@ async def signup(request: SignupRequest):
             "updated_at": datetime.utcnow().isoformat()
         }
         supabase.table("project_members").insert(project_membership_data).execute()
+        access_resolver.invalidate(str(user_id))
         
         # Create tokens
         permissions = [p.value for p in ROLE_PERMISSIONS[OrganizationRole.OWNER]]
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from app.models.content import ContentRequest, ApprovalRequest, ContentResponse, QuestionRequest
 from app.core.dependencies import get_agent, content_wrapper, content_storage
+from app.core.streaming import wants_stream, stream_agent_call, sse_response
 from app.core.auth import get_current_user
 from app.models.auth import User
 from app.core.middleware import RequestContext
+from app.core.job_queue import enqueue_job, get_job_queue
 from datetime import datetime
 import uuid
 import traceback
@@ -14,10 +16,17 @@ router = APIRouter(prefix="/content", tags=["Content"])
 @router.post("/generate", response_model=ContentResponse)
 async def generate_content(
     request: ContentRequest, 
-    background_tasks: BackgroundTasks,
+    http_request: Request,
     current_user: User = Depends(get_current_user)
 ):
-    """Generate content (requires authentication)"""
+    """Generate content (requires authentication)
+    
+    By default generation runs as a background job and the content is polled via
+    GET /content/{content_id}; an `Idempotency-Key` header makes retried requests
+    reuse the first job. With `?stream=true` or `Accept: text/event-stream`
+    the generation runs inline and its progress is streamed as Server-Sent Events,
+    ending with a `result` event holding the finished content.
+    """
     content_id = str(uuid.uuid4())
     
     # Extract organization context
@@ -41,14 +50,43 @@ async def generate_content(
         project_id=project_id
     )
     
-    # Run content generation in background
-    background_tasks.add_task(
-        run_content_generation,
-        content_id,
-        request.knowledge_files,
-        request.style_preferences,
-        context
+    if wants_stream(http_request):
+        return sse_response(stream_agent_call(
+            run_content_generation,
+            content_id,
+            request.knowledge_files,
+            request.style_preferences,
+            context,
+            result_transform=lambda _: _content_response(content_id).model_dump()
+        ))
+    
+    # Run content generation as a background job
+    job = enqueue_job(
+        "content_generation",
+        {
+            "content_id": content_id,
+            "knowledge_files": request.knowledge_files,
+            "style_preferences": request.style_preferences,
+            "context": context.model_dump(mode="json")
+        },
+        idempotency_key=http_request.headers.get("Idempotency-Key"),
+        owner_id=str(current_user.id)
     )
+    if job["payload"]["content_id"] != content_id:
+        # Retried request: answer with the content of the original job
+        del content_storage[content_id]
+        content_id = job["payload"]["content_id"]
+        if content_id in content_storage:
+            return _content_response(content_id)
+        content_storage[content_id] = {
+            "status": "processing",
+            "created_at": job["created_at"],
+            "request": request.model_dump(),
+            "user_id": current_user.id,
+            "organization_id": org_id,
+            "project_id": project_id
+        }
+    content_storage[content_id]["job_id"] = job["id"]
     
     return ContentResponse(
         content_id=content_id,
@@ -75,15 +113,7 @@ async def get_content(
     if content.get("user_id") != current_user.id and content.get("organization_id") != current_user.default_organization_id:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    return ContentResponse(
-        content_id=content_id,
-        research_results=content.get("research_results", ""),
-        written_content=content.get("written_content", ""),
-        visual_concepts=content.get("visual_concepts", ""),
-        images=content.get("images", []),
-        status=content.get("status", "unknown"),
-        created_at=content.get("created_at", "")
-    )
+    return _content_response(content_id)
 
 @router.post("/approve")
 async def approve_content(
@@ -121,6 +151,7 @@ async def list_content(
     for cid, content in content_storage.items():
         # Filter by user's organization
         if content.get("organization_id") == current_user.default_organization_id or content.get("user_id") == current_user.id:
+            _sync_job_state(content)
             user_content.append({
                 "content_id": cid,
                 "status": content.get("status", "unknown"),
@@ -150,7 +181,32 @@ async def delete_content(
     del content_storage[content_id]
     return {"status": "success", "message": "Content deleted"}
 
-# Helper function
+# Helper functions
+def _sync_job_state(content: dict):
+    """Copy the outcome of the content's background job into the stored content"""
+    if not content.get("job_id") or content.get("status") in ("completed", "error"):
+        return
+    job = get_job_queue().get(content["job_id"])
+    if not job:
+        return
+    if job["status"] == "succeeded":
+        content.update({"status": "completed", **(job["result"] or {})})
+    elif job["status"] in ("failed", "cancelled"):
+        content.update({"status": "error", "error": job["error"] or job["status"]})
+
+def _content_response(content_id: str) -> ContentResponse:
+    content = content_storage[content_id]
+    _sync_job_state(content)
+    return ContentResponse(
+        content_id=content_id,
+        research_results=content.get("research_results", ""),
+        written_content=content.get("written_content", ""),
+        visual_concepts=content.get("visual_concepts", ""),
+        images=content.get("images", []),
+        status=content.get("status", "unknown"),
+        created_at=content.get("created_at", "")
+    )
+
 async def run_content_generation(content_id: str, knowledge_files, style_preferences, context: RequestContext):
     try:
         content_storage[content_id]["status"] = "researching"
@@ -148,6 +148,24 @@ class AIAgent(BaseModel):
     description: Optional[str] = None
 
 
+def get_assignment_counts(department_ids: List[str], supabase) -> Dict[str, Dict[str, int]]:
+    """Get member and AI agent counts for many departments in one query."""
+    counts = {dept_id: {'member_count': 0, 'ai_agent_count': 0} for dept_id in department_ids}
+    if not department_ids:
+        return counts
+    
+    response = supabase.table('department_assignment_counts').select(
+        'department_id, member_count, ai_agent_count'
+    ).in_('department_id', department_ids).execute()
+    
+    for row in response.data or []:
+        counts[row['department_id']] = {
+            'member_count': row['member_count'] or 0,
+            'ai_agent_count': row['ai_agent_count'] or 0
+        }
+    return counts
+
+
 @router.get("", response_model=List[Department])
 async def list_departments(
     project_id: UUID,
@@ -162,20 +180,13 @@ async def list_departments(
             'project_id', str(project_id)
         ).order('name').execute()
         
+        # Assignment counts for all departments in one query
+        assignment_counts = get_assignment_counts([dept['id'] for dept in response.data], supabase)
+        
         departments = []
         for dept in response.data:
             dept_dict = dict(dept)
-            
-            # Get assignment counts
-            assignments = supabase.table('department_assignments').select(
-                'assignee_type'
-            ).eq('department_id', dept['id']).execute()
-            
-            member_count = sum(1 for a in assignments.data if a['assignee_type'] == 'member')
-            ai_agent_count = sum(1 for a in assignments.data if a['assignee_type'] == 'ai_agent')
-            
-            dept_dict['member_count'] = member_count
-            dept_dict['ai_agent_count'] = ai_agent_count
+            dept_dict.update(assignment_counts[dept['id']])
             departments.append(Department(**dept_dict))
             
         return departments
@@ -242,15 +253,7 @@ async def get_department(
         dept_dict = dict(response.data)
         
         # Get assignment counts
-        assignments = supabase.table('department_assignments').select(
-            'assignee_type'
-        ).eq('department_id', str(department_id)).execute()
-        
-        member_count = sum(1 for a in assignments.data if a['assignee_type'] == 'member')
-        ai_agent_count = sum(1 for a in assignments.data if a['assignee_type'] == 'ai_agent')
-        
-        dept_dict['member_count'] = member_count
-        dept_dict['ai_agent_count'] = ai_agent_count
+        dept_dict.update(get_assignment_counts([str(department_id)], supabase)[str(department_id)])
         
         return Department(**dept_dict)
     except Exception as e:
@@ -295,15 +298,7 @@ async def update_department(
         dept_dict = dict(response.data[0])
         
         # Get assignment counts
-        assignments = supabase.table('department_assignments').select(
-            'assignee_type'
-        ).eq('department_id', str(department_id)).execute()
-        
-        member_count = sum(1 for a in assignments.data if a['assignee_type'] == 'member')
-        ai_agent_count = sum(1 for a in assignments.data if a['assignee_type'] == 'ai_agent')
-        
-        dept_dict['member_count'] = member_count
-        dept_dict['ai_agent_count'] = ai_agent_count
+        dept_dict.update(get_assignment_counts([str(department_id)], supabase)[str(department_id)])
         
         return Department(**dept_dict)
     except Exception as e:
@@ -1,12 +1,17 @@
 from typing import List, Optional, Dict, Any
 from uuid import UUID, uuid4
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from pydantic import BaseModel, Field
 from datetime import datetime, date
 
 from supabase import create_client, Client
 import os
 from ...core.supabase_auth import get_current_user
+from ...core.access import UserAccess, access_resolver
+from ...core.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, apply_keyset, parse_fields, project_fields,
+    projected_response, select_columns, set_next_cursor, split_page, use_legacy_listing
+)
 from ...core.dependencies import get_goal_suggestion_crew, get_supabase_client
 from ...agents.crews.goal_suggestion_crew import GoalSuggestionInput, GoalSuggestionOutput
 
@@ -54,118 +59,119 @@ class Goal(BaseModel):
     project_name: Optional[str] = None
 
 
-async def verify_project_access(project_id: str, user_id: str, supabase) -> bool:
+async def verify_project_access(project_id: str, access: UserAccess, supabase) -> bool:
     """Verify user has access to the project."""
     try:
-        # Check if user is a member of the project
-        member_check = supabase.table('project_members').select('role').eq(
-            'project_id', project_id
-        ).eq('user_id', user_id).execute()
-        
-        if member_check.data:
-            return True
-        
-        # Check if user is member of organization that owns the project
-        project_org = supabase.table('projects').select('organization_id').eq(
-            'id', project_id
-        ).single().execute()
-        
-        if project_org.data:
-            org_member_check = supabase.table('organization_members').select('role').eq(
-                'organization_id', project_org.data['organization_id']
-            ).eq('user_id', user_id).execute()
-            
-            return bool(org_member_check.data)
-        
-        return False
+        return access_resolver.can_access_project(access, project_id, supabase)
     except:
         return False
 
 
+def get_task_counts(goal_ids: List[str], supabase) -> Dict[str, Dict[str, int]]:
+    """Get task and completed task counts for many goals in one query."""
+    counts = {goal_id: {'task_count': 0, 'completed_task_count': 0} for goal_id in goal_ids}
+    if not goal_ids:
+        return counts
+    
+    response = supabase.table('goal_task_counts').select(
+        'goal_id, task_count, completed_task_count'
+    ).in_('goal_id', goal_ids).execute()
+    
+    for row in response.data or []:
+        counts[row['goal_id']] = {
+            'task_count': row['task_count'] or 0,
+            'completed_task_count': row['completed_task_count'] or 0
+        }
+    return counts
+
+
+GOAL_DERIVED_FIELDS = ('task_count', 'completed_task_count', 'project_name')
+GOAL_COLUMNS = tuple(field for field in Goal.model_fields if field not in GOAL_DERIVED_FIELDS)
+
+
 @router.get("", response_model=List[Goal])
 async def list_goals(
+    response: Response,
     project_id: Optional[UUID] = None,
     status: Optional[str] = None,
+    target_before: Optional[date] = None,
+    target_after: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    legacy: bool = False,
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
-    """List goals. Can filter by project and status."""
+    """List goals, newest first. Can filter by project, status and target date range.
+    
+    Results are paginated by keyset: pass the X-Next-Cursor header of a page as
+    `cursor` to get the next one. `fields` limits the returned fields (comma
+    separated). `legacy=true` returns every matching goal in one response.
+    """
     supabase = get_supabase()
+    projection = parse_fields(fields, Goal.model_fields)
+    paginate = not use_legacy_listing(legacy)
     
     try:
-        # Get the user ID from the auth context
-        auth_email = current_user.get('email')
-        user_id = str(current_user['user_id'])
-        
-        # Get the public user ID from the users table if needed
-        if auth_email:
-            user_result = supabase.table('users').select('id').eq('email', auth_email).execute()
-            if user_result.data:
-                user_id = user_result.data[0]['id']
+        # Load the user's memberships once for all access checks
+        access = access_resolver.get_user_access(current_user, supabase)
         
         # Build query
-        query = supabase.table('goals').select(
-            '*, projects!inner(id, name, organization_id)'
-        )
+        query = supabase.table('goals').select(select_columns(
+            projection, GOAL_COLUMNS, 'projects!inner(id, name, organization_id)'
+        ))
         
         if project_id:
             # Verify access to specific project
-            if not await verify_project_access(str(project_id), user_id, supabase):
+            if not await verify_project_access(str(project_id), access, supabase):
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="Access denied to this project"
                 )
             query = query.eq('project_id', str(project_id))
         else:
-            # Get all projects user has access to
-            # First get projects via direct membership
-            member_projects = supabase.table('project_members').select('project_id').eq(
-                'user_id', user_id
-            ).execute()
-            
-            # Then get projects via organization membership
-            org_memberships = supabase.table('organization_members').select('organization_id').eq(
-                'user_id', user_id
-            ).execute()
-            
-            project_ids = [m['project_id'] for m in member_projects.data]
-            
-            if org_memberships.data:
-                org_ids = [m['organization_id'] for m in org_memberships.data]
-                org_projects = supabase.table('projects').select('id').in_(
-                    'organization_id', org_ids
-                ).execute()
-                project_ids.extend([p['id'] for p in org_projects.data])
+            # Get all projects user has access to, directly or via organization membership
+            project_ids = access_resolver.accessible_project_ids(access, supabase)
             
             if not project_ids:
                 return []
             
-            query = query.in_('project_id', list(set(project_ids)))
+            query = query.in_('project_id', project_ids)
         
         if status:
             query = query.eq('status', status)
+        if target_before:
+            query = query.lte('target_date', target_before.isoformat())
+        if target_after:
+            query = query.gte('target_date', target_after.isoformat())
+        
+        next_cursor = None
+        if paginate:
+            rows, next_cursor = split_page(apply_keyset(query, cursor, limit).execute().data, limit)
+            set_next_cursor(response, next_cursor)
+        else:
+            rows = query.order('created_at', desc=True).execute().data
         
-        response = query.order('created_at', desc=True).execute()
+        # Task counts for the whole page in one query, unless projected away
+        wants_counts = projection is None or {'task_count', 'completed_task_count'} & set(projection)
+        task_counts = get_task_counts([goal['id'] for goal in rows], supabase) if wants_counts else {}
         
         goals = []
-        for goal in response.data:
+        for goal in rows:
             goal_dict = dict(goal)
-            
-            # Get task counts
-            task_count_response = supabase.table('tasks').select(
-                'id, status', count='exact'
-            ).eq('goal_id', goal['id']).execute()
-            
-            goal_dict['task_count'] = task_count_response.count or 0
-            goal_dict['completed_task_count'] = len([
-                t for t in task_count_response.data if t['status'] == 'completed'
-            ])
+            goal_dict.update(task_counts.get(goal['id'], {}))
             
             if goal.get('projects'):
                 goal_dict['project_name'] = goal['projects']['name']
                 del goal_dict['projects']
             
-            goals.append(Goal(**goal_dict))
+            if projection is None:
+                goals.append(Goal(**goal_dict))
+            else:
+                goals.append(project_fields(goal_dict, projection))
         
+        if projection is not None:
+            return projected_response(goals, next_cursor)
         return goals
     except HTTPException:
         raise
@@ -184,18 +190,11 @@ async def create_goal(
     """Create a new goal for a project."""
     supabase = get_supabase()
     
-    # Get the user ID from the auth context
-    auth_email = current_user.get('email')
-    user_id = str(current_user['user_id'])
-    
-    # Get the public user ID from the users table if needed
-    if auth_email:
-        user_result = supabase.table('users').select('id').eq('email', auth_email).execute()
-        if user_result.data:
-            user_id = user_result.data[0]['id']
+    # Load the user's memberships once for all access checks
+    access = access_resolver.get_user_access(current_user, supabase)
     
     # Verify user has access to the project
-    if not await verify_project_access(str(goal.project_id), user_id, supabase):
+    if not await verify_project_access(str(goal.project_id), access, supabase):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this project"
@@ -250,32 +249,18 @@ async def get_goal(
         
         goal_dict = dict(response.data)
         
-        # Get the user ID from the auth context
-        auth_email = current_user.get('email')
-        user_id = str(current_user['user_id'])
-        
-        # Get the public user ID from the users table if needed
-        if auth_email:
-            user_result = supabase.table('users').select('id').eq('email', auth_email).execute()
-            if user_result.data:
-                user_id = user_result.data[0]['id']
+        # Load the user's memberships once for all access checks
+        access = access_resolver.get_user_access(current_user, supabase)
         
         # Verify user has access to the project
-        if not await verify_project_access(goal_dict['project_id'], user_id, supabase):
+        if not await verify_project_access(goal_dict['project_id'], access, supabase):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied"
             )
         
         # Get task counts
-        task_count_response = supabase.table('tasks').select(
-            'id, status', count='exact'
-        ).eq('goal_id', str(goal_id)).execute()
-        
-        goal_dict['task_count'] = task_count_response.count or 0
-        goal_dict['completed_task_count'] = len([
-            t for t in task_count_response.data if t['status'] == 'completed'
-        ])
+        goal_dict.update(get_task_counts([str(goal_id)], supabase)[str(goal_id)])
         
         if goal_dict.get('projects'):
             goal_dict['project_name'] = goal_dict['projects']['name']
@@ -303,15 +288,8 @@ async def update_goal(
     """Update a goal."""
     supabase = get_supabase()
     
-    # Get the user ID from the auth context
-    auth_email = current_user.get('email')
-    user_id = str(current_user['user_id'])
-    
-    # Get the public user ID from the users table if needed
-    if auth_email:
-        user_result = supabase.table('users').select('id').eq('email', auth_email).execute()
-        if user_result.data:
-            user_id = user_result.data[0]['id']
+    # Load the user's memberships once for all access checks
+    access = access_resolver.get_user_access(current_user, supabase)
     
     # Get the goal to verify access
     try:
@@ -319,7 +297,7 @@ async def update_goal(
             'id', str(goal_id)
         ).single().execute()
         
-        if not await verify_project_access(goal_check.data['project_id'], user_id, supabase):
+        if not await verify_project_access(goal_check.data['project_id'], access, supabase):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied"
@@ -367,14 +345,7 @@ async def update_goal(
         goal_dict = dict(goal_response.data)
         
         # Get task counts
-        task_count_response = supabase.table('tasks').select(
-            'id, status', count='exact'
-        ).eq('goal_id', str(goal_id)).execute()
-        
-        goal_dict['task_count'] = task_count_response.count or 0
-        goal_dict['completed_task_count'] = len([
-            t for t in task_count_response.data if t['status'] == 'completed'
-        ])
+        goal_dict.update(get_task_counts([str(goal_id)], supabase)[str(goal_id)])
         
         if goal_dict.get('projects'):
             goal_dict['project_name'] = goal_dict['projects']['name']
@@ -398,15 +369,8 @@ async def delete_goal(
     """Delete a goal. This will also delete all associated tasks."""
     supabase = get_supabase()
     
-    # Get the user ID from the auth context
-    auth_email = current_user.get('email')
-    user_id = str(current_user['user_id'])
-    
-    # Get the public user ID from the users table if needed
-    if auth_email:
-        user_result = supabase.table('users').select('id').eq('email', auth_email).execute()
-        if user_result.data:
-            user_id = user_result.data[0]['id']
+    # Load the user's memberships once for all access checks
+    access = access_resolver.get_user_access(current_user, supabase)
     
     # Get the goal to verify access
     try:
@@ -414,7 +378,7 @@ async def delete_goal(
             'id', str(goal_id)
         ).single().execute()
         
-        if not await verify_project_access(goal_check.data['project_id'], user_id, supabase):
+        if not await verify_project_access(goal_check.data['project_id'], access, supabase):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied"
@@ -478,18 +442,11 @@ async def suggest_goals(
     """Generate AI-powered goal suggestions based on project context."""
     supabase = get_supabase()
     
-    # Get the user ID from the auth context
-    auth_email = current_user.get('email')
-    user_id = str(current_user['user_id'])
-    
-    # Get the public user ID from the users table if needed
-    if auth_email:
-        user_result = supabase.table('users').select('id').eq('email', auth_email).execute()
-        if user_result.data:
-            user_id = user_result.data[0]['id']
+    # Load the user's memberships once for all access checks
+    access = access_resolver.get_user_access(current_user, supabase)
     
     # Verify user has access to the project
-    if not await verify_project_access(str(request.project_id), user_id, supabase):
+    if not await verify_project_access(str(request.project_id), access, supabase):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this project"
@@ -615,18 +572,12 @@ async def submit_goal_suggestion_feedback(
     """Submit feedback on AI-generated goal suggestions."""
     supabase = get_supabase()
     
-    # Get the user ID from the auth context
-    auth_email = current_user.get('email')
-    user_id = str(current_user['user_id'])
-    
-    # Get the public user ID from the users table if needed
-    if auth_email:
-        user_result = supabase.table('users').select('id').eq('email', auth_email).execute()
-        if user_result.data:
-            user_id = user_result.data[0]['id']
+    # Resolve the public user ID and memberships once for all access checks
+    access = access_resolver.get_user_access(current_user, supabase)
+    user_id = access.user_id
     
     # Verify user has access to the project
-    if not await verify_project_access(str(feedback.project_id), user_id, supabase):
+    if not await verify_project_access(str(feedback.project_id), access, supabase):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this project"
@@ -689,18 +640,11 @@ async def get_goal_feedback_summary(
     """Get a summary of goal suggestion feedback for a project."""
     supabase = get_supabase()
     
-    # Get the user ID from the auth context
-    auth_email = current_user.get('email')
-    user_id = str(current_user['user_id'])
-    
-    # Get the public user ID from the users table if needed
-    if auth_email:
-        user_result = supabase.table('users').select('id').eq('email', auth_email).execute()
-        if user_result.data:
-            user_id = user_result.data[0]['id']
+    # Load the user's memberships once for all access checks
+    access = access_resolver.get_user_access(current_user, supabase)
     
     # Verify user has access to the project
-    if not await verify_project_access(str(project_id), user_id, supabase):
+    if not await verify_project_access(str(project_id), access, supabase):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this project"
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Header
+from fastapi.concurrency import run_in_threadpool
 from app.models.instagram import (
     InstagramPostRequest, 
     InstagramPostingRequest,
@@ -7,24 +8,52 @@ from app.models.instagram import (
     InstagramStrategyRequest,
     InstagramMultipleAnalyzeRequest
 )
+from app.core.auth import require_job_owner
 from app.core.dependencies import get_agent
+from app.core.streaming import wants_stream, stream_agent_call, sse_response
 from app.core.config import settings
+from app.core.job_queue import enqueue_job, job_accepted
+from app.services.agent_jobs import analyze_instagram_account as run_account_analysis
 from datetime import datetime
 import json
 import os
 import uuid
 import logging
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["Instagram"])
 
+def _instagram_post_response(result: dict) -> dict:
+    """Shape a generate_instagram_post result into the endpoint's response body"""
+    # Check if generation was successful
+    if not result.get("success", False):
+        raise HTTPException(status_code=500, detail=result.get("error", "Failed to generate Instagram post"))
+    
+    # The agent already stores the post, just return it
+    return {
+        "status": "success",
+        "instagram_post": result.get("post", {}),
+        "message": result.get('message', 'Instagram post generated successfully')
+    }
+
 @router.post("/generate-instagram-post")
-async def generate_instagram_post(request: InstagramPostRequest):
+async def generate_instagram_post(request: InstagramPostRequest, http_request: Request):
+    """Generate an Instagram post; supports SSE streaming via `?stream=true`"""
     write_hashtag_agent = get_agent('write_hashtag_agent')
     if not write_hashtag_agent:
         raise HTTPException(status_code=503, detail="Instagram Agent not initialized")
     
     try:
+        if wants_stream(http_request):
+            return sse_response(stream_agent_call(
+                write_hashtag_agent.generate_instagram_post,
+                affirmation=request.affirmation,
+                period_name=request.period_name,
+                style=request.style,
+                result_transform=_instagram_post_response
+            ))
+        
         # Generate Instagram post
         result = await write_hashtag_agent.generate_instagram_post(
             affirmation=request.affirmation,
@@ -32,19 +61,7 @@ async def generate_instagram_post(request: InstagramPostRequest):
             style=request.style
         )
         
-        # Check if generation was successful
-        if not result.get("success", False):
-            raise HTTPException(status_code=500, detail=result.get("error", "Failed to generate Instagram post"))
-        
-        # Extract the post data
-        post_data = result.get("post", {})
-        
-        # The agent already stores the post, just return it
-        return {
-            "status": "success",
-            "instagram_post": post_data,
-            "message": result.get('message', 'Instagram post generated successfully')
-        }
+        return _instagram_post_response(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -140,38 +157,56 @@ async def post_to_instagram(request: InstagramPostingRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/api/analyze-instagram-account")
-async def analyze_instagram_account(request: InstagramAnalyzeRequest):
+async def analyze_instagram_account(
+    request: InstagramAnalyzeRequest,
+    http_request: Request,
+    background: bool = False,
+    idempotency_key: Optional[str] = Header(None)
+):
+    """Analyze an Instagram account
+    
+    With `?background=true` the analysis runs as a background job and the
+    response points at its status.
+    """
     instagram_analyzer_agent = get_agent('instagram_analyzer_agent')
     if not instagram_analyzer_agent:
         raise HTTPException(status_code=503, detail="Instagram Analyzer Agent not initialized")
     
-    try:
-        analysis = instagram_analyzer_agent.analyze_account(
-            account_url_or_username=request.account_url_or_username,
-            analysis_focus=request.analysis_focus
+    if background:
+        job = enqueue_job(
+            "instagram_analysis",
+            {
+                "account_url_or_username": request.account_url_or_username,
+                "analysis_focus": request.analysis_focus
+            },
+            idempotency_key=idempotency_key,
+            owner_id=require_job_owner(http_request)
         )
-        
-        # Save analysis
-        analysis_dir = "storage/instagram_analyses"
-        os.makedirs(analysis_dir, exist_ok=True)
-        
-        analysis_id = str(uuid.uuid4())
-        with open(f"{analysis_dir}/{analysis_id}.json", 'w') as f:
-            json.dump({
-                "id": analysis_id,
-                "account": request.account_url_or_username,
-                "analysis": analysis,
-                "created_at": datetime.now().isoformat()
-            }, f, indent=2)
-        
-        return {
-            "status": "success",
-            "analysis_id": analysis_id,
-            "analysis": analysis
-        }
+        return job_accepted(job)
+    
+    try:
+        return run_account_analysis(request.account_url_or_username, request.analysis_focus)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/api/analyze-multiple-instagram-accounts")
+async def analyze_multiple_instagram_accounts(request: InstagramMultipleAnalyzeRequest):
+    """Analyze several Instagram accounts in parallel and compare them"""
+    instagram_analyzer_agent = get_agent('instagram_analyzer_agent')
+    if not instagram_analyzer_agent:
+        raise HTTPException(status_code=503, detail="Instagram Analyzer Agent not initialized")
+    
+    result = await run_in_threadpool(
+        instagram_analyzer_agent.analyze_multiple_accounts,
+        request.account_list,
+        request.analysis_focus,
+        request.max_concurrency
+    )
+    if not result.get("success"):
+        raise HTTPException(status_code=500, detail=result.get("error", "Comparative analysis failed"))
+    
+    return result
+
 @router.post("/prepare-instagram-content")
 async def prepare_instagram_content(request: InstagramContentPrepareRequest):
     """Prepare Instagram content for posting"""
@@ -0,0 +1,62 @@
+"""
+Background job status endpoints
+"""
+import asyncio
+from fastapi import APIRouter, HTTPException, Request
+
+from app.core.auth import get_request_user_id
+from app.core.job_queue import TERMINAL_STATUSES, get_job_queue
+from app.core.streaming import format_sse, sse_response
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+EVENT_POLL_SECONDS = 1.0
+
+
+def _get_visible_job(job_id: str, request: Request):
+    """Load a job; jobs enqueued by a user are only visible to that user"""
+    job = get_job_queue().get(job_id)
+    if not job or (job["owner_id"] and job["owner_id"] != get_request_user_id(request)):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+def _public_job(job):
+    """Job fields exposed to clients; the payload stays internal"""
+    return {key: value for key, value in job.items() if key not in ("payload", "worker_id", "idempotency_key")}
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, request: Request):
+    """Get the status of a job, with its result once it has finished"""
+    return _public_job(_get_visible_job(job_id, request))
+
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """Stream status changes of a job as Server-Sent Events until it finishes"""
+    job = _get_visible_job(job_id, request)
+
+    async def events():
+        current = job
+        last_seen = None
+        while True:
+            state = (current["status"], current["attempts"])
+            if state != last_seen:
+                last_seen = state
+                yield format_sse("status", _public_job(current))
+            if current["status"] in TERMINAL_STATUSES or await request.is_disconnected():
+                break
+            await asyncio.sleep(EVENT_POLL_SECONDS)
+            current = get_job_queue().get(job_id) or current
+
+    return sse_response(events())
+
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str, request: Request):
+    """Cancel a job that hasn't started yet"""
+    _get_visible_job(job_id, request)
+    if not get_job_queue().cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job has already started")
+    return {"status": "success", "message": "Job cancelled", "job_id": job_id}
@@ -1,14 +1,18 @@
 """
 Media processing endpoints for voice, video, and captions
 """
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, UploadFile, File, Header, Request
+from fastapi.concurrency import run_in_threadpool
 from typing import Dict, Any, List, Optional
 import os
 import tempfile
 import shutil
 from pydantic import BaseModel
 
+from app.core.auth import require_job_owner
 from app.core.dependencies import get_agent
+from app.core.job_queue import enqueue_job, job_accepted
+from app.services.agent_jobs import agent_call_payload
 
 router = APIRouter(prefix="/api", tags=["media"])
 
@@ -90,12 +94,30 @@ async def generate_voice_script(request: VoiceScriptRequest):
     return result
 
 @router.post("/generate-voice-over")
-async def generate_voice_over(request: VoiceOverRequest):
-    """Generate voice-over audio from text"""
+async def generate_voice_over(
+    request: VoiceOverRequest,
+    http_request: Request,
+    background: bool = False,
+    idempotency_key: Optional[str] = Header(None)
+):
+    """Generate voice-over audio from text
+    
+    With `?background=true` the voice-over is generated as a background job and
+    the response points at its status.
+    """
     voice_over_agent = get_agent('voice_over_agent')
     if not voice_over_agent:
         raise HTTPException(status_code=503, detail="Voice over agent not available")
     
+    if background:
+        job = enqueue_job(
+            "voice_over",
+            agent_call_payload('voice_over_agent', 'generate_voice_over', request.model_dump()),
+            idempotency_key=idempotency_key,
+            owner_id=require_job_owner(http_request)
+        )
+        return job_accepted(job)
+    
     result = voice_over_agent.generate_voice_over(
         request.text,
         request.voice,
@@ -177,7 +199,8 @@ async def add_voice_to_video(request: AddVoiceToVideoRequest):
     if not voice_over_agent:
         raise HTTPException(status_code=503, detail="Voice over agent not available")
     
-    result = voice_over_agent.add_voice_to_video(
+    result = await run_in_threadpool(
+        voice_over_agent.add_voice_over_to_video,
         request.video_path,
         request.audio_path,
         request.volume,
@@ -194,7 +217,8 @@ async def add_captions_to_video(request: AddCaptionsToVideoRequest):
     if not voice_over_agent:
         raise HTTPException(status_code=503, detail="Voice over agent not available")
     
-    result = voice_over_agent.add_captions_to_video(
+    result = await run_in_threadpool(
+        voice_over_agent.add_captions_to_video,
         request.video_path,
         request.subtitle_path,
         request.burn_in,
@@ -204,13 +228,31 @@ async def add_captions_to_video(request: AddCaptionsToVideoRequest):
     return result
 
 @router.post("/process-video-with-voice-and-captions")
-async def process_video_with_voice_and_captions(request: ProcessVideoRequest):
-    """Process video with voice-over and captions in one step"""
+async def process_video_with_voice_and_captions(
+    request: ProcessVideoRequest,
+    http_request: Request,
+    background: bool = False,
+    idempotency_key: Optional[str] = Header(None)
+):
+    """Process video with voice-over and captions in one step
+    
+    With `?background=true` the video is processed as a background job.
+    """
     voice_over_agent = get_agent('voice_over_agent')
     if not voice_over_agent:
         raise HTTPException(status_code=503, detail="Voice over agent not available")
     
-    result = voice_over_agent.process_video_complete(
+    if background:
+        job = enqueue_job(
+            "voice_over",
+            agent_call_payload('voice_over_agent', 'process_video_with_voice_and_captions', request.model_dump()),
+            idempotency_key=idempotency_key,
+            owner_id=require_job_owner(http_request)
+        )
+        return job_accepted(job)
+    
+    result = await run_in_threadpool(
+        voice_over_agent.process_video_with_voice_and_captions,
         request.video_path,
         request.script_text,
         request.voice,
@@ -223,13 +265,43 @@ async def process_video_with_voice_and_captions(request: ProcessVideoRequest):
 
 # Video generation endpoints
 @router.post("/generate-video")
-async def generate_video(request: VideoGenerationRequest):
-    """Generate video from images"""
+async def generate_video(
+    request: VideoGenerationRequest,
+    http_request: Request,
+    preview: bool = False,
+    background: bool = False,
+    idempotency_key: Optional[str] = Header(None)
+):
+    """Generate video from images
+    
+    With `?preview=true` only a cached low resolution preview and a poster
+    image are rendered; with `?background=true` the video is rendered as a
+    background job.
+    """
     video_generation_agent = get_agent('video_generation_agent')
     if not video_generation_agent:
         raise HTTPException(status_code=503, detail="Video generation agent not available")
     
-    result = video_generation_agent.generate_video(
+    if preview:
+        return await run_in_threadpool(
+            video_generation_agent.create_video_preview,
+            request.image_paths,
+            request.video_type,
+            request.duration,
+            request.options
+        )
+    
+    if background:
+        job = enqueue_job(
+            "video_generation",
+            agent_call_payload('video_generation_agent', 'create_video', request.model_dump()),
+            idempotency_key=idempotency_key,
+            owner_id=require_job_owner(http_request)
+        )
+        return job_accepted(job)
+    
+    result = await run_in_threadpool(
+        video_generation_agent.create_video,
         request.image_paths,
         request.video_type,
         request.duration,
@@ -7,6 +7,11 @@ from app.core.dependencies import get_agent
 from app.agents.app_store_analyst import AppStoreAnalystAgent
 from app.models.mobile_analytics import AppStoreAnalysis
 from app.core.cost_tracker import cost_tracker
+from app.core.llm_cache import get_llm_cache
+from app.core.llm_gateway import llm_gateway
+from app.core.media_cache import get_media_cache
+from app.services.ffmpeg_service import ffmpeg_service
+from app.core.prompt_budget import prompt_budget_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -543,31 +548,33 @@ async def get_session_costs() -> Dict[str, Any]:
 
 
 @router.get("/costs/daily/{date}")
-async def get_daily_costs(date: str) -> Dict[str, Any]:
+async def get_daily_costs(date: str, include_details: bool = True) -> Dict[str, Any]:
     """
     Get cost summary for a specific date.
     
     Args:
         date: Date in YYYY-MM-DD format
+        include_details: Whether to include every individual cost record
         
     Returns:
         Daily cost breakdown
     """
     try:
-        return cost_tracker.get_daily_costs(date)
+        return cost_tracker.get_daily_costs(date, include_details=include_details)
     except Exception as e:
         logger.error(f"Error getting daily costs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/costs/monthly/{year}/{month}")
-async def get_monthly_costs(year: int, month: int) -> Dict[str, Any]:
+async def get_monthly_costs(year: int, month: int, organization_id: Optional[str] = None) -> Dict[str, Any]:
     """
     Get cost summary for a specific month.
     
     Args:
         year: Year (e.g., 2024)
         month: Month (1-12)
+        organization_id: Optional organization to restrict the summary to
         
     Returns:
         Monthly cost breakdown
@@ -579,9 +586,91 @@ async def get_monthly_costs(year: int, month: int) -> Dict[str, Any]:
                 detail="Month must be between 1 and 12"
             )
         
-        return cost_tracker.get_monthly_summary(year, month)
+        return cost_tracker.get_monthly_summary(year, month, organization_id=organization_id)
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error getting monthly costs: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/costs/llm-cache")
+async def get_llm_cache_stats() -> Dict[str, Any]:
+    """
+    Get LLM response cache metrics.
+    
+    Returns:
+        Entry count, evictions and hit rates overall and per task
+    """
+    try:
+        cache = get_llm_cache()
+        if cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **cache.get_stats()}
+    except Exception as e:
+        logger.error(f"Error getting LLM cache stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/costs/prompt-budget")
+async def get_prompt_budget_stats() -> Dict[str, Any]:
+    """
+    Get prompt size metrics.
+    
+    Returns:
+        Prompt counts, average and largest prompt sizes, budget use and
+        trimmed inputs per task
+    """
+    try:
+        return prompt_budget_metrics.get_stats()
+    except Exception as e:
+        logger.error(f"Error getting prompt budget stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/costs/llm-gateway")
+async def get_llm_gateway_stats() -> Dict[str, Any]:
+    """
+    Get LLM rate limiter metrics.
+    
+    Returns:
+        Per model: limits, requests and tokens admitted, calls that had to
+        wait for capacity, 429 responses and callers currently waiting
+    """
+    try:
+        return llm_gateway.get_stats()
+    except Exception as e:
+        logger.error(f"Error getting LLM gateway stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/costs/ffmpeg")
+async def get_ffmpeg_stats() -> Dict[str, Any]:
+    """
+    Get ffmpeg execution metrics.
+    
+    Returns:
+        Concurrency limit, queue depth, running jobs with their progress and
+        counts of completed, failed, timed out and cancelled encodes
+    """
+    try:
+        return ffmpeg_service.get_stats()
+    except Exception as e:
+        logger.error(f"Error getting ffmpeg stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/costs/media-cache")
+async def get_media_cache_stats() -> Dict[str, Any]:
+    """
+    Get media cache metrics.
+    
+    Returns:
+        Entries and size of the shared media cache, its limit, and counts of
+        local hits, hits served from the object store, misses and evictions
+    """
+    try:
+        return get_media_cache().get_stats()
+    except Exception as e:
+        logger.error(f"Error getting media cache stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,7 +1,7 @@
 """
 Organization management endpoints
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 from datetime import datetime
@@ -9,6 +9,11 @@ import logging
 import traceback
 
 from app.core.supabase_auth import get_current_user
+from app.core.access import access_resolver
+from app.core.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, apply_keyset, parse_fields, project_fields,
+    split_page, use_legacy_listing
+)
 from app.models.auth import Permission, OrganizationRole
 from supabase import create_client, Client
 import os
@@ -73,16 +78,9 @@ async def list_organizations(
                 detail="Database connection not available"
             )
         
-        # First, get the public user ID from the Supabase auth user email
-        auth_email = current_user.get("email")
-        public_user_id = str(current_user["user_id"])
-        
-        # If we have an email, try to find the corresponding public user
-        if auth_email:
-            user_result = supabase.table("users").select("id").eq("email", auth_email).execute()
-            if user_result.data:
-                public_user_id = user_result.data[0]["id"]
-                logger.info(f"Mapped auth user {current_user['user_id']} to public user {public_user_id}")
+        # Load the user's memberships once for all access checks
+        access = access_resolver.get_user_access(current_user, supabase)
+        public_user_id = access.user_id
         
         # Get user's organization memberships from database with joined organization data
         # Exclude soft-deleted organizations
@@ -279,6 +277,8 @@ async def create_organization(
             logger.error(f"Failed to add user as project member: {str(e)}")
             raise
         
+        access_resolver.invalidate(user_id)
+        
         return {
             "success": True,
             "organization": {
@@ -364,25 +364,16 @@ async def update_organization(
                 detail="Database connection not available"
             )
         
-        # Get the public user ID
-        auth_email = current_user.get("email")
-        public_user_id = str(current_user["user_id"])
-        
-        if auth_email:
-            user_result = supabase.table("users").select("id").eq("email", auth_email).execute()
-            if user_result.data:
-                public_user_id = user_result.data[0]["id"]
+        # Load the user's memberships once for all access checks
+        access = access_resolver.get_user_access(current_user, supabase)
+        public_user_id = access.user_id
         
         # Check if user has admin or owner access to this organization
-        membership_check = supabase.table("organization_members").select("role").eq(
-            "organization_id", organization_id
-        ).eq("user_id", public_user_id).execute()
-        
-        if not membership_check.data:
+        user_role = access.organization_role(organization_id)
+        if user_role is None:
             logger.warning(f"User {public_user_id} does not have membership in organization {organization_id}")
             raise HTTPException(status_code=403, detail="Access denied")
         
-        user_role = membership_check.data[0]["role"]
         if user_role not in ["admin", "owner"]:
             logger.warning(f"User {public_user_id} has role {user_role}, needs admin or owner")
             raise HTTPException(status_code=403, detail="Admin access required")
@@ -442,24 +433,16 @@ async def delete_organization(
                 detail="Database connection not available"
             )
         
-        # Get the public user ID
-        auth_email = current_user.get("email")
-        public_user_id = str(current_user["user_id"])
-        
-        if auth_email:
-            user_result = supabase.table("users").select("id").eq("email", auth_email).execute()
-            if user_result.data:
-                public_user_id = user_result.data[0]["id"]
+        # Load the user's memberships once for all access checks
+        access = access_resolver.get_user_access(current_user, supabase)
+        public_user_id = access.user_id
         
         # Check if user is owner of this organization
-        membership_result = supabase.table("organization_members").select("role").eq(
-            "organization_id", organization_id
-        ).eq("user_id", public_user_id).execute()
-        
-        if not membership_result.data:
+        user_role = access.organization_role(organization_id)
+        if user_role is None:
             raise HTTPException(status_code=403, detail="You are not a member of this organization")
         
-        if membership_result.data[0]["role"] != "owner":
+        if user_role != "owner":
             raise HTTPException(status_code=403, detail="Only organization owners can delete the organization")
         
         # Check if there are other owners
@@ -550,14 +533,9 @@ async def restore_organization(
                 detail="Database connection not available"
             )
         
-        # Get the public user ID
-        auth_email = current_user.get("email")
-        public_user_id = str(current_user["user_id"])
-        
-        if auth_email:
-            user_result = supabase.table("users").select("id").eq("email", auth_email).execute()
-            if user_result.data:
-                public_user_id = user_result.data[0]["id"]
+        # Load the user's memberships once for all access checks
+        access = access_resolver.get_user_access(current_user, supabase)
+        public_user_id = access.user_id
         
         # Check if organization exists and is deleted
         org_result = supabase.table("organizations").select("id, name, deleted_at").eq(
@@ -571,11 +549,7 @@ async def restore_organization(
             raise HTTPException(status_code=400, detail="Organization is not deleted")
         
         # Check if user was an owner of this organization
-        membership_result = supabase.table("organization_members").select("role").eq(
-            "organization_id", organization_id
-        ).eq("user_id", public_user_id).eq("role", "owner").execute()
-        
-        if not membership_result.data:
+        if access.organization_role(organization_id) != "owner":
             raise HTTPException(status_code=403, detail="Only former organization owners can restore the organization")
         
         # Restore organization by clearing deleted_at
@@ -619,12 +593,27 @@ async def restore_organization(
         raise HTTPException(status_code=500, detail=str(e))
 
 # Member management endpoints
+MEMBER_FIELDS = ("id", "user_id", "email", "name", "role", "joined_at", "is_current_user")
+
+
 @router.get("/{organization_id}/members")
 async def list_organization_members(
     organization_id: str,
+    role: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    legacy: bool = False,
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
-    """List organization members"""
+    """List organization members, newest first
+    
+    Paginated by keyset: pass `next_cursor` of a page as `cursor` to get the next
+    one. `fields` limits the returned fields (comma separated). `legacy=true`
+    returns every member in one response.
+    """
+    projection = parse_fields(fields, MEMBER_FIELDS)
+    next_cursor = None
     try:
         logger.info(f"Listing members for organization: {organization_id}")
         supabase = get_supabase()
@@ -635,36 +624,33 @@ async def list_organization_members(
                 detail="Database connection not available"
             )
         
-        # Get the public user ID from the Supabase auth user
+        # Load the user's memberships once for all access checks
+        access = access_resolver.get_user_access(current_user, supabase)
         auth_email = current_user.get("email")
-        public_user_id = str(current_user["user_id"])
-        
-        if auth_email:
-            user_result = supabase.table("users").select("id").eq("email", auth_email).execute()
-            if user_result.data:
-                public_user_id = user_result.data[0]["id"]
         
         # Check if user has access to this organization
-        user_membership = supabase.table("organization_members").select("role").eq(
-            "organization_id", organization_id
-        ).eq("user_id", public_user_id).execute()
-        
-        logger.info(f"User membership check - Auth email: {auth_email}, Public user ID: {public_user_id}, Membership: {user_membership.data}")
-        
-        if not user_membership.data:
+        if access.organization_role(organization_id) is None:
             raise HTTPException(status_code=403, detail="Access denied")
         
         # Get all members of this organization with user details
         # Using the user_id foreign key relationship specifically
-        result = supabase.table("organization_members").select(
+        member_query = supabase.table("organization_members").select(
             "*, users!organization_members_user_id_fkey(id, email, name)"
-        ).eq("organization_id", organization_id).execute()
+        ).eq("organization_id", organization_id)
+        if role:
+            member_query = member_query.eq("role", role)
+        
+        if use_legacy_listing(legacy):
+            member_rows = member_query.execute().data
+        else:
+            member_rows, next_cursor = split_page(
+                apply_keyset(member_query, cursor, limit).execute().data, limit
+            )
         
-        logger.info(f"Raw query result count: {len(result.data) if result.data else 0}")
-        logger.info(f"Organization members query result: {result.data}")
+        logger.info(f"Raw query result count: {len(member_rows) if member_rows else 0}")
         
         members = []
-        for membership in result.data:
+        for membership in member_rows:
             logger.info(f"Processing membership: {membership}")
             # The user data might be under different keys depending on Supabase version
             user_data = membership.get("users!organization_members_user_id_fkey") or membership.get("users")
@@ -695,8 +681,9 @@ async def list_organization_members(
         # Return the response in the expected format
         response = {
             "success": True,
-            "members": members,
-            "count": len(members)
+            "members": [project_fields(member, projection) for member in members],
+            "count": len(members),
+            "next_cursor": next_cursor
         }
         
         logger.info(f"Full API response: {response}")
@@ -724,24 +711,15 @@ async def invite_organization_member(
                 detail="Database connection not available"
             )
         
-        # Get the public user ID for permission check
-        auth_email = current_user.get("email")
-        public_user_id = str(current_user["user_id"])
-        
-        if auth_email:
-            user_result = supabase.table("users").select("id").eq("email", auth_email).execute()
-            if user_result.data:
-                public_user_id = user_result.data[0]["id"]
+        # Load the user's memberships once for all access checks
+        access = access_resolver.get_user_access(current_user, supabase)
+        public_user_id = access.user_id
         
         # Check if user has admin or owner access to this organization
-        membership_check = supabase.table("organization_members").select("role").eq(
-            "organization_id", organization_id
-        ).eq("user_id", public_user_id).execute()
-        
-        if not membership_check.data:
+        user_role = access.organization_role(organization_id)
+        if user_role is None:
             raise HTTPException(status_code=403, detail="Access denied")
         
-        user_role = membership_check.data[0]["role"]
         if user_role not in ["owner", "admin"]:
             raise HTTPException(status_code=403, detail="Admin or owner access required")
         
@@ -778,6 +756,7 @@ async def invite_organization_member(
             
             if not membership_result.data:
                 raise HTTPException(status_code=500, detail="Failed to add member")
+            access_resolver.invalidate(invited_user_id)
             
             return {
                 "success": True,
@@ -815,24 +794,14 @@ async def update_organization_member(
                 detail="Database connection not available"
             )
         
-        # Get the public user ID for permission check
-        auth_email = current_user.get("email")
-        public_user_id = str(current_user["user_id"])
-        
-        if auth_email:
-            user_result = supabase.table("users").select("id").eq("email", auth_email).execute()
-            if user_result.data:
-                public_user_id = user_result.data[0]["id"]
+        # Load the user's memberships once for all access checks
+        access = access_resolver.get_user_access(current_user, supabase)
         
         # Check if user has admin or owner access to this organization
-        membership_check = supabase.table("organization_members").select("role").eq(
-            "organization_id", organization_id
-        ).eq("user_id", public_user_id).execute()
-        
-        if not membership_check.data:
+        user_role = access.organization_role(organization_id)
+        if user_role is None:
             raise HTTPException(status_code=403, detail="Access denied")
         
-        user_role = membership_check.data[0]["role"]
         if user_role not in ["owner", "admin"]:
             raise HTTPException(status_code=403, detail="Admin or owner access required")
         
@@ -875,6 +844,7 @@ async def update_organization_member(
         
         if not update_result.data:
             raise HTTPException(status_code=500, detail="Failed to update member role")
+        access_resolver.invalidate(member_user_id)
         
         return {
             "success": True,
@@ -904,24 +874,15 @@ async def remove_organization_member(
                 detail="Database connection not available"
             )
         
-        # Get the public user ID for permission check
-        auth_email = current_user.get("email")
-        public_user_id = str(current_user["user_id"])
-        
-        if auth_email:
-            user_result = supabase.table("users").select("id").eq("email", auth_email).execute()
-            if user_result.data:
-                public_user_id = user_result.data[0]["id"]
+        # Load the user's memberships once for all access checks
+        access = access_resolver.get_user_access(current_user, supabase)
+        public_user_id = access.user_id
         
         # Check if user has admin or owner access to this organization
-        membership_check = supabase.table("organization_members").select("role").eq(
-            "organization_id", organization_id
-        ).eq("user_id", public_user_id).execute()
-        
-        if not membership_check.data:
+        user_role = access.organization_role(organization_id)
+        if user_role is None:
             raise HTTPException(status_code=403, detail="Access denied")
         
-        user_role = membership_check.data[0]["role"]
         if user_role not in ["owner", "admin"]:
             raise HTTPException(status_code=403, detail="Admin or owner access required")
         
@@ -958,6 +919,7 @@ async def remove_organization_member(
         
         if not delete_result.data:
             raise HTTPException(status_code=500, detail="Failed to remove member")
+        access_resolver.invalidate(member_user_id)
         
         return {
             "success": True,
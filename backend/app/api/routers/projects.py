@@ -1,7 +1,7 @@
 """
 Project management endpoints
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 from datetime import datetime
@@ -9,6 +9,11 @@ from uuid import uuid4
 import logging
 
 from app.core.auth import get_current_user, get_request_context
+from app.core.access import access_resolver
+from app.core.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, apply_keyset, parse_fields, project_fields,
+    select_columns, split_page, use_legacy_listing
+)
 from app.models.auth import User, Permission, RequestContext
 from app.core.security.permissions import has_project_permission
 from app.core.supabase_auth import get_current_user as get_current_user_supabase
@@ -52,12 +57,29 @@ class ProjectDepartmentRequest(BaseModel):
     department_id: str
 
 # Project endpoints
+PROJECT_FIELDS = ("id", "name", "description", "organization_id", "created_at", "is_active", "role")
+PROJECT_COLUMNS = PROJECT_FIELDS[:-1]
+
+
 @router.get("/")
 async def list_projects(
     organization_id: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    legacy: bool = False,
     current_user: Dict[str, Any] = Depends(get_current_user_supabase)
 ):
-    """List all projects the user has access to"""
+    """List all projects the user has access to, newest first
+    
+    Paginated by keyset: pass `next_cursor` of a page as `cursor` to get the next
+    one. `fields` limits the returned fields (comma separated). `legacy=true`
+    returns every project in one response.
+    """
+    projection = parse_fields(fields, PROJECT_FIELDS)
+    paginate = not use_legacy_listing(legacy)
+    next_cursor = None
     try:
         supabase = get_supabase()
         
@@ -67,68 +89,62 @@ async def list_projects(
                 detail="Database connection not available"
             )
         
-        # Map Supabase auth user to public user
-        auth_email = current_user.get("email")
-        public_user_id = str(current_user["user_id"])
-        
-        # If we have an email, try to find the corresponding public user
-        if auth_email:
-            user_result = supabase.table("users").select("id").eq("email", auth_email).execute()
-            if user_result.data:
-                public_user_id = user_result.data[0]["id"]
-                logger.info(f"Mapped auth user {current_user['user_id']} to public user {public_user_id}")
+        # Load the user's memberships once for all access checks
+        access = access_resolver.get_user_access(current_user, supabase)
+        public_user_id = access.user_id
         
         # Get projects the user has access to
         if organization_id:
             # Get projects for specific organization
             # First check if user has access to this organization
-            org_check = supabase.table("organization_members").select("role").eq(
-                "user_id", public_user_id
-            ).eq("organization_id", organization_id).execute()
-            
-            if not org_check.data:
+            if access.organization_role(organization_id) is None:
                 raise HTTPException(status_code=403, detail="Access denied to this organization")
             
             # Get all projects for the organization with user's membership info in a single query
             # First get all project IDs for this organization
-            project_result = supabase.table("projects").select("*").eq(
-                "organization_id", organization_id
-            ).execute()
+            project_query = supabase.table("projects").select(
+                select_columns(projection, PROJECT_COLUMNS)
+            ).eq("organization_id", organization_id)
+            if is_active is not None:
+                project_query = project_query.eq("is_active", is_active)
             
-            if not project_result.data:
-                projects = []
+            if paginate:
+                project_rows, next_cursor = split_page(
+                    apply_keyset(project_query, cursor, limit).execute().data, limit
+                )
             else:
-                # Get all project IDs
-                project_ids = [p["id"] for p in project_result.data]
-                
-                # Get all user's memberships for these projects in one query
-                membership_result = supabase.table("project_members").select("project_id, role").eq(
-                    "user_id", public_user_id
-                ).in_("project_id", project_ids).execute()
-                
-                # Create a map of project_id to role for quick lookup
-                membership_map = {m["project_id"]: m["role"] for m in membership_result.data}
-                
-                # Build the projects list with membership info
-                projects = []
-                for project in project_result.data:
-                    projects.append({
-                        "id": project["id"],
-                        "name": project["name"],
-                        "description": project.get("description"),
-                        "organization_id": project["organization_id"],
-                        "created_at": project["created_at"],
-                        "is_active": project.get("is_active", True),
-                        "role": membership_map.get(project["id"])  # O(1) lookup instead of query
-                    })
+                project_rows = project_query.execute().data
+            
+            # Build the projects list with the user's direct project roles
+            projects = []
+            for project in project_rows:
+                projects.append({
+                    "id": project["id"],
+                    "name": project.get("name"),
+                    "description": project.get("description"),
+                    "organization_id": project.get("organization_id"),
+                    "created_at": project["created_at"],
+                    "is_active": project.get("is_active", True),
+                    "role": access.project_roles.get(str(project["id"]))
+                })
         else:
             # Get all projects user has access to
-            result = supabase.table("project_members").select(
-                "role, projects(id, name, description, organization_id, created_at, is_active)"
-            ).eq("user_id", public_user_id).execute()
+            membership_query = supabase.table("project_members").select(
+                "id, created_at, role, projects!inner(id, name, description, organization_id, created_at, is_active)"
+            ).eq("user_id", public_user_id)
+            if is_active is not None:
+                membership_query = membership_query.eq("projects.is_active", is_active)
+            
+            # Pages follow the memberships, newest first
+            if paginate:
+                memberships, next_cursor = split_page(
+                    apply_keyset(membership_query, cursor, limit).execute().data, limit
+                )
+            else:
+                memberships = membership_query.execute().data
             
             projects = []
-            for membership in result.data:
+            for membership in memberships:
                 if membership.get("projects"):
                     project = membership["projects"]
                     projects.append({
@@ -143,9 +159,12 @@ async def list_projects(
         
         return {
             "success": True,
-            "projects": projects,
-            "count": len(projects)
+            "projects": [project_fields(item, projection) for item in projects],
+            "count": len(projects),
+            "next_cursor": next_cursor
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -194,11 +213,8 @@ async def create_project(
                 supabase.table("users").insert(user_data).execute()
         
         # Verify user has access to the organization
-        org_member_check = supabase.table("organization_members").select("role").eq(
-            "user_id", user_id
-        ).eq("organization_id", request.organization_id).execute()
-        
-        if not org_member_check.data:
+        access = access_resolver.get_user_access(current_user, supabase)
+        if access.organization_role(request.organization_id) is None:
             raise HTTPException(
                 status_code=403,
                 detail="You don't have access to this organization"
@@ -242,6 +258,7 @@ async def create_project(
             "updated_at": datetime.utcnow().isoformat()
         }
         supabase.table("project_members").insert(membership_data).execute()
+        access_resolver.invalidate(user_id)
         
         # Add department associations if provided
         if request.department_ids:
@@ -297,31 +314,8 @@ async def get_project(
                 detail="Database connection not available"
             )
         
-        # Get the public user ID
-        auth_email = current_user.get("email")
-        public_user_id = str(current_user["user_id"])
-        
-        if auth_email:
-            user_result = supabase.table("users").select("id").eq("email", auth_email).execute()
-            if user_result.data:
-                public_user_id = user_result.data[0]["id"]
-        
-        # Check if user has access to this project
-        access_check = supabase.table("project_members").select("role").eq(
-            "project_id", project_id
-        ).eq("user_id", public_user_id).execute()
-        
-        if not access_check.data:
-            # Check if user has organization-level access
-            project_data = supabase.table("projects").select("organization_id").eq("id", project_id).execute()
-            if project_data.data:
-                org_id = project_data.data[0]["organization_id"]
-                org_access = supabase.table("organization_members").select("role").eq(
-                    "organization_id", org_id
-                ).eq("user_id", public_user_id).execute()
-                
-                if not org_access.data:
-                    raise HTTPException(status_code=403, detail="Access denied")
+        # Load the user's memberships once for all access checks
+        access = access_resolver.get_user_access(current_user, supabase)
         
         # Fetch project details
         result = supabase.table("projects").select("*").eq("id", project_id).execute()
@@ -331,29 +325,16 @@ async def get_project(
         
         project = result.data[0]
         
-        # Add user's role to the project
-        if access_check.data:
-            project["role"] = access_check.data[0]["role"]
-        else:
-            # If no direct project membership, they might have org-level access
-            project_data = supabase.table("projects").select("organization_id").eq("id", project_id).execute()
-            if project_data.data:
-                org_id = project_data.data[0]["organization_id"]
-                org_access = supabase.table("organization_members").select("role").eq(
-                    "organization_id", org_id
-                ).eq("user_id", public_user_id).execute()
-                if org_access.data:
-                    # Map org roles to project roles
-                    org_role = org_access.data[0]["role"]
-                    if org_role in ["owner", "admin"]:
-                        project["role"] = "admin"
-                    else:
-                        project["role"] = "viewer"
+        # Direct project role, or one derived from the organization role
+        role = access.project_role(project_id, project["organization_id"])
+        if role is None:
+            raise HTTPException(status_code=403, detail="Access denied")
+        project["role"] = role
         
         # Get basic statistics
         stats = {
             "content_items": 0,
-            "team_members": len(access_check.data) if access_check.data else 1,
+            "team_members": 1,
             "last_activity": project.get("updated_at", project.get("created_at"))
         }
         
@@ -385,33 +366,13 @@ async def update_project(
                 detail="Database connection not available"
             )
         
-        # Get the public user ID
-        auth_email = current_user.get("email")
-        public_user_id = str(current_user["user_id"])
-        
-        if auth_email:
-            user_result = supabase.table("users").select("id").eq("email", auth_email).execute()
-            if user_result.data:
-                public_user_id = user_result.data[0]["id"]
+        # Load the user's memberships once for all access checks
+        access = access_resolver.get_user_access(current_user, supabase)
         
-        # Check if user has admin access to this project
-        access_check = supabase.table("project_members").select("role").eq(
-            "project_id", project_id
-        ).eq("user_id", public_user_id).execute()
-        
-        if not access_check.data or access_check.data[0]["role"] not in ["owner", "admin"]:
-            # Check organization-level admin access
-            project_data = supabase.table("projects").select("organization_id").eq("id", project_id).execute()
-            if project_data.data:
-                org_id = project_data.data[0]["organization_id"]
-                org_access = supabase.table("organization_members").select("role").eq(
-                    "organization_id", org_id
-                ).eq("user_id", public_user_id).execute()
-                
-                if not org_access.data or org_access.data[0]["role"] not in ["owner", "admin"]:
-                    raise HTTPException(status_code=403, detail="Admin access required")
-            else:
-                raise HTTPException(status_code=403, detail="Admin access required")
+        # Check if user has admin access to this project, directly or via the organization
+        organization_id = access_resolver.project_organization(project_id, supabase)
+        if not access.is_project_admin(project_id, organization_id):
+            raise HTTPException(status_code=403, detail="Admin access required")
         
         # Update project in database
         update_data = {}
@@ -469,29 +430,13 @@ async def delete_project(
         project = project_result.data
         
         # Check if user belongs to the organization
-        # First, get the public user ID from the Supabase auth user
-        auth_email = current_user.get("email")
-        auth_user_id = str(current_user["user_id"])
-        public_user_id = auth_user_id
-        
-        # If we have an email, try to find the corresponding public user
-        if auth_email:
-            user_result = supabase.table("users").select("id").eq("email", auth_email).execute()
-            if user_result.data:
-                public_user_id = user_result.data[0]["id"]
-                logger.info(f"Mapped auth user {auth_user_id} to public user {public_user_id}")
-        
-        logger.debug(f"Using public_user_id: {public_user_id} for org membership check")
-            
-        org_member_result = supabase.table("organization_members").select("role").eq(
-            "organization_id", project["organization_id"]
-        ).eq("user_id", public_user_id).execute()
+        access = access_resolver.get_user_access(current_user, supabase)
+        user_role = access.organization_role(project["organization_id"])
         
-        if not org_member_result.data or len(org_member_result.data) == 0:
+        if user_role is None:
             raise HTTPException(status_code=403, detail="Access denied - user is not a member of this organization")
         
         # Check if user has admin or owner role
-        user_role = org_member_result.data[0].get("role")
         if user_role not in ["admin", "owner"]:
             raise HTTPException(status_code=403, detail="Admin or owner access required")
         
@@ -525,21 +470,11 @@ async def list_project_members(
                 detail="Database connection not available"
             )
         
-        # Get the public user ID
-        auth_email = current_user.get("email")
-        public_user_id = str(current_user["user_id"])
-        
-        if auth_email:
-            user_result = supabase.table("users").select("id").eq("email", auth_email).execute()
-            if user_result.data:
-                public_user_id = user_result.data[0]["id"]
+        # Load the user's memberships once for all access checks
+        access = access_resolver.get_user_access(current_user, supabase)
         
         # Check if user has access to this project
-        access_check = supabase.table("project_members").select("role").eq(
-            "project_id", project_id
-        ).eq("user_id", public_user_id).execute()
-        
-        if not access_check.data:
+        if project_id not in access.project_roles:
             raise HTTPException(status_code=403, detail="Access denied")
         
         # Get all project members with user details
@@ -719,21 +654,11 @@ async def list_project_departments(
                 detail="Database connection not available"
             )
         
-        # Get the public user ID
-        auth_email = current_user.get("email")
-        public_user_id = str(current_user["user_id"])
-        
-        if auth_email:
-            user_result = supabase.table("users").select("id").eq("email", auth_email).execute()
-            if user_result.data:
-                public_user_id = user_result.data[0]["id"]
+        # Load the user's memberships once for all access checks
+        access = access_resolver.get_user_access(current_user, supabase)
         
         # Check if user has access to this project
-        access_check = supabase.table("project_members").select("role").eq(
-            "project_id", project_id
-        ).eq("user_id", public_user_id).execute()
-        
-        if not access_check.data:
+        if project_id not in access.project_roles:
             raise HTTPException(status_code=403, detail="Access denied")
         
         # Get departments associated with this project
@@ -781,32 +706,20 @@ async def add_project_department(
                 detail="Database connection not available"
             )
         
-        # Get the public user ID
-        auth_email = current_user.get("email")
-        public_user_id = str(current_user["user_id"])
-        
-        if auth_email:
-            user_result = supabase.table("users").select("id").eq("email", auth_email).execute()
-            if user_result.data:
-                public_user_id = user_result.data[0]["id"]
+        # Load the user's memberships once for all access checks
+        access = access_resolver.get_user_access(current_user, supabase)
         
         # Check if user has admin access to this project
-        access_check = supabase.table("project_members").select("role").eq(
-            "project_id", project_id
-        ).eq("user_id", public_user_id).execute()
-        
-        if not access_check.data or access_check.data[0]["role"] not in ["admin", "owner"]:
+        if access.project_roles.get(project_id) not in ["admin", "owner"]:
             raise HTTPException(status_code=403, detail="Admin access required")
         
         # Get project's organization
-        project_result = supabase.table("projects").select("organization_id").eq(
-            "id", project_id
-        ).single().execute()
+        organization_id = access_resolver.project_organization(project_id, supabase)
         
         # Verify department exists and belongs to same organization
         dept_check = supabase.table("departments").select("id, name").eq(
             "id", request.department_id
-        ).eq("organization_id", project_result.data["organization_id"]).execute()
+        ).eq("organization_id", organization_id).execute()
         
         if not dept_check.data:
             raise HTTPException(status_code=404, detail="Department not found in organization")
@@ -858,21 +771,11 @@ async def remove_project_department(
                 detail="Database connection not available"
             )
         
-        # Get the public user ID
-        auth_email = current_user.get("email")
-        public_user_id = str(current_user["user_id"])
-        
-        if auth_email:
-            user_result = supabase.table("users").select("id").eq("email", auth_email).execute()
-            if user_result.data:
-                public_user_id = user_result.data[0]["id"]
+        # Load the user's memberships once for all access checks
+        access = access_resolver.get_user_access(current_user, supabase)
         
         # Check if user has admin access to this project
-        access_check = supabase.table("project_members").select("role").eq(
-            "project_id", project_id
-        ).eq("user_id", public_user_id).execute()
-        
-        if not access_check.data or access_check.data[0]["role"] not in ["admin", "owner"]:
+        if access.project_roles.get(project_id) not in ["admin", "owner"]:
             raise HTTPException(status_code=403, detail="Admin access required")
         
         # Remove association
@@ -950,31 +853,14 @@ async def get_project_statistics(
                 detail="Database connection not available"
             )
         
-        # Get the public user ID
-        auth_email = current_user.get("email")
-        public_user_id = str(current_user["user_id"])
+        # Load the user's memberships once for all access checks
+        access = access_resolver.get_user_access(current_user, supabase)
         
-        if auth_email:
-            user_result = supabase.table("users").select("id").eq("email", auth_email).execute()
-            if user_result.data:
-                public_user_id = user_result.data[0]["id"]
-        
-        # Check if user has access to this project (simplified check)
-        access_check = supabase.table("project_members").select("role").eq(
-            "project_id", project_id
-        ).eq("user_id", public_user_id).execute()
-        
-        # If no direct project access, check organization access
-        if not access_check.data:
-            project_data = supabase.table("projects").select("organization_id").eq("id", project_id).execute()
-            if project_data.data:
-                org_id = project_data.data[0]["organization_id"]
-                org_access = supabase.table("organization_members").select("role").eq(
-                    "organization_id", org_id
-                ).eq("user_id", public_user_id).execute()
-                
-                if not org_access.data:
-                    raise HTTPException(status_code=403, detail="Access denied")
+        # Check if user has access to this project, directly or via the organization
+        if project_id not in access.project_roles:
+            organization_id = access_resolver.project_organization(project_id, supabase)
+            if organization_id and access.organization_role(organization_id) is None:
+                raise HTTPException(status_code=403, detail="Access denied")
         
         # Get goals count
         goals_result = supabase.table("goals").select("id, status").eq(
@@ -1,11 +1,12 @@
 """
 Q&A and knowledge base endpoints
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
 from typing import List, Optional
 
 from app.core.dependencies import get_agent
+from app.core.streaming import wants_stream, stream_agent_call, sse_response
 from app.core.auth import get_current_user, get_request_context, check_permission
 from app.models.auth import User, RequestContext, Permission
 
@@ -15,15 +16,34 @@ router = APIRouter(prefix="/api", tags=["qa"])
 class QuestionRequest(BaseModel):
     question: str
 
+def _question_response(result: dict) -> dict:
+    """Shape an answer_question result into the /ask-question response body"""
+    if not result["success"]:
+        raise HTTPException(status_code=500, detail=result.get("error", "Failed to answer question"))
+    return {
+        "success": True,
+        "answer": result["answer"],
+        "sources": result.get("sources", []),
+        "confidence": result.get("confidence", "high"),
+        "interaction_id": result.get("interaction_id"),
+        "cached": result.get("cached", False)
+    }
+
 # Q&A endpoints
 @router.post("/ask-question")
 async def ask_question(
     request: QuestionRequest,
+    http_request: Request,
     current_user: User = Depends(get_current_user),
     context: RequestContext = Depends(get_request_context),
     _: None = Depends(check_permission(Permission.AGENT_USE))
 ):
-    """Ask a question about the 7 Cycles of Life"""
+    """Ask a question about the 7 Cycles of Life
+
+    Send `?stream=true` or `Accept: text/event-stream` to receive retrieval results,
+    agent steps and answer tokens as Server-Sent Events, ending with a `result` event
+    that carries the regular response body.
+    """
     qa_agent = get_agent('qa_agent')
     if not qa_agent:
         raise HTTPException(status_code=503, detail="Q&A agent not available")
@@ -31,18 +51,13 @@ async def ask_question(
     # Set context for multi-tenant support
     qa_agent.set_context(context)
     
-    result = qa_agent.answer_question(request.question)
+    if wants_stream(http_request):
+        return sse_response(stream_agent_call(
+            qa_agent.answer_question, request.question, result_transform=_question_response
+        ))
     
-    if result["success"]:
-        return {
-            "success": True,
-            "answer": result["answer"],
-            "sources": result.get("sources", []),
-            "confidence": result.get("confidence", "high"),
-            "interaction_id": result.get("interaction_id")
-        }
-    else:
-        raise HTTPException(status_code=500, detail=result.get("error", "Failed to answer question"))
+    result = qa_agent.answer_question(request.question)
+    return _question_response(result)
 
 @router.get("/qa-health")
 async def check_qa_health():
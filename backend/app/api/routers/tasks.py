@@ -1,6 +1,6 @@
 from typing import List, Optional, Dict, Any
 from uuid import UUID, uuid4
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from pydantic import BaseModel, Field
 from datetime import datetime, date
 import json
@@ -8,6 +8,11 @@ import json
 from supabase import create_client, Client
 import os
 from ...core.supabase_auth import get_current_user
+from ...core.access import UserAccess, access_resolver
+from ...core.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, apply_keyset, parse_fields, project_fields,
+    projected_response, select_columns, set_next_cursor, split_page, use_legacy_listing
+)
 from ...core.dependencies import get_task_suggestion_crew
 from ...agents.crews.task_suggestion_crew import TaskSuggestionInput, TaskSuggestionOutput
 
@@ -84,38 +89,10 @@ class TaskHistory(BaseModel):
     created_at: datetime
 
 
-async def verify_goal_access(goal_id: str, user_id: str, supabase) -> bool:
+async def verify_goal_access(goal_id: str, access: UserAccess, supabase) -> bool:
     """Verify user has access to the goal's project."""
     try:
-        # Get the goal's project
-        goal = supabase.table('goals').select('project_id').eq(
-            'id', goal_id
-        ).single().execute()
-        
-        if not goal.data:
-            return False
-        
-        # Check if user is a member of the project
-        member_check = supabase.table('project_members').select('role').eq(
-            'project_id', goal.data['project_id']
-        ).eq('user_id', user_id).execute()
-        
-        if member_check.data:
-            return True
-        
-        # Check if user is member of organization that owns the project
-        project_org = supabase.table('projects').select('organization_id').eq(
-            'id', goal.data['project_id']
-        ).single().execute()
-        
-        if project_org.data:
-            org_member_check = supabase.table('organization_members').select('role').eq(
-                'organization_id', project_org.data['organization_id']
-            ).eq('user_id', user_id).execute()
-            
-            return bool(org_member_check.data)
-        
-        return False
+        return access_resolver.can_access_goal(access, goal_id, supabase)
     except:
         return False
 
@@ -162,91 +139,106 @@ async def create_task_history(
     supabase.table('task_history').insert(history_data).execute()
 
 
+TASK_DERIVED_FIELDS = ('goal_title', 'project_id', 'project_name')
+TASK_COLUMNS = tuple(field for field in Task.model_fields if field not in TASK_DERIVED_FIELDS)
+
+
 @router.get("", response_model=List[Task])
 async def list_tasks(
+    response: Response,
     goal_id: Optional[UUID] = None,
     project_id: Optional[UUID] = None,
     status: Optional[str] = None,
+    priority: Optional[str] = None,
     assigned_to_me: Optional[bool] = False,
+    assigned_to_type: Optional[str] = Query(None, pattern="^(member|agent)$"),
+    assigned_to_id: Optional[UUID] = None,
+    due_before: Optional[date] = None,
+    due_after: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    legacy: bool = False,
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
-    """List tasks. Can filter by goal, project, status, or assigned to current user."""
+    """List tasks, newest first.
+    
+    Filters: goal, project, status, priority, assignee, due date range, or assigned to
+    the current user. Results are paginated by keyset: pass the X-Next-Cursor header of
+    a page as `cursor` to get the next one. `fields` limits the returned fields
+    (comma separated). `legacy=true` returns every matching task in one response.
+    """
     supabase = get_supabase()
+    projection = parse_fields(fields, Task.model_fields)
+    paginate = not use_legacy_listing(legacy)
     
     try:
-        # Get the user ID from the auth context
-        auth_email = current_user.get('email')
-        user_id = str(current_user['user_id'])
-        
-        # Get the public user ID from the users table if needed
-        if auth_email:
-            user_result = supabase.table('users').select('id').eq('email', auth_email).execute()
-            if user_result.data:
-                user_id = user_result.data[0]['id']
+        # Resolve the public user ID and memberships once for all access checks
+        access = access_resolver.get_user_access(current_user, supabase)
+        user_id = access.user_id
         
         # Build query
-        query = supabase.table('tasks').select(
-            '*, goals!inner(id, title, project_id, projects!inner(id, name))'
-        )
+        query = supabase.table('tasks').select(select_columns(
+            projection, TASK_COLUMNS, 'goals!inner(id, title, project_id, projects!inner(id, name))'
+        ))
         
         if goal_id:
             # Verify access to specific goal
-            if not await verify_goal_access(str(goal_id), user_id, supabase):
+            if not await verify_goal_access(str(goal_id), access, supabase):
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="Access denied to this goal"
                 )
             query = query.eq('goal_id', str(goal_id))
         elif project_id:
+            if not access_resolver.can_access_project(access, str(project_id), supabase):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Access denied to this project"
+                )
             # Filter by project - join through goals
             query = query.eq('goals.project_id', str(project_id))
         else:
-            # Get all accessible tasks through project membership
-            # First get projects user has access to
-            member_projects = supabase.table('project_members').select('project_id').eq(
-                'user_id', user_id
-            ).execute()
-            
-            org_memberships = supabase.table('organization_members').select('organization_id').eq(
-                'user_id', user_id
-            ).execute()
-            
-            project_ids = [m['project_id'] for m in member_projects.data]
-            
-            if org_memberships.data:
-                org_ids = [m['organization_id'] for m in org_memberships.data]
-                org_projects = supabase.table('projects').select('id').in_(
-                    'organization_id', org_ids
-                ).execute()
-                project_ids.extend([p['id'] for p in org_projects.data])
+            # Get all accessible tasks through project and organization membership
+            project_ids = access_resolver.accessible_project_ids(access, supabase)
             
             if not project_ids:
                 return []
             
-            # Get goals for these projects
-            goals_response = supabase.table('goals').select('id').in_(
-                'project_id', list(set(project_ids))
-            ).execute()
-            
-            goal_ids = [g['id'] for g in goals_response.data]
-            if not goal_ids:
-                return []
-            
-            query = query.in_('goal_id', goal_ids)
+            # Filter through the goals join instead of resolving every goal id first
+            query = query.in_('goals.project_id', project_ids)
         
         if status:
             query = query.eq('status', status)
         
+        if priority:
+            query = query.eq('priority', priority)
+        
         if assigned_to_me:
             # Filter tasks assigned to the current user
             query = query.eq('assigned_to_type', 'member').eq(
                 'assigned_to_id', user_id
             )
-        
-        response = query.order('created_at', desc=True).execute()
+        else:
+            if assigned_to_type:
+                query = query.eq('assigned_to_type', assigned_to_type)
+            if assigned_to_id:
+                query = query.eq('assigned_to_id', str(assigned_to_id))
+        
+        if due_before:
+            query = query.lte('due_date', due_before.isoformat())
+        if due_after:
+            query = query.gte('due_date', due_after.isoformat())
+        
+        next_cursor = None
+        if paginate:
+            rows, next_cursor = split_page(apply_keyset(query, cursor, limit).execute().data, limit)
+            set_next_cursor(response, next_cursor)
+        else:
+            rows = query.order('created_at', desc=True).execute().data
         
         tasks = []
-        for task in response.data:
+        for task in rows:
             task_dict = dict(task)
             
             if task.get('goals'):
@@ -256,8 +248,13 @@ async def list_tasks(
                     task_dict['project_name'] = task['goals']['projects']['name']
                 del task_dict['goals']
             
-            tasks.append(Task(**task_dict))
+            if projection is None:
+                tasks.append(Task(**task_dict))
+            else:
+                tasks.append(project_fields(task_dict, projection))
         
+        if projection is not None:
+            return projected_response(tasks, next_cursor)
         return tasks
     except HTTPException:
         raise
@@ -277,18 +274,12 @@ async def create_task(
     """Create a new task."""
     supabase = get_supabase()
     
-    # Get the user ID from the auth context
-    auth_email = current_user.get('email')
-    user_id = str(current_user['user_id'])
-    
-    # Get the public user ID from the users table if needed
-    if auth_email:
-        user_result = supabase.table('users').select('id').eq('email', auth_email).execute()
-        if user_result.data:
-            user_id = user_result.data[0]['id']
+    # Resolve the public user ID and memberships once for all access checks
+    access = access_resolver.get_user_access(current_user, supabase)
+    user_id = access.user_id
     
     # Verify user has access to the goal
-    if not await verify_goal_access(str(task.goal_id), user_id, supabase):
+    if not await verify_goal_access(str(task.goal_id), access, supabase):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this goal"
@@ -374,18 +365,11 @@ async def get_task(
         
         task_dict = dict(response.data)
         
-        # Get the user ID from the auth context
-        auth_email = current_user.get('email')
-        user_id = str(current_user['user_id'])
-        
-        # Get the public user ID from the users table if needed
-        if auth_email:
-            user_result = supabase.table('users').select('id').eq('email', auth_email).execute()
-            if user_result.data:
-                user_id = user_result.data[0]['id']
+        # Load the user's memberships once for all access checks
+        access = access_resolver.get_user_access(current_user, supabase)
         
         # Verify user has access to the goal
-        if not await verify_goal_access(task_dict['goal_id'], user_id, supabase):
+        if not await verify_goal_access(task_dict['goal_id'], access, supabase):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied"
@@ -421,15 +405,9 @@ async def update_task(
     """Update a task."""
     supabase = get_supabase()
     
-    # Get the user ID from the auth context
-    auth_email = current_user.get('email')
-    user_id = str(current_user['user_id'])
-    
-    # Get the public user ID from the users table if needed
-    if auth_email:
-        user_result = supabase.table('users').select('id').eq('email', auth_email).execute()
-        if user_result.data:
-            user_id = user_result.data[0]['id']
+    # Resolve the public user ID and memberships once for all access checks
+    access = access_resolver.get_user_access(current_user, supabase)
+    user_id = access.user_id
     
     # Get the task to verify access and track changes
     try:
@@ -437,7 +415,7 @@ async def update_task(
             'id', str(task_id)
         ).single().execute()
         
-        if not await verify_goal_access(task_check.data['goal_id'], user_id, supabase):
+        if not await verify_goal_access(task_check.data['goal_id'], access, supabase):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied"
@@ -585,15 +563,8 @@ async def get_task_history(
     """Get the history of changes for a task."""
     supabase = get_supabase()
     
-    # Get the user ID from the auth context
-    auth_email = current_user.get('email')
-    user_id = str(current_user['user_id'])
-    
-    # Get the public user ID from the users table if needed
-    if auth_email:
-        user_result = supabase.table('users').select('id').eq('email', auth_email).execute()
-        if user_result.data:
-            user_id = user_result.data[0]['id']
+    # Load the user's memberships once for all access checks
+    access = access_resolver.get_user_access(current_user, supabase)
     
     # Verify access through the task's goal
     try:
@@ -601,7 +572,7 @@ async def get_task_history(
             'id', str(task_id)
         ).single().execute()
         
-        if not await verify_goal_access(task_check.data['goal_id'], user_id, supabase):
+        if not await verify_goal_access(task_check.data['goal_id'], access, supabase):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied"
@@ -633,15 +604,8 @@ async def delete_task(
     """Delete a task."""
     supabase = get_supabase()
     
-    # Get the user ID from the auth context
-    auth_email = current_user.get('email')
-    user_id = str(current_user['user_id'])
-    
-    # Get the public user ID from the users table if needed
-    if auth_email:
-        user_result = supabase.table('users').select('id').eq('email', auth_email).execute()
-        if user_result.data:
-            user_id = user_result.data[0]['id']
+    # Load the user's memberships once for all access checks
+    access = access_resolver.get_user_access(current_user, supabase)
     
     # Get the task to verify access
     try:
@@ -649,7 +613,7 @@ async def delete_task(
             'id', str(task_id)
         ).single().execute()
         
-        if not await verify_goal_access(task_check.data['goal_id'], user_id, supabase):
+        if not await verify_goal_access(task_check.data['goal_id'], access, supabase):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied"
@@ -701,18 +665,11 @@ async def suggest_tasks(
     """Generate AI-powered task suggestions based on a goal."""
     supabase = get_supabase()
     
-    # Get the user ID from the auth context
-    auth_email = current_user.get("email")
-    user_id = str(current_user["user_id"])
-    
-    # Get the public user ID from the users table if needed
-    if auth_email:
-        user_result = supabase.table("users").select("id").eq("email", auth_email).execute()
-        if user_result.data:
-            user_id = user_result.data[0]["id"]
+    # Load the user's memberships once for all access checks
+    access = access_resolver.get_user_access(current_user, supabase)
     
     # Verify user has access to the goal
-    if not await verify_goal_access(str(request.goal_id), user_id, supabase):
+    if not await verify_goal_access(str(request.goal_id), access, supabase):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this goal"
@@ -799,18 +756,12 @@ async def submit_task_suggestion_feedback(
     """Submit feedback on AI-generated task suggestions."""
     supabase = get_supabase()
     
-    # Get the user ID from the auth context
-    auth_email = current_user.get("email")
-    user_id = str(current_user["user_id"])
-    
-    # Get the public user ID from the users table if needed
-    if auth_email:
-        user_result = supabase.table("users").select("id").eq("email", auth_email).execute()
-        if user_result.data:
-            user_id = user_result.data[0]["id"]
+    # Resolve the public user ID and memberships once for all access checks
+    access = access_resolver.get_user_access(current_user, supabase)
+    user_id = access.user_id
     
     # Verify user has access to the goal
-    if not await verify_goal_access(str(feedback.goal_id), user_id, supabase):
+    if not await verify_goal_access(str(feedback.goal_id), access, supabase):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this goal"
@@ -862,18 +813,11 @@ async def get_task_feedback_summary(
     """Get summary of feedback for task suggestions for a goal."""
     supabase = get_supabase()
     
-    # Get the user ID from the auth context
-    auth_email = current_user.get("email")
-    user_id = str(current_user["user_id"])
-    
-    # Get the public user ID from the users table if needed
-    if auth_email:
-        user_result = supabase.table("users").select("id").eq("email", auth_email).execute()
-        if user_result.data:
-            user_id = user_result.data[0]["id"]
+    # Load the user's memberships once for all access checks
+    access = access_resolver.get_user_access(current_user, supabase)
     
     # Verify user has access to the goal
-    if not await verify_goal_access(str(goal_id), user_id, supabase):
+    if not await verify_goal_access(str(goal_id), access, supabase):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this goal"
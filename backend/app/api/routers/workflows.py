@@ -1,14 +1,18 @@
 """
 Workflow management endpoints
 """
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, Any, Optional
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Depends, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Any, List, Optional
+from pydantic import BaseModel, Field
 
 from app.core.dependencies import get_agent
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, require_job_owner
 from app.models.auth import User
 from app.core.middleware import RequestContext
+from app.core.job_queue import enqueue_job, job_accepted
+from app.core.streaming import sse_response, stream_agent_call, wants_stream
+from app.services.agent_jobs import agent_call_payload
 
 router = APIRouter(prefix="/api", tags=["workflows"])
 
@@ -27,6 +31,18 @@ class PostCompositionRequest(BaseModel):
     custom_options: Optional[Dict[str, Any]] = None
     force_new: Optional[bool] = False
 
+class PostCompositionJob(BaseModel):
+    background_path: str
+    text: str
+    period: str
+    template_name: Optional[str] = "default"
+    post_format: Optional[str] = "story"
+    custom_options: Optional[Dict[str, Any]] = None
+
+class BatchPostCompositionRequest(BaseModel):
+    jobs: List[PostCompositionJob] = Field(..., min_length=1, max_length=100)
+    force_new: Optional[bool] = False
+
 class IntegratedPostCompositionRequest(BaseModel):
     instagram_post_id: str
     visual_post_id: str
@@ -42,9 +58,15 @@ class VideoReelRequest(BaseModel):
 @router.post("/workflows")
 async def create_workflow(
     request: WorkflowCreateRequest,
+    background: bool = False,
+    idempotency_key: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user)
 ):
-    """Create a new content workflow (requires authentication)"""
+    """Create a new content workflow (requires authentication)
+    
+    With `?background=true` the workflow runs as a background job and the
+    response points at its status.
+    """
     workflow_agent = get_agent('workflow_agent')
     if not workflow_agent:
         raise HTTPException(status_code=503, detail="Workflow agent not available")
@@ -56,7 +78,22 @@ async def create_workflow(
     )
     workflow_agent.set_context(context)
     
-    result = workflow_agent.create_workflow(
+    if background:
+        job = enqueue_job(
+            "content_workflow",
+            agent_call_payload('workflow_agent', 'create_complete_content_workflow', {
+                "period": request.period,
+                "workflow_type": request.workflow_type,
+                "options": request.options
+            }, context),
+            idempotency_key=idempotency_key,
+            owner_id=str(current_user.id)
+        )
+        return job_accepted(job)
+    
+    # The workflow steps block, keep them off the event loop
+    result = await run_in_threadpool(
+        workflow_agent.create_complete_content_workflow,
         request.period,
         request.workflow_type,
         request.options
@@ -80,7 +117,7 @@ async def list_workflows(
     )
     workflow_agent.set_context(context)
     
-    return workflow_agent.list_workflows()
+    return workflow_agent.get_workflows()
 
 @router.get("/workflows/{workflow_id}")
 async def get_workflow(
@@ -99,11 +136,34 @@ async def get_workflow(
     )
     workflow_agent.set_context(context)
     
-    workflow = workflow_agent.get_workflow(workflow_id)
-    if not workflow:
+    result = workflow_agent.get_workflow_by_id(workflow_id)
+    if not result.get("success"):
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    
+    return result["workflow"]
+
+@router.post("/workflows/{workflow_id}/resume")
+async def resume_workflow(
+    workflow_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Resume a failed or interrupted workflow, skipping the steps that completed (requires authentication)"""
+    workflow_agent = get_agent('workflow_agent')
+    if not workflow_agent:
+        raise HTTPException(status_code=503, detail="Workflow agent not available")
+    
+    # Set context on agent
+    context = RequestContext(
+        user_id=current_user.id,
+        organization_id=current_user.default_organization_id
+    )
+    workflow_agent.set_context(context)
+    
+    result = await run_in_threadpool(workflow_agent.resume_workflow, workflow_id)
+    if result.get("error") == "Workflow nicht gefunden":
         raise HTTPException(status_code=404, detail="Workflow not found")
     
-    return workflow
+    return result
 
 @router.delete("/workflows/{workflow_id}")
 async def delete_workflow(
@@ -179,7 +239,8 @@ async def compose_post(
     if hasattr(post_composition_agent, 'set_context'):
         post_composition_agent.set_context(context)
     
-    result = post_composition_agent.compose_post(
+    result = await run_in_threadpool(
+        post_composition_agent.compose_post,
         request.background_path,
         request.text,
         request.period,
@@ -191,6 +252,38 @@ async def compose_post(
     
     return result
 
+@router.post("/compose-posts")
+async def compose_posts(
+    request: BatchPostCompositionRequest,
+    http_request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """Compose a batch of visual posts (requires authentication)
+    
+    Jobs are rendered in parallel; jobs that were composed before or repeat an
+    earlier job of the batch are not rendered again. With `?stream=true` or
+    `Accept: text/event-stream` every finished post is sent as a
+    `post_composed` event, followed by a `result` event with all results.
+    """
+    post_composition_agent = get_agent('post_composition_agent')
+    if not post_composition_agent:
+        raise HTTPException(status_code=503, detail="Post composition agent not available")
+    
+    context = RequestContext(
+        user_id=current_user.id,
+        organization_id=current_user.default_organization_id
+    )
+    if hasattr(post_composition_agent, 'set_context'):
+        post_composition_agent.set_context(context)
+    
+    jobs = [job.model_dump() for job in request.jobs]
+    if wants_stream(http_request):
+        return sse_response(stream_agent_call(
+            post_composition_agent.compose_posts, jobs, request.force_new
+        ))
+    
+    return await run_in_threadpool(post_composition_agent.compose_posts, jobs, request.force_new)
+
 @router.get("/composed-posts")
 async def list_composed_posts():
     """List all composed posts"""
@@ -308,16 +401,43 @@ async def get_video_template_fields(template_id: str):
     return result
 
 @router.post("/create-video-reel")
-async def create_video_reel(request: VideoReelRequest):
-    """Create a reel/video using a video template"""
+async def create_video_reel(
+    request: VideoReelRequest,
+    http_request: Request,
+    preview: bool = False,
+    background: bool = False,
+    idempotency_key: Optional[str] = Header(None)
+):
+    """Create a reel/video using a video template
+    
+    With `?preview=true` only a cached low resolution preview and a poster
+    image are rendered; with `?background=true` the full reel is rendered as
+    a background job.
+    """
     post_composition_agent = get_agent('post_composition_agent')
     if not post_composition_agent:
         raise HTTPException(status_code=503, detail="Post composition agent not available")
     
-    result = post_composition_agent.create_video_reel(
-        request.template_id,
-        request.content_data
-    )
+    if preview:
+        result = await run_in_threadpool(
+            post_composition_agent.create_video_reel_preview,
+            request.template_id,
+            request.content_data
+        )
+    elif background:
+        job = enqueue_job(
+            "video_composition",
+            agent_call_payload('post_composition_agent', 'create_video_reel', request.model_dump()),
+            idempotency_key=idempotency_key,
+            owner_id=require_job_owner(http_request)
+        )
+        return job_accepted(job)
+    else:
+        result = await run_in_threadpool(
+            post_composition_agent.create_video_reel,
+            request.template_id,
+            request.content_data
+        )
     
     if not result.get("success"):
         raise HTTPException(status_code=400, detail=result.get("message", "Error creating video reel"))
@@ -325,8 +445,19 @@ async def create_video_reel(request: VideoReelRequest):
     return result
 
 @router.post("/compose-video-post")
-async def compose_video_post(request: PostCompositionRequest):
-    """Compose a post using video templates"""
+async def compose_video_post(
+    request: PostCompositionRequest,
+    http_request: Request,
+    preview: bool = False,
+    background: bool = False,
+    idempotency_key: Optional[str] = Header(None)
+):
+    """Compose a post using video templates
+    
+    With `?preview=true` only a cached low resolution preview and a poster
+    image are rendered; with `?background=true` the full video is rendered
+    as a background job.
+    """
     # Ensure the template name starts with "video:"
     if not request.template_name.startswith("video:"):
         raise HTTPException(status_code=400, detail="Invalid video template name format")
@@ -335,15 +466,33 @@ async def compose_video_post(request: PostCompositionRequest):
     if not post_composition_agent:
         raise HTTPException(status_code=503, detail="Post composition agent not available")
     
-    result = post_composition_agent.compose_post(
-        request.background_path,
-        request.text,
-        request.period,
-        request.template_name,
-        request.post_format,
-        request.custom_options,
-        request.force_new
-    )
+    if preview:
+        result = await run_in_threadpool(
+            post_composition_agent.compose_video_preview,
+            request.text,
+            request.period,
+            request.template_name,
+            request.custom_options
+        )
+    elif background:
+        job = enqueue_job(
+            "video_composition",
+            agent_call_payload('post_composition_agent', 'compose_post', request.model_dump()),
+            idempotency_key=idempotency_key,
+            owner_id=require_job_owner(http_request)
+        )
+        return job_accepted(job)
+    else:
+        result = await run_in_threadpool(
+            post_composition_agent.compose_post,
+            request.background_path,
+            request.text,
+            request.period,
+            request.template_name,
+            request.post_format,
+            request.custom_options,
+            request.force_new
+        )
     
     if not result.get("success"):
         raise HTTPException(status_code=400, detail=result.get("message", "Error composing video post"))
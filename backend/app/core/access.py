@@ -0,0 +1,222 @@
+"""Membership-based access checks for organizations and projects
+
+A user's organization and project memberships are loaded together (users by
+email, organization_members, project_members) and kept for a short time, so a
+handler resolves them once and every permission check after that is a dict
+lookup. Which organization a project belongs to and which project a goal
+belongs to never change, so those mappings are cached for the process.
+
+Endpoints that change memberships call `access_resolver.invalidate(user_id)`
+for the affected users; other processes pick the change up once the TTL runs
+out.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ADMIN_ROLES = ("owner", "admin")
+
+
+@dataclass
+class UserAccess:
+    """Organization and project memberships of one user"""
+    user_id: str
+    organization_roles: Dict[str, str] = field(default_factory=dict)
+    project_roles: Dict[str, str] = field(default_factory=dict)
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def organization_role(self, organization_id: Optional[str]) -> Optional[str]:
+        """Role in the organization, or None if not a member"""
+        return self.organization_roles.get(str(organization_id))
+
+    def is_organization_admin(self, organization_id: Optional[str]) -> bool:
+        return self.organization_role(organization_id) in ADMIN_ROLES
+
+    def project_role(self, project_id: str, organization_id: Optional[str] = None) -> Optional[str]:
+        """Effective role in a project
+
+        A direct project membership wins. Otherwise members of the owning
+        organization get access through it: owners and admins as 'admin',
+        everyone else as 'viewer'.
+        """
+        role = self.project_roles.get(str(project_id))
+        if role:
+            return role
+        org_role = self.organization_role(organization_id)
+        if org_role is None:
+            return None
+        return "admin" if org_role in ADMIN_ROLES else "viewer"
+
+    def can_access_project(self, project_id: str, organization_id: Optional[str] = None) -> bool:
+        return self.project_role(project_id, organization_id) is not None
+
+    def is_project_admin(self, project_id: str, organization_id: Optional[str] = None) -> bool:
+        """Project admin directly or as owner/admin of the owning organization"""
+        return (self.project_roles.get(str(project_id)) in ADMIN_ROLES
+                or self.is_organization_admin(organization_id))
+
+
+class AccessResolver:
+    """Loads and caches user memberships for access checks"""
+
+    def __init__(self, ttl_seconds: int = 30, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._users: "OrderedDict[Tuple[str, str], UserAccess]" = OrderedDict()
+        self._project_organizations: "OrderedDict[str, str]" = OrderedDict()
+        self._goal_projects: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, cache: OrderedDict, key, value):
+        """Store a value and drop the least recently used entries; caller holds the lock"""
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.max_entries:
+            cache.popitem(last=False)
+
+    def get_user_access(self, current_user: Dict[str, Any], supabase) -> UserAccess:
+        """Get the memberships of the authenticated user
+
+        Args:
+            current_user: Auth context with 'user_id' and optionally 'email'
+            supabase: Supabase client used on a cache miss
+        """
+        key = (str(current_user["user_id"]), current_user.get("email") or "")
+        with self._lock:
+            access = self._users.get(key)
+            if access and time.monotonic() - access.loaded_at < self.ttl_seconds:
+                self._users.move_to_end(key)
+                self.hits += 1
+                return access
+            self.misses += 1
+
+        access = self._load(key[0], key[1], supabase)
+        if self.ttl_seconds > 0:
+            with self._lock:
+                self._remember(self._users, key, access)
+        return access
+
+    @staticmethod
+    def _load(auth_user_id: str, email: str, supabase) -> UserAccess:
+        """Query the public user id and all memberships"""
+        user_id = auth_user_id
+        if email:
+            user_result = supabase.table("users").select("id").eq("email", email).execute()
+            if user_result.data:
+                user_id = user_result.data[0]["id"]
+
+        org_result = supabase.table("organization_members").select(
+            "organization_id, role"
+        ).eq("user_id", user_id).execute()
+        project_result = supabase.table("project_members").select(
+            "project_id, role"
+        ).eq("user_id", user_id).execute()
+
+        return UserAccess(
+            user_id=user_id,
+            organization_roles={str(m["organization_id"]): m["role"] for m in org_result.data or []},
+            project_roles={str(m["project_id"]): m["role"] for m in project_result.data or []}
+        )
+
+    def project_organization(self, project_id: str, supabase) -> Optional[str]:
+        """Organization that owns a project, or None if the project doesn't exist"""
+        project_id = str(project_id)
+        with self._lock:
+            organization_id = self._project_organizations.get(project_id)
+        if organization_id:
+            return organization_id
+
+        result = supabase.table("projects").select("organization_id").eq("id", project_id).execute()
+        if not result.data:
+            return None
+        organization_id = str(result.data[0]["organization_id"])
+        with self._lock:
+            self._remember(self._project_organizations, project_id, organization_id)
+        return organization_id
+
+    def goal_project(self, goal_id: str, supabase) -> Optional[str]:
+        """Project a goal belongs to, or None if the goal doesn't exist"""
+        goal_id = str(goal_id)
+        with self._lock:
+            project_id = self._goal_projects.get(goal_id)
+        if project_id:
+            return project_id
+
+        result = supabase.table("goals").select("project_id").eq("id", goal_id).execute()
+        if not result.data:
+            return None
+        project_id = str(result.data[0]["project_id"])
+        with self._lock:
+            self._remember(self._goal_projects, goal_id, project_id)
+        return project_id
+
+    def can_access_project(self, access: UserAccess, project_id: str, supabase) -> bool:
+        """Whether the user is a member of the project or of its organization"""
+        if str(project_id) in access.project_roles:
+            return True
+        organization_id = self.project_organization(project_id, supabase)
+        return organization_id is not None and access.can_access_project(project_id, organization_id)
+
+    def can_access_goal(self, access: UserAccess, goal_id: str, supabase) -> bool:
+        """Whether the user can access the project of the goal"""
+        project_id = self.goal_project(goal_id, supabase)
+        return project_id is not None and self.can_access_project(access, project_id, supabase)
+
+    def accessible_project_ids(self, access: UserAccess, supabase) -> List[str]:
+        """Projects the user is a member of plus all projects of their organizations"""
+        project_ids = set(access.project_roles)
+        if access.organization_roles:
+            org_projects = supabase.table("projects").select("id, organization_id").in_(
+                "organization_id", list(access.organization_roles)
+            ).execute()
+            with self._lock:
+                for project in org_projects.data or []:
+                    project_ids.add(str(project["id"]))
+                    self._remember(self._project_organizations, str(project["id"]),
+                                   str(project["organization_id"]))
+        return list(project_ids)
+
+    def invalidate(self, user_id: Optional[str] = None) -> int:
+        """Forget cached memberships of a user (auth or public id), or of everyone
+
+        Returns:
+            int: Number of entries removed
+        """
+        with self._lock:
+            if user_id is None:
+                removed = len(self._users)
+                self._users.clear()
+                return removed
+
+            user_id = str(user_id)
+            stale = [key for key, access in self._users.items()
+                     if key[0] == user_id or access.user_id == user_id]
+            for key in stale:
+                del self._users[key]
+            return len(stale)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "users": len(self._users),
+                "projects": len(self._project_organizations),
+                "goals": len(self._goal_projects),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Global instance
+access_resolver = AccessResolver(ttl_seconds=settings.ACCESS_CACHE_TTL_SECONDS)
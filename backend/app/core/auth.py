@@ -104,6 +104,34 @@ def decode_token(token: str) -> TokenData:
         )
 
 
+def get_request_user_id(request: Request) -> Optional[str]:
+    """User id of the bearer token, if the request carries a valid access token"""
+    authorization = request.headers.get("authorization", "")
+    if not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        token_data = decode_token(authorization[7:])
+    except HTTPException:
+        return None
+    return str(token_data.sub) if token_data.token_type == "access" else None
+
+
+def require_job_owner(request: Request) -> str:
+    """User id that owns a background job enqueued by this request
+
+    Jobs are only visible to their owner, so endpoints that are otherwise
+    public need a signed in caller to run in the background.
+    """
+    user_id = get_request_user_id(request)
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required for background jobs",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user_id
+
+
 async def get_current_user_token(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> TokenData:
@@ -55,6 +55,77 @@ class Settings:
     SUPABASE_JWT_SECRET: Optional[str] = os.getenv("SUPABASE_JWT_SECRET")  # JWT secret for verifying tokens
     DUAL_WRITE_READ_FROM: str = os.getenv("DUAL_WRITE_READ_FROM", "json")  # json or supabase
     
+    # LLM Response Cache (used by tasks with `cache: true` in tasks.yaml)
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+    # Listings: serve the old unpaginated responses of /api/tasks, /api/goals,
+    # /api/projects and member listings (per request: ?legacy=true)
+    LEGACY_UNPAGINATED_LISTINGS: bool = os.getenv("LEGACY_UNPAGINATED_LISTINGS", "false").lower() == "true"
+    
+    # Content workflows: independent steps run in parallel up to this many at a time
+    WORKFLOW_MAX_CONCURRENCY: int = int(os.getenv("WORKFLOW_MAX_CONCURRENCY", "3"))
+    WORKFLOW_STEP_TIMEOUT_SECONDS: int = int(os.getenv("WORKFLOW_STEP_TIMEOUT_SECONDS", "900"))
+    
+    # Background jobs: persistent queue for long-running agent work
+    JOB_WORKERS_ENABLED: bool = os.getenv("JOB_WORKERS_ENABLED", "true").lower() == "true"  # run workers in the API process
+    JOB_CONCURRENCY: str = os.getenv("JOB_CONCURRENCY", "")  # e.g. "video_generation=1,voice_over=2"
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    JOB_RETRY_BACKOFF_SECONDS: int = int(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "10"))
+    JOB_VISIBILITY_TIMEOUT_SECONDS: int = int(os.getenv("JOB_VISIBILITY_TIMEOUT_SECONDS", "600"))
+    
+    # Instagram analyses: accounts per request, accounts analyzed in parallel and how long stored analyses are reused
+    INSTAGRAM_ANALYSIS_MAX_ACCOUNTS: int = int(os.getenv("INSTAGRAM_ANALYSIS_MAX_ACCOUNTS", "10"))
+    INSTAGRAM_ANALYSIS_CONCURRENCY: int = int(os.getenv("INSTAGRAM_ANALYSIS_CONCURRENCY", "4"))
+    INSTAGRAM_ANALYSIS_MAX_AGE_HOURS: float = float(os.getenv("INSTAGRAM_ANALYSIS_MAX_AGE_HOURS", "168"))
+    
+    # Prompt budgets: token limit of crew task prompts without `max_prompt_tokens` in tasks.yaml (0 disables)
+    PROMPT_BUDGET_DEFAULT_TOKENS: int = int(os.getenv("PROMPT_BUDGET_DEFAULT_TOKENS", "12000"))
+    
+    # LLM gateway: process-wide limits per model, overrides as "gpt-4=100:40000" (model=rpm:tpm)
+    LLM_RPM_LIMIT: int = int(os.getenv("LLM_RPM_LIMIT", "500"))
+    LLM_TPM_LIMIT: int = int(os.getenv("LLM_TPM_LIMIT", "200000"))
+    LLM_RATE_LIMITS: str = os.getenv("LLM_RATE_LIMITS", "")
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "4"))  # retries after a 429
+    LLM_RETRY_BACKOFF_SECONDS: float = float(os.getenv("LLM_RETRY_BACKOFF_SECONDS", "1"))
+    LLM_MAX_CONNECTIONS: int = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))  # pooled connections per model
+    LLM_INTERACTIVE_RESERVE: float = float(os.getenv("LLM_INTERACTIVE_RESERVE", "0.2"))  # share of the limits batch calls leave free
+    
+    # Post composition: processes rendering composition batches (0 uses all available cores)
+    POST_RENDER_WORKERS: int = int(os.getenv("POST_RENDER_WORKERS", "0"))
+    
+    # FFmpeg: encodes running at once (0 uses all available cores) and seconds before one is killed
+    FFMPEG_MAX_CONCURRENT: int = int(os.getenv("FFMPEG_MAX_CONCURRENT", "0"))
+    FFMPEG_TIMEOUT_SECONDS: float = float(os.getenv("FFMPEG_TIMEOUT_SECONDS", "600"))
+    # FFmpeg executable (empty uses ffmpeg on PATH, then the imageio-ffmpeg binary)
+    FFMPEG_BINARY: str = os.getenv("FFMPEG_BINARY", "")
+    # Where render jobs get their scratch directories (empty uses /dev/shm when available)
+    RENDER_TMP_DIR: str = os.getenv("RENDER_TMP_DIR", "")
+    # Video encoding: x264 preset and CRF (lower is better quality) for final renders and previews
+    VIDEO_ENCODER_PRESET: str = os.getenv("VIDEO_ENCODER_PRESET", "medium")
+    VIDEO_CRF: int = int(os.getenv("VIDEO_CRF", "21"))
+    VIDEO_PREVIEW_PRESET: str = os.getenv("VIDEO_PREVIEW_PRESET", "ultrafast")
+    VIDEO_PREVIEW_CRF: int = int(os.getenv("VIDEO_PREVIEW_CRF", "30"))
+    # Video previews: frame width (height keeps the aspect ratio) and frame rate
+    VIDEO_PREVIEW_WIDTH: int = int(os.getenv("VIDEO_PREVIEW_WIDTH", "270"))
+    VIDEO_PREVIEW_FPS: int = int(os.getenv("VIDEO_PREVIEW_FPS", "10"))
+    
+    # Media cache: content-addressed renders shared by the workers of a host (empty dir uses
+    # storage/media/cache), its size limit and an optional Supabase bucket shared across hosts
+    MEDIA_CACHE_DIR: str = os.getenv("MEDIA_CACHE_DIR", "")
+    MEDIA_CACHE_MAX_MB: int = int(os.getenv("MEDIA_CACHE_MAX_MB", "2048"))
+    MEDIA_CACHE_BUCKET: str = os.getenv("MEDIA_CACHE_BUCKET", "")
+    
+    # Access checks: how long a user's organization/project memberships are reused (0 disables)
+    ACCESS_CACHE_TTL_SECONDS: int = int(os.getenv("ACCESS_CACHE_TTL_SECONDS", "30"))
+    
+    # Semantic Q&A Cache
+    QA_SEMANTIC_CACHE_ENABLED: bool = os.getenv("QA_SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    QA_SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("QA_SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    QA_SEMANTIC_CACHE_MAX_ENTRIES: int = int(os.getenv("QA_SEMANTIC_CACHE_MAX_ENTRIES", "500"))
+    QA_SEMANTIC_CACHE_WARM_LIMIT: int = int(os.getenv("QA_SEMANTIC_CACHE_WARM_LIMIT", "200"))
+    
     # File Storage Settings
     STORAGE_BASE_PATH: str = "storage"
     GENERATED_DIR: str = "generated"
@@ -0,0 +1,227 @@
+"""SQLite-backed store for LLM cost records with incremental daily rollups"""
+
+import glob
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CostStore:
+    """Persist cost records and keep per-day aggregates up to date on write
+
+    Every record updates a rollup row keyed by (date, agent, model, organization),
+    so range queries read at most one row per day and dimension instead of
+    every individual record.
+    """
+
+    ROLLUP_DIMENSIONS = ("agent_name", "model", "organization_id")
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._create_schema()
+
+    def _create_schema(self):
+        """Create tables and indexes if they don't exist"""
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS cost_records (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    date TEXT NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    agent_name TEXT NOT NULL,
+                    task_name TEXT,
+                    task_description TEXT,
+                    model TEXT NOT NULL,
+                    organization_id TEXT NOT NULL DEFAULT '',
+                    project_id TEXT,
+                    prompt_tokens INTEGER NOT NULL,
+                    completion_tokens INTEGER NOT NULL,
+                    total_tokens INTEGER NOT NULL,
+                    estimated_cost REAL NOT NULL,
+                    currency TEXT NOT NULL DEFAULT 'USD'
+                );
+                CREATE INDEX IF NOT EXISTS idx_cost_records_date ON cost_records(date);
+
+                CREATE TABLE IF NOT EXISTS cost_daily_rollups (
+                    date TEXT NOT NULL,
+                    agent_name TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    organization_id TEXT NOT NULL DEFAULT '',
+                    requests INTEGER NOT NULL DEFAULT 0,
+                    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                    completion_tokens INTEGER NOT NULL DEFAULT 0,
+                    total_tokens INTEGER NOT NULL DEFAULT 0,
+                    cost REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (date, agent_name, model, organization_id)
+                );
+
+                CREATE TABLE IF NOT EXISTS imported_files (
+                    filename TEXT PRIMARY KEY
+                );
+            """)
+
+    @staticmethod
+    def _to_row(record: Dict[str, Any]) -> Dict[str, Any]:
+        """Flatten a CostEstimate dict into a cost_records row"""
+        usage = record["token_usage"]
+        return {
+            "date": record["timestamp"][:10],
+            "timestamp": record["timestamp"],
+            "agent_name": record["agent_name"],
+            "task_name": record.get("task_name"),
+            "task_description": record.get("task_description"),
+            "model": record["model"],
+            "organization_id": record.get("organization_id") or "",
+            "project_id": record.get("project_id"),
+            "prompt_tokens": usage["prompt_tokens"],
+            "completion_tokens": usage["completion_tokens"],
+            "total_tokens": usage["total_tokens"],
+            "estimated_cost": record["estimated_cost"],
+            "currency": record.get("currency", "USD")
+        }
+
+    def add(self, record: Dict[str, Any]):
+        """Insert a cost record and fold it into the daily rollup"""
+        with self._lock, self._conn:
+            self._insert(self._to_row(record))
+
+    def _insert(self, row: Dict[str, Any]):
+        """Insert a record row and upsert its rollup; caller holds the lock and transaction"""
+        self._conn.execute("""
+            INSERT INTO cost_records (date, timestamp, agent_name, task_name, task_description,
+                model, organization_id, project_id, prompt_tokens, completion_tokens,
+                total_tokens, estimated_cost, currency)
+            VALUES (:date, :timestamp, :agent_name, :task_name, :task_description,
+                :model, :organization_id, :project_id, :prompt_tokens, :completion_tokens,
+                :total_tokens, :estimated_cost, :currency)
+        """, row)
+        self._conn.execute("""
+            INSERT INTO cost_daily_rollups (date, agent_name, model, organization_id,
+                requests, prompt_tokens, completion_tokens, total_tokens, cost)
+            VALUES (:date, :agent_name, :model, :organization_id,
+                1, :prompt_tokens, :completion_tokens, :total_tokens, :estimated_cost)
+            ON CONFLICT (date, agent_name, model, organization_id) DO UPDATE SET
+                requests = requests + 1,
+                prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+                completion_tokens = completion_tokens + excluded.completion_tokens,
+                total_tokens = total_tokens + excluded.total_tokens,
+                cost = cost + excluded.cost
+        """, row)
+
+    def import_jsonl_files(self, directory: str) -> int:
+        """One-time import of legacy costs_YYYY-MM-DD.jsonl files
+
+        Files already imported are skipped, so this is safe to call on every start.
+
+        Returns:
+            int: Number of records imported
+        """
+        imported = 0
+        for path in sorted(glob.glob(os.path.join(directory, "costs_*.jsonl"))):
+            filename = os.path.basename(path)
+            with self._lock, self._conn:
+                done = self._conn.execute(
+                    "SELECT 1 FROM imported_files WHERE filename = ?", (filename,)
+                ).fetchone()
+                if done:
+                    continue
+
+                try:
+                    with open(path, "r") as f:
+                        for line in f:
+                            if not line.strip():
+                                continue
+                            self._insert(self._to_row(json.loads(line)))
+                            imported += 1
+                except Exception as e:
+                    logger.error(f"Failed to import cost file {filename}: {e}")
+                    raise
+
+                self._conn.execute("INSERT INTO imported_files (filename) VALUES (?)", (filename,))
+
+        if imported:
+            logger.info(f"Imported {imported} cost records from JSONL files in {directory}")
+        return imported
+
+    def get_rollups(self,
+                    start_date: str,
+                    end_date: str,
+                    group_by: Optional[List[str]] = None,
+                    organization_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Aggregate rollups between two dates (inclusive)
+
+        Args:
+            start_date: First date in YYYY-MM-DD format
+            end_date: Last date in YYYY-MM-DD format
+            group_by: Columns to group by, any of 'date' and ROLLUP_DIMENSIONS
+            organization_id: Optional tenant filter
+
+        Returns:
+            List[Dict]: One row per group with requests, tokens and cost
+        """
+        group_by = group_by or []
+        for column in group_by:
+            if column != "date" and column not in self.ROLLUP_DIMENSIONS:
+                raise ValueError(f"Cannot group costs by '{column}'")
+
+        columns = ", ".join(group_by + [
+            "SUM(requests) AS requests",
+            "SUM(prompt_tokens) AS prompt_tokens",
+            "SUM(completion_tokens) AS completion_tokens",
+            "SUM(total_tokens) AS total_tokens",
+            "SUM(cost) AS cost"
+        ])
+        query = f"SELECT {columns} FROM cost_daily_rollups WHERE date BETWEEN ? AND ?"
+        params: List[Any] = [start_date, end_date]
+        if organization_id is not None:
+            query += " AND organization_id = ?"
+            params.append(organization_id)
+        if group_by:
+            query += f" GROUP BY {', '.join(group_by)} ORDER BY {', '.join(group_by)}"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [dict(row) for row in rows if row["requests"]]
+
+    def get_records(self, date: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get individual cost records for a day in the JSONL record format"""
+        query = "SELECT * FROM cost_records WHERE date = ? ORDER BY id"
+        params: List[Any] = [date]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        return [{
+            "model": row["model"],
+            "token_usage": {
+                "prompt_tokens": row["prompt_tokens"],
+                "completion_tokens": row["completion_tokens"],
+                "total_tokens": row["total_tokens"]
+            },
+            "estimated_cost": row["estimated_cost"],
+            "currency": row["currency"],
+            "timestamp": row["timestamp"],
+            "agent_name": row["agent_name"],
+            "task_description": row["task_description"],
+            "task_name": row["task_name"],
+            "organization_id": row["organization_id"] or None,
+            "project_id": row["project_id"]
+        } for row in rows]
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
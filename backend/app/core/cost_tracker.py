@@ -1,13 +1,64 @@
 import logging
 import os
-import json
+import asyncio
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 from pydantic import BaseModel
 from functools import wraps
+from collections import deque
+
+from app.core.cost_store import CostStore
 
 logger = logging.getLogger(__name__)
 
+# Attribution (agent, task, tenant) for LLM calls made in the current context.
+# Set by BaseCrew while an agent executes a task and by the track_cost decorator.
+_cost_attribution: ContextVar[Dict[str, Any]] = ContextVar("cost_attribution", default={})
+
+
+@contextmanager
+def cost_attribution(**fields):
+    """Attribute all LLM usage tracked inside this block to the given fields.
+
+    Supported fields are ``agent_name``, ``task_name``, ``organization_id`` and
+    ``project_id``. Nested blocks inherit and override the outer fields.
+    """
+    current = _cost_attribution.get()
+    merged = {**current, **{k: v for k, v in fields.items() if v is not None}}
+    token = _cost_attribution.set(merged)
+    try:
+        yield merged
+    finally:
+        _cost_attribution.reset(token)
+
+
+def get_cost_attribution() -> Dict[str, Any]:
+    """Get the attribution fields active in the current context"""
+    return dict(_cost_attribution.get())
+
+
+# Rollups collecting the usage tracked in the current context, see collect_costs()
+_cost_collectors: ContextVar[tuple] = ContextVar("cost_collectors", default=())
+
+
+@contextmanager
+def collect_costs():
+    """Collect the usage of all LLM calls tracked inside this block
+    
+    Yields a CostRollup of its own, so concurrent requests sharing an agent
+    each see only their own calls. Threads started with a copy of the
+    context (e.g. parallel crew tasks) report into the same rollup.
+    """
+    rollup = CostRollup(max_recent=0)
+    token = _cost_collectors.set(_cost_collectors.get() + (rollup,))
+    try:
+        yield rollup
+    finally:
+        _cost_collectors.reset(token)
+
 
 class TokenUsage(BaseModel):
     """Model for tracking token usage"""
@@ -31,7 +82,78 @@ class CostEstimate(BaseModel):
     timestamp: str
     agent_name: str
     task_description: Optional[str] = None
+    task_name: Optional[str] = None
+    organization_id: Optional[str] = None
+    project_id: Optional[str] = None
+
+
+class CostRollup:
+    """Running cost totals with fixed-size breakdowns
     
+    Keeps aggregates instead of every CostEstimate so long-lived processes
+    don't accumulate records in memory. Only the most recent estimates are kept.
+    """
+    
+    def __init__(self, max_recent: int = 100, max_groups: int = 500):
+        self.max_groups = max_groups
+        self.recent: deque = deque(maxlen=max_recent)
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        """Clear all totals"""
+        with self._lock:
+            self.total_cost = 0.0
+            self.prompt_tokens = 0
+            self.completion_tokens = 0
+            self.total_tokens = 0
+            self.requests = 0
+            self.models: set = set()
+            self.by_agent: Dict[str, Dict[str, Any]] = {}
+            self.by_model: Dict[str, Dict[str, Any]] = {}
+            self.by_organization: Dict[str, Dict[str, Any]] = {}
+            self.recent.clear()
+    
+    def _add_to_group(self, groups: Dict[str, Dict[str, Any]], key: str, cost: CostEstimate):
+        if key not in groups:
+            if len(groups) >= self.max_groups:
+                key = "other"
+            groups.setdefault(key, {"cost": 0.0, "tokens": 0, "requests": 0})
+        groups[key]["cost"] += cost.estimated_cost
+        groups[key]["tokens"] += cost.token_usage.total_tokens
+        groups[key]["requests"] += 1
+    
+    def add(self, cost: CostEstimate):
+        """Fold a cost estimate into the totals"""
+        with self._lock:
+            self.total_cost += cost.estimated_cost
+            self.prompt_tokens += cost.token_usage.prompt_tokens
+            self.completion_tokens += cost.token_usage.completion_tokens
+            self.total_tokens += cost.token_usage.total_tokens
+            self.requests += 1
+            if len(self.models) < self.max_groups:
+                self.models.add(cost.model)
+            self._add_to_group(self.by_agent, cost.agent_name, cost)
+            self._add_to_group(self.by_model, cost.model, cost)
+            self._add_to_group(self.by_organization, cost.organization_id or "none", cost)
+            self.recent.append(cost)
+    
+    def __len__(self) -> int:
+        return self.requests
+    
+    def summary(self) -> Dict[str, Any]:
+        """Totals and breakdowns in the session summary format"""
+        with self._lock:
+            return {
+                "total_cost": round(self.total_cost, 6),
+                "total_tokens": self.total_tokens,
+                "requests": self.requests,
+                "by_agent": {key: dict(group) for key, group in self.by_agent.items()},
+                "by_model": {key: dict(group) for key, group in self.by_model.items()},
+                "by_organization": {key: dict(group) for key, group in self.by_organization.items()},
+                "currency": "USD"
+            }
+
 
 class CostTracker:
     """Track costs for AI agent operations"""
@@ -55,37 +177,95 @@ class CostTracker:
             "input": 3.00,
             "output": 4.00
         },
+        "gpt-4o": {
+            "input": 2.50,
+            "output": 10.00
+        },
+        "gpt-4o-mini": {
+            "input": 0.15,
+            "output": 0.60
+        },
+        "gpt-4.1": {
+            "input": 2.00,
+            "output": 8.00
+        },
+        "gpt-4.1-mini": {
+            "input": 0.40,
+            "output": 1.60
+        },
         "text-embedding-ada-002": {
             "input": 0.10,
             "output": 0.00  # Embeddings don't have output tokens
         },
+        "text-embedding-3-small": {
+            "input": 0.02,
+            "output": 0.00
+        },
+        "text-embedding-3-large": {
+            "input": 0.13,
+            "output": 0.00
+        },
         # Add more models as needed
     }
     
     def __init__(self, storage_dir: str = "storage/cost_tracking"):
         self.storage_dir = storage_dir
         os.makedirs(storage_dir, exist_ok=True)
-        self.session_costs: List[CostEstimate] = []
+        self.session_costs = CostRollup()
+        self._store: Optional[CostStore] = None
+    
+    @property
+    def store(self) -> CostStore:
+        """Cost store, opened on first use; imports legacy JSONL files once"""
+        if self._store is None:
+            self._store = CostStore(os.path.join(self.storage_dir, "costs.db"))
+            try:
+                self._store.import_jsonl_files(self.storage_dir)
+            except Exception as e:
+                logger.error(f"Failed to import legacy cost files: {e}")
+        return self._store
         
+    def resolve_model(self, model: str) -> Optional[str]:
+        """Map a provider model id to a MODEL_COSTS key.
+
+        Handles provider prefixes ("openai/gpt-4o-mini") and dated snapshots
+        ("gpt-4o-mini-2024-07-18") by picking the longest matching prefix.
+        """
+        if not model:
+            return None
+        name = model.split("/")[-1].lower()
+        if name in self.MODEL_COSTS:
+            return name
+        matches = [key for key in self.MODEL_COSTS if name.startswith(key + "-")]
+        return max(matches, key=len) if matches else None
+
     def calculate_cost(self, model: str, token_usage: TokenUsage) -> float:
         """Calculate cost based on model and token usage"""
-        if model not in self.MODEL_COSTS:
+        resolved = self.resolve_model(model)
+        if resolved is None:
             logger.warning(f"Unknown model: {model}. Using default GPT-4 pricing.")
-            model = "gpt-4"
+            resolved = "gpt-4"
             
-        costs = self.MODEL_COSTS[model]
+        costs = self.MODEL_COSTS[resolved]
         input_cost = (token_usage.prompt_tokens / 1_000_000) * costs["input"]
         output_cost = (token_usage.completion_tokens / 1_000_000) * costs["output"]
         
-        return round(input_cost + output_cost, 4)
+        # Single calls to small models cost fractions of a cent
+        return round(input_cost + output_cost, 6)
     
     def track_usage(self, 
                    agent_name: str,
                    model: str,
                    token_usage: TokenUsage,
-                   task_description: Optional[str] = None) -> CostEstimate:
-        """Track token usage and calculate cost"""
+                   task_description: Optional[str] = None,
+                   task_name: Optional[str] = None,
+                   organization_id: Optional[str] = None,
+                   project_id: Optional[str] = None) -> CostEstimate:
+        """Track token usage and calculate cost
         
+        Fields not passed explicitly are filled from the active cost_attribution().
+        """
+        attribution = _cost_attribution.get()
         estimated_cost = self.calculate_cost(model, token_usage)
         
         cost_estimate = CostEstimate(
@@ -93,16 +273,21 @@ class CostTracker:
             token_usage=token_usage,
             estimated_cost=estimated_cost,
             timestamp=datetime.now().isoformat(),
-            agent_name=agent_name,
-            task_description=task_description
+            agent_name=agent_name or attribution.get("agent_name", "unknown"),
+            task_description=task_description,
+            task_name=task_name or attribution.get("task_name"),
+            organization_id=organization_id or attribution.get("organization_id"),
+            project_id=project_id or attribution.get("project_id")
         )
         
-        # Add to session costs
-        self.session_costs.append(cost_estimate)
+        # Add to session costs and to the rollups collecting this context's usage
+        self.session_costs.add(cost_estimate)
+        for rollup in _cost_collectors.get():
+            rollup.add(cost_estimate)
         
         # Log the cost
-        logger.info(f"Cost tracking - Agent: {agent_name}, Model: {model}, "
-                   f"Tokens: {token_usage.total_tokens}, Cost: ${estimated_cost:.4f}")
+        logger.info(f"Cost tracking - Agent: {cost_estimate.agent_name}, Task: {cost_estimate.task_name}, "
+                   f"Model: {model}, Tokens: {token_usage.total_tokens}, Cost: ${estimated_cost:.6f}")
         
         # Save to file
         self._save_cost_record(cost_estimate)
@@ -110,132 +295,86 @@ class CostTracker:
         return cost_estimate
     
     def _save_cost_record(self, cost_estimate: CostEstimate):
-        """Save cost record to file"""
+        """Save cost record to the cost store"""
         try:
-            # Create daily file
-            date_str = datetime.now().strftime("%Y-%m-%d")
-            filename = os.path.join(self.storage_dir, f"costs_{date_str}.jsonl")
-            
-            with open(filename, "a") as f:
-                f.write(cost_estimate.json() + "\n")
-                
+            self.store.add(cost_estimate.dict())
         except Exception as e:
             logger.error(f"Failed to save cost record: {e}")
     
     def get_session_summary(self) -> Dict[str, Any]:
         """Get summary of costs for current session"""
-        if not self.session_costs:
-            return {
-                "total_cost": 0.0,
-                "total_tokens": 0,
-                "requests": 0,
-                "by_agent": {},
-                "by_model": {}
-            }
-        
-        total_cost = sum(cost.estimated_cost for cost in self.session_costs)
-        total_tokens = sum(cost.token_usage.total_tokens for cost in self.session_costs)
-        
-        # Group by agent
-        by_agent = {}
-        for cost in self.session_costs:
-            if cost.agent_name not in by_agent:
-                by_agent[cost.agent_name] = {
-                    "cost": 0.0,
-                    "tokens": 0,
-                    "requests": 0
-                }
-            by_agent[cost.agent_name]["cost"] += cost.estimated_cost
-            by_agent[cost.agent_name]["tokens"] += cost.token_usage.total_tokens
-            by_agent[cost.agent_name]["requests"] += 1
-        
-        # Group by model
-        by_model = {}
-        for cost in self.session_costs:
-            if cost.model not in by_model:
-                by_model[cost.model] = {
-                    "cost": 0.0,
-                    "tokens": 0,
-                    "requests": 0
-                }
-            by_model[cost.model]["cost"] += cost.estimated_cost
-            by_model[cost.model]["tokens"] += cost.token_usage.total_tokens
-            by_model[cost.model]["requests"] += 1
-        
+        return self.session_costs.summary()
+    
+    @staticmethod
+    def _group_rollups(rows: List[Dict[str, Any]], dimension: str) -> Dict[str, Dict[str, Any]]:
+        """Key rollup rows by one dimension in the session summary format"""
         return {
-            "total_cost": round(total_cost, 4),
-            "total_tokens": total_tokens,
-            "requests": len(self.session_costs),
-            "by_agent": by_agent,
-            "by_model": by_model,
-            "currency": "USD"
+            (row[dimension] or "none"): {
+                "cost": round(row["cost"], 6),
+                "tokens": row["total_tokens"],
+                "requests": row["requests"]
+            }
+            for row in rows
         }
     
-    def get_daily_costs(self, date: Optional[str] = None) -> Dict[str, Any]:
+    def get_daily_costs(self, date: Optional[str] = None, include_details: bool = True) -> Dict[str, Any]:
         """Get costs for a specific day"""
         if not date:
             date = datetime.now().strftime("%Y-%m-%d")
-            
-        filename = os.path.join(self.storage_dir, f"costs_{date}.jsonl")
-        if not os.path.exists(filename):
-            return {
-                "date": date,
-                "total_cost": 0.0,
-                "total_tokens": 0,
-                "requests": 0,
-                "details": []
-            }
         
-        costs = []
-        total_cost = 0.0
-        total_tokens = 0
+        totals = self.store.get_rollups(date, date)
+        total = totals[0] if totals else {"cost": 0.0, "total_tokens": 0, "requests": 0}
         
-        try:
-            with open(filename, "r") as f:
-                for line in f:
-                    if line.strip():
-                        cost_data = json.loads(line)
-                        costs.append(cost_data)
-                        total_cost += cost_data["estimated_cost"]
-                        total_tokens += cost_data["token_usage"]["total_tokens"]
-        except Exception as e:
-            logger.error(f"Failed to read cost file: {e}")
-        
-        return {
+        daily = {
             "date": date,
-            "total_cost": round(total_cost, 4),
-            "total_tokens": total_tokens,
-            "requests": len(costs),
-            "details": costs,
+            "total_cost": round(total["cost"], 6),
+            "total_tokens": total["total_tokens"],
+            "requests": total["requests"],
+            "by_agent": self._group_rollups(self.store.get_rollups(date, date, ["agent_name"]), "agent_name"),
+            "by_model": self._group_rollups(self.store.get_rollups(date, date, ["model"]), "model"),
             "currency": "USD"
         }
+        if include_details:
+            daily["details"] = self.store.get_records(date)
+        return daily
     
-    def get_monthly_summary(self, year: int, month: int) -> Dict[str, Any]:
-        """Get monthly cost summary"""
+    def get_monthly_summary(self, year: int, month: int, organization_id: Optional[str] = None) -> Dict[str, Any]:
+        """Get monthly cost summary
+        
+        Reads the daily rollups only, so the cost is proportional to the number
+        of days and dimensions rather than the number of tracked calls.
+        """
         import calendar
         
         days_in_month = calendar.monthrange(year, month)[1]
-        monthly_costs = []
-        total_cost = 0.0
-        total_tokens = 0
-        total_requests = 0
+        start_date = f"{year:04d}-{month:02d}-01"
+        end_date = f"{year:04d}-{month:02d}-{days_in_month:02d}"
         
-        for day in range(1, days_in_month + 1):
-            date_str = f"{year:04d}-{month:02d}-{day:02d}"
-            daily = self.get_daily_costs(date_str)
-            if daily["requests"] > 0:
-                monthly_costs.append(daily)
-                total_cost += daily["total_cost"]
-                total_tokens += daily["total_tokens"]
-                total_requests += daily["requests"]
+        daily_rows = self.store.get_rollups(start_date, end_date, ["date"], organization_id=organization_id)
+        monthly_costs = [{
+            "date": row["date"],
+            "total_cost": round(row["cost"], 6),
+            "total_tokens": row["total_tokens"],
+            "requests": row["requests"],
+            "currency": "USD"
+        } for row in daily_rows]
         
         return {
             "year": year,
             "month": month,
-            "total_cost": round(total_cost, 4),
-            "total_tokens": total_tokens,
-            "total_requests": total_requests,
+            "total_cost": round(sum(row["cost"] for row in daily_rows), 6),
+            "total_tokens": sum(row["total_tokens"] for row in daily_rows),
+            "total_requests": sum(row["requests"] for row in daily_rows),
             "daily_costs": monthly_costs,
+            "by_agent": self._group_rollups(
+                self.store.get_rollups(start_date, end_date, ["agent_name"], organization_id=organization_id),
+                "agent_name"),
+            "by_model": self._group_rollups(
+                self.store.get_rollups(start_date, end_date, ["model"], organization_id=organization_id),
+                "model"),
+            "by_organization": self._group_rollups(
+                self.store.get_rollups(start_date, end_date, ["organization_id"], organization_id=organization_id),
+                "organization_id"),
             "currency": "USD"
         }
 
@@ -245,14 +384,22 @@ cost_tracker = CostTracker()
 
 
 def track_cost(agent_name: str):
-    """Decorator to track costs for agent operations"""
+    """Decorator to attribute LLM usage inside an agent operation to agent_name
+    
+    Token usage itself is captured per LLM call by the LLM gateway; this only
+    scopes the attribution.
+    """
     def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with cost_attribution(agent_name=agent_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+        
         @wraps(func)
-        async def wrapper(*args, **kwargs):
-            # This is a placeholder - in real implementation,
-            # you'd need to intercept the LLM calls to get token usage
-            # For now, we'll add hooks in the agent methods
-            result = await func(*args, **kwargs)
-            return result
+        def wrapper(*args, **kwargs):
+            with cost_attribution(agent_name=agent_name):
+                return func(*args, **kwargs)
         return wrapper
     return decorator
\ No newline at end of file
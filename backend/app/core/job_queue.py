@@ -0,0 +1,473 @@
+"""Durable background jobs backed by SQLite
+
+Long-running agent work (video rendering, voice-overs, account analyses, app
+tests, content workflows) is enqueued as a job and executed by workers, so it
+no longer lives and dies with the HTTP request. Clients get a job id back and
+poll GET /api/jobs/{job_id} or subscribe to GET /api/jobs/{job_id}/events.
+
+A worker leases the job it runs and extends the lease while the handler is
+busy. If the worker dies the lease runs out after the visibility timeout and
+the job is picked up again. Failed attempts are retried with exponential
+backoff until the job type's max_attempts; an idempotency key returns the
+existing job instead of enqueuing a duplicate.
+
+Workers run inside the API process (JOB_WORKERS_ENABLED) and can also be
+started as separate processes with `python -m app.core.job_queue`; all of them
+share the queue through the database file.
+"""
+
+import asyncio
+import contextvars
+import inspect
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+@dataclass
+class JobType:
+    """A kind of job and how it is executed
+
+    Attributes:
+        name: Job type name used when enqueuing
+        handler: Called with the job payload, returns a JSON serializable result
+        concurrency: Jobs of this type one worker runs at the same time
+        max_attempts: Attempts before the job is marked as failed
+    """
+    name: str
+    handler: Callable[[Dict[str, Any]], Any]
+    concurrency: int = 1
+    max_attempts: int = 3
+
+
+class JobQueue:
+    """Persistent job queue with leases, retries and idempotency keys"""
+
+    def __init__(self, db_path: str, visibility_timeout: int = 600,
+                 retry_backoff_seconds: float = 10, max_backoff_seconds: float = 3600):
+        self.db_path = db_path
+        self.visibility_timeout = visibility_timeout
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        # Other worker processes write to the same file, wait for their locks
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._create_schema()
+
+    def _create_schema(self):
+        """Create tables and indexes if they don't exist"""
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    job_type TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL DEFAULT 3,
+                    idempotency_key TEXT UNIQUE,
+                    owner_id TEXT,
+                    result TEXT,
+                    error TEXT,
+                    available_at REAL NOT NULL,
+                    lease_expires_at REAL,
+                    worker_id TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(job_type, status, available_at);
+            """)
+
+    @staticmethod
+    def _to_job(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        """Convert a jobs row into the job dict returned by the API"""
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def enqueue(self,
+                job_type: str,
+                payload: Dict[str, Any],
+                idempotency_key: Optional[str] = None,
+                owner_id: Optional[str] = None,
+                max_attempts: int = 3,
+                delay_seconds: float = 0) -> Dict[str, Any]:
+        """Add a job to the queue
+
+        Args:
+            job_type: Registered job type
+            payload: JSON serializable arguments for the handler
+            idempotency_key: Enqueuing again with the same key returns the existing job
+            owner_id: User the job belongs to
+            max_attempts: Attempts before the job is marked as failed
+            delay_seconds: Seconds before the job may start
+
+        Returns:
+            Dict: The new job, or the existing job for the idempotency key
+        """
+        now = datetime.now().isoformat()
+        job_id = str(uuid.uuid4())
+        with self._lock, self._conn:
+            if idempotency_key:
+                existing = self._conn.execute(
+                    "SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)
+                ).fetchone()
+                if existing:
+                    return self._to_job(existing)
+
+            self._conn.execute("""
+                INSERT INTO jobs (id, job_type, payload, status, max_attempts, idempotency_key,
+                    owner_id, available_at, created_at, updated_at)
+                VALUES (?, ?, ?, 'queued', ?, ?, ?, ?, ?, ?)
+            """, (job_id, job_type, json.dumps(payload, default=str), max_attempts, idempotency_key,
+                  owner_id, time.time() + delay_seconds, now, now))
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        logger.info(f"Enqueued {job_type} job {job_id}")
+        return self._to_job(row)
+
+    def claim(self, job_types: Iterable[str], worker_id: str) -> Optional[Dict[str, Any]]:
+        """Lease the next due job of the given types
+
+        Queued jobs whose backoff has passed and running jobs whose lease ran
+        out (their worker died) are due. An expired job that already used all
+        its attempts is marked as failed instead, so a job that keeps killing
+        its worker isn't retried forever. The update is a single statement, so
+        two workers never lease the same job.
+        """
+        job_types = list(job_types)
+        now = time.time()
+        updated_at = datetime.now().isoformat()
+        placeholders = ", ".join("?" for _ in job_types)
+        with self._lock, self._conn:
+            self._conn.execute(f"""
+                UPDATE jobs
+                SET status = 'failed', lease_expires_at = NULL, updated_at = ?,
+                    error = 'Lease expired after ' || attempts || ' attempts, the worker stopped responding'
+                WHERE job_type IN ({placeholders})
+                  AND status = 'running' AND lease_expires_at < ? AND attempts >= max_attempts
+            """, (updated_at, *job_types, now))
+            row = self._conn.execute(f"""
+                UPDATE jobs
+                SET status = 'running', attempts = attempts + 1, worker_id = ?,
+                    lease_expires_at = ?, updated_at = ?
+                WHERE id = (
+                    SELECT id FROM jobs
+                    WHERE job_type IN ({placeholders})
+                      AND ((status = 'queued' AND available_at <= ?)
+                           OR (status = 'running' AND lease_expires_at < ? AND attempts < max_attempts))
+                    ORDER BY available_at
+                    LIMIT 1
+                )
+                RETURNING *
+            """, (worker_id, now + self.visibility_timeout, updated_at,
+                  *job_types, now, now)).fetchone()
+        return self._to_job(row)
+
+    def extend_lease(self, job_id: str, worker_id: str) -> bool:
+        """Keep a running job leased; False if another worker took it over"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute("""
+                UPDATE jobs SET lease_expires_at = ?
+                WHERE id = ? AND worker_id = ? AND status = 'running'
+            """, (time.time() + self.visibility_timeout, job_id, worker_id))
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: Any) -> bool:
+        """Store the result of a job; False if the lease was lost in the meantime"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute("""
+                UPDATE jobs
+                SET status = 'succeeded', result = ?, error = NULL, lease_expires_at = NULL, updated_at = ?
+                WHERE id = ? AND worker_id = ? AND status = 'running'
+            """, (json.dumps(result, default=str), datetime.now().isoformat(), job_id, worker_id))
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str, result: Any = None) -> Optional[str]:
+        """Record a failed attempt and schedule a retry if attempts are left
+
+        Returns:
+            str: New status ('queued' for a retry, 'failed'), None if the lease was lost
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND worker_id = ? AND status = 'running'",
+                (job_id, worker_id)
+            ).fetchone()
+            if row is None:
+                return None
+
+            if row["attempts"] < row["max_attempts"]:
+                status = "queued"
+                backoff = min(self.retry_backoff_seconds * 2 ** (row["attempts"] - 1), self.max_backoff_seconds)
+            else:
+                status = "failed"
+                backoff = 0
+            self._conn.execute("""
+                UPDATE jobs
+                SET status = ?, error = ?, result = ?, available_at = ?, lease_expires_at = NULL, updated_at = ?
+                WHERE id = ?
+            """, (status, error, json.dumps(result, default=str) if result is not None else None,
+                  time.time() + backoff, datetime.now().isoformat(), job_id))
+        return status
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that hasn't started yet"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', updated_at = ? WHERE id = ? AND status = 'queued'",
+                (datetime.now().isoformat(), job_id)
+            )
+        return cursor.rowcount == 1
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row)
+
+    def list(self, owner_id: Optional[str] = None, job_type: Optional[str] = None,
+             status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent jobs, optionally filtered"""
+        clauses, params = [], []
+        for column, value in (("owner_id", owner_id), ("job_type", job_type), ("status", status)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs {where} ORDER BY created_at DESC LIMIT ?", (*params, limit)
+            ).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Number of jobs per type and status"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_type, status, COUNT(*) AS count FROM jobs GROUP BY job_type, status"
+            ).fetchall()
+        stats: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            stats.setdefault(row["job_type"], {})[row["status"]] = row["count"]
+        return stats
+
+
+class JobWorker:
+    """Runs queued jobs in threads, `concurrency` threads per job type"""
+
+    def __init__(self, queue: JobQueue, job_types: Dict[str, JobType], poll_interval: float = 1.0):
+        self.queue = queue
+        self.job_types = job_types
+        self.poll_interval = poll_interval
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._running: Dict[str, str] = {}
+        self._running_lock = threading.Lock()
+
+    def start(self):
+        """Start the worker threads and the lease keeper"""
+        self._stop.clear()
+        for job_type in self.job_types.values():
+            for index in range(max(1, job_type.concurrency)):
+                thread = threading.Thread(
+                    target=self._work, args=(job_type,), daemon=True,
+                    name=f"job-{job_type.name}-{index}"
+                )
+                thread.start()
+                self._threads.append(thread)
+
+        keeper = threading.Thread(target=self._keep_leases, daemon=True, name="job-leases")
+        keeper.start()
+        self._threads.append(keeper)
+        logger.info(f"Job worker {self.worker_id} started for {sorted(self.job_types)}")
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop taking new jobs; running jobs are picked up again after their lease runs out"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _work(self, job_type: JobType):
+        # Each thread leases under its own id so leases are released per job
+        worker_id = f"{self.worker_id}-{threading.current_thread().name}"
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim([job_type.name], worker_id)
+            except sqlite3.Error as e:
+                logger.error(f"Could not claim {job_type.name} job: {e}")
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            self.run_job(job_type, job, worker_id)
+
+    def run_job(self, job_type: JobType, job: Dict[str, Any], worker_id: str):
+        """Execute one leased job and store its outcome"""
+        with self._running_lock:
+            self._running[job["id"]] = worker_id
+        try:
+            # Each job gets its own copy of the context, so request contexts set
+            # on agents by one job don't carry over to the next
+            result = contextvars.copy_context().run(self._call_handler, job_type, job["payload"])
+        except Exception as e:
+            status = self.queue.fail(job["id"], worker_id, str(e))
+            logger.warning(f"{job_type.name} job {job['id']} attempt {job['attempts']} failed: {e} -> {status}")
+            return
+        finally:
+            with self._running_lock:
+                self._running.pop(job["id"], None)
+
+        # Agents report most failures in the result instead of raising
+        if isinstance(result, dict) and (result.get("success") is False or result.get("status") == "failed"):
+            error = result.get("error") or result.get("message") or "Job failed"
+            status = self.queue.fail(job["id"], worker_id, str(error), result)
+            logger.warning(f"{job_type.name} job {job['id']} attempt {job['attempts']} failed: {error} -> {status}")
+        elif self.queue.complete(job["id"], worker_id, result):
+            logger.info(f"{job_type.name} job {job['id']} succeeded")
+        else:
+            logger.warning(f"{job_type.name} job {job['id']} finished after its lease was taken over")
+
+    @staticmethod
+    def _call_handler(job_type: JobType, payload: Dict[str, Any]) -> Any:
+        result = job_type.handler(payload)
+        if inspect.isawaitable(result):
+            result = asyncio.run(result)
+        return result
+
+    def _keep_leases(self):
+        """Extend the leases of running jobs well before they expire"""
+        interval = max(1.0, self.queue.visibility_timeout / 3)
+        while not self._stop.wait(interval):
+            with self._running_lock:
+                running = list(self._running.items())
+            for job_id, worker_id in running:
+                try:
+                    self.queue.extend_lease(job_id, worker_id)
+                except sqlite3.Error as e:
+                    logger.error(f"Could not extend lease of job {job_id}: {e}")
+
+
+_job_types: Dict[str, JobType] = {}
+_job_queue: Optional[JobQueue] = None
+_job_worker: Optional[JobWorker] = None
+
+
+def register_job_type(name: str, handler: Callable[[Dict[str, Any]], Any],
+                      concurrency: int = 1, max_attempts: Optional[int] = None):
+    """Register a job type; concurrency can be overridden with JOB_CONCURRENCY"""
+    from app.core.config import settings
+
+    overrides = parse_concurrency(settings.JOB_CONCURRENCY)
+    _job_types[name] = JobType(
+        name=name,
+        handler=handler,
+        concurrency=overrides.get(name, concurrency),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS
+    )
+
+
+def parse_concurrency(value: str) -> Dict[str, int]:
+    """Parse 'video_generation=1,voice_over=2' into per job type limits"""
+    limits = {}
+    for item in (value or "").split(","):
+        name, _, count = item.partition("=")
+        if name.strip() and count.strip().isdigit():
+            limits[name.strip()] = int(count)
+    return limits
+
+
+def get_job_queue() -> JobQueue:
+    """Get the process-wide job queue"""
+    global _job_queue
+    from app.core.config import settings
+
+    if _job_queue is None:
+        _job_queue = JobQueue(
+            db_path=settings.get_storage_path("jobs", "jobs.db"),
+            visibility_timeout=settings.JOB_VISIBILITY_TIMEOUT_SECONDS,
+            retry_backoff_seconds=settings.JOB_RETRY_BACKOFF_SECONDS
+        )
+    return _job_queue
+
+
+def enqueue_job(job_type: str, payload: Dict[str, Any], idempotency_key: Optional[str] = None,
+                owner_id: Optional[str] = None) -> Dict[str, Any]:
+    """Enqueue a job of a registered type
+
+    The idempotency key is scoped to the job type and owner so different users
+    can't collide on the same key.
+    """
+    if job_type not in _job_types:
+        raise ValueError(f"Unknown job type '{job_type}'")
+    if idempotency_key:
+        idempotency_key = f"{job_type}:{owner_id or ''}:{idempotency_key}"
+    return get_job_queue().enqueue(
+        job_type,
+        payload,
+        idempotency_key=idempotency_key,
+        owner_id=owner_id,
+        max_attempts=_job_types[job_type].max_attempts
+    )
+
+
+def job_accepted(job: Dict[str, Any]) -> JSONResponse:
+    """202 response pointing the client at the job's status"""
+    return JSONResponse(status_code=202, content={
+        "job_id": job["id"],
+        "job_type": job["job_type"],
+        "status": job["status"],
+        "status_url": f"/api/jobs/{job['id']}",
+        "events_url": f"/api/jobs/{job['id']}/events"
+    })
+
+
+def start_job_workers() -> JobWorker:
+    """Start workers for all registered job types in this process"""
+    global _job_worker
+    if _job_worker is None:
+        _job_worker = JobWorker(get_job_queue(), dict(_job_types))
+        _job_worker.start()
+    return _job_worker
+
+
+def stop_job_workers():
+    global _job_worker
+    if _job_worker is not None:
+        _job_worker.stop(timeout=5)
+        _job_worker = None
+
+
+if __name__ == "__main__":
+    # Standalone worker process: python -m app.core.job_queue
+    from app.core.dependencies import initialize_agents
+    from app.services.agent_jobs import register_agent_jobs
+
+    logging.basicConfig(level=logging.INFO)
+    initialize_agents()
+    register_agent_jobs()
+    worker = start_job_workers()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stop_job_workers()
@@ -0,0 +1,192 @@
+"""Persistent cache for LLM task responses"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """SQLite-backed response cache with TTL and LRU eviction
+
+    Entries are scoped by organization so tenants never see each other's
+    responses. Hit/miss counters are kept in memory per task name.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 5000, default_ttl: int = 86400):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    organization_id TEXT NOT NULL DEFAULT '',
+                    task_name TEXT,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_llm_responses_last_access ON llm_responses(last_access);
+                CREATE INDEX IF NOT EXISTS idx_llm_responses_org ON llm_responses(organization_id);
+            """)
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model: Optional[str],
+                 description: str,
+                 agent_config: Dict[str, Any],
+                 temperature: Optional[float],
+                 organization_id: Optional[str] = None,
+                 context: Optional[str] = None) -> str:
+        """Build the cache key for a rendered task
+
+        Args:
+            model: Model id of the agent's LLM
+            description: Fully rendered task description
+            agent_config: Agent settings that shape the prompt (role, goal, backstory, ...)
+            temperature: Sampling temperature of the LLM
+            organization_id: Tenant the response belongs to
+            context: Output of upstream tasks passed to this task
+
+        Returns:
+            str: SHA-256 hex digest
+        """
+        agent_hash = hashlib.sha256(
+            json.dumps(agent_config, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        payload = json.dumps({
+            "model": model,
+            "description": description,
+            "agent": agent_hash,
+            "temperature": temperature,
+            "organization_id": organization_id or "",
+            "context": context or ""
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _count(self, task_name: Optional[str], field: str):
+        stats = self._stats.setdefault(task_name or "unknown", {"hits": 0, "misses": 0})
+        stats[field] += 1
+
+    def get(self, key: str, task_name: Optional[str] = None) -> Optional[str]:
+        """Get a cached response, or None if missing or expired"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT response, expires_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row and row[1] < now:
+                self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                row = None
+            if row:
+                self._conn.execute("UPDATE llm_responses SET last_access = ? WHERE key = ?", (now, key))
+
+            self._count(task_name, "hits" if row else "misses")
+
+        if row:
+            logger.info(f"LLM cache hit for task {task_name}")
+            return row[0]
+        return None
+
+    def set(self,
+            key: str,
+            response: str,
+            task_name: Optional[str] = None,
+            organization_id: Optional[str] = None,
+            ttl: Optional[int] = None):
+        """Store a response and evict least recently used entries over the limit"""
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT OR REPLACE INTO llm_responses
+                    (key, organization_id, task_name, response, created_at, last_access, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (key, organization_id or "", task_name, response, now, now, now + ttl))
+
+            count = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+            if count > self.max_entries:
+                # Drop expired entries first, then the least recently used
+                self._conn.execute("DELETE FROM llm_responses WHERE expires_at < ?", (now,))
+                overflow = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0] - self.max_entries
+                if overflow > 0:
+                    self._conn.execute("""
+                        DELETE FROM llm_responses WHERE key IN (
+                            SELECT key FROM llm_responses ORDER BY last_access ASC LIMIT ?
+                        )
+                    """, (overflow,))
+                    self.evictions += overflow
+
+    def invalidate(self, organization_id: Optional[str] = None, task_name: Optional[str] = None) -> int:
+        """Remove cached responses for a tenant and/or task
+
+        Returns:
+            int: Number of entries removed
+        """
+        query = "DELETE FROM llm_responses WHERE 1 = 1"
+        params = []
+        if organization_id is not None:
+            query += " AND organization_id = ?"
+            params.append(organization_id)
+        if task_name is not None:
+            query += " AND task_name = ?"
+            params.append(task_name)
+
+        with self._lock, self._conn:
+            return self._conn.execute(query, params).rowcount
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit-rate metrics overall and per task"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+            by_task = {name: dict(stats) for name, stats in self._stats.items()}
+
+        hits = sum(stats["hits"] for stats in by_task.values())
+        misses = sum(stats["misses"] for stats in by_task.values())
+        for stats in by_task.values():
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "evictions": self.evictions,
+            "by_task": by_task
+        }
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Get the process-wide response cache, or None if disabled"""
+    global _llm_cache
+    from app.core.config import settings
+
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMResponseCache(
+                db_path=settings.get_storage_path("llm_cache", "responses.db"),
+                max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+                default_ttl=settings.LLM_CACHE_TTL_SECONDS
+            )
+        return _llm_cache
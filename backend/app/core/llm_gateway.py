@@ -0,0 +1,472 @@
+"""Shared LLM clients with process-wide rate limiting
+
+Agents get their LLMs from the gateway instead of constructing them:
+
+    self.llm = create_llm("gpt-4o-mini", priority="interactive")
+
+- HTTP connections are pooled: every LLM of a model shares one OpenAI client
+  (sync and async) and its keep-alive connections
+- every call goes through a per-model token bucket for requests and tokens per
+  minute, shared by all agents and crews in the process
+- callers have a priority: while interactive calls wait for capacity no lower
+  priority call is started, and batch calls leave a reserve of the buckets
+  free so interactive requests rarely wait at all
+- 429 responses are retried with exponential backoff (honouring Retry-After),
+  and pause the model's limiter so other callers back off as well
+- the token usage of every call is recorded in the CostTracker, attributed to
+  the active `cost_attribution()` or else to the crewai agent and task making
+  the call, so agents that build their crews directly are accounted as well
+
+The priority of an LLM can be overridden for a block of work with
+`llm_priority("batch")`.
+"""
+
+import asyncio
+import contextvars
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.cost_tracker import CostTracker, TokenUsage, cost_tracker as default_cost_tracker, get_cost_attribution
+from app.core.prompt_budget import count_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# Lower rank is served first
+PRIORITIES = {"interactive": 0, "default": 1, "batch": 2}
+
+# Tokens reserved for the completion when a call's prompt is counted up front
+COMPLETION_TOKEN_ESTIMATE = 1000
+
+_priority_override: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_priority", default=None)
+
+# Token usage of the LLM call running in the current context, see LLMGateway.wrap
+_call_usage: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar("llm_call_usage", default=None)
+
+
+@contextmanager
+def llm_priority(priority: str):
+    """Run LLM calls made in this block with the given priority"""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown LLM priority '{priority}'")
+    token = _priority_override.set(priority)
+    try:
+        yield
+    finally:
+        _priority_override.reset(token)
+
+
+class TokenBucket:
+    """Bucket that refills continuously up to its per-minute capacity"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, floor: float = 0.0) -> float:
+        """Seconds until `amount` can be taken without dropping below `floor`"""
+        missing = amount + floor - self.level
+        return max(0.0, missing / self.rate) if self.rate else float("inf")
+
+
+class RateLimiter:
+    """Requests- and tokens-per-minute limiter with priority classes"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, reserve: float = 0.2):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.reserve = reserve
+        self._cond = threading.Condition()
+        self._waiting = {rank: 0 for rank in PRIORITIES.values()}
+        self._paused_until = 0.0
+        self.stats = {"requests": 0, "tokens": 0, "throttled": 0, "wait_seconds": 0.0, "rate_limited": 0}
+
+    def _floor(self, bucket: TokenBucket, rank: int) -> float:
+        """Level a caller of this rank must leave in the bucket"""
+        return bucket.capacity * self.reserve * rank / (len(PRIORITIES) - 1)
+
+    def acquire(self, tokens: int, priority: str = "default") -> float:
+        """Block until a call of `tokens` tokens may start; returns the seconds waited"""
+        rank = PRIORITIES.get(priority, PRIORITIES["default"])
+        # A call larger than the whole bucket would never fit, let it drain the bucket instead
+        tokens = min(tokens, self.tokens.capacity * (1 - self.reserve))
+        started = time.monotonic()
+
+        with self._cond:
+            self._waiting[rank] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self.requests.refill(now)
+                    self.tokens.refill(now)
+
+                    if now < self._paused_until:
+                        delay = self._paused_until - now
+                    elif any(self._waiting[higher] for higher in range(rank)):
+                        # Higher priority callers go first; they notify when they're done
+                        delay = 1.0
+                    else:
+                        delay = max(
+                            self.requests.wait_time(1, self._floor(self.requests, rank)),
+                            self.tokens.wait_time(tokens, self._floor(self.tokens, rank))
+                        )
+                        if delay <= 0:
+                            self.requests.level -= 1
+                            self.tokens.level -= tokens
+                            break
+                    self._cond.wait(min(delay, 5.0))
+            finally:
+                self._waiting[rank] -= 1
+                self._cond.notify_all()
+
+            waited = time.monotonic() - started
+            self.stats["requests"] += 1
+            self.stats["tokens"] += int(tokens)
+            if waited > 0.01:
+                self.stats["throttled"] += 1
+                self.stats["wait_seconds"] += waited
+            return waited
+
+    def settle(self, estimated: int, actual: int):
+        """Correct the token bucket once a call's real usage is known"""
+        with self._cond:
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level + estimated - actual)
+            self.stats["tokens"] += actual - estimated
+            self._cond.notify_all()
+
+    def pause(self, seconds: float):
+        """Hold back all callers, e.g. after the provider answered 429"""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self.stats["rate_limited"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                **self.stats,
+                "wait_seconds": round(self.stats["wait_seconds"], 3),
+                "requests_per_minute": int(self.requests.capacity),
+                "tokens_per_minute": int(self.tokens.capacity),
+                "waiting": sum(self._waiting.values())
+            }
+
+
+# Error codes and types providers send with a 429
+_RATE_LIMIT_ERRORS = {"rate_limit_exceeded", "rate_limit_error"}
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    """Whether an error is the provider's 429 response"""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    if getattr(getattr(error, "response", None), "status_code", None) == 429:
+        return True
+    if "ratelimit" in type(error).__name__.lower():
+        return True
+    return (getattr(error, "code", None) in _RATE_LIMIT_ERRORS
+            or getattr(error, "type", None) in _RATE_LIMIT_ERRORS)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds the provider asked us to wait, if it said so"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _prompt_text(messages: Any) -> str:
+    """Text of a prompt given as a string or a list of chat messages"""
+    if isinstance(messages, str):
+        return messages
+    parts = []
+    for message in messages or []:
+        content = message.get("content") if isinstance(message, dict) else getattr(message, "content", message)
+        parts.append(content if isinstance(content, str) else str(content))
+    return "\n".join(parts)
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[int, int]]:
+    """Parse "gpt-4o-mini=500:200000,gpt-4=100:40000" into {model: (rpm, tpm)}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            model, values = item.split("=", 1)
+            rpm, tpm = values.split(":", 1)
+            limits[model.strip()] = (int(rpm), int(tpm))
+        except ValueError:
+            logger.warning(f"Ignoring invalid LLM_RATE_LIMITS entry '{item}'")
+    return limits
+
+
+class LLMGateway:
+    """Hands out LLMs that share connections and rate limits per model"""
+
+    def __init__(self,
+                 requests_per_minute: int = 500,
+                 tokens_per_minute: int = 200000,
+                 model_limits: Optional[Dict[str, Tuple[int, int]]] = None,
+                 max_retries: int = 4,
+                 retry_backoff_seconds: float = 1.0,
+                 max_connections: int = 20,
+                 interactive_reserve: float = 0.2,
+                 cost_tracker: Optional[CostTracker] = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.model_limits = model_limits or {}
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.max_connections = max_connections
+        self.interactive_reserve = interactive_reserve
+        self.cost_tracker = cost_tracker
+        self._lock = threading.Lock()
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._clients: Dict[Tuple[str, str], Tuple[Any, Any]] = {}
+
+    def limiter(self, model: str) -> RateLimiter:
+        """Process-wide limiter of a model"""
+        with self._lock:
+            if model not in self._limiters:
+                rpm, tpm = self.model_limits.get(model, (self.requests_per_minute, self.tokens_per_minute))
+                self._limiters[model] = RateLimiter(rpm, tpm, reserve=self.interactive_reserve)
+            return self._limiters[model]
+
+    def clients(self, model: str, api_key: str) -> Tuple[Any, Any]:
+        """Pooled (sync, async) OpenAI clients of a model"""
+        import httpx
+        from openai import AsyncOpenAI, OpenAI
+
+        key = (model, api_key)
+        with self._lock:
+            if key not in self._clients:
+                limits = httpx.Limits(max_connections=self.max_connections,
+                                      max_keepalive_connections=self.max_connections)
+                # Retries happen in the gateway so they count against the rate limit
+                self._clients[key] = (
+                    OpenAI(api_key=api_key, max_retries=0, http_client=httpx.Client(limits=limits)),
+                    AsyncOpenAI(api_key=api_key, max_retries=0, http_client=httpx.AsyncClient(limits=limits))
+                )
+            return self._clients[key]
+
+    def create_llm(self,
+                   model: str = DEFAULT_MODEL,
+                   temperature: Optional[float] = None,
+                   priority: str = "default",
+                   api_key: Optional[str] = None,
+                   **kwargs) -> Any:
+        """Create a crewai LLM routed through the gateway
+
+        Args:
+            model: Model id
+            temperature: Sampling temperature, None for the provider default
+            priority: "interactive", "default" or "batch"
+            api_key: API key, defaults to OPENAI_API_KEY
+            **kwargs: Further crewai LLM settings
+        """
+        from crewai.llm import LLM
+
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown LLM priority '{priority}'")
+        api_key = api_key or settings.OPENAI_API_KEY or None
+
+        llm = LLM(model=model, temperature=temperature, api_key=api_key, **kwargs)
+        if api_key and "_client" in getattr(llm, "__private_attributes__", {}):
+            # Native OpenAI LLMs build their own clients; swap in the pooled ones
+            llm._client, llm._async_client = self.clients(model, api_key)
+        self.wrap(llm, model, priority)
+        return llm
+
+    def wrap(self, llm: Any, model: str, priority: str = "default"):
+        """Route an LLM's calls through the rate limiter, 429 retries and cost tracking
+        
+        Also used for LLMs not created by the gateway (see BaseCrew.instrument_agent).
+        """
+        if getattr(llm.call, "_gateway", False):
+            return
+        original_call = llm.call
+        gateway = self
+        _count_native_usage(llm)
+
+        def call(messages, *args, **kwargs):
+            estimate = count_tokens(_prompt_text(messages), model) + (
+                getattr(llm, "max_tokens", None) or COMPLETION_TOKEN_ESTIMATE
+            )
+            usage = {"prompt_tokens": 0, "completion_tokens": 0}
+            # LiteLLM based LLMs report usage to callbacks, native ones through _count_native_usage
+            handler = _usage_handler()
+            if handler is not None:
+                if len(args) > 1:
+                    args = list(args)
+                    args[1] = list(args[1] or []) + [handler]
+                else:
+                    kwargs["callbacks"] = list(kwargs.get("callbacks") or []) + [handler]
+
+            token = _call_usage.set(usage)
+            try:
+                return gateway.execute(model, lambda: original_call(messages, *args, **kwargs),
+                                       tokens=estimate, priority=priority,
+                                       usage=lambda: _handler_tokens(handler) + sum(usage.values()))
+            finally:
+                _call_usage.reset(token)
+                if handler is not None:
+                    usage["prompt_tokens"] += handler.token_cost_process.prompt_tokens
+                    usage["completion_tokens"] += handler.token_cost_process.completion_tokens
+                gateway.record_usage(getattr(llm, "model", None) or model, usage,
+                                     kwargs.get("from_agent"), kwargs.get("from_task"))
+
+        call._gateway = True
+        object.__setattr__(llm, "call", call)
+
+    def record_usage(self, model: str, usage: Dict[str, int], agent: Any = None, task: Any = None):
+        """Record the token usage of one call in the CostTracker"""
+        if self.cost_tracker is None or not (usage["prompt_tokens"] or usage["completion_tokens"]):
+            return
+        attribution = get_cost_attribution()
+        task_name = getattr(task, "name", None) or getattr(task, "description", None)
+        try:
+            self.cost_tracker.track_usage(
+                agent_name=attribution.get("agent_name") or getattr(agent, "role", None) or "unknown",
+                model=model,
+                token_usage=TokenUsage(
+                    prompt_tokens=usage["prompt_tokens"],
+                    completion_tokens=usage["completion_tokens"],
+                    total_tokens=usage["prompt_tokens"] + usage["completion_tokens"]
+                ),
+                task_name=attribution.get("task_name") or (task_name[:80] if task_name else None)
+            )
+        except Exception as e:
+            logger.error(f"Failed to record LLM usage: {e}")
+
+    def execute(self,
+                model: str,
+                fn: Callable[[], Any],
+                tokens: int,
+                priority: str = "default",
+                usage: Optional[Callable[[], Optional[int]]] = None) -> Any:
+        """Run one LLM request under the model's limiter, retrying on 429
+
+        Args:
+            model: Model the request goes to
+            fn: Performs the request
+            tokens: Estimated prompt + completion tokens
+            priority: Default priority, overridden by `llm_priority()`
+            usage: Returns the tokens the request has used so far, to settle the estimate
+        """
+        limiter = self.limiter(model)
+        priority = _priority_override.get() or priority
+
+        for attempt in range(self.max_retries + 1):
+            limiter.acquire(tokens, priority)
+            before = usage() if usage else None
+            try:
+                result = fn()
+            except Exception as e:
+                if not _is_rate_limited(e) or attempt >= self.max_retries:
+                    raise
+                delay = _retry_after(e) or self.retry_backoff_seconds * 2 ** attempt
+                delay += random.uniform(0, delay / 4)
+                limiter.pause(delay)
+                logger.warning(f"{model} rate limited, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+                continue
+
+            after = usage() if usage else None
+            if before is not None and after is not None and after > before:
+                limiter.settle(tokens, after - before)
+            return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            limiters = dict(self._limiters)
+            pooled = len(self._clients)
+        return {
+            "pooled_clients": pooled,
+            "models": {model: limiter.get_stats() for model, limiter in limiters.items()}
+        }
+
+    def close(self):
+        """Close the pooled connections, from code without a running event loop"""
+        asyncio.run(self.aclose())
+
+    async def aclose(self):
+        """Close the pooled sync and async connections"""
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for sync_client, async_client in clients:
+            try:
+                sync_client.close()
+                await async_client.close()
+            except Exception as e:
+                logger.warning(f"Error closing LLM client: {e}")
+
+
+def _count_native_usage(llm: Any):
+    """Also count the usage a native provider LLM records into the running call's usage
+    
+    Native LLMs only add usage to counters on the (shared) instance, which
+    concurrent calls would mix up.
+    """
+    track = getattr(llm, "_track_token_usage_internal", None)
+    if track is None or getattr(track, "_gateway", False):
+        return
+
+    def track_token_usage(usage_data):
+        track(usage_data)
+        usage = _call_usage.get()
+        if usage is None:
+            return
+        from crewai.types.usage_metrics import UsageMetrics
+        metrics = UsageMetrics.from_provider_dict(usage_data)
+        if metrics is not None:
+            usage["prompt_tokens"] += metrics.prompt_tokens
+            usage["completion_tokens"] += metrics.completion_tokens
+
+    track_token_usage._gateway = True
+    object.__setattr__(llm, "_track_token_usage_internal", track_token_usage)
+
+
+def _usage_handler() -> Any:
+    """crewai callback counting the usage LiteLLM reports for one call"""
+    try:
+        from crewai.agents.agent_builder.utilities.base_token_process import TokenProcess
+        from crewai.utilities.token_counter_callback import TokenCalcHandler
+    except ImportError:
+        return None
+    return TokenCalcHandler(TokenProcess())
+
+
+def _handler_tokens(handler: Any) -> int:
+    if handler is None:
+        return 0
+    return handler.token_cost_process.prompt_tokens + handler.token_cost_process.completion_tokens
+
+
+# Global instance
+llm_gateway = LLMGateway(
+    requests_per_minute=settings.LLM_RPM_LIMIT,
+    tokens_per_minute=settings.LLM_TPM_LIMIT,
+    model_limits=parse_rate_limits(settings.LLM_RATE_LIMITS),
+    max_retries=settings.LLM_MAX_RETRIES,
+    retry_backoff_seconds=settings.LLM_RETRY_BACKOFF_SECONDS,
+    max_connections=settings.LLM_MAX_CONNECTIONS,
+    interactive_reserve=settings.LLM_INTERACTIVE_RESERVE,
+    cost_tracker=default_cost_tracker
+)
+
+
+def create_llm(model: str = DEFAULT_MODEL, temperature: Optional[float] = None,
+               priority: str = "default", **kwargs) -> Any:
+    """Create an LLM through the process-wide gateway"""
+    return llm_gateway.create_llm(model, temperature=temperature, priority=priority, **kwargs)
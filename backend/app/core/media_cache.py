@@ -0,0 +1,267 @@
+"""Content-addressed cache for rendered and generated media
+
+Files are stored under the SHA-256 of a canonical description of everything
+that determines them: the render parameters plus the contents (not the
+paths) of the input files (see `media_key`). Before an agent calls an
+external API or ffmpeg it asks the cache for the key; on a hit the file is
+copied into its output directory instead. (Copies, not hard links: outputs
+are sometimes rewritten in place, which must not change the cached entry.)
+
+- all workers of a host share the cache directory and its SQLite index
+- with MEDIA_CACHE_BUCKET set, entries are also uploaded to that Supabase
+  storage bucket, so workers on other hosts download them instead of
+  rendering again
+- files are written to a temporary name and renamed into place, so a
+  partly written entry is never served
+- the least recently used entries are evicted once the cache grows beyond
+  MEDIA_CACHE_MAX_MB
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=4096)
+def _digest(path: str, size: int, mtime_ns: int) -> str:
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's contents, computed once per file version"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    return _digest(path, stat.st_size, stat.st_mtime_ns)
+
+
+def media_key(kind: str, params: Dict[str, Any], files: Iterable[str] = ()) -> str:
+    """Cache key of a media file made from `params` and the input `files`
+
+    Input files count by content, in the given order, so a renamed copy of an
+    image hits the same entry and an edited image with the same path does not.
+    """
+    canonical = json.dumps(
+        {"kind": kind, "params": params, "files": [file_digest(path) for path in files]},
+        sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _copy_atomic(source: str, target: str):
+    """Copy `source` to `target` through a temporary file in the target directory"""
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    temp = f"{target}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        shutil.copyfile(source, temp)
+        os.replace(temp, target)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+
+def _write_bytes(path: str, data: bytes):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+class SupabaseObjectStore:
+    """Cache entries in a Supabase storage bucket"""
+
+    def __init__(self, bucket: str):
+        self.bucket = bucket
+
+    def _bucket(self):
+        from app.core.dependencies import get_supabase_client
+        return get_supabase_client().storage.from_(self.bucket)
+
+    def download(self, name: str) -> Optional[bytes]:
+        try:
+            return self._bucket().download(name)
+        except Exception:
+            return None
+
+    def upload(self, name: str, path: str):
+        with open(path, 'rb') as f:
+            self._bucket().upload(name, f.read(), {"upsert": "true"})
+
+
+class MediaCache:
+    """Files addressed by `media_key`, each entry named key + file suffix"""
+
+    def __init__(self, root: str, max_bytes: int, object_store: Optional[SupabaseObjectStore] = None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.object_store = object_store
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, "index.db"), timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS media_cache (
+                    name TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_media_cache_last_used ON media_cache(last_used)")
+        self.hits = 0
+        self.remote_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name[:2], name)
+
+    def fetch(self, key: str, target: str) -> bool:
+        """Place the entry for `key` at `target` (its suffix selects the entry)
+
+        Returns:
+            bool: False if there is no such entry, locally or remotely
+        """
+        name = key + os.path.splitext(target)[1]
+        path = self._path(name)
+        with self._lock, self._conn:
+            found = self._conn.execute(
+                "UPDATE media_cache SET last_used = ? WHERE name = ?", (time.time(), name)
+            ).rowcount
+        if found:
+            try:
+                _copy_atomic(path, target)
+                with self._lock:
+                    self.hits += 1
+                return True
+            except FileNotFoundError:
+                # Removed behind the index's back
+                with self._lock, self._conn:
+                    self._conn.execute("DELETE FROM media_cache WHERE name = ?", (name,))
+
+        data = self.object_store.download(name) if self.object_store else None
+        if data is None:
+            with self._lock:
+                self.misses += 1
+            return False
+
+        self._store(name, lambda temp: _write_bytes(temp, data))
+        _copy_atomic(path, target)
+        with self._lock:
+            self.remote_hits += 1
+        return True
+
+    def put(self, key: str, source: str):
+        """Add a file under `key`, keeping its suffix; errors are logged, not raised"""
+        name = key + os.path.splitext(source)[1]
+        try:
+            self._store(name, lambda temp: shutil.copyfile(source, temp))
+            if self.object_store:
+                self.object_store.upload(name, self._path(name))
+        except Exception as e:
+            logger.warning(f"Could not cache {source}: {e}")
+
+    def get_bytes(self, key: str, suffix: str) -> Optional[bytes]:
+        """Contents of a small entry, e.g. a transcription"""
+        path = os.path.join(self.root, f"read-{uuid.uuid4().hex}{suffix}")
+        if not self.fetch(key, path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        finally:
+            os.remove(path)
+
+    def put_bytes(self, key: str, data: bytes, suffix: str):
+        path = os.path.join(self.root, f"write-{uuid.uuid4().hex}{suffix}")
+        _write_bytes(path, data)
+        try:
+            self.put(key, path)
+        finally:
+            os.remove(path)
+
+    def _store(self, name: str, write):
+        """Write an entry through a temporary file, index it and evict older ones"""
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            write(temp)
+            os.replace(temp, path)
+        except BaseException:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO media_cache (name, size, last_used) VALUES (?, ?, ?)",
+                (name, os.path.getsize(path), time.time())
+            )
+        self._evict(keep=name)
+
+    def _evict(self, keep: str):
+        """Remove the least recently used entries until the cache fits max_bytes"""
+        with self._lock, self._conn:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM media_cache").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            evicted = []
+            for name, size in self._conn.execute("SELECT name, size FROM media_cache ORDER BY last_used"):
+                if total <= self.max_bytes:
+                    break
+                if name != keep:
+                    evicted.append(name)
+                    total -= size
+            self._conn.executemany("DELETE FROM media_cache WHERE name = ?", [(name,) for name in evicted])
+            self.evictions += len(evicted)
+
+        for name in evicted:
+            try:
+                os.remove(self._path(name))
+            except FileNotFoundError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM media_cache").fetchone()
+            return {
+                "entries": entries,
+                "size_bytes": size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "remote_hits": self.remote_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "object_store": self.object_store.bucket if self.object_store else None
+            }
+
+
+_media_cache: Optional[MediaCache] = None
+_media_cache_lock = threading.Lock()
+
+
+def get_media_cache() -> MediaCache:
+    """Get the process-wide media cache"""
+    global _media_cache
+    from app.core.config import settings
+
+    with _media_cache_lock:
+        if _media_cache is None:
+            _media_cache = MediaCache(
+                settings.MEDIA_CACHE_DIR or settings.get_storage_path("media", "cache"),
+                settings.MEDIA_CACHE_MAX_MB * 1024 * 1024,
+                SupabaseObjectStore(settings.MEDIA_CACHE_BUCKET) if settings.MEDIA_CACHE_BUCKET else None
+            )
+        return _media_cache
@@ -0,0 +1,221 @@
+"""Local metadata store for media the agents produce
+
+Composed posts, videos, voice overs, workflows and the Instagram posting
+history used to be kept in `static/*_storage.json` files that every agent
+loaded completely at start-up and rewrote after each item. This store keeps
+them in one SQLite database instead: items are looked up by key or id through
+indexes, appends touch a single row and nothing is held in memory.
+
+The legacy sections of those files are imported once at start-up (see
+`migrate_json_file`).
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MediaMetadataStore:
+    """Items grouped in collections, addressed by a key (e.g. a content hash)
+
+    An item's `id` field is indexed as well, so items can be found by the
+    storage id the API hands out.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS media_items (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    collection TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    item_id TEXT,
+                    created_at TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    UNIQUE (collection, key)
+                );
+                CREATE INDEX IF NOT EXISTS idx_media_items_item_id ON media_items(collection, item_id);
+                CREATE INDEX IF NOT EXISTS idx_media_items_created ON media_items(collection, created_at);
+                CREATE TABLE IF NOT EXISTS media_migrations (
+                    source TEXT PRIMARY KEY,
+                    collection TEXT NOT NULL,
+                    items INTEGER NOT NULL,
+                    migrated_at TEXT NOT NULL
+                );
+            """)
+
+    @staticmethod
+    def _created_at(item: Dict[str, Any]) -> str:
+        return item.get("created_at") or item.get("posted_at") or datetime.now().isoformat()
+
+    def put(self, collection: str, item: Dict[str, Any], key: Optional[str] = None) -> str:
+        """Insert or replace an item
+
+        Args:
+            key: Lookup key, defaults to the item's id (or a new uuid)
+
+        Returns:
+            str: The key
+        """
+        key = key or str(item.get("id") or uuid.uuid4())
+        item_id = item.get("id")
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT INTO media_items (collection, key, item_id, created_at, data)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (collection, key) DO UPDATE SET
+                    item_id = excluded.item_id,
+                    data = excluded.data
+            """, (collection, key, str(item_id) if item_id is not None else None,
+                  self._created_at(item), json.dumps(item, default=str)))
+        return key
+
+    def get(self, collection: str, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM media_items WHERE collection = ? AND key = ?", (collection, key)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find(self, collection: str, item_id: str) -> Optional[Dict[str, Any]]:
+        """Item by its `id` field, falling back to its key"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM media_items WHERE collection = ? AND (item_id = ? OR key = ?) LIMIT 1",
+                (collection, str(item_id), str(item_id))
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, collection: str, item_id: str) -> Optional[Dict[str, Any]]:
+        """Remove an item by id or key
+
+        Returns:
+            The removed item, or None if there was none
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT seq, data FROM media_items WHERE collection = ? AND (item_id = ? OR key = ?) LIMIT 1",
+                (collection, str(item_id), str(item_id))
+            ).fetchone()
+            if not row:
+                return None
+            self._conn.execute("DELETE FROM media_items WHERE seq = ?", (row[0],))
+        return json.loads(row[1])
+
+    def list(self, collection: str, filters: Optional[Dict[str, Any]] = None,
+             limit: Optional[int] = None, newest_first: bool = False) -> List[Dict[str, Any]]:
+        """Items of a collection, oldest or newest first
+
+        Args:
+            filters: Field values the items must have, e.g. {"period": "Energie"}
+        """
+        query = "SELECT data FROM media_items WHERE collection = ?"
+        params: List[Any] = [collection]
+        for field, value in (filters or {}).items():
+            query += " AND json_extract(data, ?) = ?"
+            params.extend([f"$.{field}", value])
+        query += " ORDER BY created_at DESC, seq DESC" if newest_first else " ORDER BY created_at, seq"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def count(self, collection: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM media_items WHERE collection = ?", (collection,)
+            ).fetchone()[0]
+
+    def migrate_json_file(self, collection: str, path: str, list_key: str, hash_key: str = "by_hash",
+                          extra_keys: Tuple[str, ...] = ()) -> int:
+        """Import the legacy sections of a `*_storage.json` file once
+
+        Items indexed under `hash_key` keep their hash as key, the remaining
+        items of `list_key` are keyed by their id. The JSON storage adapter
+        keeps its items in some of the same files, so only the legacy sections
+        (`list_key`, `hash_key` and `extra_keys`) are removed from the file;
+        a file left empty is renamed to `<path>.migrated`.
+
+        Returns:
+            int: Number of items imported
+        """
+        source = os.path.abspath(path)
+        if not os.path.exists(source):
+            return 0
+
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM media_migrations WHERE source = ?", (source,)).fetchone():
+                return 0
+
+        try:
+            with open(source, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Could not read legacy storage {source}: {e}")
+            return 0
+
+        # The old visual_posts_storage.json format kept its hash index under by_period
+        legacy_keys = {list_key, hash_key, "by_period", *extra_keys}
+        by_hash = data.get(hash_key) or {}
+        hashed_ids = {item.get("id") for item in by_hash.values() if isinstance(item, dict)}
+
+        rows = [(key, item) for key, item in by_hash.items() if isinstance(item, dict)]
+        for item in data.get(list_key, []):
+            if isinstance(item, dict) and (item.get("id") is None or item.get("id") not in hashed_ids):
+                rows.append((str(item.get("id") or uuid.uuid4()), item))
+
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT OR IGNORE INTO media_items (collection, key, item_id, created_at, data)
+                VALUES (?, ?, ?, ?, ?)
+            """, [
+                (collection, key, str(item["id"]) if item.get("id") is not None else None,
+                 self._created_at(item), json.dumps(item, default=str))
+                for key, item in rows
+            ])
+            self._conn.execute(
+                "INSERT OR IGNORE INTO media_migrations (source, collection, items, migrated_at) VALUES (?, ?, ?, ?)",
+                (source, collection, len(rows), datetime.now().isoformat())
+            )
+
+        remaining = {key: value for key, value in data.items() if key not in legacy_keys}
+        try:
+            if remaining:
+                with open(source, 'w', encoding='utf-8') as f:
+                    json.dump(remaining, f, indent=2, ensure_ascii=False)
+            else:
+                os.replace(source, source + ".migrated")
+        except OSError as e:
+            logger.warning(f"Migrated {source} but could not clean it up: {e}")
+        logger.info(f"Migrated {len(rows)} items from {source} into {collection}")
+        return len(rows)
+
+
+_media_store: Optional[MediaMetadataStore] = None
+_media_store_lock = threading.Lock()
+
+
+def get_media_store() -> MediaMetadataStore:
+    """Get the process-wide media metadata store"""
+    global _media_store
+    from app.core.config import settings
+
+    with _media_store_lock:
+        if _media_store is None:
+            _media_store = MediaMetadataStore(settings.get_storage_path("media", "metadata.db"))
+        return _media_store
@@ -0,0 +1,125 @@
+"""Keyset pagination and field projection for Supabase listings
+
+Listings are ordered by (created_at, id) descending. A page is fetched with one
+extra row to know whether another page exists; the cursor for the next page
+encodes the (created_at, id) of the last row returned, so every page is an
+index range scan no matter how deep the client pages.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    """Encode the keyset position after a row"""
+    payload = json.dumps([str(row["created_at"]), str(row["id"])])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a cursor into (created_at, id)
+
+    Both fields end up in a PostgREST filter, so anything that is not a
+    timestamp and a UUID is rejected rather than interpolated.
+    """
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        datetime.fromisoformat(created_at)
+        return created_at, str(UUID(row_id))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def use_legacy_listing(legacy: bool) -> bool:
+    """Whether to serve the old unpaginated response"""
+    return legacy or settings.LEGACY_UNPAGINATED_LISTINGS
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """Parse a comma separated field projection
+
+    Returns:
+        List[str]: Requested fields, or None when all fields are wanted
+    """
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - set(allowed))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+
+def select_columns(fields: Optional[List[str]], columns: Iterable[str], extra: str = "") -> str:
+    """Build a select clause for a projection
+
+    Only table columns among the requested fields are fetched; id and created_at
+    are always included because the cursor needs them.
+
+    Args:
+        fields: Requested fields, or None for all columns
+        columns: Columns of the base table
+        extra: Embedded resources to append (e.g. "goals!inner(id, title)")
+    """
+    if fields is None:
+        base = "*"
+    else:
+        wanted = {"id", "created_at"} | (set(fields) & set(columns))
+        base = ", ".join(column for column in columns if column in wanted)
+    return f"{base}, {extra}" if extra else base
+
+
+def apply_keyset(query, cursor: Optional[str], limit: int):
+    """Order a query by (created_at, id) descending and start after the cursor
+
+    Args:
+        query: Supabase query builder
+        cursor: Cursor returned with the previous page
+        limit: Page size; one extra row is fetched to detect further pages
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.or_(
+            f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{row_id})'
+        )
+    return query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1)
+
+
+def split_page(rows: List[Dict[str, Any]], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Trim the extra row of a keyset query and build the next cursor"""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(page[-1])
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    """Expose the next cursor on list endpoints whose body is a plain JSON array"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+def projected_response(items: List[Dict[str, Any]], next_cursor: Optional[str]) -> JSONResponse:
+    """Return projected items directly, they no longer match the endpoint's response model"""
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return JSONResponse(content=jsonable_encoder(items), headers=headers)
+
+
+def project_fields(item: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Keep only the requested fields of a response item"""
+    if fields is None:
+        return item
+    return {field: item.get(field) for field in fields}
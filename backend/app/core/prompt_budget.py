@@ -0,0 +1,205 @@
+"""Token budgets for crew task prompts
+
+Task descriptions are rendered from tasks.yaml templates with inputs such as
+retrieved knowledge base chunks, feedback history or earlier analyses. Those
+inputs grow with the data behind them, so every rendered prompt is fitted to
+a per-task token budget before it is sent:
+
+- dicts and lists are serialized as compact JSON
+- the template text itself is never cut
+- if the inputs don't fit, the budget left after the template is shared out
+  so that small inputs (the question, a period name) stay whole and the large
+  ones are shortened, keeping their beginning (retrieval results come ordered
+  by relevance) and ending on a paragraph or line break where possible
+
+Tokens are counted with the model's tiktoken encoding. When tiktoken or the
+encoding isn't available a characters/4 estimate is used instead.
+"""
+
+import json
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODING = "cl100k_base"
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = "\n[…]"
+
+_encodings: Dict[str, Any] = {}
+_encodings_lock = threading.Lock()
+
+
+def _get_encoding(model: Optional[str]):
+    """tiktoken encoding for a model, None if it can't be loaded"""
+    key = model or DEFAULT_ENCODING
+    with _encodings_lock:
+        if key in _encodings:
+            return _encodings[key]
+
+        encoding = None
+        try:
+            import tiktoken
+            try:
+                encoding = tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding(DEFAULT_ENCODING)
+            except KeyError:
+                # Unknown model names (e.g. provider prefixes) use the default encoding
+                encoding = tiktoken.get_encoding(DEFAULT_ENCODING)
+        except Exception as e:
+            # Encodings are downloaded on first use; offline hosts fall back to estimates
+            logger.warning(f"No tokenizer for model '{key}', estimating token counts: {e}")
+
+        _encodings[key] = encoding
+        return encoding
+
+
+def _model_name(model: Optional[str]) -> Optional[str]:
+    """Strip provider prefixes such as 'openai/'"""
+    if not model:
+        return None
+    return str(model).split("/")[-1]
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Number of tokens `text` takes up for `model`"""
+    if not text:
+        return 0
+    encoding = _get_encoding(_model_name(model))
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """Shorten `text` to at most `max_tokens` tokens including the truncation marker"""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    keep = max(0, max_tokens - count_tokens(TRUNCATION_MARKER, model))
+    if keep == 0:
+        return ""
+
+    encoding = _get_encoding(_model_name(model))
+    if encoding is None:
+        head = text[:keep * CHARS_PER_TOKEN]
+    else:
+        head = encoding.decode(encoding.encode(text, disallowed_special=())[:keep])
+
+    # End on a paragraph or line break unless that throws away most of the text
+    for separator in ("\n\n", "\n"):
+        cut = head.rfind(separator)
+        if cut >= len(head) * 0.7:
+            head = head[:cut]
+            break
+
+    return head.rstrip() + TRUNCATION_MARKER
+
+
+def compact_value(value: Any) -> str:
+    """Text an input is rendered as; structured values become compact JSON"""
+    if isinstance(value, (dict, list, tuple)):
+        try:
+            return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+        except (TypeError, ValueError):
+            return str(value)
+    return "" if value is None else str(value)
+
+
+def fit_inputs(template: str,
+               inputs: Dict[str, Any],
+               max_tokens: Optional[int],
+               model: Optional[str] = None) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    """Fit the inputs of a prompt template into a token budget
+
+    Args:
+        template: str.format template the inputs are rendered into
+        inputs: Template inputs
+        max_tokens: Token budget of the rendered prompt, None or 0 for no limit
+        model: Model the prompt is sent to
+
+    Returns:
+        Tuple of the (possibly shortened) inputs as strings and a report with
+        prompt_tokens, budget, trimmed (input names) and tokens_removed
+    """
+    values = {name: compact_value(value) for name, value in inputs.items()}
+    sizes = {name: count_tokens(value, model) for name, value in values.items()}
+    template_tokens = count_tokens(template.format(**{name: "" for name in values}), model)
+    report = {
+        "prompt_tokens": template_tokens + sum(sizes.values()),
+        "budget": max_tokens or None,
+        "trimmed": [],
+        "tokens_removed": 0
+    }
+
+    if not max_tokens or report["prompt_tokens"] <= max_tokens:
+        return values, report
+
+    # Share what's left after the template: inputs smaller than an even share
+    # keep their full size and hand the rest on to the larger ones
+    remaining = max(0, max_tokens - template_tokens)
+    allowances = {}
+    by_size = sorted(sizes, key=sizes.get)
+    for index, name in enumerate(by_size):
+        share = remaining // (len(by_size) - index)
+        allowances[name] = min(sizes[name], share)
+        remaining -= allowances[name]
+
+    for name, allowance in allowances.items():
+        if allowance < sizes[name]:
+            values[name] = truncate_to_tokens(values[name], allowance, model)
+            report["trimmed"].append(name)
+
+    new_sizes = {name: count_tokens(value, model) for name, value in values.items()}
+    report["tokens_removed"] = sum(sizes.values()) - sum(new_sizes.values())
+    report["prompt_tokens"] = template_tokens + sum(new_sizes.values())
+    return values, report
+
+
+class PromptBudgetMetrics:
+    """Prompt sizes per task, relative to their budgets"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, task_name: Optional[str], report: Dict[str, Any]):
+        with self._lock:
+            stats = self._stats.setdefault(task_name or "unknown", {
+                "prompts": 0,
+                "total_tokens": 0,
+                "max_tokens": 0,
+                "budget": None,
+                "trimmed": 0,
+                "tokens_removed": 0
+            })
+            stats["prompts"] += 1
+            stats["total_tokens"] += report["prompt_tokens"]
+            stats["max_tokens"] = max(stats["max_tokens"], report["prompt_tokens"])
+            stats["budget"] = report["budget"]
+            stats["trimmed"] += 1 if report["trimmed"] else 0
+            stats["tokens_removed"] += report["tokens_removed"]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            by_task = {}
+            for name, stats in self._stats.items():
+                by_task[name] = {
+                    **stats,
+                    "avg_tokens": round(stats["total_tokens"] / stats["prompts"], 1),
+                    "budget_used": round(stats["max_tokens"] / stats["budget"], 3) if stats["budget"] else None
+                }
+        return {
+            "prompts": sum(stats["prompts"] for stats in by_task.values()),
+            "trimmed": sum(stats["trimmed"] for stats in by_task.values()),
+            "tokens_removed": sum(stats["tokens_removed"] for stats in by_task.values()),
+            "by_task": by_task
+        }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+# Global instance
+prompt_budget_metrics = PromptBudgetMetrics()
@@ -0,0 +1,162 @@
+"""Server-Sent Events streaming for agent endpoints
+
+Agent code reports progress with `emit_event(...)`. Outside of a streaming
+request this is a no-op, so agents don't need to know how they are called.
+Streaming endpoints run the agent call in a worker thread with an EventStream
+bound to the context and forward every event to the client as it happens:
+
+    retrieval   - knowledge base context selected for the request
+    agent_step  - a task started/finished or the agent produced a thought or tool call
+    token       - an LLM output chunk
+    result      - the same body the non-streaming endpoint returns
+    error       - the call failed
+"""
+
+import asyncio
+import contextvars
+import inspect
+import json
+import logging
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+_event_stream: ContextVar[Optional["EventStream"]] = ContextVar("event_stream", default=None)
+_token_forwarding_registered = False
+
+_DONE = object()
+
+
+class EventStream:
+    """Thread-safe bridge from agent code to the response generator"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def emit(self, event: str, data: Dict[str, Any]):
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (event, data))
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, _DONE)
+
+    async def get(self):
+        return await self._queue.get()
+
+
+def emit_event(event: str, **data: Any) -> None:
+    """Send an event to the client of the current streaming request, if any"""
+    stream = _event_stream.get()
+    if stream is not None:
+        try:
+            stream.emit(event, data)
+        except RuntimeError:
+            # The request's event loop is gone (client disconnected)
+            pass
+
+
+def is_streaming() -> bool:
+    """Whether the current call is serving a streaming request"""
+    return _event_stream.get() is not None
+
+
+def wants_stream(request: Request, stream: Optional[bool] = None) -> bool:
+    """Streaming is opt-in via ?stream=true or an Accept: text/event-stream header"""
+    if stream is not None:
+        return stream
+    if request.query_params.get("stream", "").lower() in ("1", "true", "yes"):
+        return True
+    return "text/event-stream" in request.headers.get("accept", "")
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str, ensure_ascii=False)}\n\n"
+
+
+def _register_token_forwarding():
+    """Forward crewai LLM stream chunks to the stream of the request that produced them
+
+    crewai runs event handlers with a copy of the emitting context, so the
+    handler sees the EventStream bound to the agent's thread.
+    """
+    global _token_forwarding_registered
+    if _token_forwarding_registered:
+        return
+
+    try:
+        from crewai.events import crewai_event_bus, LLMStreamChunkEvent
+    except ImportError:
+        try:
+            from crewai.utilities.events import crewai_event_bus, LLMStreamChunkEvent
+        except ImportError:
+            logger.info("crewai has no stream chunk events, token streaming disabled")
+            _token_forwarding_registered = True
+            return
+
+    @crewai_event_bus.on(LLMStreamChunkEvent)
+    def forward_chunk(source, event):
+        emit_event("token", content=event.chunk, agent=getattr(event, "agent_role", None))
+
+    _token_forwarding_registered = True
+
+
+async def stream_agent_call(func: Callable[..., Any],
+                            *args: Any,
+                            result_transform: Optional[Callable[[Any], Any]] = None,
+                            **kwargs: Any) -> AsyncIterator[str]:
+    """Run an agent call and yield its events as SSE messages
+
+    Sync and async callables both run in a worker thread so blocking crew
+    kickoffs don't hold up the event loop while events are delivered.
+
+    Args:
+        func: Agent method to call
+        result_transform: Shapes the return value into the endpoint's response body;
+            may raise HTTPException to report a failed result
+    """
+    _register_token_forwarding()
+    loop = asyncio.get_running_loop()
+    stream = EventStream(loop)
+
+    context = contextvars.copy_context()
+    context.run(_event_stream.set, stream)
+
+    def run():
+        try:
+            if inspect.iscoroutinefunction(func):
+                return asyncio.run(func(*args, **kwargs))
+            return func(*args, **kwargs)
+        finally:
+            stream.close()
+
+    future = loop.run_in_executor(None, context.run, run)
+
+    while True:
+        item = await stream.get()
+        if item is _DONE:
+            break
+        yield format_sse(*item)
+
+    try:
+        result = await future
+        if result_transform is not None:
+            result = result_transform(result)
+        yield format_sse("result", result)
+    except Exception as e:
+        detail = getattr(e, "detail", None) or str(e)
+        logger.error(f"Streaming call {getattr(func, '__name__', func)} failed: {detail}")
+        yield format_sse("error", {"detail": detail})
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """Wrap SSE messages in a response that proxies won't buffer"""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
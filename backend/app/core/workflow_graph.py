@@ -0,0 +1,198 @@
+"""Dependency-graph execution for multi-step agent workflows
+
+A workflow is a set of steps that each declare which steps they depend on.
+Steps whose dependencies have succeeded run concurrently in worker threads (the
+agent steps are blocking calls), up to a concurrency cap. Each step has its own
+timeout. After the first failure no new steps are started; steps already
+running are allowed to finish so their results are not lost.
+
+A step function receives the results of the steps before it and returns the
+usual step record: {"step", "success", "data", "message"[, "error"]}.
+
+A run can start from a checkpoint: steps passed as `completed` are treated as
+already succeeded and their data is expected in `results`.
+"""
+
+import contextvars
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WorkflowStep:
+    """One node of a workflow graph
+
+    Attributes:
+        name: Step name, also reported as "step" in the step record
+        run: Called with the results so far, returns the step record
+        depends_on: Names of steps that must succeed first
+        result_key: Key the step's data is stored under in the results
+        timeout: Seconds the step may run, None for the graph default
+    """
+    name: str
+    run: Callable[[Dict[str, Any]], Dict[str, Any]]
+    depends_on: Tuple[str, ...] = ()
+    result_key: Optional[str] = None
+    timeout: Optional[float] = None
+
+
+class WorkflowGraph:
+    """Runs workflow steps in dependency order, independent steps in parallel"""
+
+    def __init__(self, steps: List[WorkflowStep]):
+        self.steps: Dict[str, WorkflowStep] = {}
+        for step in steps:
+            if step.name in self.steps:
+                raise ValueError(f"Duplicate workflow step '{step.name}'")
+            self.steps[step.name] = step
+
+        for step in steps:
+            unknown = [dep for dep in step.depends_on if dep not in self.steps]
+            if unknown:
+                raise ValueError(f"Step '{step.name}' depends on unknown steps: {unknown}")
+
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        """Steps in an order that respects dependencies, declaration order otherwise"""
+        order: List[str] = []
+        done = set()
+        while len(order) < len(self.steps):
+            ready = [
+                name for name, step in self.steps.items()
+                if name not in done and all(dep in done for dep in step.depends_on)
+            ]
+            if not ready:
+                cycle = [name for name in self.steps if name not in done]
+                raise ValueError(f"Workflow steps have a dependency cycle: {cycle}")
+            order.extend(ready)
+            done.update(ready)
+        return order
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """Serializable view of the graph"""
+        return [{
+            "step": name,
+            "depends_on": list(self.steps[name].depends_on),
+            "result_key": self.steps[name].result_key
+        } for name in self.order]
+
+    def run(self,
+            results: Dict[str, Any],
+            max_concurrency: int = 3,
+            default_timeout: Optional[float] = None,
+            on_step_complete: Optional[Callable[[Dict[str, Any]], None]] = None,
+            completed: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """Execute the graph
+
+        Args:
+            results: Results of the workflow, updated in place with each step's data
+            max_concurrency: Maximum number of steps running at the same time
+            default_timeout: Seconds a step may run unless it sets its own timeout
+            on_step_complete: Called with each step record as soon as it is available
+            completed: Steps that already succeeded in an earlier run; they are
+                skipped and their data must already be in `results`
+
+        Returns:
+            List[Dict]: Records of the steps run, in completion order; a step that
+            failed or timed out ends the run after the steps in flight have finished
+        """
+        records: List[Dict[str, Any]] = []
+        succeeded = set(completed) & set(self.steps)
+        pending = [name for name in self.order if name not in succeeded]
+        running: Dict[Future, Tuple[str, float]] = {}
+        failed = False
+
+        executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="workflow-step")
+        try:
+            while pending or running:
+                # Start every ready step while there is capacity
+                if not failed:
+                    for name in list(pending):
+                        if len(running) >= max_concurrency:
+                            break
+                        step = self.steps[name]
+                        if all(dep in succeeded for dep in step.depends_on):
+                            pending.remove(name)
+                            # Agents attribute costs and stream events through context variables
+                            context = contextvars.copy_context()
+                            future = executor.submit(context.run, step.run, dict(results))
+                            running[future] = (name, time.monotonic())
+                            logger.info(f"Workflow step '{name}' started")
+
+                if not running:
+                    # Nothing left that can run: a dependency failed
+                    break
+
+                done, _ = wait(running, timeout=self._next_deadline(running, default_timeout), return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    name, started = running.pop(future)
+                    record = self._record(name, future, time.monotonic() - started)
+                    failed = self._complete(record, results, succeeded) or failed
+                    records.append(record)
+                    if on_step_complete:
+                        on_step_complete(record)
+
+                # Give up on steps that ran past their timeout; the thread finishes in the background
+                now = time.monotonic()
+                for future, (name, started) in list(running.items()):
+                    timeout = self.steps[name].timeout or default_timeout
+                    if timeout and now - started >= timeout and not future.done():
+                        running.pop(future)
+                        future.cancel()
+                        record = {
+                            "step": name,
+                            "success": False,
+                            "error": f"Step timed out after {timeout:g}s",
+                            "duration_seconds": round(now - started, 3)
+                        }
+                        logger.warning(f"Workflow step '{name}' timed out after {timeout:g}s")
+                        failed = True
+                        records.append(record)
+                        if on_step_complete:
+                            on_step_complete(record)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return records
+
+    def _next_deadline(self, running: Dict[Future, Tuple[str, float]], default_timeout: Optional[float]) -> Optional[float]:
+        """Seconds until the first running step times out, None if none has a timeout"""
+        now = time.monotonic()
+        remaining = [
+            started + (self.steps[name].timeout or default_timeout) - now
+            for name, started in running.values()
+            if self.steps[name].timeout or default_timeout
+        ]
+        return max(0.0, min(remaining)) if remaining else None
+
+    @staticmethod
+    def _record(name: str, future: Future, duration: float) -> Dict[str, Any]:
+        """Step record of a finished future"""
+        try:
+            record = dict(future.result())
+        except Exception as e:
+            record = {"step": name, "success": False, "error": str(e)}
+        record["step"] = name
+        record["duration_seconds"] = round(duration, 3)
+        return record
+
+    def _complete(self, record: Dict[str, Any], results: Dict[str, Any], succeeded: set) -> bool:
+        """Store a finished step's data; returns True if the step failed"""
+        name = record["step"]
+        if not record.get("success"):
+            logger.warning(f"Workflow step '{name}' failed: {record.get('error')}")
+            return True
+
+        succeeded.add(name)
+        result_key = self.steps[name].result_key
+        if result_key:
+            results[result_key] = record.get("data")
+        logger.info(f"Workflow step '{name}' completed in {record['duration_seconds']}s")
+        return False
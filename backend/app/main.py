@@ -12,14 +12,20 @@ import sys
 
 # Import configuration and dependencies
 from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER
 from app.core.dependencies import initialize_agents, cleanup_agents
+from app.core.job_queue import start_job_workers, stop_job_workers
+from app.core.llm_gateway import llm_gateway
+from app.tools.post_renderer import shutdown_render_pool
+from app.services.ffmpeg_service import ffmpeg_service
+from app.services.agent_jobs import register_agent_jobs
 
 # Import routers
 from app.api.routers import (
     health, content, affirmations, visual_posts, instagram,
     media, workflows, app_testing, feedback, qa, images, mobile_analytics, threads, x, agent_prompts,
     background_video, auth, organizations, projects, departments, goals, tasks, agent_tasks,
-    credits, billing, knowledge_bases, ai_agents, organization_management, ideas
+    credits, billing, knowledge_bases, ai_agents, organization_management, ideas, jobs
 )
 
 # Configure logging
@@ -68,12 +74,20 @@ async def lifespan(app: FastAPI):
     logger.info("[STARTUP] Starting AI Company Backend...")
     initialize_agents()
     logger.info("[STARTUP] Agents initialized successfully")
+    register_agent_jobs()
+    if settings.JOB_WORKERS_ENABLED:
+        start_job_workers()
+        logger.info("[STARTUP] Background job workers started")
     
     yield
     
     # Shutdown
     logger.info("[SHUTDOWN] Shutting down AI Company Backend...")
+    stop_job_workers()
     cleanup_agents()
+    await llm_gateway.aclose()
+    shutdown_render_pool()
+    ffmpeg_service.close()
     logger.info("[SHUTDOWN] Cleanup completed")
 
 # Create FastAPI app
@@ -135,6 +149,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Global exception handler to ensure CORS headers are always present
@@ -193,6 +208,7 @@ app.include_router(knowledge_bases.router)  # Knowledge base management
 app.include_router(ai_agents.router)  # AI agents management
 app.include_router(organization_management.router)  # Organization management AI agents
 app.include_router(ideas.router)  # Ideas management
+app.include_router(jobs.router)  # Background job status
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,6 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Dict, Any, Optional, List
 
+from app.core.config import settings
+
 class InstagramPostRequest(BaseModel):
     affirmation: str
     period_name: str
@@ -39,8 +41,10 @@ class InstagramStrategyRequest(BaseModel):
     account_stage: Optional[str] = "starting"
 
 class InstagramMultipleAnalyzeRequest(BaseModel):
-    account_list: List[str]
+    account_list: List[str] = Field(..., min_length=1, max_length=settings.INSTAGRAM_ANALYSIS_MAX_ACCOUNTS)
     analysis_focus: Optional[str] = "comprehensive"
+    # Capped at INSTAGRAM_ANALYSIS_CONCURRENCY by the agent
+    max_concurrency: Optional[int] = Field(None, ge=1)
 
 class InstagramReelRequest(BaseModel):
     instagram_text: str
@@ -0,0 +1,120 @@
+"""
+Background job types for long-running agent calls
+Registered with the job queue on startup and by standalone worker processes
+"""
+import json
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.core.job_queue import register_job_type
+
+logger = logging.getLogger(__name__)
+
+INSTAGRAM_ANALYSES_DIR = "storage/instagram_analyses"
+
+
+def agent_call_payload(agent: str, method: str, kwargs: Dict[str, Any],
+                       context: Optional[Any] = None) -> Dict[str, Any]:
+    """Payload of a job that calls `method` of the agent registered as `agent`"""
+    return {
+        "agent": agent,
+        "method": method,
+        "kwargs": kwargs,
+        "context": context.model_dump(mode="json") if context is not None else None
+    }
+
+
+def run_agent_method(payload: Dict[str, Any]) -> Any:
+    """Job handler: call an agent method with the payload's arguments"""
+    from app.core.dependencies import get_agent
+    from app.core.middleware import RequestContext
+
+    agent = get_agent(payload["agent"])
+    if not agent:
+        raise RuntimeError(f"Agent '{payload['agent']}' not available")
+
+    if payload.get("context") and hasattr(agent, "set_context"):
+        agent.set_context(RequestContext(**payload["context"]))
+
+    # Async methods are awaited by the worker
+    return getattr(agent, payload["method"])(**payload.get("kwargs", {}))
+
+
+def analyze_instagram_account(account_url_or_username: str, analysis_focus: Optional[str] = None) -> Dict[str, Any]:
+    """Analyze an Instagram account and store the analysis
+
+    Returns:
+        Dict: {"status", "analysis_id", "analysis"}
+    """
+    from app.core.dependencies import get_agent
+
+    instagram_analyzer_agent = get_agent('instagram_analyzer_agent')
+    if not instagram_analyzer_agent:
+        raise RuntimeError("Instagram Analyzer Agent not initialized")
+
+    analysis = instagram_analyzer_agent.analyze_instagram_account(
+        account_url_or_username,
+        analysis_focus or "comprehensive"
+    )
+
+    os.makedirs(INSTAGRAM_ANALYSES_DIR, exist_ok=True)
+    analysis_id = str(uuid.uuid4())
+    with open(f"{INSTAGRAM_ANALYSES_DIR}/{analysis_id}.json", 'w') as f:
+        json.dump({
+            "id": analysis_id,
+            "account": account_url_or_username,
+            "analysis": analysis,
+            "created_at": datetime.now().isoformat()
+        }, f, indent=2)
+
+    return {
+        "status": "success",
+        "analysis_id": analysis_id,
+        "analysis": analysis
+    }
+
+
+def run_instagram_analysis(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler for Instagram account analyses"""
+    return analyze_instagram_account(payload["account_url_or_username"], payload.get("analysis_focus"))
+
+
+async def run_content_generation(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler for the content generation flow of /content/generate"""
+    from app.core.dependencies import content_wrapper, content_storage
+    from app.core.middleware import RequestContext
+
+    if not content_wrapper:
+        raise RuntimeError("Content generation not available")
+
+    content_id = payload["content_id"]
+    if content_id in content_storage:
+        content_storage[content_id]["status"] = "researching"
+
+    if hasattr(content_wrapper, 'set_context'):
+        content_wrapper.set_context(RequestContext(**payload["context"]))
+
+    result = await content_wrapper.run_async(
+        knowledge_files=payload.get("knowledge_files"),
+        style_preferences=payload.get("style_preferences")
+    )
+    return {
+        "research_results": result.get("research_results", ""),
+        "written_content": result.get("written_content", ""),
+        "visual_concepts": result.get("visual_concepts", ""),
+        "images": result.get("generated_images", [])
+    }
+
+
+def register_agent_jobs():
+    """Register the agent job types with their default concurrency"""
+    register_job_type("content_generation", run_content_generation, concurrency=2)
+    register_job_type("video_generation", run_agent_method, concurrency=1)
+    register_job_type("video_composition", run_agent_method, concurrency=1)
+    register_job_type("voice_over", run_agent_method, concurrency=2)
+    register_job_type("instagram_analysis", run_instagram_analysis, concurrency=2)
+    register_job_type("app_testing", run_agent_method, concurrency=1)
+    register_job_type("content_workflow", run_agent_method, concurrency=1)
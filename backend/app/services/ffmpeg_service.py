@@ -0,0 +1,403 @@
+"""
+FFmpeg execution service
+
+Video and voice-over agents run ffmpeg through this service instead of calling
+`subprocess.run` from the request handler:
+
+- encodes run as asyncio subprocesses on one event loop thread; async callers
+  await them, sync agent code waits for its own job only
+- at most `max_concurrent` encodes run at once in the process (one per CPU
+  core by default), further jobs wait in a queue
+- every job has a timeout and can be cancelled, the process is killed either way
+- progress is parsed from `-progress pipe:1` and passed to a callback and to the
+  client of a streaming request as `ffmpeg_progress` events
+- `get_stats()` reports the queue depth and the progress of running jobs
+- frames rendered in Python can be streamed to ffmpeg's stdin (`frames=`), so
+  no intermediate image files are encoded and decoded again
+
+Every render job works in its own scratch directory (`render_workspace()`), on
+tmpfs where available, so concurrent jobs never share intermediate files.
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from app.core.config import settings
+from app.core.streaming import emit_event
+from app.tools.post_renderer import available_cores
+
+logger = logging.getLogger(__name__)
+
+# Characters of ffmpeg's stderr kept for error messages
+STDERR_TAIL = 8000
+
+# Shared memory is a tmpfs on Linux
+TMPFS_DIR = "/dev/shm"
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+_END_OF_FRAMES = object()
+
+
+def workspace_root() -> str:
+    """Directory render workspaces are created in
+
+    RENDER_TMP_DIR if set, otherwise /dev/shm when it is writable and the
+    system temp directory as a fallback.
+    """
+    if settings.RENDER_TMP_DIR:
+        os.makedirs(settings.RENDER_TMP_DIR, exist_ok=True)
+        return settings.RENDER_TMP_DIR
+    if os.path.isdir(TMPFS_DIR) and os.access(TMPFS_DIR, os.W_OK):
+        return TMPFS_DIR
+    return tempfile.gettempdir()
+
+
+@contextmanager
+def render_workspace(prefix: str = "render-") -> Iterator[str]:
+    """Scratch directory of one render job, removed with everything in it afterwards"""
+    path = tempfile.mkdtemp(prefix=prefix, dir=workspace_root())
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+@dataclass
+class FFmpegResult:
+    returncode: int
+    stderr: str = ""
+    elapsed: float = 0.0
+    timed_out: bool = False
+    cancelled: bool = False
+    progress: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def success(self) -> bool:
+        return self.returncode == 0 and not self.timed_out and not self.cancelled
+
+
+def parse_progress(values: Dict[str, str], duration: Optional[float] = None) -> Dict[str, Any]:
+    """Progress snapshot from one block of `-progress` key=value lines"""
+    def number(key, cast=float):
+        try:
+            return cast(values[key])
+        except (KeyError, ValueError):
+            return None
+
+    # out_time_ms is in microseconds as well (ffmpeg keeps the old name for compatibility)
+    out_time_us = number("out_time_us", int)
+    if out_time_us is None:
+        out_time_us = number("out_time_ms", int)
+    seconds = out_time_us / 1_000_000 if out_time_us is not None else None
+
+    progress = {
+        "frame": number("frame", int),
+        "fps": number("fps"),
+        "out_time": seconds,
+        "speed": values.get("speed"),
+        "done": values.get("progress") == "end",
+    }
+    if duration and seconds is not None:
+        progress["percent"] = 100.0 if progress["done"] else round(min(100.0, 100.0 * seconds / duration), 1)
+    return progress
+
+
+def resolve_ffmpeg_binary(binary: Optional[str] = None) -> str:
+    """Return the ffmpeg executable to run
+
+    An explicit binary wins, then ffmpeg on PATH, then the static build shipped
+    with imageio-ffmpeg, so images without a system ffmpeg can still encode.
+    """
+    if binary:
+        return binary
+    found = shutil.which("ffmpeg")
+    if found:
+        return found
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception as e:
+        logger.warning(f"No ffmpeg on PATH and no imageio-ffmpeg binary: {e}")
+        return "ffmpeg"
+
+
+class FFmpegService:
+    """Bounded, non-blocking ffmpeg runner shared by the process"""
+
+    def __init__(self, binary: Optional[str] = None, max_concurrent: Optional[int] = None,
+                 timeout: float = 600.0):
+        self.binary = resolve_ffmpeg_binary(binary)
+        self.max_concurrent = max_concurrent or available_cores()
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._completed = 0
+        self._failed = 0
+        self._timed_out = 0
+        self._cancelled = 0
+        self._wait_seconds = 0.0
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._slots = asyncio.Semaphore(self.max_concurrent)
+                self._thread = threading.Thread(target=loop.run_forever, name="ffmpeg-service", daemon=True)
+                self._thread.start()
+                self._loop = loop
+            return self._loop
+
+    def _submit(self, args: List[str], timeout: Optional[float], duration: Optional[float],
+                on_progress: Optional[ProgressCallback], job_id: Optional[str], frames: Optional[Iterable[Any]]):
+        job_id = job_id or str(uuid.uuid4())
+        # Progress is reported in the caller's context, so events reach its streaming request
+        context = contextvars.copy_context()
+        coro = self._execute(job_id, list(args), timeout or self.timeout, duration, on_progress, context, frames)
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    async def run(self, args: List[str], timeout: Optional[float] = None, duration: Optional[float] = None,
+                  on_progress: Optional[ProgressCallback] = None, job_id: Optional[str] = None,
+                  frames: Optional[Iterable[Any]] = None) -> FFmpegResult:
+        """Run ffmpeg with `args` (without the binary) and wait for it
+
+        Cancelling the awaiting task kills the process.
+
+        Args:
+            timeout: Seconds before the process is killed, defaults to the service timeout
+            duration: Expected output duration in seconds, to report progress in percent
+            on_progress: Called with every progress snapshot
+            job_id: Id to cancel the job with, a new uuid by default
+            frames: Buffers (bytes or C-contiguous arrays) written to ffmpeg's stdin
+                in order, e.g. raw frames for `-f rawvideo -i pipe:0`. The
+                iterable is consumed in a worker thread; a buffer may be reused
+                for the next frame once the following one is requested.
+        """
+        return await asyncio.wrap_future(self._submit(args, timeout, duration, on_progress, job_id, frames))
+
+    def run_sync(self, args: List[str], timeout: Optional[float] = None, duration: Optional[float] = None,
+                 on_progress: Optional[ProgressCallback] = None, job_id: Optional[str] = None,
+                 frames: Optional[Iterable[Any]] = None) -> FFmpegResult:
+        """Blocking variant of `run` for sync agent code running in a worker thread"""
+        return self._submit(args, timeout, duration, on_progress, job_id, frames).result()
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; returns False for unknown jobs"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            job["cancelled"] = True
+            process = job.get("process")
+        if process is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._kill, process)
+        return True
+
+    @staticmethod
+    def _kill(process: asyncio.subprocess.Process):
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+
+    async def _execute(self, job_id: str, args: List[str], timeout: float, duration: Optional[float],
+                       on_progress: Optional[ProgressCallback], context: contextvars.Context,
+                       frames: Optional[Iterable[Any]] = None) -> FFmpegResult:
+        queued_at = time.monotonic()
+        job = {"state": "queued", "queued_at": queued_at, "process": None, "progress": {}, "cancelled": False}
+        with self._lock:
+            self._jobs[job_id] = job
+
+        try:
+            async with self._slots:
+                started = time.monotonic()
+                with self._lock:
+                    self._wait_seconds += started - queued_at
+                    job.update(state="running", started_at=started)
+                    if job["cancelled"]:
+                        self._cancelled += 1
+                        return FFmpegResult(returncode=-1, cancelled=True)
+
+                process = await asyncio.create_subprocess_exec(
+                    self.binary, "-nostats", "-progress", "pipe:1", *args,
+                    stdin=asyncio.subprocess.PIPE if frames is not None else asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                with self._lock:
+                    job["process"] = process
+                    cancelled = job["cancelled"]
+                if cancelled:
+                    self._kill(process)
+
+                stderr_task = asyncio.ensure_future(self._read_stderr(process.stderr))
+                progress_task = asyncio.ensure_future(
+                    self._read_progress(process.stdout, job_id, job, duration, on_progress, context)
+                )
+                frames_task = asyncio.ensure_future(self._write_frames(process, frames)) if frames is not None else None
+
+                timed_out = False
+                try:
+                    await asyncio.wait_for(process.wait(), timeout)
+                except asyncio.TimeoutError:
+                    timed_out = True
+                    self._kill(process)
+                    await process.wait()
+                except asyncio.CancelledError:
+                    self._kill(process)
+                    await process.wait()
+                    if frames_task is not None:
+                        frames_task.cancel()
+                    with self._lock:
+                        self._cancelled += 1
+                    raise
+
+                stderr = await stderr_task
+                await progress_task
+                frames_error = await frames_task if frames_task is not None else None
+                result = FFmpegResult(
+                    returncode=process.returncode,
+                    stderr=stderr,
+                    elapsed=time.monotonic() - started,
+                    timed_out=timed_out,
+                    cancelled=job["cancelled"],
+                    progress=job["progress"]
+                )
+                if timed_out:
+                    result.stderr += f"\nffmpeg timed out after {timeout:.0f}s"
+                if frames_error is not None:
+                    result.stderr += f"\nFrame source failed: {frames_error}"
+                    if result.returncode == 0:
+                        result.returncode = -1
+
+                with self._lock:
+                    if result.cancelled:
+                        self._cancelled += 1
+                    elif timed_out:
+                        self._timed_out += 1
+                    elif result.returncode == 0:
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+                return result
+        finally:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+
+    async def _write_frames(self, process: asyncio.subprocess.Process, frames: Iterable[Any]) -> Optional[Exception]:
+        """Feed `frames` to stdin; returns the error of the frame source, if any"""
+        loop = asyncio.get_running_loop()
+        iterator = iter(frames)
+        try:
+            while True:
+                # Frames are rendered off the event loop thread
+                frame = await loop.run_in_executor(None, next, iterator, _END_OF_FRAMES)
+                if frame is _END_OF_FRAMES:
+                    return None
+                process.stdin.write(memoryview(frame).cast("B"))
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # ffmpeg exited early, its return code and stderr tell why
+            return None
+        except Exception as e:
+            logger.error(f"Frame source of ffmpeg job failed: {e}")
+            self._kill(process)
+            return e
+        finally:
+            try:
+                process.stdin.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    async def _read_stderr(stream: asyncio.StreamReader) -> str:
+        tail = ""
+        while True:
+            chunk = await stream.read(4096)
+            if not chunk:
+                return tail
+            tail = (tail + chunk.decode("utf-8", errors="replace"))[-STDERR_TAIL:]
+
+    async def _read_progress(self, stream: asyncio.StreamReader, job_id: str, job: Dict[str, Any],
+                             duration: Optional[float], on_progress: Optional[ProgressCallback],
+                             context: contextvars.Context):
+        values: Dict[str, str] = {}
+        async for raw_line in stream:
+            key, _, value = raw_line.decode("utf-8", errors="replace").strip().partition("=")
+            if not key:
+                continue
+            values[key] = value.strip()
+            if key != "progress":
+                continue
+
+            progress = parse_progress(values, duration)
+            with self._lock:
+                job["progress"] = progress
+            try:
+                context.run(emit_event, "ffmpeg_progress", job_id=job_id, **progress)
+                if on_progress is not None:
+                    context.run(on_progress, progress)
+            except Exception as e:
+                logger.warning(f"ffmpeg progress callback failed: {e}")
+            values = {}
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            jobs = [
+                {
+                    "id": job_id,
+                    "state": job["state"],
+                    "seconds": round(now - job.get("started_at", job["queued_at"]), 2),
+                    "progress": job["progress"],
+                }
+                for job_id, job in self._jobs.items()
+            ]
+            started = self._completed + self._failed + self._timed_out + self._cancelled
+            stats = {
+                "max_concurrent": self.max_concurrent,
+                "completed": self._completed,
+                "failed": self._failed,
+                "timed_out": self._timed_out,
+                "cancelled": self._cancelled,
+                "average_wait_seconds": round(self._wait_seconds / started, 3) if started else 0.0,
+            }
+        stats["queue_depth"] = sum(1 for job in jobs if job["state"] == "queued")
+        stats["running"] = sum(1 for job in jobs if job["state"] == "running")
+        stats["jobs"] = jobs
+        return stats
+
+    def close(self):
+        """Kill running encodes and stop the event loop thread"""
+        with self._lock:
+            loop, thread, self._loop, self._thread = self._loop, self._thread, None, None
+            processes = [job["process"] for job in self._jobs.values() if job.get("process") is not None]
+        if loop is None:
+            return
+        for process in processes:
+            loop.call_soon_threadsafe(self._kill, process)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+
+
+# Global instance
+ffmpeg_service = FFmpegService(
+    binary=settings.FFMPEG_BINARY or None,
+    max_concurrent=settings.FFMPEG_MAX_CONCURRENT or None,
+    timeout=settings.FFMPEG_TIMEOUT_SECONDS
+)
@@ -2,6 +2,7 @@
 Shared Knowledge Base Manager
 Manages a single instance of the knowledge base embeddings to be shared across all agents
 """
+import hashlib
 import os
 from typing import Optional
 from langchain_community.document_loaders import PyPDFLoader
@@ -19,6 +20,7 @@ class KnowledgeBaseManager:
     _instance: Optional['KnowledgeBaseManager'] = None
     _vector_store: Optional[FAISS] = None
     _embeddings: Optional[OpenAIEmbeddings] = None
+    _version: str = ""
     
     def __new__(cls):
         if cls._instance is None:
@@ -55,6 +57,13 @@ class KnowledgeBaseManager:
         
         # Create vector store ONCE
         self._vector_store = FAISS.from_documents(texts, self._embeddings)
+
+        # Version changes whenever the source document does, so answers cached
+        # against an older edition are not reused
+        stat = os.stat(knowledge_base_path)
+        self._version = hashlib.sha256(
+            f"{os.path.abspath(knowledge_base_path)}:{stat.st_size}:{stat.st_mtime}".encode()
+        ).hexdigest()[:16]
         
         logger.info(f"Successfully loaded {len(texts)} document sections into shared vector store")
     
@@ -70,6 +79,10 @@ class KnowledgeBaseManager:
             raise RuntimeError("Knowledge base not initialized. Call initialize() first.")
         return self._embeddings
     
+    def get_version(self) -> str:
+        """Get a fingerprint of the loaded knowledge base content"""
+        return self._version
+
     def is_initialized(self) -> bool:
         """Check if the knowledge base is initialized"""
         return self._vector_store is not None
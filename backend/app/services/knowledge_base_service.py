@@ -25,6 +25,7 @@ from app.models.knowledge_base import (
     KnowledgeBaseList
 )
 from app.core.config import settings
+from app.services.qa_answer_cache import qa_answer_cache
 
 logger = logging.getLogger(__name__)
 
@@ -318,6 +319,7 @@ class KnowledgeBaseService:
                 "id", str(knowledge_base_id)
             ).execute()
             
+            qa_answer_cache.invalidate(str(kb.organization_id))
             return True
         except Exception as e:
             logger.error(f"Error deleting knowledge base: {e}")
@@ -347,6 +349,7 @@ class KnowledgeBaseService:
             # Reindex
             await self._index_knowledge_base(kb, file_content)
             
+            qa_answer_cache.invalidate(str(kb.organization_id))
             return True
         except Exception as e:
             logger.error(f"Error reindexing knowledge base: {e}")
@@ -420,9 +423,11 @@ class KnowledgeBaseService:
             vector_store_id = f"faiss_{kb.id}"
             vector_store.save_local(f"/tmp/{vector_store_id}")
             
-            # Update knowledge base with vector store ID
+            # Update knowledge base with vector store ID; bumping updated_at changes
+            # the knowledge base version seen by the Q&A answer cache
             self.supabase.table("knowledge_bases").update({
-                "vector_store_id": vector_store_id
+                "vector_store_id": vector_store_id,
+                "updated_at": datetime.utcnow().isoformat()
             }).eq("id", str(kb.id)).execute()
             
             # Clean up temp file
@@ -0,0 +1,162 @@
+"""
+Semantic answer cache for the Q&A agent
+Reuses answers of previously asked questions whose embeddings are close enough
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ScopeKey = Tuple[str, str, str]
+
+
+class _ScopeIndex:
+    """Normalized question embeddings and answers for one tenant + knowledge base version"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.vectors: Optional[np.ndarray] = None
+        self.entries: List[Dict[str, Any]] = []
+
+    def add(self, vector: np.ndarray, entry: Dict[str, Any]):
+        row = vector.reshape(1, -1)
+        self.vectors = row if self.vectors is None else np.vstack([self.vectors, row])
+        self.entries.append(entry)
+        if len(self.entries) > self.max_entries:
+            # Oldest answers go first
+            overflow = len(self.entries) - self.max_entries
+            self.vectors = self.vectors[overflow:]
+            self.entries = self.entries[overflow:]
+
+    def best_match(self, vector: np.ndarray) -> Optional[Tuple[Dict[str, Any], float]]:
+        if self.vectors is None or not self.entries or self.vectors.shape[1] != vector.shape[0]:
+            return None
+        scores = self.vectors @ vector
+        best = int(np.argmax(scores))
+        return self.entries[best], float(scores[best])
+
+
+class SemanticAnswerCache:
+    """In-process nearest-neighbour lookup over answered questions
+
+    Entries are partitioned by (organization, project, knowledge base version) so a
+    tenant never receives another tenant's answer and a reindexed knowledge base
+    never serves answers built from its old content. The least recently used
+    scopes are dropped once max_scopes is exceeded.
+    """
+
+    def __init__(self, max_entries_per_scope: int = 500, max_scopes: int = 200):
+        self.max_entries_per_scope = max_entries_per_scope
+        self.max_scopes = max_scopes
+        self._scopes: "OrderedDict[ScopeKey, _ScopeIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_scope(organization_id: Optional[str], project_id: Optional[str], kb_version: str) -> ScopeKey:
+        return (str(organization_id or ""), str(project_id or ""), kb_version)
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if vector.ndim != 1 or norm == 0:
+            return None
+        return vector / norm
+
+    def is_loaded(self, scope: ScopeKey) -> bool:
+        """Whether the scope has been warmed from storage in this process"""
+        with self._lock:
+            return scope in self._scopes
+
+    def _get_scope(self, scope: ScopeKey) -> _ScopeIndex:
+        """Get or create a scope index; caller holds the lock"""
+        index = self._scopes.get(scope)
+        if index is None:
+            index = self._scopes[scope] = _ScopeIndex(self.max_entries_per_scope)
+            while len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+        self._scopes.move_to_end(scope)
+        return index
+
+    def load(self, scope: ScopeKey, entries: List[Dict[str, Any]]):
+        """Warm a scope from stored interactions (oldest first)
+
+        Each entry needs an 'embedding' plus the fields to hand back on a hit.
+        """
+        with self._lock:
+            index = self._get_scope(scope)
+            for entry in entries:
+                vector = self._normalize(entry.get("embedding") or [])
+                if vector is not None:
+                    index.add(vector, {k: v for k, v in entry.items() if k != "embedding"})
+
+    def add(self, scope: ScopeKey, embedding: List[float], entry: Dict[str, Any]):
+        """Remember an answered question"""
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+        with self._lock:
+            self._get_scope(scope).add(vector, entry)
+
+    def find(self, scope: ScopeKey, embedding: List[float], threshold: float) -> Optional[Dict[str, Any]]:
+        """Find the closest answered question with cosine similarity >= threshold
+
+        Returns:
+            Dict: The stored entry plus its 'similarity', or None
+        """
+        vector = self._normalize(embedding)
+        match = None
+        with self._lock:
+            index = self._scopes.get(scope)
+            if index is not None and vector is not None:
+                self._scopes.move_to_end(scope)
+                match = index.best_match(vector)
+
+            if match and match[1] >= threshold:
+                self.hits += 1
+            else:
+                self.misses += 1
+                return None
+
+        entry, similarity = match
+        return {**entry, "similarity": round(similarity, 4)}
+
+    def invalidate(self, organization_id: Optional[str] = None) -> int:
+        """Drop cached answers for a tenant, or everything if no tenant is given
+
+        Returns:
+            int: Number of scopes removed
+        """
+        with self._lock:
+            if organization_id is None:
+                removed = len(self._scopes)
+                self._scopes.clear()
+                return removed
+
+            stale = [scope for scope in self._scopes if scope[0] == str(organization_id)]
+            for scope in stale:
+                del self._scopes[scope]
+            return len(stale)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "scopes": len(self._scopes),
+                "entries": sum(len(index.entries) for index in self._scopes.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Global instance
+qa_answer_cache = SemanticAnswerCache(max_entries_per_scope=settings.QA_SEMANTIC_CACHE_MAX_ENTRIES)
@@ -0,0 +1,334 @@
+"""
+Compositing engine for the picture post templates
+
+Templates are drawn straight onto the opaque background canvas:
+- fonts are loaded from disk once per size, and wrapped text layouts are
+  cached (see text_layout)
+- overlays that only depend on the period, template and canvas size (color
+  tints, gradients, quote cards, branding bars) are built once and kept in an
+  LRU cache
+- gradients are built as NumPy arrays instead of line by line
+- each layer only covers the region it draws on (its dirty region) and is
+  blended into the canvas exactly once; no full-canvas intermediate layers
+  are created and chained
+
+Batches are rendered in a process pool sized to the available cores; every
+worker process keeps its own renderer, so its caches stay warm across jobs.
+"""
+
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from app.tools.text_layout import fit_font_size, load_font, wrap_text
+
+# Opacity of the full-canvas color tint per template style
+TINT_ALPHA = {
+    "minimal": 76,  # 30% opacity
+    "dramatic": 127,  # 50% opacity
+}
+DEFAULT_TINT_ALPHA = 102  # 40% opacity
+
+
+def font_size(style: str, height: int, text_length: int) -> int:
+    """Font size for a text style on a canvas of the given height"""
+    if style == "title":
+        return 80
+    if style == "quote":
+        return 60
+    if text_length < 50:
+        return 72 if height > 1500 else 64
+    if text_length < 100:
+        return 60 if height > 1500 else 52
+    return 48 if height > 1500 else 42
+
+
+def fit_cover(image: Image.Image, width: int, height: int) -> Image.Image:
+    """Scale and center-crop an image to cover width x height, as RGB
+
+    Only the cropped area is resampled, and JPEGs are decoded at the smallest
+    scale that still covers the target size.
+    """
+    image.draft("RGB", (width, height))
+    target_ratio = width / height
+
+    if image.width / image.height > target_ratio:
+        crop_width = image.height * target_ratio
+        left = (image.width - crop_width) / 2
+        box = (left, 0, left + crop_width, image.height)
+    else:
+        crop_height = image.width / target_ratio
+        top = (image.height - crop_height) / 2
+        box = (0, top, image.width, top + crop_height)
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    resized = image.resize((width, height), Image.Resampling.LANCZOS, box=box, reducing_gap=3.0)
+    return resized.convert("RGB") if resized.mode != "RGB" else resized
+
+
+def hex_to_rgb(color: str) -> Tuple[int, int, int]:
+    return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+
+
+@dataclass
+class Layer:
+    """RGBA image blended into the canvas at `position`"""
+    image: Image.Image
+    position: Tuple[int, int] = (0, 0)
+
+
+class PostRenderer:
+    """Renders the picture templates of the post composition agent"""
+
+    TEMPLATES = ("minimal", "dramatic", "gradient", "quote_card", "period_branding")
+
+    def __init__(self, period_colors: Dict[str, str], max_cached_overlays: int = 64):
+        self.period_colors = period_colors
+        self.max_cached_overlays = max_cached_overlays
+        self._overlays: "OrderedDict[tuple, List[Layer]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, background: Image.Image, template: str, text: str, period: str,
+               options: Optional[Dict[str, Any]] = None) -> Image.Image:
+        """Compose a post; `background` must already have the canvas size
+
+        Returns:
+            Image.Image: The composed post in RGB
+        """
+        options = options or {}
+        canvas = background.convert("RGB") if background.mode != "RGB" else background.copy()
+        width, height = canvas.size
+
+        if template == "dramatic":
+            layers = self._overlay("tint", period, "dramatic", width, height)
+            layers += [self._text_layer(text, "dramatic", width, height, options)]
+        elif template == "gradient":
+            layers = self._overlay("gradient", period, "gradient", width, height)
+            layers += [self._text_layer(text, "gradient", width, height, options)]
+        elif template == "quote_card":
+            layers = self._overlay("card", period, "quote_card", width, height)
+            layers += [self._quote_layer(text, width, height)]
+        elif template == "period_branding":
+            layers = self._overlay("branding", period, "period_branding", width, height)
+            layers += self._branded_text_layers(text, period, width, height)
+        else:
+            # minimal, also the default template
+            layers = self._overlay("tint", period, "minimal", width, height)
+            layers += [self._text_layer(text, "minimal", width, height, options)]
+
+        for layer in layers:
+            if layer is not None:
+                canvas.paste(layer.image, layer.position, layer.image)
+        return canvas
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"cached_overlays": len(self._overlays), "hits": self.hits, "misses": self.misses}
+
+    # Static overlays
+
+    def _overlay(self, kind: str, period: str, style: str, width: int, height: int) -> List[Layer]:
+        """Cached overlay layers of a template"""
+        key = (kind, period, style, width, height)
+        with self._lock:
+            if key in self._overlays:
+                self._overlays.move_to_end(key)
+                self.hits += 1
+                return list(self._overlays[key])
+            self.misses += 1
+
+        color = hex_to_rgb(self.period_colors.get(period, "#808080"))
+        if kind == "tint":
+            layers = [Layer(Image.new('RGBA', (width, height), color + (TINT_ALPHA.get(style, DEFAULT_TINT_ALPHA),)))]
+        elif kind == "gradient":
+            layers = [self._gradient_layer(color, width, height)]
+        elif kind == "card":
+            layers = [self._card_layer(color, width, height)]
+        else:
+            layers = self._branding_layers(color, width, height)
+
+        with self._lock:
+            self._overlays[key] = layers
+            while len(self._overlays) > self.max_cached_overlays:
+                self._overlays.popitem(last=False)
+        return list(layers)
+
+    @staticmethod
+    def _gradient_layer(color: Tuple[int, int, int], width: int, height: int) -> Layer:
+        """Vertical gradient, stronger at top and bottom, lighter in the middle"""
+        third = height // 3
+        y = np.arange(height)
+        alpha = np.full(height, 51, dtype=np.uint8)
+        top = y < third
+        alpha[top] = (127 * (1 - y[top] / third)).astype(np.uint8)
+        bottom = y > 2 * height // 3
+        alpha[bottom] = (127 * (y[bottom] - 2 * height // 3) / third).astype(np.uint8)
+
+        pixels = np.empty((height, width, 4), dtype=np.uint8)
+        pixels[..., :3] = color
+        pixels[..., 3] = alpha[:, None]
+        return Layer(Image.fromarray(pixels, 'RGBA'))
+
+    @staticmethod
+    def _card_layer(color: Tuple[int, int, int], width: int, height: int) -> Layer:
+        """Rounded white card with a period-colored border in the middle half"""
+        card_margin = 100
+        card_width = width - 2 * card_margin
+        card_height = height // 2
+
+        card = Image.new('RGBA', (card_width + 1, card_height + 1), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(card)
+        draw.rounded_rectangle([0, 0, card_width, card_height], radius=20, fill=(255, 255, 255, 200))
+        draw.rounded_rectangle([0, 0, card_width, card_height], radius=20, outline=color + (255,), width=5)
+        return Layer(card, (card_margin, height // 4))
+
+    @staticmethod
+    def _branding_layers(color: Tuple[int, int, int], width: int, height: int) -> List[Layer]:
+        """Period-colored header and footer bars"""
+        header_height = 100
+        footer_height = 80
+        return [
+            Layer(Image.new('RGBA', (width, header_height + 1), color + (200,))),
+            Layer(Image.new('RGBA', (width, footer_height + 1), color + (150,)), (0, height - footer_height))
+        ]
+
+    # Text
+
+    @staticmethod
+    def _draw_lines(lines: List[str], font: ImageFont.ImageFont, width: int, height: int,
+                    start_y: int, line_height: int, shadow_offset: int,
+                    shadow_fill: Tuple[int, ...], fill: Tuple[int, ...]) -> Optional[Layer]:
+        """Centered lines with a drop shadow, on a layer covering only the text block"""
+        if not lines:
+            return None
+        ascent, descent = font.getmetrics()
+        top = max(0, start_y)
+        bottom = min(height, start_y + (len(lines) - 1) * line_height + ascent + descent + max(shadow_offset, 0) + 1)
+        if bottom <= top:
+            return None
+
+        layer = Image.new('RGBA', (width, bottom - top), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(layer)
+        for i, line in enumerate(lines):
+            bbox = draw.textbbox((0, 0), line, font=font)
+            x = (width - (bbox[2] - bbox[0])) // 2
+            y = start_y + i * line_height - top
+            draw.text((x + shadow_offset, y + shadow_offset), line, font=font, fill=shadow_fill)
+            draw.text((x, y), line, font=font, fill=fill)
+        return Layer(layer, (0, top))
+
+    def _text_layer(self, text: str, style: str, width: int, height: int, options: Dict[str, Any]) -> Optional[Layer]:
+        """Vertically centered text with shadow, shrunk if it would not fit the canvas"""
+        margin = options.get("text_margin", 150)
+        size = font_size(style, height, len(text))
+        if "line_height" in options:
+            lines = wrap_text(text, load_font(size), width - margin)
+        else:
+            size, lines = fit_font_size(text, width - margin, height - 200, size)
+        font = load_font(size)
+        line_height = options.get("line_height", font.size + 10)
+        start_y = (height - len(lines) * line_height) // 2
+        return self._draw_lines(
+            lines, font, width, height, start_y, line_height,
+            shadow_offset=options.get("shadow_offset", 3),
+            shadow_fill=(0, 0, 0, 128),
+            fill=tuple(options.get("text_color", (255, 255, 255, 255)))
+        )
+
+    def _quote_layer(self, text: str, width: int, height: int) -> Optional[Layer]:
+        """Quoted text in dark grey, shrunk to fit the quote card"""
+        size, lines = fit_font_size(f'"{text}"', width - 150, height // 2 - 40,
+                                    font_size("quote", height, len(text)), line_spacing=15)
+        font = load_font(size)
+        line_height = font.size + 15
+        start_y = (height - len(lines) * line_height) // 2
+        return self._draw_lines(lines, font, width, height, start_y, line_height,
+                                shadow_offset=3, shadow_fill=(0, 0, 0, 128), fill=(50, 50, 50, 255))
+
+    def _branded_text_layers(self, text: str, period: str, width: int, height: int) -> List[Optional[Layer]]:
+        """Period name in the header and the text between header and footer"""
+        title_font = load_font(font_size("title", height, len(period)))
+
+        title = self._draw_lines([period], title_font, width, height, 30, 0,
+                                 shadow_offset=0, shadow_fill=(0, 0, 0, 0), fill=(255, 255, 255, 255))
+
+        available_height = height - 200  # Account for header and footer
+        size, lines = fit_font_size(text, width - 150, available_height, font_size("text", height, len(text)))
+        text_font = load_font(size)
+        line_height = text_font.size + 10
+        start_y = 150 + (available_height - len(lines) * line_height) // 2
+        body = self._draw_lines(lines, text_font, width, height, start_y, line_height,
+                                shadow_offset=2, shadow_fill=(0, 0, 0, 128), fill=(255, 255, 255, 255))
+        return [title, body]
+
+
+def render_post_file(background_path: str, output_path: str, template: str, text: str, period: str,
+                     size: Tuple[int, int], options: Optional[Dict[str, Any]],
+                     period_colors: Dict[str, str], renderer: Optional[PostRenderer] = None) -> str:
+    """Render one post from a background file and save it as JPEG
+
+    Runs in render pool workers, so it only takes picklable arguments; without
+    a renderer the worker's own renderer is used.
+
+    Returns:
+        str: The output path
+    """
+    if renderer is None:
+        renderer = _worker_renderer(period_colors)
+    with Image.open(background_path) as image:
+        background = fit_cover(image, *size)
+    renderer.render(background, template, text, period, options).save(output_path, 'JPEG', quality=95)
+    return output_path
+
+
+_process_renderer: Optional[PostRenderer] = None
+
+
+def _worker_renderer(period_colors: Dict[str, str]) -> PostRenderer:
+    global _process_renderer
+    if _process_renderer is None or _process_renderer.period_colors != period_colors:
+        _process_renderer = PostRenderer(period_colors)
+    return _process_renderer
+
+
+def available_cores() -> int:
+    """CPU cores this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+
+
+def get_render_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Shared process pool for post rendering, one worker per available core by default"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            # spawn: the API process runs threads, which fork does not copy safely
+            _render_pool = ProcessPoolExecutor(
+                max_workers=max_workers or available_cores(),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _render_pool
+
+
+def shutdown_render_pool():
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+            _render_pool = None
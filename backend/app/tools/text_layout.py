@@ -0,0 +1,162 @@
+"""
+Text layout shared by post composition and captions
+
+- glyph advance widths are measured once per (font, size) and summed for
+  words, instead of measuring every growing candidate line
+- greedy word wrapping is linear in the text length
+- font sizes are fitted to a bounding box with a binary search
+- finished layouts are kept in an LRU keyed by (text, font, size, width)
+"""
+
+import os
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PIL import ImageFont
+
+FONT_PATHS = [
+    "/System/Library/Fonts/Helvetica.ttc",  # macOS
+    "/Windows/Fonts/arial.ttf",  # Windows
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",  # Linux
+]
+
+LAYOUT_CACHE_SIZE = 2048
+
+_advance_tables: Dict[Tuple[str, int], Dict[str, float]] = {}
+_advance_lock = threading.Lock()
+
+
+@lru_cache(maxsize=128)
+def font_at(font_path: str, size: int) -> ImageFont.FreeTypeFont:
+    """Font file at the given size, loaded once"""
+    return ImageFont.truetype(font_path, size)
+
+
+@lru_cache(maxsize=128)
+def load_font(size: int) -> ImageFont.ImageFont:
+    """First available system font at the given size, loaded once"""
+    for font_path in FONT_PATHS:
+        if os.path.exists(font_path):
+            try:
+                return font_at(font_path, size)
+            except Exception:
+                continue
+    return ImageFont.load_default()
+
+
+def _font_path(font: ImageFont.ImageFont) -> Optional[str]:
+    """Path of a font file; the default font has none (its `path` is a BytesIO)"""
+    path = getattr(font, "path", None)
+    return path if isinstance(path, str) else None
+
+
+def _font_key(font: ImageFont.ImageFont) -> Tuple[str, int]:
+    return _font_path(font) or f"default-{id(font)}", getattr(font, "size", 0)
+
+
+def text_width(text: str, font: ImageFont.ImageFont) -> float:
+    """Advance width of `text`, summed from cached per-glyph advances"""
+    key = _font_key(font)
+    advances = _advance_tables.get(key)
+    if advances is None:
+        with _advance_lock:
+            advances = _advance_tables.setdefault(key, {})
+
+    width = 0.0
+    for char in text:
+        advance = advances.get(char)
+        if advance is None:
+            advance = advances[char] = font.getlength(char)
+        width += advance
+    return width
+
+
+def wrap_words(text: str, max_width: float, measure: Callable[[str], float] = len,
+               space_width: Optional[float] = None) -> List[str]:
+    """Greedy word wrap; every word is measured once
+
+    With the default `measure` widths are character counts, as for captions.
+    A word wider than `max_width` gets a line of its own.
+    """
+    if space_width is None:
+        space_width = measure(" ")
+
+    lines = []
+    current_line: List[str] = []
+    current_width = 0.0
+
+    for word in text.split():
+        word_width = measure(word)
+        added_width = word_width + (space_width if current_line else 0)
+
+        if current_width + added_width <= max_width:
+            current_line.append(word)
+            current_width += added_width
+        else:
+            if current_line:
+                lines.append(" ".join(current_line))
+            current_line = [word]
+            current_width = word_width
+
+    if current_line:
+        lines.append(" ".join(current_line))
+
+    return lines
+
+
+def wrap_text(text: str, font: ImageFont.ImageFont, max_width: int) -> List[str]:
+    """Wrap text to fit within max width in pixels
+
+    Layouts of font files are cached; other fonts (the default font when no
+    system font is installed) are wrapped directly.
+    """
+    font_path = _font_path(font)
+    if font_path:
+        return list(layout_text(text, font.size, max_width, font_path))
+    return wrap_words(text, max_width, lambda part: text_width(part, font))
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def layout_text(text: str, size: int, max_width: int, font_path: Optional[str] = None) -> Tuple[str, ...]:
+    """Wrapped lines of `text` at a font size, cached
+
+    Without a font path the default system font is used.
+    """
+    font = font_at(font_path, size) if font_path else load_font(size)
+    return tuple(wrap_words(text, max_width, lambda part: text_width(part, font)))
+
+
+def fit_font_size(text: str, max_width: int, max_height: int, max_size: int,
+                  min_size: int = 24, line_spacing: int = 10) -> Tuple[int, Tuple[str, ...]]:
+    """Largest font size up to `max_size` whose wrapped text fits the box
+
+    Line height is the font size plus `line_spacing`. Returns the size and its
+    lines; if even `min_size` overflows, that size is returned anyway.
+    """
+    def fits(size):
+        font = load_font(size)
+        lines = tuple(wrap_text(text, font, max_width))
+        return len(lines) * (size + line_spacing) <= max_height and all(
+            text_width(line, font) <= max_width for line in lines
+        ), lines
+
+    ok, lines = fits(max_size)
+    if ok or max_size <= min_size:
+        return max_size, lines
+
+    low, high = min_size, max_size - 1
+    best = min_size
+    while low <= high:
+        size = (low + high) // 2
+        if fits(size)[0]:
+            best = size
+            low = size + 1
+        else:
+            high = size - 1
+    return best, fits(best)[1]
+
+
+def layout_cache_info() -> Dict[str, int]:
+    info = layout_text.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
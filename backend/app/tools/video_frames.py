@@ -0,0 +1,94 @@
+"""
+Raw frame input for ffmpeg
+
+Images are decoded and scaled once into RGB buffers and streamed to ffmpeg's
+stdin as `rawvideo`, instead of being written as JPEG files that ffmpeg
+decodes again.
+
+The H.264 output settings come from encoder presets: `final` for published
+videos, `preview` for quick drafts (fastest x264 preset, higher CRF). Previews
+are also rendered at `preview_size` and VIDEO_PREVIEW_FPS.
+"""
+
+from typing import Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+from app.tools.post_renderer import fit_cover
+
+PIX_FMT = "rgb24"
+QUALITIES = ("final", "preview")
+
+
+def rawvideo_input(width: int, height: int, framerate: Union[int, float, str]) -> List[str]:
+    """Input arguments reading RGB frames of the given size from stdin"""
+    return [
+        '-f', 'rawvideo',
+        '-pix_fmt', PIX_FMT,
+        '-s', f'{width}x{height}',
+        '-framerate', str(framerate),
+        '-i', 'pipe:0',
+    ]
+
+
+def encoder_args(quality: str = "final") -> List[str]:
+    """Output arguments encoding H.264 with the preset of a quality level
+
+    Raises:
+        ValueError: For an unknown quality
+    """
+    if quality == "final":
+        preset, crf = settings.VIDEO_ENCODER_PRESET, settings.VIDEO_CRF
+    elif quality == "preview":
+        preset, crf = settings.VIDEO_PREVIEW_PRESET, settings.VIDEO_PREVIEW_CRF
+    else:
+        raise ValueError(f"Unknown video quality '{quality}', expected one of {', '.join(QUALITIES)}")
+    return [
+        '-c:v', 'libx264',
+        '-preset', preset,
+        '-crf', str(crf),
+        '-pix_fmt', 'yuv420p',
+    ]
+
+
+def preview_size(width: int, height: int) -> Tuple[int, int]:
+    """Preview frame size for a full size, VIDEO_PREVIEW_WIDTH wide
+
+    Both sides are even, as yuv420p requires.
+    """
+    preview_width = min(width, settings.VIDEO_PREVIEW_WIDTH)
+    preview_height = height * preview_width / width
+    return max(2, int(round(preview_width / 2)) * 2), max(2, int(round(preview_height / 2)) * 2)
+
+
+def image_frame(image_path: str, width: int, height: int) -> np.ndarray:
+    """Image scaled and center-cropped to the frame size, as an RGB array"""
+    with Image.open(image_path) as image:
+        return np.ascontiguousarray(fit_cover(image, width, height), dtype=np.uint8)
+
+
+def crossfade_frames(frames: Sequence[np.ndarray], duration: float, fps: int,
+                     transition: float) -> Iterator[np.ndarray]:
+    """Frames showing each image for `duration / len(frames)` seconds
+
+    From the start of every following image's slot the previous image is
+    crossfaded into it over `transition` seconds. Frames without a fade are
+    yielded as the image buffers themselves, faded frames reuse one buffer.
+    """
+    slot = duration / len(frames)
+    blended = np.empty_like(frames[0])
+    for index in range(int(round(duration * fps))):
+        t = index / fps
+        current = min(int(t // slot), len(frames) - 1)
+        into = t - current * slot
+        if current == 0 or into >= transition:
+            yield frames[current]
+            continue
+
+        weight = int(256 * into / transition)
+        mixed = frames[current - 1].astype(np.uint16) * (256 - weight) + frames[current].astype(np.uint16) * weight
+        np.right_shift(mixed, 8, out=mixed)
+        np.copyto(blended, mixed, casting="unsafe")
+        yield blended
@@ -1,25 +1,54 @@
 """
 Video template tools for creating dynamic videos with replaceable elements
-Uses MoviePy for video manipulation without requiring Canva API
+Frames are composited with NumPy and streamed to ffmpeg as raw RGB, without
+requiring Canva API
+
+Static layers (background, color overlays, rendered text) only depend on the
+template and a few replacements, so they are rasterized once and kept in LRU
+caches across renders, together with the composited static frames.
+
+Previews are rendered at a reduced size and frame rate with the fastest
+encoder preset, with a poster image, and cached by their inputs.
 """
 
 import os
 import json
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass
-from moviepy.editor import (
-    VideoFileClip, TextClip, CompositeVideoClip, 
-    ColorClip, ImageClip, concatenate_videoclips,
-    AudioFileClip, CompositeAudioClip
-)
-from moviepy.video.fx import resize, crop
-from PIL import Image, ImageDraw, ImageFont
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional, Any, Tuple
+from dataclasses import asdict, dataclass, field, replace
+import imageio_ffmpeg
+from PIL import Image, ImageColor, ImageDraw, ImageFont
 import numpy as np
-import tempfile
 import logging
 
+from app.core.config import settings
+from app.core.media_cache import get_media_cache, media_key
+from app.services.ffmpeg_service import ffmpeg_service, render_workspace
+from app.tools.text_layout import load_font, text_width, wrap_text
+from app.tools.video_frames import encoder_args, preview_size, rawvideo_input
+
 logger = logging.getLogger(__name__)
 
+TEXT_ANIMATIONS = ("fade_in", "fade_in_out", "slide_up", "zoom_in")
+OVERLAY_ANIMATIONS = ("pulse",)
+
+# 'pulse' overlays swing between their opacity and PULSE_DEPTH less every
+# PULSE_PERIOD seconds, in PULSE_LEVELS steps so the frames stay cacheable
+PULSE_PERIOD = 2.0
+PULSE_DEPTH = 0.5
+PULSE_LEVELS = 6
+
+# 'slide_up' text rises this fraction of the frame height, 'zoom_in' text
+# grows from ZOOM_START of its size, both during its first second
+SLIDE_DISTANCE = 0.05
+ZOOM_START = 0.5
+
+# Part of the media cache key of renders, bump it when the same template and
+# replacements render differently
+RENDERER_VERSION = 2
+
 
 @dataclass
 class VideoTemplate:
@@ -35,10 +64,177 @@ class VideoTemplate:
     transitions: List[Dict[str, Any]] = None
 
 
+@dataclass
+class OverlayLayer:
+    """Color layer blended as frame * (256 - alpha) + color * alpha, in 1/256 steps"""
+    id: str
+    start: float
+    end: float
+    inverse_alpha: np.ndarray
+    premultiplied: np.ndarray
+    pulse: List["OverlayLayer"] = field(default_factory=list)
+
+    @classmethod
+    def from_color(cls, layer_id: str, start: float, end: float, rgb: Tuple[int, int, int],
+                   alpha: np.ndarray, animation: Optional[str] = None) -> "OverlayLayer":
+        """`alpha` in 0..1, broadcastable to (height, width, 1)"""
+        layer = cls(layer_id, start, end, *cls._blend_terms(rgb, alpha))
+        if animation == "pulse":
+            # One layer per pulse level, from the faintest to full opacity
+            for level in range(PULSE_LEVELS):
+                factor = 1 - PULSE_DEPTH * (1 - level / (PULSE_LEVELS - 1))
+                layer.pulse.append(cls(f"{layer_id}@{level}", start, end, *cls._blend_terms(rgb, alpha * factor)))
+        return layer
+
+    @staticmethod
+    def _blend_terms(rgb: Tuple[int, int, int], alpha: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        alpha = np.rint(np.clip(alpha, 0, 1) * 256).astype(np.uint16)
+        return 256 - alpha, alpha * np.array(rgb, dtype=np.uint16)
+
+    def active(self, t: float) -> bool:
+        return self.start <= t < self.end
+
+    def at(self, t: float) -> "OverlayLayer":
+        """The layer as shown at time t, the pulse level for pulsing overlays"""
+        if not self.pulse:
+            return self
+        wave = (1 + np.cos(2 * np.pi * (t - self.start) / PULSE_PERIOD)) / 2
+        return self.pulse[int(round(wave * (PULSE_LEVELS - 1)))]
+
+    def apply(self, frame: np.ndarray):
+        blended = frame * self.inverse_alpha + self.premultiplied
+        np.right_shift(blended, 8, out=blended)
+        np.copyto(frame, blended, casting="unsafe")
+
+
+@dataclass
+class TextLayer:
+    """Pre-rendered text blended into its own region of the frame"""
+    id: str
+    start: float
+    end: float
+    rgb: np.ndarray
+    alpha: np.ndarray
+    position: Tuple[int, int]
+    animation: Optional[str] = None
+
+    @classmethod
+    def from_image(cls, layer_id: str, start: float, end: float, image: Image.Image,
+                   position: Tuple[int, int], animation: Optional[str] = None) -> "TextLayer":
+        pixels = np.asarray(image.convert("RGBA"), dtype=np.uint16)
+        return cls(layer_id, start, end, pixels[..., :3], pixels[..., 3:], position, animation)
+
+    def active(self, t: float) -> bool:
+        return self.start <= t < self.end
+
+    def opacity(self, t: float) -> float:
+        """Fade factor of the text at time t (one second fades, also while sliding or zooming in)"""
+        opacity = 1.0
+        if self.animation in TEXT_ANIMATIONS:
+            opacity = min(opacity, t - self.start)
+        if self.animation == "fade_in_out":
+            opacity = min(opacity, self.end - t)
+        return max(0.0, min(1.0, opacity))
+
+    def settled(self, t: float) -> bool:
+        """Whether the text is fully visible and in place at time t"""
+        return self.opacity(t) >= 1 and (self.animation not in ("slide_up", "zoom_in") or t - self.start >= 1)
+
+    def draw(self, frame: np.ndarray, t: float):
+        """Blend the text as it looks at time t"""
+        progress = max(0.0, min(1.0, t - self.start))
+        if self.animation == "slide_up" and progress < 1:
+            x, y = self.position
+            offset = int(round((1 - progress) * SLIDE_DISTANCE * frame.shape[0]))
+            self.blend(frame, self.opacity(t), (x, y + offset))
+        elif self.animation == "zoom_in" and progress < 1:
+            self._zoomed(ZOOM_START + (1 - ZOOM_START) * progress).blend(frame, self.opacity(t))
+        else:
+            self.blend(frame, self.opacity(t))
+
+    def _zoomed(self, scale: float) -> "TextLayer":
+        """The text scaled around its center"""
+        height, width = self.rgb.shape[:2]
+        size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+        image = Image.fromarray(np.dstack((self.rgb, self.alpha)).astype(np.uint8), "RGBA").resize(size)
+        x, y = self.position
+        position = (x + (width - size[0]) // 2, y + (height - size[1]) // 2)
+        return TextLayer.from_image(self.id, self.start, self.end, image, position)
+
+    def blend(self, frame: np.ndarray, opacity: float = 1.0, position: Optional[Tuple[int, int]] = None):
+        x, y = position or self.position
+        height, width = frame.shape[:2]
+        left, top = max(x, 0), max(y, 0)
+        right, bottom = min(x + self.rgb.shape[1], width), min(y + self.rgb.shape[0], height)
+        if left >= right or top >= bottom:
+            return
+
+        rgb = self.rgb[top - y:bottom - y, left - x:right - x]
+        alpha = self.alpha[top - y:bottom - y, left - x:right - x]
+        alpha = (alpha * int(round(opacity * 256)) + 127) // 255
+        region = frame[top:bottom, left:right]
+        blended = region * (256 - alpha) + rgb * alpha
+        np.right_shift(blended, 8, out=blended)
+        np.copyto(region, blended, casting="unsafe")
+
+
+@dataclass
+class VideoLayer:
+    """Video decoded frame by frame while its zone is visible"""
+    id: str
+    start: float
+    end: float
+    path: str
+    size: Optional[Tuple[int, int]]
+    position: Tuple[int, int]
+    loop: bool = False
+    fps: int = 30
+    _frames: Optional[Iterator[np.ndarray]] = None
+
+    def active(self, t: float) -> bool:
+        return self.start <= t < self.end
+
+    def _read(self) -> Iterator[np.ndarray]:
+        output_params = ['-r', str(self.fps)]
+        if self.size:
+            output_params = ['-vf', f'scale={self.size[0]}:{self.size[1]}'] + output_params
+
+        last = None
+        while True:
+            reader = imageio_ffmpeg.read_frames(self.path, output_params=output_params)
+            meta = next(reader)
+            width, height = meta["size"]
+            count = 0
+            for raw in reader:
+                count += 1
+                last = np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 3)
+                yield last
+            if not self.loop or not count:
+                break
+
+        # Shorter videos hold their last frame
+        while last is not None:
+            yield last
+
+    def paste_next(self, frame: np.ndarray):
+        if self._frames is None:
+            self._frames = self._read()
+        image = next(self._frames, None)
+        if image is None:
+            return
+
+        x, y = self.position
+        height, width = frame.shape[:2]
+        left, top = max(x, 0), max(y, 0)
+        right, bottom = min(x + image.shape[1], width), min(y + image.shape[0], height)
+        if left < right and top < bottom:
+            frame[top:bottom, left:right] = image[top - y:bottom - y, left - x:right - x]
+
+
 class VideoTemplateProcessor:
     """Process video templates with dynamic content replacement"""
     
-    def __init__(self):
+    def __init__(self, max_cached_layers: int = 256, max_cached_frames: int = 16):
         self.templates_dir = os.path.join(os.path.dirname(__file__), "../../static/video_templates")
         os.makedirs(self.templates_dir, exist_ok=True)
         
@@ -52,6 +248,15 @@ class VideoTemplateProcessor:
         
         # Load or create default templates
         self.templates = self._load_templates()
+        
+        # Rasterized static layers and composited static frames (about 6 MB per reel frame)
+        self.max_cached_layers = max_cached_layers
+        self.max_cached_frames = max_cached_frames
+        self._layers: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._frames: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
     
     def _load_templates(self) -> Dict[str, VideoTemplate]:
         """Load video templates from configuration"""
@@ -194,61 +399,80 @@ class VideoTemplateProcessor:
         self, 
         template_name: str,
         replacements: Dict[str, Any],
-        output_path: str
+        output_path: str,
+        fps: int = 30,
+        quality: str = "final",
+        size: Optional[Tuple[int, int]] = None,
+        poster_path: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Create a video from template with dynamic replacements"""
+        """Create a video from template with dynamic replacements
+        
+        Frames are composited with NumPy and piped to ffmpeg as raw RGB.
+        
+        Args:
+            quality: Encoder preset, "final" or "preview"
+            size: Frame size, if not the template's resolution
+            poster_path: Where to save a JPEG of a frame showing the text
+        """
         try:
             template = self.templates.get(template_name)
             if not template:
                 return {"success": False, "error": f"Template '{template_name}' not found"}
+            if size and tuple(size) != tuple(template.resolution):
+                template = self._scaled_template(template, tuple(size))
             
-            # Create video composition
-            clips = []
+            width, height = template.resolution
             
-            # 1. Add background (color or video)
-            background_clip = self._create_background(template, replacements)
-            clips.append(background_clip)
-            
-            # 2. Add video zones
-            for video_zone in template.video_zones or []:
-                video_clip = self._add_video_zone(video_zone, replacements, template)
-                if video_clip:
-                    clips.append(video_clip)
+            # Layers from bottom to top: background, video zones, color overlays, text zones
+            background_color = replacements.get("background_color", template.background_color)
+            background = self._cached(
+                self._frames, self.max_cached_frames, ("background", width, height, background_color),
+                lambda: self._solid_frame(width, height, self._hex_to_rgb(background_color))
+            )
+            videos = [
+                layer for layer in (self._video_layer(zone, replacements, template, fps) for zone in template.video_zones or [])
+                if layer
+            ]
             
-            # 3. Add color overlays
+            overlay_colors = []
+            overlays = []
             for overlay in template.color_overlays or []:
-                overlay_clip = self._add_color_overlay(overlay, replacements, template)
-                if overlay_clip:
-                    clips.append(overlay_clip)
+                color = replacements.get(f"color_{overlay['id']}", overlay['color'])
+                layer = self._cached(
+                    self._layers, self.max_cached_layers, ("overlay", template_name, width, height, overlay['id'], color),
+                    lambda overlay=overlay: self._overlay_layer(overlay, replacements, template)
+                )
+                if layer:
+                    overlays.append(layer)
+                    overlay_colors.append(color)
             
-            # 4. Add text zones
-            for text_zone in template.text_zones or []:
-                text_clip = self._add_text_zone(text_zone, replacements, template)
-                if text_clip:
-                    clips.append(text_clip)
+            texts = []
+            text_values = []
+            for zone in template.text_zones or []:
+                text = replacements.get(f"text_{zone['id']}")
+                layer = self._cached(
+                    self._layers, self.max_cached_layers, ("text", template_name, width, height, zone['id'], text),
+                    lambda zone=zone: self._text_layer(zone, replacements, template)
+                ) if text else None
+                if layer:
+                    texts.append(layer)
+                    text_values.append((zone['id'], text))
             
-            # Composite all clips
-            final_video = CompositeVideoClip(
-                clips, 
-                size=(template.resolution[0], template.resolution[1])
-            ).set_duration(template.duration)
+            cmd = ['-y'] + rawvideo_input(width, height, fps)
             
             # Add audio if provided
             if "audio_path" in replacements:
-                audio_clip = AudioFileClip(replacements["audio_path"])
-                final_video = final_video.set_audio(audio_clip)
+                cmd += ['-i', replacements["audio_path"], '-map', '0:v', '-map', '1:a', '-c:a', 'aac']
             
-            # Export video
-            final_video.write_videofile(
-                output_path,
-                fps=30,
-                codec='libx264',
-                audio_codec='aac',
-                bitrate="5000k"
-            )
+            cmd += encoder_args(quality) + ['-t', str(template.duration), output_path]
             
-            # Clean up
-            final_video.close()
+            static_key = (template_name, width, height, background_color, tuple(overlay_colors), tuple(text_values))
+            frames = self._render_frames(template, fps, background, videos, overlays, texts, static_key)
+            if poster_path:
+                frames = self._with_poster(frames, int(self._poster_time(template, replacements) * fps), poster_path)
+            result = ffmpeg_service.run_sync(cmd, duration=template.duration, frames=frames)
+            if result.returncode != 0:
+                return {"success": False, "error": f"FFmpeg error: {result.stderr}"}
             
             return {
                 "success": True,
@@ -261,157 +485,316 @@ class VideoTemplateProcessor:
             logger.error(f"Error creating video from template: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    def _create_background(self, template: VideoTemplate, replacements: Dict) -> VideoFileClip:
-        """Create background clip (solid color)"""
-        bg_color = replacements.get("background_color", template.background_color)
-        return ColorClip(
-            size=template.resolution,
-            color=self._hex_to_rgb(bg_color),
-            duration=template.duration
-        )
-    
-    def _add_video_zone(self, zone: Dict, replacements: Dict, template: VideoTemplate) -> Optional[VideoFileClip]:
-        """Add a video to a specific zone"""
-        video_key = f"video_{zone['id']}"
-        if video_key not in replacements:
-            return None
+    def create_preview(self, template_name: str, replacements: Dict[str, Any], preview_dir: str) -> Dict[str, Any]:
+        """Quick low resolution preview of a template video, with a poster image
+        
+        Rendered at the preview size and frame rate with the fastest encoder
+        preset, and cached in `preview_dir` by template and replacements.
         
+        Returns:
+            Dict: preview_id, video_path, poster_path and source ("cache" or "generated")
+        """
         try:
-            video_path = replacements[video_key]
-            video_clip = VideoFileClip(video_path)
+            template = self.templates.get(template_name)
+            if not template:
+                return {"success": False, "error": f"Template '{template_name}' not found"}
             
-            # Resize to fit zone
-            if zone['size'] == 'full':
-                video_clip = video_clip.resize(template.resolution)
-            else:
-                # Custom size handling
-                pass
+            width, height = preview_size(*template.resolution)
+            fps = settings.VIDEO_PREVIEW_FPS
+            preview_id = self.media_key(template_name, replacements, fps, "preview", (width, height))
+            preview = {
+                "success": True,
+                "preview_id": preview_id,
+                "video_path": os.path.join(preview_dir, f"{preview_id}.mp4"),
+                "poster_path": os.path.join(preview_dir, f"{preview_id}.jpg"),
+                "template": template_name,
+                "duration": template.duration,
+                "dimensions": {"width": width, "height": height},
+                "fps": fps
+            }
             
-            # Set position and duration
-            video_clip = video_clip.set_position(zone['position'])
-            video_clip = video_clip.set_start(zone['start_time'])
+            if os.path.exists(preview["video_path"]) and os.path.exists(preview["poster_path"]):
+                return {**preview, "source": "cache"}
+            # Rendered by another worker
+            media_cache = get_media_cache()
+            if (media_cache.fetch(preview_id, preview["poster_path"])
+                    and media_cache.fetch(preview_id, preview["video_path"])):
+                return {**preview, "source": "cache"}
             
-            # Handle looping
-            if zone.get('loop') and video_clip.duration < zone['duration']:
-                video_clip = video_clip.loop(duration=zone['duration'])
-            else:
-                video_clip = video_clip.set_duration(zone['duration'])
+            os.makedirs(preview_dir, exist_ok=True)
+            with render_workspace(prefix="preview-") as workspace:
+                video_path = os.path.join(workspace, "preview.mp4")
+                poster_path = os.path.join(workspace, "poster.jpg")
+                result = self.create_video_from_template(
+                    template_name, replacements, video_path,
+                    fps=fps, quality="preview", size=(width, height), poster_path=poster_path
+                )
+                if not result["success"]:
+                    return result
+                
+                # Both files appear atomically, the poster first: a cached preview needs both
+                for source, target in ((poster_path, preview["poster_path"]), (video_path, preview["video_path"])):
+                    shutil.move(source, target + ".tmp")
+                    os.replace(target + ".tmp", target)
+                    media_cache.put(preview_id, target)
             
-            return video_clip
+            return {**preview, "source": "generated"}
             
         except Exception as e:
-            logger.error(f"Error adding video zone: {str(e)}")
+            logger.error(f"Error creating video preview: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def media_key(self, template_name: str, replacements: Dict[str, Any], fps: int = 30,
+                  quality: str = "final", size: Optional[Tuple[int, int]] = None) -> str:
+        """Content address of a render; videos and audio count by their contents
+
+        The template counts by its definition, so editing a template doesn't
+        serve renders of its old version.
+        """
+        template = self.templates[template_name]
+        # Input videos and audio that exist count by content, everything else by value
+        file_keys = sorted(
+            key for key, value in replacements.items()
+            if (key.startswith("video_") or key == "audio_path") and isinstance(value, str) and os.path.exists(value)
+        )
+        return media_key("video_template", {
+            "template": template_name,
+            "definition": asdict(template),
+            "renderer": RENDERER_VERSION,
+            "replacements": {
+                key: value for key, value in replacements.items()
+                if key not in file_keys
+            },
+            "file_keys": file_keys,
+            "fps": fps,
+            "size": list(size or template.resolution),
+            "encoder": encoder_args(quality)
+        }, files=[replacements[key] for key in file_keys])
+    
+    def _scaled_template(self, template: VideoTemplate, size: Tuple[int, int]) -> VideoTemplate:
+        """Copy of a template at another frame size, with positions and font sizes scaled"""
+        scale = size[0] / template.resolution[0]
+        
+        def scaled(zone: Dict[str, Any]) -> Dict[str, Any]:
+            zone = dict(zone)
+            zone['position'] = tuple(
+                value if isinstance(value, str) else int(round(value * scale)) for value in zone['position']
+            )
+            if isinstance(zone.get('size'), (int, float)):
+                zone['size'] = max(1, int(round(zone['size'] * scale)))
+            return zone
+        
+        return replace(
+            template,
+            resolution=size,
+            text_zones=[scaled(zone) for zone in template.text_zones or []],
+            video_zones=[scaled(zone) for zone in template.video_zones or []]
+        )
+    
+    @staticmethod
+    def _poster_time(template: VideoTemplate, replacements: Dict[str, Any]) -> float:
+        """Time at which the most text zones are fully visible, the middle of videos without text"""
+        zones = [zone for zone in template.text_zones or [] if replacements.get(f"text_{zone['id']}")]
+        if not zones:
+            return template.duration / 2
+        
+        def visible(t: float) -> int:
+            return sum(zone['start_time'] <= t < zone['start_time'] + zone['duration'] for zone in zones)
+        
+        # One second after a zone appears its fade-in is done
+        candidates = [min(zone['start_time'] + 1, zone['start_time'] + zone['duration'] / 2) for zone in zones]
+        return max(sorted(candidates), key=visible)
+    
+    @staticmethod
+    def _with_poster(frames: Iterator[np.ndarray], index: int, poster_path: str) -> Iterator[np.ndarray]:
+        """Pass frames through, saving the one at `index` as a JPEG"""
+        for i, frame in enumerate(frames):
+            if i == index:
+                Image.fromarray(frame).save(poster_path, "JPEG", quality=85)
+            yield frame
+    
+    def _render_frames(self, template: VideoTemplate, fps: int, background: np.ndarray,
+                       videos: List[VideoLayer], overlays: List[OverlayLayer],
+                       texts: List[TextLayer], static_key: tuple = ()) -> Iterator[np.ndarray]:
+        """Frames of the template, one RGB array per frame
+        
+        Background, the overlays and the fully visible text active at a time
+        are static, so they are composited once per combination (cached under
+        `static_key` across renders) and reused for every frame; only video
+        zones and fading or moving text are blended per frame. A pulsing
+        overlay is static at each of its pulse levels.
+        """
+        frame = np.empty_like(background)
+        
+        for index in range(int(round(template.duration * fps))):
+            t = index / fps
+            active_overlays = [layer.at(t) for layer in overlays if layer.active(t)]
+            active_videos = [layer for layer in videos if layer.active(t)]
+            active_texts = [layer for layer in texts if layer.active(t) and layer.opacity(t) > 0]
+            
+            if active_videos:
+                np.copyto(frame, background)
+                for layer in active_videos:
+                    layer.paste_next(frame)
+                for layer in active_overlays:
+                    layer.apply(frame)
+            else:
+                static_texts = [layer for layer in active_texts if layer.settled(t)]
+                active_texts = [layer for layer in active_texts if not layer.settled(t)]
+                base = self._cached(
+                    self._frames, self.max_cached_frames,
+                    ("static", static_key, tuple(layer.id for layer in active_overlays),
+                     tuple(layer.id for layer in static_texts)),
+                    lambda: self._composite(background, active_overlays, static_texts)
+                )
+                if not active_texts:
+                    yield base
+                    continue
+                np.copyto(frame, base)
+            
+            for layer in active_texts:
+                layer.draw(frame, t)
+            yield frame
+    
+    def _cached(self, cache: "OrderedDict[tuple, Any]", max_size: int, key: tuple, build: Callable[[], Any]) -> Any:
+        """Cached value of `key`, built on a miss; None is not cached"""
+        with self._lock:
+            if key in cache:
+                cache.move_to_end(key)
+                self.hits += 1
+                return cache[key]
+            self.misses += 1
+        
+        value = build()
+        if value is not None:
+            with self._lock:
+                cache[key] = value
+                while len(cache) > max_size:
+                    cache.popitem(last=False)
+        return value
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "cached_layers": len(self._layers),
+                "cached_frames": len(self._frames),
+                "hits": self.hits,
+                "misses": self.misses
+            }
+    
+    @staticmethod
+    def _solid_frame(width: int, height: int, rgb: Tuple[int, int, int]) -> np.ndarray:
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[:] = rgb
+        # Cached frames are shared between renders
+        frame.flags.writeable = False
+        return frame
+    
+    @staticmethod
+    def _composite(background: np.ndarray, overlays: List[OverlayLayer],
+                   texts: List[TextLayer] = ()) -> np.ndarray:
+        frame = background.copy()
+        for layer in overlays:
+            layer.apply(frame)
+        for layer in texts:
+            layer.blend(frame)
+        frame.flags.writeable = False
+        return frame
+    
+    def _video_layer(self, zone: Dict, replacements: Dict, template: VideoTemplate, fps: int = 30) -> Optional[VideoLayer]:
+        """Video for a specific zone"""
+        video_key = f"video_{zone['id']}"
+        if video_key not in replacements:
             return None
+        
+        video_path = replacements[video_key]
+        if not os.path.exists(video_path):
+            logger.error(f"Error adding video zone: {video_path} not found")
+            return None
+        
+        return VideoLayer(
+            id=zone['id'],
+            start=zone['start_time'],
+            end=zone['start_time'] + zone['duration'],
+            path=video_path,
+            # Custom sizes keep the video's own size
+            size=template.resolution if zone['size'] == 'full' else None,
+            position=tuple(zone['position']),
+            loop=bool(zone.get('loop')),
+            fps=fps
+        )
     
-    def _add_color_overlay(self, overlay: Dict, replacements: Dict, template: VideoTemplate) -> Optional[ColorClip]:
-        """Add color overlay with opacity"""
+    def _overlay_layer(self, overlay: Dict, replacements: Dict, template: VideoTemplate) -> Optional[OverlayLayer]:
+        """Color overlay with opacity"""
         color_key = f"color_{overlay['id']}"
         color = replacements.get(color_key, overlay['color'])
         
         try:
             if overlay.get('gradient'):
-                # Create gradient overlay
-                overlay_clip = self._create_gradient_clip(
-                    color, 
-                    template.resolution,
-                    overlay['duration']
-                )
+                # Vertical gradient, opaque at the top
+                alpha = overlay['opacity'] * (1 - np.arange(template.resolution[1]) / template.resolution[1])
+                alpha = alpha.reshape(-1, 1, 1)
             else:
-                # Solid color overlay
-                rgb_color = self._hex_to_rgb(color)
-                overlay_clip = ColorClip(
-                    size=template.resolution,
-                    color=rgb_color,
-                    duration=overlay['duration']
-                )
-            
-            # Set opacity
-            overlay_clip = overlay_clip.set_opacity(overlay['opacity'])
-            overlay_clip = overlay_clip.set_start(overlay['start_time'])
+                alpha = np.full((1, 1, 1), overlay['opacity'])
             
-            # Add animation if specified
-            if overlay.get('animation') == 'pulse':
-                # Add pulsing effect
-                pass
-            
-            return overlay_clip
+            animation = overlay.get('animation')
+            if animation and animation not in OVERLAY_ANIMATIONS:
+                logger.warning(f"Unsupported animation '{animation}' of color overlay {overlay['id']}, shown without it")
+            return OverlayLayer.from_color(
+                overlay['id'],
+                overlay['start_time'],
+                overlay['start_time'] + overlay['duration'],
+                self._hex_to_rgb(color),
+                alpha,
+                animation
+            )
             
         except Exception as e:
             logger.error(f"Error adding color overlay: {str(e)}")
             return None
     
-    def _add_text_zone(self, zone: Dict, replacements: Dict, template: VideoTemplate) -> Optional[TextClip]:
-        """Add text to a specific zone"""
+    def _text_layer(self, zone: Dict, replacements: Dict, template: VideoTemplate) -> Optional[TextLayer]:
+        """Text for a specific zone, rendered once"""
         text_key = f"text_{zone['id']}"
-        if text_key not in replacements:
+        text = replacements.get(text_key)
+        if not text:
             return None
         
         try:
-            text = replacements[text_key]
+            width, height = template.resolution
+            font = load_font(zone['size'])
+            # 50 px margins at the reel width
+            box_width = width - 100 * width // self.reel_width
+            line_height = int(zone['size'] * 1.2)
+            lines = wrap_text(text, font, box_width)
             
-            # Create text clip
-            text_clip = TextClip(
-                text,
-                fontsize=zone['size'],
-                color=zone['color'],
-                font=zone.get('font', 'Arial'),
-                method='caption',
-                size=(template.resolution[0] - 100, None),
-                align='center'
-            )
+            # Lines centered in a caption box as wide as the frame minus margins
+            image = Image.new('RGBA', (box_width, line_height * len(lines)), (0, 0, 0, 0))
+            draw = ImageDraw.Draw(image)
+            fill = ImageColor.getrgb(zone['color'])
+            for i, line in enumerate(lines):
+                draw.text(((box_width - text_width(line, font)) / 2, i * line_height), line, font=font, fill=fill)
             
-            # Set position
-            if zone['position'] == ("center", "center"):
-                text_clip = text_clip.set_position('center')
-            else:
-                text_clip = text_clip.set_position(zone['position'])
+            x, y = zone['position']
+            x = (width - image.width) // 2 if x == "center" else int(x)
+            y = (height - image.height) // 2 if y == "center" else int(y)
             
-            # Set timing
-            text_clip = text_clip.set_start(zone['start_time'])
-            text_clip = text_clip.set_duration(zone['duration'])
-            
-            # Add animation
-            text_clip = self._apply_text_animation(text_clip, zone.get('animation'))
-            
-            return text_clip
+            animation = zone.get('animation')
+            if animation and animation not in TEXT_ANIMATIONS:
+                logger.warning(f"Unsupported animation '{animation}' of text zone {zone['id']}, shown without it")
+            return TextLayer.from_image(
+                zone['id'],
+                zone['start_time'],
+                zone['start_time'] + zone['duration'],
+                image,
+                (x, y),
+                animation
+            )
             
         except Exception as e:
             logger.error(f"Error adding text zone: {str(e)}")
             return None
     
-    def _apply_text_animation(self, clip: TextClip, animation: str) -> TextClip:
-        """Apply animation to text clip"""
-        if animation == 'fade_in':
-            clip = clip.crossfadein(1)
-        elif animation == 'fade_in_out':
-            clip = clip.crossfadein(1).crossfadeout(1)
-        elif animation == 'slide_up':
-            # Implement slide up animation
-            pass
-        elif animation == 'zoom_in':
-            # Implement zoom in animation
-            pass
-        
-        return clip
-    
-    def _create_gradient_clip(self, color: str, size: Tuple[int, int], duration: float) -> ColorClip:
-        """Create a gradient color clip"""
-        # Create gradient image using PIL
-        gradient = Image.new('RGBA', size)
-        draw = ImageDraw.Draw(gradient)
-        
-        base_color = self._hex_to_rgb(color)
-        
-        # Create vertical gradient
-        for y in range(size[1]):
-            alpha = int(255 * (1 - y / size[1]))
-            color_with_alpha = base_color + (alpha,)
-            draw.line([(0, y), (size[0], y)], fill=color_with_alpha)
-        
-        # Convert to numpy array and create clip
-        gradient_array = np.array(gradient)
-        return ImageClip(gradient_array, duration=duration)
-    
     def _hex_to_rgb(self, hex_color: str) -> Tuple[int, int, int]:
         """Convert hex color to RGB tuple"""
         hex_color = hex_color.lstrip('#')
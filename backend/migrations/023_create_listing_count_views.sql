@@ -0,0 +1,25 @@
+-- Aggregated counts for goal and department listings
+-- Lets GET /api/goals and GET /api/departments fetch the counts for a whole page
+-- in one query instead of one query per row
+
+-- Task counts per goal
+CREATE OR REPLACE VIEW goal_task_counts AS
+SELECT
+    goal_id,
+    COUNT(*) AS task_count,
+    COUNT(*) FILTER (WHERE status = 'completed') AS completed_task_count
+FROM tasks
+GROUP BY goal_id;
+
+-- Member and AI agent counts per department
+CREATE OR REPLACE VIEW department_assignment_counts AS
+SELECT
+    department_id,
+    COUNT(*) FILTER (WHERE assignee_type = 'member') AS member_count,
+    COUNT(*) FILTER (WHERE assignee_type = 'ai_agent') AS ai_agent_count
+FROM department_assignments
+GROUP BY department_id;
+
+-- Grant permissions on the views
+GRANT SELECT ON goal_task_counts TO authenticated;
+GRANT SELECT ON department_assignment_counts TO authenticated;
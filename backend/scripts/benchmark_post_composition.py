@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the picture post templates
+
+Renders every template in post and story format from a stock photo sized JPEG,
+once with the previous per-post pipeline (fonts loaded per call, quadratic
+word wrapping, full-canvas overlay layers, line-by-line gradient, resize then
+crop) and once with PostRenderer. Runs in a single process, so the numbers are
+posts/sec per core.
+
+Usage:
+    python scripts/benchmark_post_composition.py [--posts 40]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# Add backend to path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.tools.post_renderer import PostRenderer, fit_cover, font_size
+from app.tools.text_layout import FONT_PATHS
+
+PERIOD_COLORS = {
+    "Image": "#DAA520",
+    "Veränderung": "#2196F3",
+    "Energie": "#F44336",
+    "Kreativität": "#FFD700",
+    "Erfolg": "#CC0066",
+    "Entspannung": "#4CAF50",
+    "Umsicht": "#9C27B0"
+}
+SIZES = {"post": (1080, 1350), "story": (1080, 1920)}
+TEXT = "Energie ist die Kraft, die dich jeden Tag ein Stück näher an deine Ziele bringt"
+
+
+class LegacyRenderer:
+    """Reference copy of the per-post pipeline PostRenderer replaced"""
+
+    def font(self, style, height, text_length):
+        for font_path in FONT_PATHS:
+            if os.path.exists(font_path):
+                return ImageFont.truetype(font_path, font_size(style, height, text_length))
+        return ImageFont.load_default()
+
+    def wrap(self, text, font, max_width):
+        lines, current_line = [], []
+        for word in text.split(' '):
+            bbox = font.getbbox(' '.join(current_line + [word]))
+            if bbox[2] - bbox[0] <= max_width:
+                current_line.append(word)
+            elif current_line:
+                lines.append(' '.join(current_line))
+                current_line = [word]
+            else:
+                lines.append(word)
+        if current_line:
+            lines.append(' '.join(current_line))
+        return lines
+
+    def resize(self, image, width, height):
+        img_ratio = image.width / image.height
+        if img_ratio > width / height:
+            new_width = int(height * img_ratio)
+            image = image.resize((new_width, height), Image.Resampling.LANCZOS)
+            left = (new_width - width) // 2
+            return image.crop((left, 0, left + width, height))
+        new_height = int(width / img_ratio)
+        image = image.resize((width, new_height), Image.Resampling.LANCZOS)
+        top = (new_height - height) // 2
+        return image.crop((0, top, width, top + height))
+
+    def render(self, background, template, text, period):
+        width, height = background.size
+        color = tuple(int(PERIOD_COLORS[period][i:i + 2], 16) for i in (1, 3, 5))
+        background_overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(background_overlay)
+
+        if template == "gradient":
+            for y in range(height):
+                if y < height // 3:
+                    alpha = int(127 * (1 - y / (height // 3)))
+                elif y > 2 * height // 3:
+                    alpha = int(127 * (y - 2 * height // 3) / (height // 3))
+                else:
+                    alpha = 51
+                draw.line([(0, y), (width, y)], fill=color + (alpha,))
+        elif template == "quote_card":
+            box = [100, height // 4, width - 100, height // 4 + height // 2]
+            draw.rounded_rectangle(box, radius=20, fill=(255, 255, 255, 200))
+            draw.rounded_rectangle(box, radius=20, outline=color + (255,), width=5)
+        elif template == "period_branding":
+            draw.rectangle([0, 0, width, 100], fill=color + (200,))
+            draw.rectangle([0, height - 80, width, height], fill=color + (150,))
+        else:
+            alpha = 127 if template == "dramatic" else 76
+            background_overlay = Image.new('RGBA', (width, height), color + (alpha,))
+
+        text_overlay = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(text_overlay)
+        if template == "period_branding":
+            title_font = self.font("title", height, len(period))
+            bbox = draw.textbbox((0, 0), period, font=title_font)
+            draw.text(((width - bbox[2] + bbox[0]) // 2, 30), period, font=title_font, fill=(255, 255, 255, 255))
+            style, start, offset, fill = "text", 150, 2, (255, 255, 255, 255)
+            available = height - 200
+        elif template == "quote_card":
+            style, start, offset, fill = "quote", 0, 3, (50, 50, 50, 255)
+            text, available = f'"{text}"', height
+        else:
+            style, start, offset, fill = template, 0, 3, (255, 255, 255, 255)
+            available = height
+        font = self.font(style, height, len(text))
+        lines = self.wrap(text, font, width - 150)
+        line_height = font.size + (15 if style == "quote" else 10)
+        start_y = start + (available - len(lines) * line_height) // 2
+        for i, line in enumerate(lines):
+            bbox = draw.textbbox((0, 0), line, font=font)
+            x = (width - (bbox[2] - bbox[0])) // 2
+            y = start_y + i * line_height
+            draw.text((x + offset, y + offset), line, font=font, fill=(0, 0, 0, 128))
+            draw.text((x, y), line, font=font, fill=fill)
+
+        overlay = Image.alpha_composite(Image.new('RGBA', (width, height), (0, 0, 0, 0)), background_overlay)
+        overlay = Image.alpha_composite(overlay, text_overlay)
+        return Image.alpha_composite(background.convert('RGBA'), overlay).convert('RGB')
+
+
+def _jobs(count):
+    periods = list(PERIOD_COLORS)
+    for i in range(count):
+        yield PostRenderer.TEMPLATES[i % len(PostRenderer.TEMPLATES)], periods[i % len(periods)], list(SIZES)[i % 2]
+
+
+def run_legacy(background_path, count):
+    renderer = LegacyRenderer()
+    for template, period, post_format in _jobs(count):
+        with Image.open(background_path) as image:
+            background = renderer.resize(image, *SIZES[post_format])
+            renderer.render(background, template, TEXT, period)
+
+
+def run_current(background_path, count):
+    renderer = PostRenderer(PERIOD_COLORS)
+    for template, period, post_format in _jobs(count):
+        with Image.open(background_path) as image:
+            background = fit_cover(image, *SIZES[post_format])
+            renderer.render(background, template, TEXT, period)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=40, help="posts rendered per pipeline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Photo-like background at the size of a Pexels "large2x" download
+        background_path = os.path.join(tmp, "background.jpg")
+        noise = np.random.default_rng(7).integers(0, 255, (65, 94, 3), dtype=np.uint8)
+        Image.fromarray(noise).resize((1880, 1300), Image.Resampling.BICUBIC).save(background_path, quality=90)
+
+        results = {}
+        for name, run in (("legacy", run_legacy), ("renderer", run_current)):
+            start = time.perf_counter()
+            run(background_path, args.posts)
+            elapsed = time.perf_counter() - start
+            results[name] = args.posts / elapsed
+            print(f"{name:>9}: {results[name]:6.2f} posts/sec per core ({elapsed:.2f}s for {args.posts} posts)")
+
+        print(f"  speedup: {results['renderer'] / results['legacy']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
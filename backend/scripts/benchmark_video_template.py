@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark for video template rendering
+
+Renders the 15s "energy_burst" reel (1080x1920, 30fps, libx264 at 5000k) once
+with the previous MoviePy pipeline (every layer composited per frame in
+Python) and once with VideoTemplateProcessor, which composites static layers
+once and pipes raw RGB frames into ffmpeg. Prints seconds-to-render for each.
+
+MoviePy renders text through ImageMagick; without it the previous pipeline
+skips the text zones, which makes it look faster than it is.
+
+Usage:
+    python scripts/benchmark_video_template.py [--runs 1] [--with-video] [--quality final|preview]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import imageio_ffmpeg
+from moviepy.editor import AudioFileClip, ColorClip, CompositeVideoClip, ImageClip, TextClip, VideoFileClip
+from PIL import Image, ImageDraw
+import numpy as np
+
+# Add backend to path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.services import ffmpeg_service as ffmpeg_module
+from app.services.ffmpeg_service import FFmpegService
+from app.tools import video_template_tools
+from app.tools.video_template_tools import VideoTemplateProcessor
+
+TEMPLATE = "energy_burst"
+REPLACEMENTS = {
+    "background_color": "#F44336",
+    "text_main_text": "Energie ist die Kraft, die dich jeden Tag weiterbringt",
+    "text_subtitle": "7 Cycles - Energie",
+    "color_primary_overlay": "#F44336",
+}
+
+
+class LegacyTemplateProcessor(VideoTemplateProcessor):
+    """Reference copy of the MoviePy pipeline VideoTemplateProcessor replaced"""
+
+    def create_video_from_template(self, template_name, replacements, output_path):
+        template = self.templates[template_name]
+        clips = [ColorClip(size=template.resolution,
+                           color=self._hex_to_rgb(replacements.get("background_color", template.background_color)),
+                           duration=template.duration)]
+
+        for zone in template.video_zones or []:
+            if f"video_{zone['id']}" in replacements:
+                clip = VideoFileClip(replacements[f"video_{zone['id']}"]).resize(template.resolution)
+                clip = clip.set_position(zone['position']).set_start(zone['start_time'])
+                if zone.get('loop') and clip.duration < zone['duration']:
+                    clip = clip.loop(duration=zone['duration'])
+                else:
+                    clip = clip.set_duration(zone['duration'])
+                clips.append(clip)
+
+        for overlay in template.color_overlays or []:
+            color = replacements.get(f"color_{overlay['id']}", overlay['color'])
+            if overlay.get('gradient'):
+                gradient = Image.new('RGBA', template.resolution)
+                draw = ImageDraw.Draw(gradient)
+                for y in range(template.resolution[1]):
+                    alpha = int(255 * (1 - y / template.resolution[1]))
+                    draw.line([(0, y), (template.resolution[0], y)], fill=self._hex_to_rgb(color) + (alpha,))
+                clip = ImageClip(np.array(gradient), duration=overlay['duration'])
+            else:
+                clip = ColorClip(size=template.resolution, color=self._hex_to_rgb(color), duration=overlay['duration'])
+            clips.append(clip.set_opacity(overlay['opacity']).set_start(overlay['start_time']))
+
+        for zone in template.text_zones or []:
+            if f"text_{zone['id']}" not in replacements:
+                continue
+            try:
+                clip = TextClip(replacements[f"text_{zone['id']}"], fontsize=zone['size'], color=zone['color'],
+                                font=zone.get('font', 'Arial'), method='caption',
+                                size=(template.resolution[0] - 100, None), align='center')
+            except Exception:
+                # No ImageMagick
+                continue
+            clip = clip.set_position('center' if zone['position'] == ("center", "center") else zone['position'])
+            clip = clip.set_start(zone['start_time']).set_duration(zone['duration'])
+            if zone.get('animation') == 'fade_in':
+                clip = clip.crossfadein(1)
+            elif zone.get('animation') == 'fade_in_out':
+                clip = clip.crossfadein(1).crossfadeout(1)
+            clips.append(clip)
+
+        video = CompositeVideoClip(clips, size=template.resolution).set_duration(template.duration)
+        if "audio_path" in replacements:
+            video = video.set_audio(AudioFileClip(replacements["audio_path"]))
+        video.write_videofile(output_path, fps=30, codec='libx264', audio_codec='aac', bitrate="5000k",
+                              verbose=False, logger=None)
+        video.close()
+        return {"success": True, "output_path": output_path}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=1, help="renders per pipeline")
+    parser.add_argument("--with-video", action="store_true", help="fill the background video zone")
+    parser.add_argument("--quality", choices=("final", "preview"), default="final",
+                        help="encoder preset of the piped pipeline")
+    args = parser.parse_args()
+
+    # Use the ffmpeg bundled with imageio-ffmpeg when there is none on the PATH
+    binary = shutil.which("ffmpeg") or imageio_ffmpeg.get_ffmpeg_exe()
+    service = FFmpegService(binary=binary)
+    video_template_tools.ffmpeg_service = service
+    ffmpeg_module.ffmpeg_service = service
+
+    with tempfile.TemporaryDirectory() as tmp:
+        replacements = dict(REPLACEMENTS)
+        if args.with_video:
+            replacements["video_background_video"] = os.path.join(tmp, "background.mp4")
+            subprocess.run([binary, "-y", "-f", "lavfi", "-i", "testsrc=size=720x1280:rate=30", "-t", "15",
+                            "-pix_fmt", "yuv420p", replacements["video_background_video"]],
+                           check=True, capture_output=True)
+
+        results = {}
+        for name, processor in (("legacy", LegacyTemplateProcessor()), ("piped", VideoTemplateProcessor())):
+            options = {"quality": args.quality} if name == "piped" else {}
+            start = time.perf_counter()
+            for run in range(args.runs):
+                result = processor.create_video_from_template(
+                    TEMPLATE, replacements, os.path.join(tmp, f"{name}_{run}.mp4"), **options
+                )
+                if not result["success"]:
+                    sys.exit(f"{name} render failed: {result.get('error')}")
+            results[name] = (time.perf_counter() - start) / args.runs
+            print(f"{name:>7}: {results[name]:6.2f}s per 15s reel")
+
+        print(f"speedup: {results['legacy'] / results['piped']:.1f}x")
+    service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Query-count benchmark for the goal and department listings
+
+Runs the list endpoints against an in-memory Supabase stand-in that counts
+round-trips and asserts the count doesn't grow with the number of rows.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from uuid import uuid4
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+import pytest
+from fastapi import Response
+
+from app.core.config import settings
+
+# The routers verify JWTs on import
+settings.SUPABASE_JWT_SECRET = settings.SUPABASE_JWT_SECRET or "test-secret"
+
+from app.api.routers import departments, goals
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+        self.count = len(data)
+
+
+class _Query:
+    def __init__(self, client, table):
+        self.client = client
+        self.rows = list(client.tables.get(table, []))
+        self._single = False
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        self.rows = [row for row in self.rows if str(row.get(column)) == str(value)]
+        return self
+
+    def in_(self, column, values):
+        values = {str(value) for value in values}
+        self.rows = [row for row in self.rows if str(row.get(column)) in values]
+        return self
+
+    def order(self, column, desc=False):
+        self.rows.sort(key=lambda row: row.get(column) or "", reverse=desc)
+        return self
+
+    def limit(self, count):
+        self.rows = self.rows[:count]
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    def execute(self):
+        self.client.queries += 1
+        if self._single:
+            return _Result(self.rows[0] if self.rows else None)
+        return _Result(self.rows)
+
+
+class CountingSupabase:
+    def __init__(self, tables):
+        self.tables = tables
+        self.queries = 0
+
+    def table(self, name):
+        return _Query(self, name)
+
+
+def _goal_tables(user_id, project_id, goal_count):
+    now = "2025-01-01T00:00:00+00:00"
+    goal_rows = [{
+        "id": str(uuid4()), "project_id": project_id, "title": f"Goal {i}", "description": None,
+        "target_date": None, "status": "active", "progress": 0, "created_at": now, "updated_at": now,
+        "projects": {"id": project_id, "name": "Launch", "organization_id": "org-1"}
+    } for i in range(goal_count)]
+    return {
+        "users": [{"id": user_id, "email": "owner@example.com"}],
+        "project_members": [{"project_id": project_id, "user_id": user_id, "role": "owner"}],
+        "goals": goal_rows,
+        "goal_task_counts": [
+            {"goal_id": goal["id"], "task_count": 3, "completed_task_count": 1} for goal in goal_rows
+        ]
+    }
+
+
+def _department_tables(project_id, department_count):
+    now = "2025-01-01T00:00:00+00:00"
+    department_rows = [{
+        "id": str(uuid4()), "project_id": project_id, "name": f"Department {i:03d}",
+        "description": None, "created_at": now, "updated_at": now
+    } for i in range(department_count)]
+    return {
+        "departments": department_rows,
+        "department_assignment_counts": [
+            {"department_id": dept["id"], "member_count": 2, "ai_agent_count": 1} for dept in department_rows
+        ]
+    }
+
+
+@pytest.mark.parametrize("goal_count", [1, 20, 200])
+def test_list_goals_query_count_is_constant(goal_count, monkeypatch):
+    """Listing goals costs the same number of round-trips for 1 or 200 goals"""
+    user_id, project_id = str(uuid4()), str(uuid4())
+    client = CountingSupabase(_goal_tables(user_id, project_id, goal_count))
+    monkeypatch.setattr(goals, "get_supabase", lambda: client)
+
+    start = time.perf_counter()
+    result = asyncio.run(goals.list_goals(
+        response=Response(), project_id=project_id, status=None, target_before=None,
+        target_after=None, cursor=None, limit=200, fields=None, legacy=False,
+        current_user={"user_id": user_id, "email": "owner@example.com"}
+    ))
+    elapsed = time.perf_counter() - start
+
+    assert len(result) == goal_count
+    assert all(goal.task_count == 3 and goal.completed_task_count == 1 for goal in result)
+    # users lookup, organization and project memberships, goals, task counts
+    assert client.queries == 5
+    print(f"list_goals: {goal_count} goals, {client.queries} queries, {elapsed * 1000:.1f} ms")
+
+
+def test_list_goals_reuses_cached_memberships(monkeypatch):
+    """A second listing by the same user skips the membership lookups"""
+    user_id, project_id = str(uuid4()), str(uuid4())
+    client = CountingSupabase(_goal_tables(user_id, project_id, 5))
+    monkeypatch.setattr(goals, "get_supabase", lambda: client)
+    current_user = {"user_id": user_id, "email": "owner@example.com"}
+
+    for _ in range(2):
+        client.queries = 0
+        asyncio.run(goals.list_goals(
+            response=Response(), project_id=project_id, status=None, target_before=None,
+            target_after=None, cursor=None, limit=200, fields=None, legacy=False,
+            current_user=current_user
+        ))
+
+    # goals and task counts only
+    assert client.queries == 2
+
+
+@pytest.mark.parametrize("department_count", [1, 20, 200])
+def test_list_departments_query_count_is_constant(department_count, monkeypatch):
+    """Listing departments costs two round-trips regardless of their number"""
+    project_id = str(uuid4())
+    client = CountingSupabase(_department_tables(project_id, department_count))
+    monkeypatch.setattr(departments, "get_supabase", lambda: client)
+
+    result = asyncio.run(departments.list_departments(
+        project_id=project_id, current_user={"user_id": str(uuid4())}
+    ))
+
+    assert len(result) == department_count
+    assert all(dept.member_count == 2 and dept.ai_agent_count == 1 for dept in result)
+    assert client.queries == 2
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for checkpointing and resuming content workflows
+"""
+
+import os
+import sys
+import uuid
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from app.agents.content_workflow_agent import ContentWorkflowAgent
+from app.models.auth import OrganizationRole, RequestContext
+
+ORG_1, ORG_2 = uuid.uuid4(), uuid.uuid4()
+
+
+def _context(organization_id):
+    return RequestContext(user_id=uuid.uuid4(), organization_id=organization_id, role=OrganizationRole.MEMBER)
+
+
+class _MemoryStorage:
+    def __init__(self):
+        self.collections = {}
+
+    async def save(self, collection, data, id=None):
+        self.collections.setdefault(collection, {})[id] = {**data, "id": id}
+        return id
+
+    async def load(self, collection, id):
+        return self.collections.get(collection, {}).get(id)
+
+
+
+def _agent(storage, calls, fail_images=False):
+    agent = ContentWorkflowAgent.__new__(ContentWorkflowAgent)
+    agent._context = None
+    agent.storage_adapter = storage
+    agent.collection = "workflows"
+    agent.instagram_poster = None
+    for name in ("affirmations_agent", "visual_post_creator", "post_composition_agent",
+                 "video_generation_agent", "hashtag_research_agent"):
+        setattr(agent, name, object())
+
+    def step(name, data, fail=False):
+        def run(*args):
+            calls.append(name)
+            if fail:
+                return {"step": name, "success": False, "error": "Pexels down"}
+            return {"step": name, "success": True, "data": data}
+        return run
+
+    agent._execute_affirmation_step = step("affirmation_generation", ["Ich bin ruhig"])
+    agent._execute_image_finding_step = step("image_finding", ["bg.jpg"], fail=fail_images)
+    agent._execute_post_composition_step = step("post_composition", ["post.jpg"])
+    agent._execute_hashtag_research_step = step("hashtag_research", {"posts": []})
+    agent.set_context(_context(ORG_1))
+    return agent
+
+
+def test_failed_workflow_resumes_from_its_checkpoint():
+    storage, calls = _MemoryStorage(), []
+    failed = _agent(storage, calls, fail_images=True).create_complete_content_workflow("Image", "posts_only")
+
+    assert failed["status"] == "failed"
+    checkpoint = storage.collections["workflows"][failed["storage_id"]]
+    assert checkpoint["organization_id"] == str(ORG_1) and checkpoint["status"] == "failed"
+
+    calls.clear()
+    resumed = _agent(storage, calls).resume_workflow(failed["storage_id"])
+
+    assert resumed["success"] and resumed["status"] == "completed"
+    # The affirmations were reused from the checkpoint
+    assert "affirmation_generation" not in calls
+    assert sorted(calls) == ["hashtag_research", "image_finding", "post_composition"]
+    assert resumed["results"]["affirmations"] == ["Ich bin ruhig"]
+
+
+def test_creating_an_unfinished_workflow_again_continues_it():
+    storage, calls = _MemoryStorage(), []
+    failed = _agent(storage, calls, fail_images=True).create_complete_content_workflow("Image", "posts_only")
+
+    calls.clear()
+    result = _agent(storage, calls).create_complete_content_workflow("Image", "posts_only")
+
+    assert result["success"] and result["storage_id"] == failed["storage_id"]
+    assert "affirmation_generation" not in calls
+
+
+def test_checkpoints_of_other_organizations_are_not_resumed():
+    storage, calls = _MemoryStorage(), []
+    failed = _agent(storage, calls, fail_images=True).create_complete_content_workflow("Image", "posts_only")
+
+    other = _agent(storage, calls)
+    other.set_context(_context(ORG_2))
+    assert other.resume_workflow(failed["storage_id"])["error"] == "Workflow nicht gefunden"
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the concurrent multi-account Instagram analysis
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from app.agents import instagram_analyzer_agent as module
+from app.agents.instagram_analyzer_agent import InstagramAnalyzerAgent
+
+
+def _analysis(username):
+    return {
+        "account_username": f"@{username}",
+        "content_analysis": {"primary_content_types": ["reels", "carousels", "stories", "images", "igtv"],
+                             "visual_style": "x" * 5000},
+        "success_factors": {"key_differentiators": ["consistency"]},
+        "overall_assessment": {"success_level": "high"}
+    }
+
+
+class _FakeCrew:
+    prompts = []
+
+    def __init__(self, agents, tasks, verbose=False):
+        self.tasks = tasks
+
+    def kickoff(self):
+        _FakeCrew.prompts.append(self.tasks[0].description)
+        return json.dumps({"common_success_factors": {"universal_strategies": ["reels"]}})
+
+
+def _agent(monkeypatch):
+    agent = InstagramAnalyzerAgent.__new__(InstagramAnalyzerAgent)
+    agent.analyzer_agent = None
+    agent._create_analyzer_agent = lambda: None
+    monkeypatch.setattr(module, "Crew", _FakeCrew)
+    monkeypatch.setattr(module, "Task", lambda description, expected_output, agent: type(
+        "Task", (), {"description": description})())
+    return agent
+
+
+def test_accounts_are_analyzed_concurrently_within_the_limit(monkeypatch):
+    agent = _agent(monkeypatch)
+    active, peak, seen = [0], [0], []
+    lock = threading.Lock()
+
+    def analyze(account, focus, max_age_hours=None, analyzer_agent=None):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            seen.append(account)
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return {"success": True, "analysis": _analysis(account),
+                "source": "existing" if account == "cached" else "generated"}
+
+    agent.analyze_instagram_account = analyze
+    accounts = ["@one", "two", "https://instagram.com/three/", "cached", "@one"]
+    # Requests can't go above the configured concurrency
+    monkeypatch.setattr(module.settings, "INSTAGRAM_ANALYSIS_CONCURRENCY", 2)
+
+    start = time.perf_counter()
+    result = agent.analyze_multiple_accounts(accounts, max_concurrency=50)
+    elapsed = time.perf_counter() - start
+
+    assert result["success"]
+    assert sorted(seen) == ["cached", "one", "three", "two"]
+    assert peak[0] == 2
+    assert elapsed < 0.18
+    assert [a["account_username"] for a in result["individual_analyses"]] == ["@one", "@two", "@three", "@cached"]
+    assert result["comparative_analysis"]["reused_count"] == 1
+
+
+def test_comparative_prompt_uses_compact_summaries(monkeypatch):
+    agent = _agent(monkeypatch)
+    agent.analyze_instagram_account = lambda account, focus, **kwargs: {
+        "success": True, "analysis": _analysis(account), "source": "generated"}
+    _FakeCrew.prompts.clear()
+
+    agent.analyze_multiple_accounts(["a", "b"])
+
+    prompt = _FakeCrew.prompts[0]
+    assert '"account":"@a"' in prompt
+    assert "x" * 200 not in prompt
+    assert "igtv" not in prompt
+
+
+def test_failed_accounts_are_reported(monkeypatch):
+    agent = _agent(monkeypatch)
+    agent.analyze_instagram_account = lambda account, focus, **kwargs: {"success": False, "error": "private"}
+
+    result = agent.analyze_multiple_accounts(["a", "b"])
+    assert not result["success"]
+    assert result["failed_analyses"] == [{"account": "a", "error": "private"}, {"account": "b", "error": "private"}]
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Tests for batch post composition with process-pool rendering
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from PIL import Image
+from starlette.concurrency import run_in_threadpool
+
+from app.agents import post_composition_agent as module
+from app.agents.post_composition_agent import PostCompositionAgent
+from app.core.media_cache import MediaCache
+from app.core.media_store import MediaMetadataStore
+from app.models.auth import OrganizationRole, RequestContext
+from app.tools.post_renderer import PostRenderer
+
+
+class _Storage:
+    def __init__(self):
+        self.saved = []
+
+    async def save(self, collection, data, id=None):
+        self.saved.append(data)
+        return f"post-{len(self.saved)}"
+
+
+def _agent(monkeypatch, tmp_path, name="worker"):
+    agent = PostCompositionAgent.__new__(PostCompositionAgent)
+    agent.storage_adapter = _Storage()
+    agent.collection = "composed_posts"
+    agent.media_store = MediaMetadataStore(str(tmp_path / name / "metadata.db"))
+    agent.media_cache = MediaCache(str(tmp_path / "cache"), 1 << 30)
+    agent.output_dir = str(tmp_path / name)
+    agent.period_colors = {"Energie": "#F44336"}
+    agent.renderer = PostRenderer(agent.period_colors)
+    agent.story_width, agent.story_height = 1080, 1920
+    agent.post_width, agent.post_height = 1080, 1350
+    agent.validate_context = lambda: False
+
+    # Threads instead of worker processes keep the test fast
+    pool = ThreadPoolExecutor(max_workers=4)
+    monkeypatch.setattr(module, "get_render_pool", lambda max_workers=None: pool)
+    return agent
+
+
+def _background(tmp_path, name="background.jpg"):
+    path = str(tmp_path / name)
+    Image.new("RGB", (1200, 1600), (30, 60, 90)).save(path)
+    return path
+
+
+def test_batch_renders_each_composition_once(monkeypatch, tmp_path):
+    agent = _agent(monkeypatch, tmp_path)
+    background = _background(tmp_path)
+    jobs = [
+        {"background_path": background, "text": "Eins", "period": "Energie", "template_name": "gradient"},
+        {"background_path": background, "text": "Zwei", "period": "Energie", "post_format": "post"},
+        {"background_path": background, "text": "Eins", "period": "Energie", "template_name": "gradient"},
+        {"background_path": str(tmp_path / "missing.jpg"), "text": "Drei", "period": "Energie"},
+    ]
+
+    batch = agent.compose_posts(jobs)
+
+    results = batch["results"]
+    assert [result["success"] for result in results] == [True, True, True, False]
+    assert results[2]["source"] == "existing"
+    assert results[2]["post"]["file_path"] == results[0]["post"]["file_path"]
+    assert batch["generated"] == 2 and batch["existing"] == 1 and batch["failed"] == 1
+    assert len(agent.storage_adapter.saved) == 2
+    with Image.open(results[1]["post"]["file_path"]) as image:
+        assert image.size == (1080, 1350)
+
+
+def test_formats_and_options_are_separate_compositions(monkeypatch, tmp_path):
+    agent = _agent(monkeypatch, tmp_path)
+    job = {"background_path": _background(tmp_path), "text": "Eins", "period": "Energie"}
+    jobs = [job, dict(job, post_format="post"), dict(job, custom_options={"font_size": 90})]
+
+    batch = agent.compose_posts(jobs)
+
+    assert [result["source"] for result in batch["results"]] == ["generated"] * 3
+    sizes = []
+    for result in batch["results"]:
+        with Image.open(result["post"]["file_path"]) as image:
+            sizes.append(image.size)
+    assert sizes == [(1080, 1920), (1080, 1350), (1080, 1920)]
+    # Asked again, each job gets back its own post
+    again = agent.compose_posts(jobs)["results"]
+    assert [result["post"]["file_path"] for result in again] == [
+        result["post"]["file_path"] for result in batch["results"]
+    ]
+
+
+def test_existing_compositions_are_not_rendered_again(monkeypatch, tmp_path):
+    agent = _agent(monkeypatch, tmp_path)
+    background = _background(tmp_path)
+    job = {"background_path": background, "text": "Eins", "period": "Energie"}
+    agent.compose_posts([job, dict(job, text="Zwei")])
+
+    submitted = []
+    monkeypatch.setattr(module, "get_render_pool", lambda max_workers=None: submitted.append(1))
+    batch = agent.compose_posts([job, dict(job, text="Zwei")])
+
+    assert submitted == []
+    assert [result["source"] for result in batch["results"]] == ["existing", "existing"]
+
+
+def test_results_are_yielded_as_they_finish(monkeypatch, tmp_path):
+    agent = _agent(monkeypatch, tmp_path)
+    background = _background(tmp_path)
+    jobs = [{"background_path": background, "text": f"Text {i}", "period": "Energie"} for i in range(4)]
+
+    finished = list(agent.iter_compose_posts(jobs))
+
+    assert sorted(index for index, _ in finished) == [0, 1, 2, 3]
+    assert all(result["source"] == "generated" for _, result in finished)
+
+
+def test_renders_of_other_workers_are_copied_from_the_media_cache(monkeypatch, tmp_path):
+    background = _background(tmp_path)
+    jobs = [{"background_path": background, "text": f"Text {i}", "period": "Energie"} for i in range(2)]
+    first = _agent(monkeypatch, tmp_path, "first").compose_posts(jobs)
+
+    # A worker with its own metadata finds the renders in the shared cache
+    second = _agent(monkeypatch, tmp_path, "second")
+    submitted = []
+    monkeypatch.setattr(module, "get_render_pool", lambda max_workers=None: submitted)
+    batch = second.compose_posts(jobs + [dict(jobs[0], background_path=_background(tmp_path, "copy.jpg"))])
+
+    assert submitted == []
+    assert batch["generated"] == 3
+    for before, after in zip(first["results"], batch["results"]):
+        with open(before["post"]["file_path"], 'rb') as a, open(after["post"]["file_path"], 'rb') as b:
+            assert a.read() == b.read()
+    assert second.media_cache.get_stats()["hits"] == 3
+
+
+def test_concurrent_requests_save_posts_under_their_own_organization(monkeypatch, tmp_path):
+    agent = _agent(monkeypatch, tmp_path)
+    del agent.validate_context
+    background = _background(tmp_path)
+    organizations = {"Eins": uuid.uuid4(), "Zwei": uuid.uuid4()}
+
+    # Both requests have set their context before either one saves its post
+    both_rendering = threading.Barrier(2)
+    compose = agent._compose_with_template
+
+    def compose_after_both_started(*args):
+        both_rendering.wait(timeout=5)
+        return compose(*args)
+
+    agent._compose_with_template = compose_after_both_started
+
+    async def request(text):
+        agent.set_context(RequestContext(
+            user_id=uuid.uuid4(), organization_id=organizations[text], role=OrganizationRole.MEMBER
+        ))
+        jobs = [{"background_path": background, "text": text, "period": "Energie"}]
+        return await run_in_threadpool(agent.compose_posts, jobs)
+
+    async def main():
+        return await asyncio.gather(request("Eins"), request("Zwei"))
+
+    assert all(batch["generated"] == 1 for batch in asyncio.run(main()))
+    assert {post["text"]: post["organization_id"] for post in agent.storage_adapter.saved} == {
+        text: str(organization) for text, organization in organizations.items()
+    }
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for per-job render workspaces of the video generation agent
+"""
+
+import os
+import sys
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from PIL import Image
+
+from app.agents import video_generation_agent as module
+from app.agents.video_generation_agent import VideoGenerationAgent
+from app.core.config import settings
+from app.core.media_cache import MediaCache
+from app.core.media_store import MediaMetadataStore
+from app.services.ffmpeg_service import FFmpegResult
+
+
+class _Storage:
+    async def save(self, collection, data):
+        return data["id"]
+
+
+class _FFmpeg:
+    """Records the piped frames of every slideshow and writes an empty output"""
+
+    def __init__(self):
+        self.jobs = []
+        self.barrier = threading.Barrier(2, timeout=5)
+
+    def run_sync(self, cmd, frames=None, **kwargs):
+        shapes = [frame.shape for frame in frames]
+        self.jobs.append((os.path.dirname(cmd[-1]), cmd[cmd.index('-s') + 1], shapes))
+        # Both jobs are rendering at the same time
+        self.barrier.wait()
+        open(cmd[-1], "wb").close()
+        return FFmpegResult(returncode=0)
+
+
+def _agent(monkeypatch, tmp_path):
+    agent = VideoGenerationAgent.__new__(VideoGenerationAgent)
+    agent.storage_adapter = _Storage()
+    agent.collection = "videos"
+    agent.media_store = MediaMetadataStore(str(tmp_path / "metadata.db"))
+    agent.media_cache = MediaCache(str(tmp_path / "cache"), 1 << 30)
+    agent.output_dir = str(tmp_path / "videos")
+    agent.preview_dir = str(tmp_path / "videos" / "previews")
+    os.makedirs(agent.preview_dir)
+    agent.reel_width, agent.reel_height = 1080, 1920
+    agent.ffmpeg_available = True
+    agent.validate_context = lambda: False
+    monkeypatch.setattr(settings, "RENDER_TMP_DIR", str(tmp_path / "render"))
+    return agent
+
+
+def test_concurrent_slideshows_use_their_own_workspace(monkeypatch, tmp_path):
+    agent = _agent(monkeypatch, tmp_path)
+    ffmpeg = _FFmpeg()
+    monkeypatch.setattr(module, "ffmpeg_service", ffmpeg)
+
+    images = []
+    for i in range(4):
+        path = str(tmp_path / f"image_{i}.jpg")
+        Image.new("RGB", (600, 800), (40 * i, 80, 120)).save(path)
+        images.append(path)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda paths=paths: results.append(agent.create_video(paths, "slideshow", 10)))
+        for paths in (images[:2], images[2:])
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(result["success"] for result in results)
+    assert results[0]["video"]["file_path"] != results[1]["video"]["file_path"]
+
+    (first_dir, first_size, first), (second_dir, _, second) = ffmpeg.jobs
+    assert first_dir != second_dir
+    assert os.path.dirname(first_dir) == str(tmp_path / "render")
+    # One decoded frame per image, no intermediate files
+    assert first_size == "1080x1920"
+    assert first == second == [(1920, 1080, 3)] * 2
+    assert os.listdir(tmp_path / "render") == []
+
+
+def test_previews_are_rendered_small_and_cached(monkeypatch, tmp_path):
+    agent = _agent(monkeypatch, tmp_path)
+    commands = []
+
+    class _PreviewFFmpeg:
+        def run_sync(self, cmd, frames=None, **kwargs):
+            commands.append((cmd, [frame.shape for frame in frames]))
+            open(cmd[-1], "wb").close()
+            return FFmpegResult(returncode=0)
+
+    monkeypatch.setattr(module, "ffmpeg_service", _PreviewFFmpeg())
+    image = str(tmp_path / "image.jpg")
+    Image.new("RGB", (600, 800), (200, 80, 120)).save(image)
+
+    result = agent.create_video_preview([image], "zoom_in", 10)
+    assert result["success"] and result["source"] == "generated"
+    (cmd, shapes), = commands
+    assert cmd[cmd.index('-s') + 1] == "270x480" and shapes == [(480, 270, 3)]
+    assert cmd[cmd.index('-preset') + 1] == "ultrafast"
+    assert "fps=10" in cmd[cmd.index('-vf') + 1]
+
+    preview_id = result["preview"]["id"]
+    assert sorted(os.listdir(agent.preview_dir)) == [f"{preview_id}.jpg", f"{preview_id}.mp4"]
+    assert agent.create_video_preview([image], "zoom_in", 10)["source"] == "cache"
+    assert len(commands) == 1
+    # Previews are not stored as videos
+    assert agent.media_store.count("videos") == 0
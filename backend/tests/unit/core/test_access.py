@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Tests for the membership-based access resolver
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from app.core.access import AccessResolver, UserAccess
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Query:
+    def __init__(self, client, table):
+        self.client = client
+        self.rows = list(client.tables.get(table, []))
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        self.rows = [row for row in self.rows if str(row.get(column)) == str(value)]
+        return self
+
+    def in_(self, column, values):
+        values = {str(value) for value in values}
+        self.rows = [row for row in self.rows if str(row.get(column)) in values]
+        return self
+
+    def execute(self):
+        self.client.queries += 1
+        return _Result(self.rows)
+
+
+class CountingSupabase:
+    def __init__(self, tables):
+        self.tables = tables
+        self.queries = 0
+
+    def table(self, name):
+        return _Query(self, name)
+
+
+def _client():
+    return CountingSupabase({
+        "users": [{"id": "user-1", "email": "ann@example.com"}],
+        "organization_members": [
+            {"organization_id": "org-1", "user_id": "user-1", "role": "member"},
+            {"organization_id": "org-2", "user_id": "user-1", "role": "owner"}
+        ],
+        "project_members": [{"project_id": "p-direct", "user_id": "user-1", "role": "admin"}],
+        "projects": [
+            {"id": "p-direct", "organization_id": "org-3"},
+            {"id": "p-org1", "organization_id": "org-1"},
+            {"id": "p-org2", "organization_id": "org-2"},
+            {"id": "p-other", "organization_id": "org-9"}
+        ],
+        "goals": [{"id": "g-1", "project_id": "p-org1"}, {"id": "g-2", "project_id": "p-other"}]
+    })
+
+
+CURRENT_USER = {"user_id": "auth-1", "email": "ann@example.com"}
+
+
+def test_memberships_are_loaded_once_per_ttl():
+    """The first lookup costs three queries, later ones none"""
+    resolver = AccessResolver(ttl_seconds=60)
+    client = _client()
+
+    access = resolver.get_user_access(CURRENT_USER, client)
+    assert access.user_id == "user-1"
+    assert client.queries == 3
+
+    assert resolver.get_user_access(CURRENT_USER, client) is access
+    assert client.queries == 3
+    assert resolver.get_stats()["hits"] == 1
+
+
+def test_zero_ttl_disables_caching():
+    resolver = AccessResolver(ttl_seconds=0)
+    client = _client()
+
+    resolver.get_user_access(CURRENT_USER, client)
+    resolver.get_user_access(CURRENT_USER, client)
+    assert client.queries == 6
+
+
+def test_invalidate_by_public_user_id():
+    """Membership changes reported with the public user id drop the cached entry"""
+    resolver = AccessResolver(ttl_seconds=60)
+    client = _client()
+    resolver.get_user_access(CURRENT_USER, client)
+
+    assert resolver.invalidate("user-1") == 1
+    resolver.get_user_access(CURRENT_USER, client)
+    assert client.queries == 6
+
+
+def test_project_roles_follow_direct_then_organization_membership():
+    access = UserAccess(
+        user_id="user-1",
+        organization_roles={"org-1": "member", "org-2": "owner"},
+        project_roles={"p-direct": "member"}
+    )
+
+    assert access.project_role("p-direct", "org-3") == "member"
+    assert access.project_role("p-org1", "org-1") == "viewer"
+    assert access.project_role("p-org2", "org-2") == "admin"
+    assert access.project_role("p-other", "org-9") is None
+
+    assert not access.is_project_admin("p-direct", "org-3")
+    assert access.is_project_admin("p-org2", "org-2")
+
+
+def test_project_and_goal_checks_cache_ownership():
+    """Project and goal ownership is looked up once, then checks are dict lookups"""
+    resolver = AccessResolver(ttl_seconds=60)
+    client = _client()
+    access = resolver.get_user_access(CURRENT_USER, client)
+    client.queries = 0
+
+    assert resolver.can_access_project(access, "p-direct", client)
+    assert client.queries == 0
+
+    assert resolver.can_access_goal(access, "g-1", client)
+    assert not resolver.can_access_goal(access, "g-2", client)
+    assert not resolver.can_access_goal(access, "missing", client)
+    queries = client.queries
+
+    assert resolver.can_access_goal(access, "g-1", client)
+    assert not resolver.can_access_project(access, "p-other", client)
+    assert client.queries == queries
+
+
+def test_accessible_project_ids():
+    resolver = AccessResolver(ttl_seconds=60)
+    client = _client()
+    access = resolver.get_user_access(CURRENT_USER, client)
+
+    assert sorted(resolver.accessible_project_ids(access, client)) == ["p-direct", "p-org1", "p-org2"]
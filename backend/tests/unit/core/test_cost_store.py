@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite cost store and its daily rollups
+"""
+
+import os
+import sys
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from app.core.cost_store import CostStore
+from app.core.cost_tracker import CostTracker, CostRollup, CostEstimate, TokenUsage
+
+
+def _record(timestamp, agent="qa_agent", model="gpt-4o-mini", org=None, tokens=(100, 50), cost=0.001):
+    return {
+        "model": model,
+        "token_usage": {"prompt_tokens": tokens[0], "completion_tokens": tokens[1],
+                        "total_tokens": tokens[0] + tokens[1]},
+        "estimated_cost": cost,
+        "currency": "USD",
+        "timestamp": timestamp,
+        "agent_name": agent,
+        "organization_id": org
+    }
+
+
+def test_rollups_are_incremental(tmp_path):
+    """Each record updates exactly one rollup row per (date, agent, model, org)"""
+    store = CostStore(str(tmp_path / "costs.db"))
+    for _ in range(50):
+        store.add(_record("2025-03-02T10:00:00"))
+    store.add(_record("2025-03-02T11:00:00", agent="affirmations_agent", org="org-1"))
+    store.add(_record("2025-03-05T09:00:00", model="gpt-4o"))
+
+    rollup_rows = store._conn.execute("SELECT COUNT(*) FROM cost_daily_rollups").fetchone()[0]
+    assert rollup_rows == 3
+
+    by_date = store.get_rollups("2025-03-01", "2025-03-31", ["date"])
+    assert [row["date"] for row in by_date] == ["2025-03-02", "2025-03-05"]
+    assert by_date[0]["requests"] == 51
+    assert by_date[0]["total_tokens"] == 51 * 150
+
+    tenant = store.get_rollups("2025-03-01", "2025-03-31", organization_id="org-1")
+    assert tenant[0]["requests"] == 1
+
+
+def test_import_jsonl_files_once(tmp_path):
+    """Legacy daily JSONL files are imported a single time"""
+    with open(tmp_path / "costs_2025-02-10.jsonl", "w") as f:
+        for _ in range(3):
+            f.write(json.dumps(_record("2025-02-10T08:00:00")) + "\n")
+
+    store = CostStore(str(tmp_path / "costs.db"))
+    assert store.import_jsonl_files(str(tmp_path)) == 3
+    assert store.import_jsonl_files(str(tmp_path)) == 0
+    assert len(store.get_records("2025-02-10")) == 3
+
+
+def test_monthly_summary_from_rollups(tmp_path):
+    """The tracker answers month queries from the store"""
+    tracker = CostTracker(storage_dir=str(tmp_path))
+    tracker.store.add(_record("2025-04-01T08:00:00", cost=0.5))
+    tracker.store.add(_record("2025-04-20T08:00:00", agent="writer", cost=0.25))
+
+    summary = tracker.get_monthly_summary(2025, 4)
+    assert summary["total_requests"] == 2
+    assert summary["total_cost"] == 0.75
+    assert len(summary["daily_costs"]) == 2
+    assert set(summary["by_agent"]) == {"qa_agent", "writer"}
+
+    daily = tracker.get_daily_costs("2025-04-20")
+    assert daily["requests"] == 1
+    assert daily["details"][0]["agent_name"] == "writer"
+
+
+def test_cost_rollup_is_bounded():
+    """Session aggregates keep totals but only a window of recent estimates"""
+    rollup = CostRollup(max_recent=5, max_groups=3)
+    for i in range(20):
+        rollup.add(CostEstimate(
+            model="gpt-4o-mini",
+            token_usage=TokenUsage(prompt_tokens=10, completion_tokens=5, total_tokens=15),
+            estimated_cost=0.01,
+            timestamp="2025-01-01T00:00:00",
+            agent_name=f"agent_{i}"
+        ))
+
+    assert rollup.requests == 20
+    assert rollup.total_tokens == 300
+    assert len(rollup.recent) == 5
+    assert len(rollup.by_agent) == 4  # 3 named groups + "other"
+    assert rollup.by_agent["other"]["requests"] == 17
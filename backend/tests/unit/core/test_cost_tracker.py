@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for token accounting in the CostTracker
+"""
+
+import os
+import sys
+import asyncio
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from app.core.cost_tracker import CostTracker, TokenUsage, cost_attribution, track_cost, get_cost_attribution
+
+
+def test_model_resolution(tmp_path):
+    """Provider prefixes and dated snapshots map onto MODEL_COSTS"""
+    tracker = CostTracker(storage_dir=str(tmp_path))
+
+    assert tracker.resolve_model("gpt-4o-mini") == "gpt-4o-mini"
+    assert tracker.resolve_model("openai/gpt-4o-mini") == "gpt-4o-mini"
+    assert tracker.resolve_model("gpt-4o-mini-2024-07-18") == "gpt-4o-mini"
+    assert tracker.resolve_model("gpt-4o-2024-08-06") == "gpt-4o"
+    assert tracker.resolve_model("claude-unknown") is None
+
+
+def test_calculate_cost_small_model(tmp_path):
+    """Cheap models keep sub-cent precision"""
+    tracker = CostTracker(storage_dir=str(tmp_path))
+    usage = TokenUsage(prompt_tokens=1000, completion_tokens=500, total_tokens=1500)
+
+    # 1000 * 0.15/1M + 500 * 0.60/1M
+    assert tracker.calculate_cost("gpt-4o-mini", usage) == 0.00045
+
+
+def test_track_usage_uses_attribution(tmp_path):
+    """Agent, task and tenant come from the active attribution"""
+    tracker = CostTracker(storage_dir=str(tmp_path))
+    usage = TokenUsage(prompt_tokens=100, completion_tokens=50, total_tokens=150)
+
+    with cost_attribution(agent_name="qa_agent", organization_id="org-1"):
+        with cost_attribution(task_name="answer_question_task"):
+            estimate = tracker.track_usage(agent_name=None, model="gpt-4o-mini", token_usage=usage)
+
+    assert estimate.agent_name == "qa_agent"
+    assert estimate.task_name == "answer_question_task"
+    assert estimate.organization_id == "org-1"
+    assert get_cost_attribution() == {}
+
+    summary = tracker.get_session_summary()
+    assert summary["by_organization"]["org-1"]["requests"] == 1
+    assert tracker.get_daily_costs()["requests"] == 1
+
+
+def test_track_cost_decorator():
+    """The decorator scopes attribution for sync and async functions"""
+    @track_cost("AffirmationsAgent")
+    async def generate():
+        return get_cost_attribution()["agent_name"]
+
+    @track_cost("QAAgent")
+    def answer():
+        return get_cost_attribution()["agent_name"]
+
+    assert asyncio.run(generate()) == "AffirmationsAgent"
+    assert answer() == "QAAgent"
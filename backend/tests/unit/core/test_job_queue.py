@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for the durable background job queue
+"""
+
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from app.core.job_queue import JobQueue, JobType, JobWorker, parse_concurrency
+
+
+def _queue(tmp_path, **kwargs):
+    return JobQueue(str(tmp_path / "jobs.db"), **kwargs)
+
+
+def test_enqueue_claim_complete(tmp_path):
+    queue = _queue(tmp_path)
+    job = queue.enqueue("video_generation", {"image_paths": ["a.jpg"]}, owner_id="user-1")
+    assert job["status"] == "queued"
+
+    claimed = queue.claim(["video_generation"], "worker-1")
+    assert claimed["id"] == job["id"]
+    assert claimed["attempts"] == 1
+    assert queue.claim(["video_generation"], "worker-2") is None
+
+    assert queue.complete(job["id"], "worker-1", {"success": True, "video": "out.mp4"})
+    stored = queue.get(job["id"])
+    assert stored["status"] == "succeeded"
+    assert stored["result"]["video"] == "out.mp4"
+
+
+def test_idempotency_key_returns_existing_job(tmp_path):
+    queue = _queue(tmp_path)
+    first = queue.enqueue("voice_over", {"text": "hi"}, idempotency_key="req-1")
+    second = queue.enqueue("voice_over", {"text": "hi"}, idempotency_key="req-1")
+
+    assert second["id"] == first["id"]
+    assert len(queue.list()) == 1
+
+
+def test_failed_attempts_are_retried_with_backoff(tmp_path):
+    queue = _queue(tmp_path, retry_backoff_seconds=60)
+    job = queue.enqueue("voice_over", {}, max_attempts=2)
+
+    queue.claim(["voice_over"], "worker-1")
+    assert queue.fail(job["id"], "worker-1", "ElevenLabs timeout") == "queued"
+    # Not due again until the backoff has passed
+    assert queue.claim(["voice_over"], "worker-1") is None
+
+    with queue._conn:
+        queue._conn.execute("UPDATE jobs SET available_at = 0 WHERE id = ?", (job["id"],))
+    assert queue.claim(["voice_over"], "worker-1")["attempts"] == 2
+    assert queue.fail(job["id"], "worker-1", "ElevenLabs timeout") == "failed"
+    assert queue.get(job["id"])["error"] == "ElevenLabs timeout"
+
+
+def test_expired_lease_is_picked_up_by_another_worker(tmp_path):
+    queue = _queue(tmp_path, visibility_timeout=0)
+    job = queue.enqueue("content_workflow", {})
+    queue.claim(["content_workflow"], "dead-worker")
+    time.sleep(0.01)
+
+    reclaimed = queue.claim(["content_workflow"], "worker-2")
+    assert reclaimed["id"] == job["id"]
+    assert reclaimed["worker_id"] == "worker-2"
+    # The first worker lost its lease and can't overwrite the outcome
+    assert not queue.complete(job["id"], "dead-worker", {"success": True})
+    assert queue.complete(job["id"], "worker-2", {"success": True})
+
+
+def test_expired_lease_without_attempts_left_fails(tmp_path):
+    queue = _queue(tmp_path, visibility_timeout=0)
+    job = queue.enqueue("video_generation", {}, max_attempts=2)
+    queue.claim(["video_generation"], "dead-worker")
+    time.sleep(0.01)
+    queue.claim(["video_generation"], "worker-2")
+    time.sleep(0.01)
+
+    # Both workers died, the job isn't leased a third time
+    assert queue.claim(["video_generation"], "worker-3") is None
+    stored = queue.get(job["id"])
+    assert stored["status"] == "failed" and stored["attempts"] == 2
+    assert stored["error"] == "Lease expired after 2 attempts, the worker stopped responding"
+    assert not queue.complete(job["id"], "worker-2", {"success": True})
+
+
+def test_worker_respects_concurrency_per_job_type(tmp_path):
+    queue = _queue(tmp_path)
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def handler(payload):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return {"success": True, "n": payload["n"]}
+
+    for n in range(6):
+        queue.enqueue("voice_over", {"n": n})
+    queue.enqueue("video_generation", {"n": 99}, max_attempts=1)
+
+    worker = JobWorker(queue, {
+        "voice_over": JobType("voice_over", handler, concurrency=2),
+        "video_generation": JobType("video_generation", lambda payload: {"success": False, "error": "no ffmpeg"})
+    }, poll_interval=0.01)
+    worker.start()
+    try:
+        deadline = time.time() + 5
+        while time.time() < deadline and len(queue.list(status="succeeded")) < 6:
+            time.sleep(0.02)
+    finally:
+        worker.stop(timeout=2)
+
+    assert len(queue.list(status="succeeded")) == 6
+    assert peak[0] == 2
+    failed = queue.list(job_type="video_generation")[0]
+    assert failed["status"] == "failed" and failed["error"] == "no ffmpeg"
+
+
+def test_parse_concurrency():
+    assert parse_concurrency("video_generation=1, voice_over=3,bad,x=") == {"video_generation": 1, "voice_over": 3}
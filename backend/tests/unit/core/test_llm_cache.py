@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent LLM response cache
+"""
+
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from app.core.llm_cache import LLMResponseCache
+
+AGENT = {"role": "Q&A", "goal": "Answer", "backstory": "Expert", "tools": []}
+
+
+def test_key_is_tenant_and_temperature_aware():
+    """Different tenants, temperatures or agent configs never share entries"""
+    base = LLMResponseCache.make_key("gpt-4o-mini", "Explain cycle 3", AGENT, 0.7, "org-1")
+
+    assert base == LLMResponseCache.make_key("gpt-4o-mini", "Explain cycle 3", AGENT, 0.7, "org-1")
+    assert base != LLMResponseCache.make_key("gpt-4o-mini", "Explain cycle 3", AGENT, 0.7, "org-2")
+    assert base != LLMResponseCache.make_key("gpt-4o-mini", "Explain cycle 3", AGENT, 0.2, "org-1")
+    assert base != LLMResponseCache.make_key("gpt-4o", "Explain cycle 3", AGENT, 0.7, "org-1")
+    assert base != LLMResponseCache.make_key("gpt-4o-mini", "Explain cycle 3", {**AGENT, "goal": "Other"}, 0.7, "org-1")
+
+
+def test_hit_miss_and_ttl(tmp_path):
+    """Entries expire after their TTL and lookups are counted"""
+    cache = LLMResponseCache(str(tmp_path / "cache.db"))
+    cache.set("k1", "answer", task_name="answer_question_task", ttl=60)
+    cache.set("k2", "stale", task_name="answer_question_task", ttl=-1)
+
+    assert cache.get("k1", "answer_question_task") == "answer"
+    assert cache.get("k2", "answer_question_task") is None
+    assert cache.get("k3", "knowledge_overview_task") is None
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["by_task"]["answer_question_task"]["hit_rate"] == 0.5
+    assert stats["entries"] == 1
+
+
+def test_lru_eviction(tmp_path):
+    """The least recently used entry is evicted when over capacity"""
+    cache = LLMResponseCache(str(tmp_path / "cache.db"), max_entries=2)
+    cache.set("a", "1")
+    time.sleep(0.01)
+    cache.set("b", "2")
+    time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    cache.set("c", "3")
+
+    assert cache.get("a") == "1"
+    assert cache.get("b") is None
+    assert cache.get("c") == "3"
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_invalidate_by_tenant(tmp_path):
+    """Invalidation can be limited to one organization"""
+    cache = LLMResponseCache(str(tmp_path / "cache.db"))
+    cache.set("a", "1", organization_id="org-1")
+    cache.set("b", "2", organization_id="org-2")
+
+    assert cache.invalidate(organization_id="org-1") == 1
+    assert cache.get("a") is None
+    assert cache.get("b") == "2"
+
+
+def test_only_tasks_that_opted_in_are_cached(tmp_path, monkeypatch):
+    """Tasks using tools or live data are run every time unless tasks.yaml opts them in"""
+    from types import SimpleNamespace
+    from app.agents.crews import base_crew
+    from app.agents.crews.base_crew import BaseCrew
+
+    cache = LLMResponseCache(str(tmp_path / "cache.db"))
+    monkeypatch.setattr(base_crew, "get_llm_cache", lambda: cache)
+    crew = BaseCrew()
+    agent = SimpleNamespace(llm="gpt-4o-mini", tools=[], **{k: v for k, v in AGENT.items() if k != "tools"})
+    runs = []
+
+    def execute(task, *args, **kwargs):
+        runs.append(task.description)
+        return f"answer {len(runs)}"
+
+    def task(name, description):
+        task = SimpleNamespace(description=description, expected_output="Text")
+        crew.configure_task(task, name, cache=crew.tasks_config.get(name, {}).get("cache", False))
+        return task
+
+    answer = task("answer_question_task", "Explain cycle 3")
+    search = task("search_images_task", "Find images for cycle 3")
+    results = [crew._execute_task_cached(agent, execute, t) for t in (answer, answer, search, search)]
+
+    assert results == ["answer 1", "answer 1", "answer 2", "answer 3"]
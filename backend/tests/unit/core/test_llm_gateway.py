@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM gateway's rate limiting, 429 retries and usage recording
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import pytest
+
+from app.core.cost_tracker import CostTracker, collect_costs, cost_attribution
+from app.core.llm_gateway import (
+    LLMGateway, RateLimiter, _is_rate_limited, llm_priority, parse_rate_limits
+)
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FakeLLM:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = 0
+
+    def call(self, messages, callbacks=None):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RateLimitError("Rate limit reached for gpt-4o-mini")
+        return "ok"
+
+
+class NativeLLM:
+    """Counts usage on the instance, like crewai's native provider LLMs"""
+    model = "gpt-4o-mini"
+
+    def __init__(self):
+        self.total_tokens = 0
+
+    def _track_token_usage_internal(self, usage_data):
+        self.total_tokens += usage_data["prompt_tokens"] + usage_data["completion_tokens"]
+
+    def call(self, messages, tools=None, callbacks=None, from_agent=None, from_task=None):
+        time.sleep(0.01)
+        self._track_token_usage_internal({"prompt_tokens": len(messages), "completion_tokens": 10})
+        return "ok"
+
+
+class Role:
+    role = "Structure Specialist"
+
+
+def test_requests_wait_for_the_bucket_to_refill():
+    # 600 requests per minute refill one request every 0.1s
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=10**6, reserve=0)
+    limiter.requests.level = 1
+
+    assert limiter.acquire(10) < 0.01
+    waited = limiter.acquire(10)
+    assert 0.05 < waited < 0.3
+    assert limiter.get_stats()["throttled"] == 1
+
+
+def test_batch_calls_leave_the_reserve_to_interactive_calls():
+    limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=1000, reserve=0.2)
+    limiter.tokens.level = 150
+
+    # Interactive calls may use the reserve, batch calls would have to wait for a refill
+    assert limiter.acquire(100, "interactive") < 0.01
+    assert limiter.tokens.wait_time(40, limiter._floor(limiter.tokens, 2)) > 0
+
+
+def test_interactive_waiters_go_before_batch():
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=10**6, reserve=0)
+    limiter.requests.level = 0
+    order = []
+
+    def run(priority):
+        limiter.acquire(1, priority)
+        order.append(priority)
+
+    batch = threading.Thread(target=run, args=("batch",))
+    batch.start()
+    time.sleep(0.02)
+    interactive = threading.Thread(target=run, args=("interactive",))
+    interactive.start()
+    batch.join(2)
+    interactive.join(2)
+
+    assert order == ["interactive", "batch"]
+
+
+def test_rate_limited_calls_are_retried_with_backoff():
+    gateway = LLMGateway(requests_per_minute=6000, tokens_per_minute=10**6,
+                         max_retries=3, retry_backoff_seconds=0.01)
+    llm = FakeLLM(failures=2)
+    gateway.wrap(llm, "gpt-4o-mini")
+
+    assert llm.call([{"role": "user", "content": "Hallo"}]) == "ok"
+    assert llm.calls == 3
+    stats = gateway.get_stats()["models"]["gpt-4o-mini"]
+    assert stats["rate_limited"] == 2 and stats["requests"] == 3
+
+
+def test_retries_give_up_and_other_errors_are_not_retried():
+    gateway = LLMGateway(max_retries=1, retry_backoff_seconds=0.01)
+    llm = FakeLLM(failures=5)
+    gateway.wrap(llm, "gpt-4o-mini")
+    with pytest.raises(RateLimitError):
+        llm.call("Hallo")
+    assert llm.calls == 2
+
+    def broken():
+        raise ValueError("bad request")
+    with pytest.raises(ValueError):
+        gateway.execute("gpt-4o-mini", broken, tokens=10)
+    assert gateway.get_stats()["models"]["gpt-4o-mini"]["requests"] == 3
+
+
+def test_only_rate_limit_errors_count_as_429():
+    class ProviderError(Exception):
+        def __init__(self, message, code=None):
+            super().__init__(message)
+            self.code = code
+
+    assert _is_rate_limited(RateLimitError("slow down"))
+    assert _is_rate_limited(ProviderError("quota", code="rate_limit_exceeded"))
+    assert not _is_rate_limited(ValueError("prompt mentions 429 and rate limit"))
+    assert not _is_rate_limited(ProviderError("invalid", code="invalid_request_error"))
+
+
+def test_close_closes_sync_and_async_clients():
+    closed = []
+
+    class SyncClient:
+        def close(self):
+            closed.append("sync")
+
+    class AsyncClient:
+        async def close(self):
+            closed.append("async")
+
+    gateway = LLMGateway()
+    gateway._clients[("gpt-4o-mini", "key")] = (SyncClient(), AsyncClient())
+    gateway.close()
+    assert closed == ["sync", "async"] and gateway.get_stats()["pooled_clients"] == 0
+
+    gateway._clients[("gpt-4o-mini", "key")] = (SyncClient(), AsyncClient())
+    asyncio.run(gateway.aclose())
+    assert closed == ["sync", "async"] * 2
+
+
+def test_priority_override_and_limit_parsing():
+    with pytest.raises(ValueError):
+        with llm_priority("urgent"):
+            pass
+    assert parse_rate_limits("gpt-4o-mini=500:200000, broken ,gpt-4=100:40000") == {
+        "gpt-4o-mini": (500, 200000),
+        "gpt-4": (100, 40000)
+    }
+
+
+def test_usage_of_each_call_is_recorded(tmp_path):
+    tracker = CostTracker(storage_dir=str(tmp_path))
+    gateway = LLMGateway(requests_per_minute=6000, tokens_per_minute=10**6, cost_tracker=tracker)
+    llm = NativeLLM()
+    gateway.wrap(llm, "gpt-4o-mini")
+
+    # Agents without cost attribution are named after the crewai agent making the call
+    llm.call("x" * 100, from_agent=Role())
+    with cost_attribution(agent_name="qa_agent", organization_id="org-1"):
+        llm.call("x" * 50, from_agent=Role())
+
+    summary = tracker.get_session_summary()
+    assert summary["by_agent"]["Structure Specialist"]["tokens"] == 110
+    assert summary["by_agent"]["qa_agent"]["tokens"] == 60
+    assert summary["by_organization"]["org-1"]["requests"] == 1
+
+
+def test_concurrent_runs_collect_only_their_own_calls(tmp_path):
+    tracker = CostTracker(storage_dir=str(tmp_path))
+    gateway = LLMGateway(requests_per_minute=6000, tokens_per_minute=10**6, cost_tracker=tracker)
+    # One LLM shared by both runs, like an agent singleton's
+    llm = NativeLLM()
+    gateway.wrap(llm, "gpt-4o-mini")
+    collected = {}
+
+    def run(name, prompt_tokens):
+        with collect_costs() as run_costs:
+            for _ in range(5):
+                llm.call("x" * prompt_tokens)
+        collected[name] = run_costs.total_tokens
+
+    threads = [threading.Thread(target=run, args=("a", 100)), threading.Thread(target=run, args=("b", 200))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert collected == {"a": 5 * 110, "b": 5 * 210}
+    assert tracker.get_session_summary()["total_tokens"] == 5 * 110 + 5 * 210
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for the content-addressed media cache
+"""
+
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from app.core.media_cache import MediaCache, media_key
+
+
+class _ObjectStore:
+    bucket = "media-cache"
+
+    def __init__(self):
+        self.objects = {}
+
+    def download(self, name):
+        return self.objects.get(name)
+
+    def upload(self, name, path):
+        with open(path, 'rb') as f:
+            self.objects[name] = f.read()
+
+
+def _file(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_keys_address_inputs_by_content(tmp_path):
+    image = _file(tmp_path / "image.jpg", b"pixels")
+    copy = _file(tmp_path / "copy.jpg", b"pixels")
+    key = media_key("generated_video", {"duration": 5, "options": {"a": 1, "b": 2}}, files=[image])
+
+    assert key == media_key("generated_video", {"options": {"b": 2, "a": 1}, "duration": 5}, files=[copy])
+    assert key != media_key("generated_video", {"duration": 6, "options": {"a": 1, "b": 2}}, files=[image])
+    assert key != media_key("voice_over", {"duration": 5, "options": {"a": 1, "b": 2}}, files=[image])
+
+    # Same path, new contents
+    time.sleep(0.01)
+    _file(tmp_path / "image.jpg", b"other pixels")
+    assert key != media_key("generated_video", {"duration": 5, "options": {"a": 1, "b": 2}}, files=[image])
+
+
+def test_entries_are_copied_to_the_target(tmp_path):
+    cache = MediaCache(str(tmp_path / "cache"), 1 << 20)
+    source = _file(tmp_path / "render.mp4", b"video")
+    target = str(tmp_path / "out" / "video.mp4")
+
+    assert not cache.fetch("k1", target)
+    cache.put("k1", source)
+    assert cache.fetch("k1", target)
+    with open(target, 'rb') as f:
+        assert f.read() == b"video"
+
+    # Rewriting the output leaves the entry alone, and the suffix selects the entry
+    _file(tmp_path / "out" / "video.mp4", b"edited")
+    assert cache.fetch("k1", str(tmp_path / "again.mp4"))
+    assert (tmp_path / "again.mp4").read_bytes() == b"video"
+    assert not cache.fetch("k1", str(tmp_path / "poster.jpg"))
+    assert not [name for name in os.listdir(tmp_path / "out") if name.endswith(".tmp")]
+
+    stats = cache.get_stats()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (1, 2, 2)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = MediaCache(str(tmp_path / "cache"), 250)
+    for key in ("a", "b"):
+        cache.put(key, _file(tmp_path / f"{key}.bin", key.encode() * 100))
+    time.sleep(0.01)
+    assert cache.fetch("a", str(tmp_path / "a-out.bin"))
+
+    cache.put("c", _file(tmp_path / "c.bin", b"c" * 100))
+
+    assert not cache.fetch("b", str(tmp_path / "b-out.bin"))
+    assert cache.fetch("a", str(tmp_path / "a-out.bin"))
+    assert cache.fetch("c", str(tmp_path / "c-out.bin"))
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1 and stats["size_bytes"] <= 250
+
+
+def test_entries_are_shared_through_the_object_store(tmp_path):
+    object_store = _ObjectStore()
+    first = MediaCache(str(tmp_path / "host-1"), 1 << 20, object_store)
+    second = MediaCache(str(tmp_path / "host-2"), 1 << 20, object_store)
+
+    first.put("k1", _file(tmp_path / "voice.mp3", b"audio"))
+    assert second.fetch("k1", str(tmp_path / "out.mp3"))
+    assert (tmp_path / "out.mp3").read_bytes() == b"audio"
+    assert second.get_stats()["remote_hits"] == 1
+
+    # Downloaded entries are served locally afterwards
+    assert second.fetch("k1", str(tmp_path / "out-2.mp3"))
+    assert second.get_stats()["hits"] == 1
+
+
+def test_small_entries_as_bytes(tmp_path):
+    cache = MediaCache(str(tmp_path / "cache"), 1 << 20)
+
+    assert cache.get_bytes("k1", ".json") is None
+    cache.put_bytes("k1", b'{"segments": []}', ".json")
+    assert cache.get_bytes("k1", ".json") == b'{"segments": []}'
+    # The temporary files are gone
+    assert not [name for name in os.listdir(tmp_path / "cache") if name.startswith(("read-", "write-"))]
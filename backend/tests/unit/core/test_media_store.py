@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for the media metadata store
+"""
+
+import json
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from app.core.media_store import MediaMetadataStore
+
+
+def test_items_are_found_by_key_and_id(tmp_path):
+    store = MediaMetadataStore(str(tmp_path / "metadata.db"))
+    store.put("videos", {"id": "v1", "title": "Eins"}, key="hash-1")
+
+    assert store.get("videos", "hash-1")["title"] == "Eins"
+    assert store.find("videos", "v1")["title"] == "Eins"
+    assert store.get("composed_posts", "hash-1") is None
+
+    # Same key replaces the item
+    store.put("videos", {"id": "v1", "title": "Neu"}, key="hash-1")
+    assert store.count("videos") == 1
+    assert store.delete("videos", "v1")["title"] == "Neu"
+    assert store.delete("videos", "v1") is None
+
+
+def test_list_filters_and_order(tmp_path):
+    store = MediaMetadataStore(str(tmp_path / "metadata.db"))
+    store.put("posts", {"id": "a", "period": "Energie", "created_at": "2024-01-01T10:00:00"})
+    store.put("posts", {"id": "b", "period": "Umsicht", "created_at": "2024-01-02T10:00:00"})
+    store.put("posts", {"id": "c", "period": "Energie", "created_at": "2024-01-03T10:00:00"})
+
+    assert [item["id"] for item in store.list("posts")] == ["a", "b", "c"]
+    assert [item["id"] for item in store.list("posts", filters={"period": "Energie"})] == ["a", "c"]
+    assert [item["id"] for item in store.list("posts", limit=2, newest_first=True)] == ["c", "b"]
+
+
+def test_legacy_files_are_migrated_once(tmp_path):
+    store = MediaMetadataStore(str(tmp_path / "metadata.db"))
+    legacy = tmp_path / "videos_storage.json"
+    legacy.write_text(json.dumps({
+        "videos": [{"id": "v1", "title": "Eins"}, {"id": "v2", "title": "Zwei"}],
+        "by_hash": {"hash-1": {"id": "v1", "title": "Eins"}},
+    }))
+
+    assert store.migrate_json_file("videos", str(legacy), list_key="videos") == 2
+    assert store.get("videos", "hash-1")["id"] == "v1"
+    assert store.find("videos", "v2")["title"] == "Zwei"
+    assert not legacy.exists() and (tmp_path / "videos_storage.json.migrated").exists()
+
+    legacy.write_text(json.dumps({"videos": [{"id": "v3"}]}))
+    assert store.migrate_json_file("videos", str(legacy), list_key="videos") == 0
+    assert store.count("videos") == 2
+
+
+def test_adapter_entries_stay_in_a_shared_file(tmp_path):
+    """The JSON storage adapter writes to some of the same files"""
+    store = MediaMetadataStore(str(tmp_path / "metadata.db"))
+    shared = tmp_path / "workflows_storage.json"
+    shared.write_text(json.dumps({
+        "workflows": [{"id": "w1"}],
+        "8f1c": {"id": "8f1c", "status": "completed"},
+    }))
+
+    assert store.migrate_json_file("workflows", str(shared), list_key="workflows") == 1
+    assert json.loads(shared.read_text()) == {"8f1c": {"id": "8f1c", "status": "completed"}}
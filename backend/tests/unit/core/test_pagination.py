@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for keyset pagination helpers
+"""
+
+import base64
+import json
+import os
+import sys
+import uuid
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import (
+    apply_keyset, decode_cursor, encode_cursor, parse_fields, project_fields,
+    select_columns, split_page
+)
+
+
+class RecordingQuery:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return record
+
+
+ROW_ID = "8c1f4a52-3d1e-4b7a-9f0e-2a6b5c4d3e21"
+
+
+def _raw_cursor(created_at, row_id):
+    return base64.urlsafe_b64encode(json.dumps([created_at, row_id]).encode()).decode()
+
+
+def test_cursor_round_trip_and_invalid_cursor():
+    """Cursors are opaque but decode back to the keyset position"""
+    cursor = encode_cursor({"created_at": "2025-03-01T10:00:00+00:00", "id": ROW_ID})
+    assert decode_cursor(cursor) == ("2025-03-01T10:00:00+00:00", ROW_ID)
+
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize("created_at,row_id", [
+    ("2025-03-01T10:00:00+00:00", "abc,created_at.gt.2000-01-01"),
+    ('2025-03-01",id.neq.0,created_at.eq."', ROW_ID),
+    (12345, ROW_ID),
+])
+def test_cursor_fields_must_be_a_timestamp_and_uuid(created_at, row_id):
+    """Cursor fields end up in the filter, so anything else is rejected"""
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(_raw_cursor(created_at, row_id))
+    assert exc.value.status_code == 400
+
+
+def test_keyset_query_starts_after_cursor():
+    """Pages are ordered by (created_at, id) and fetch one extra row"""
+    query = RecordingQuery()
+    cursor = encode_cursor({"created_at": "2025-03-01T10:00:00+00:00", "id": ROW_ID})
+    apply_keyset(query, cursor, limit=25)
+
+    assert query.calls[0] == ("or_", (
+        'created_at.lt."2025-03-01T10:00:00+00:00",'
+        f'and(created_at.eq."2025-03-01T10:00:00+00:00",id.lt.{ROW_ID})',
+    ), {})
+    assert query.calls[1:] == [
+        ("order", ("created_at",), {"desc": True}),
+        ("order", ("id",), {"desc": True}),
+        ("limit", (26,), {})
+    ]
+
+
+def test_split_page_builds_next_cursor_only_when_more_rows():
+    ids = [str(uuid.UUID(int=i)) for i in range(3)]
+    rows = [{"id": ids[i], "created_at": f"2025-01-{30 - i:02d}"} for i in range(3)]
+
+    page, next_cursor = split_page(rows, limit=2)
+    assert [row["id"] for row in page] == ids[:2]
+    assert decode_cursor(next_cursor) == ("2025-01-29", ids[1])
+
+    assert split_page(rows, limit=3) == (rows, None)
+
+
+def test_field_projection():
+    """Unknown fields are rejected and the cursor columns are always selected"""
+    allowed = ("id", "title", "status", "created_at", "goal_title")
+    fields = parse_fields("title, goal_title", allowed)
+
+    assert fields == ["title", "goal_title"]
+    assert select_columns(fields, ("id", "title", "status", "created_at"), "goals!inner(id)") == \
+        "id, title, created_at, goals!inner(id)"
+    assert select_columns(None, ("id",)) == "*"
+    assert project_fields({"id": 1, "title": "Ship", "status": "pending"}, ["title"]) == {"title": "Ship"}
+
+    with pytest.raises(HTTPException):
+        parse_fields("title,password", allowed)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests for crew prompt token budgets
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from app.core.prompt_budget import (
+    PromptBudgetMetrics, TRUNCATION_MARKER, count_tokens, fit_inputs, truncate_to_tokens
+)
+
+TEMPLATE = "Frage: {question}\n\nKontext aus der Wissensdatenbank:\n{context}\n\nAntworte auf Deutsch."
+MODEL = "gpt-4o-mini"
+
+
+def _chunks(count):
+    return "\n\n".join(f"Abschnitt {i}: " + "Die sieben Zyklen des Lebens. " * 20 for i in range(count))
+
+
+def test_inputs_within_budget_are_untouched():
+    values, report = fit_inputs(TEMPLATE, {"question": "Was ist Energie?", "context": "kurz"}, 1000, MODEL)
+
+    assert values == {"question": "Was ist Energie?", "context": "kurz"}
+    assert report["trimmed"] == []
+    assert report["prompt_tokens"] == count_tokens(TEMPLATE.format(**values), MODEL)
+
+
+def test_large_input_is_trimmed_and_small_input_kept():
+    question = "Wie hängen die Zyklen zusammen?"
+    values, report = fit_inputs(TEMPLATE, {"question": question, "context": _chunks(30)}, 400, MODEL)
+
+    prompt = TEMPLATE.format(**values)
+    assert values["question"] == question
+    assert report["trimmed"] == ["context"]
+    assert report["tokens_removed"] > 0
+    assert count_tokens(prompt, MODEL) <= 400
+    # The most relevant chunks come first and are kept
+    assert values["context"].startswith("Abschnitt 0:")
+    assert values["context"].endswith(TRUNCATION_MARKER)
+
+
+def test_structured_inputs_are_compact_json():
+    values, _ = fit_inputs("{goals}", {"goals": [{"title": "Launch", "priority": "high"}]}, None, MODEL)
+    assert values["goals"] == '[{"title":"Launch","priority":"high"}]'
+
+
+def test_truncation_ends_on_a_paragraph():
+    text = _chunks(10)
+    shortened = truncate_to_tokens(text, count_tokens(text, MODEL) // 2, MODEL)
+
+    body = shortened[:-len(TRUNCATION_MARKER)]
+    assert text.startswith(body)
+    assert text[len(body):].lstrip(" ").startswith("\n\n")
+
+
+def test_metrics_report_budget_use():
+    metrics = PromptBudgetMetrics()
+    metrics.record("answer_question_task", {"prompt_tokens": 300, "budget": 600, "trimmed": [], "tokens_removed": 0})
+    metrics.record("answer_question_task", {"prompt_tokens": 600, "budget": 600, "trimmed": ["context"], "tokens_removed": 250})
+
+    stats = metrics.get_stats()
+    task = stats["by_task"]["answer_question_task"]
+    assert stats["prompts"] == 2 and stats["trimmed"] == 1 and stats["tokens_removed"] == 250
+    assert task["avg_tokens"] == 450.0
+    assert task["budget_used"] == 1.0
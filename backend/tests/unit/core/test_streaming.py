@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for Server-Sent Events streaming of agent calls
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from fastapi import HTTPException
+
+from app.core.streaming import emit_event, is_streaming, stream_agent_call
+
+
+def _collect(func, *args, **kwargs):
+    async def run():
+        return [message async for message in stream_agent_call(func, *args, **kwargs)]
+
+    events = []
+    for message in asyncio.run(run()):
+        event_line, data_line = message.strip().split("\n")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+def test_sync_call_streams_events_then_result():
+    """Events emitted inside the call arrive before the transformed result"""
+    def answer(question):
+        assert is_streaming()
+        emit_event("retrieval", context="cycle docs")
+        emit_event("token", content="Hello")
+        return {"success": True, "answer": f"Answer to {question}"}
+
+    events = _collect(answer, "why?", result_transform=lambda result: {"answer": result["answer"]})
+
+    assert events == [
+        ("retrieval", {"context": "cycle docs"}),
+        ("token", {"content": "Hello"}),
+        ("result", {"answer": "Answer to why?"})
+    ]
+
+
+def test_async_call_and_error_event():
+    """Coroutine functions are supported and failed results end with an error event"""
+    async def generate(count):
+        emit_event("agent_step", status="started")
+        return {"success": False, "error": f"failed {count}"}
+
+    def check(result):
+        if not result["success"]:
+            raise HTTPException(status_code=500, detail=result["error"])
+        return result
+
+    events = _collect(generate, count=3, result_transform=check)
+
+    assert events == [
+        ("agent_step", {"status": "started"}),
+        ("error", {"detail": "failed 3"})
+    ]
+
+
+def test_emit_outside_stream_is_noop():
+    """Agents can always emit; nothing happens without a streaming request"""
+    assert not is_streaming()
+    emit_event("token", content="ignored")
+
+
+def test_shared_llm_streams_only_for_streaming_requests():
+    """Token streaming is switched on per call, never on the shared LLM"""
+    from app.agents.crews.base_crew import BaseCrew
+    from app.core.llm_gateway import create_llm
+
+    llm = create_llm("gpt-4o-mini", api_key="sk-test")
+    seen = []
+
+    def call(messages, *args, **kwargs):
+        seen.append((messages, llm._effective_stream()))
+        if messages == "streamed":
+            # A concurrent request on the same LLM (a thread with its own context)
+            thread = threading.Thread(target=llm.call, args=("plain",))
+            thread.start()
+            thread.join()
+        return "ok"
+    call._gateway = True
+    object.__setattr__(llm, "call", call)
+    BaseCrew.__new__(BaseCrew)._instrument_llm(llm, "qa_agent")
+
+    _collect(lambda: {"answer": llm.call("streamed")})
+
+    assert seen == [("streamed", True), ("plain", False)]
+    assert llm.stream is False
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Tests for dependency-graph workflow execution
+"""
+
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import pytest
+
+from app.core.workflow_graph import WorkflowGraph, WorkflowStep
+
+
+def _step(name, data=None, delay=0.0, success=True):
+    def run(results):
+        time.sleep(delay)
+        return {"step": name, "success": success, "data": data if data is not None else name,
+                "error": None if success else f"{name} failed"}
+    return run
+
+
+def test_independent_steps_run_concurrently():
+    """Two 0.2s branches finish in roughly 0.2s, not 0.4s"""
+    graph = WorkflowGraph([
+        WorkflowStep("a", _step("a", delay=0.2), result_key="a"),
+        WorkflowStep("b", _step("b", delay=0.2), result_key="b"),
+        WorkflowStep("c", lambda results: {"success": True, "data": results["a"] + results["b"]},
+                     depends_on=("a", "b"), result_key="c"),
+    ])
+    results = {}
+
+    start = time.perf_counter()
+    records = graph.run(results, max_concurrency=2)
+    elapsed = time.perf_counter() - start
+
+    assert [record["step"] for record in records][-1] == "c"
+    assert results == {"a": "a", "b": "b", "c": "ab"}
+    assert elapsed < 0.35
+
+
+def test_concurrency_cap_is_respected():
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def run(results):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return {"success": True, "data": None}
+
+    graph = WorkflowGraph([WorkflowStep(f"s{i}", run) for i in range(6)])
+    records = graph.run({}, max_concurrency=2)
+
+    assert len(records) == 6
+    assert peak[0] == 2
+
+
+def test_failure_stops_dependent_steps_but_keeps_finished_work():
+    graph = WorkflowGraph([
+        WorkflowStep("a", _step("a", success=False), result_key="a"),
+        WorkflowStep("b", _step("b", delay=0.05), result_key="b"),
+        WorkflowStep("c", _step("c"), depends_on=("a",), result_key="c"),
+    ])
+    results = {}
+    records = graph.run(results, max_concurrency=2)
+
+    steps = {record["step"]: record for record in records}
+    assert not steps["a"]["success"]
+    assert steps["b"]["success"] and results["b"] == "b"
+    assert "c" not in steps
+
+
+def test_step_timeout_fails_the_step():
+    graph = WorkflowGraph([
+        WorkflowStep("slow", _step("slow", delay=1.0), timeout=0.1),
+    ])
+    start = time.perf_counter()
+    records = graph.run({})
+
+    assert time.perf_counter() - start < 0.5
+    assert records[0]["success"] is False
+    assert "timed out" in records[0]["error"]
+
+
+def test_exceptions_become_failed_records():
+    def boom(results):
+        raise RuntimeError("no images")
+
+    records = WorkflowGraph([WorkflowStep("images", boom)]).run({})
+    assert records[0] == {"step": "images", "success": False, "error": "no images",
+                          "duration_seconds": records[0]["duration_seconds"]}
+
+
+def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError):
+        WorkflowGraph([WorkflowStep("a", _step("a"), depends_on=("missing",))])
+    with pytest.raises(ValueError):
+        WorkflowGraph([
+            WorkflowStep("a", _step("a"), depends_on=("b",)),
+            WorkflowStep("b", _step("b"), depends_on=("a",)),
+        ])
+
+
+def test_completed_steps_are_skipped():
+    """Resuming from a checkpoint only runs the steps that haven't succeeded"""
+    calls = []
+
+    def run(name):
+        def step(results):
+            calls.append(name)
+            return {"success": True, "data": f"{name}:{results.get('a')}"}
+        return step
+
+    graph = WorkflowGraph([
+        WorkflowStep("a", run("a"), result_key="a"),
+        WorkflowStep("b", run("b"), depends_on=("a",), result_key="b"),
+    ])
+    results = {"a": "saved"}
+    records = graph.run(results, completed=["a"])
+
+    assert calls == ["b"]
+    assert [record["step"] for record in records] == ["b"]
+    assert results["b"] == "b:saved"
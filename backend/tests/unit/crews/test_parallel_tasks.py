@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for running crew tasks in parallel along their dependencies
+"""
+
+import os
+import sys
+import time
+from types import SimpleNamespace
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import pytest
+
+from app.agents.crews.base_crew import BaseCrew
+
+
+class FakeCrew:
+    """Single crew run: each task sleeps, then outputs its name and its context"""
+
+    def __init__(self, tasks, log, delay):
+        self.tasks, self.log, self.delay = tasks, log, delay
+
+    def kickoff(self):
+        for task in self.tasks:
+            self.log.append(("start", task.name, time.perf_counter()))
+            time.sleep(self.delay)
+            if task.name == "broken":
+                raise RuntimeError("LLM unavailable")
+            context = [dep.output.raw for dep in task.context or []]
+            task.output = SimpleNamespace(raw=f"{task.name}<{','.join(context)}>")
+
+
+def _crew(process, delay=0.1):
+    crew = BaseCrew()
+    crew.crews_config = {"idea_crew": {"process": process, "max_concurrency": 3}}
+    log = []
+    crew.create_crew = lambda crew_name, agents, tasks: FakeCrew(tasks, log, delay)
+    return crew, log
+
+
+def _task(name, agent=None, context=None):
+    return SimpleNamespace(name=name, description=name, agent=agent or object(), context=context, output=None)
+
+
+def test_independent_tasks_fan_out():
+    crew, log = _crew("parallel")
+    refine = _task("refine")
+    validate = _task("validate", context=[refine])
+    generate = _task("generate", context=[refine])
+
+    start = time.perf_counter()
+    outputs = crew.run_tasks("idea_crew", [refine, validate, generate])
+    elapsed = time.perf_counter() - start
+
+    assert [output.raw for output in outputs] == ["refine<>", "validate<refine<>>", "generate<refine<>>"]
+    # refine, then validate and generate side by side
+    assert elapsed < 0.28
+
+
+def test_tasks_of_one_agent_take_turns():
+    crew, log = _crew("parallel", delay=0.05)
+    agent = object()
+    first, second = _task("first", agent=agent), _task("second", agent=agent)
+
+    crew.run_tasks("idea_crew", [first, second])
+
+    starts = sorted(entry[2] for entry in log)
+    assert starts[1] - starts[0] >= 0.045
+
+
+def test_sequential_crews_run_as_one_crew():
+    crew, log = _crew("sequential")
+    calls = []
+    create_crew = crew.create_crew
+    crew.create_crew = lambda crew_name, agents, tasks: calls.append(len(tasks)) or create_crew(crew_name, agents, tasks)
+
+    first = _task("first")
+    second = _task("second", context=[first])
+    outputs = crew.run_tasks("idea_crew", [first, second])
+
+    assert calls == [2]
+    assert outputs[1].raw == "second<first<>>"
+
+
+def test_failed_task_raises():
+    crew, _ = _crew("parallel", delay=0)
+    with pytest.raises(RuntimeError, match="LLM unavailable"):
+        crew.run_tasks("idea_crew", [_task("ok"), _task("broken")])
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for request contexts on shared agent instances
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import uuid
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from starlette.concurrency import run_in_threadpool
+
+from app.agents.crews.base_crew import BaseCrew
+from app.core.job_queue import JobQueue, JobType, JobWorker
+from app.models.auth import OrganizationRole, RequestContext
+
+
+def _context():
+    return RequestContext(user_id=uuid.uuid4(), organization_id=uuid.uuid4(), role=OrganizationRole.MEMBER)
+
+
+def test_concurrent_requests_keep_their_own_context():
+    agent = BaseCrew()
+    contexts = [_context() for _ in range(2)]
+    both_set = threading.Barrier(2)
+    seen = {}
+
+    def work(index):
+        # What the agent sees after the other request set its context too
+        both_set.wait(timeout=5)
+        seen[index] = agent.get_context()
+
+    async def request(index):
+        agent.set_context(contexts[index])
+        await run_in_threadpool(work, index)
+
+    async def main():
+        await asyncio.gather(request(0), request(1))
+
+    asyncio.run(main())
+
+    assert seen == {0: contexts[0], 1: contexts[1]}
+    # Nothing leaks outside the requests
+    assert agent.get_context() is None
+
+
+def test_agents_keep_separate_contexts():
+    first, second = BaseCrew(), BaseCrew()
+    context = _context()
+
+    first.set_context(context)
+
+    assert first.get_context() == context
+    assert second.get_context() is None
+    first._context = None
+
+
+def test_jobs_start_without_the_previous_job_context(tmp_path):
+    agent = BaseCrew()
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    context = _context()
+    seen = []
+
+    def handler(payload):
+        seen.append(agent.get_context())
+        if payload["set"]:
+            agent.set_context(context)
+        return {"success": True}
+
+    worker = JobWorker(queue, {"content_workflow": JobType("content_workflow", handler)})
+    for set_context in (True, False):
+        job = queue.enqueue("content_workflow", {"set": set_context})
+        worker.run_job(worker.job_types["content_workflow"], queue.claim(["content_workflow"], "worker-1"), "worker-1")
+        assert queue.get(job["id"])["status"] == "succeeded"
+
+    assert seen == [None, None]
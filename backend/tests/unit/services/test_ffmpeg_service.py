@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests for the ffmpeg execution service
+"""
+
+import asyncio
+import os
+import stat
+import sys
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import pytest
+
+from app.services import ffmpeg_service as module
+from app.services.ffmpeg_service import (
+    FFmpegService, parse_progress, render_workspace, resolve_ffmpeg_binary
+)
+
+# Stands in for ffmpeg: reports progress on stdout like `-progress pipe:1`
+FAKE_FFMPEG = f"""#!{sys.executable}
+import sys, time
+args = sys.argv[1:]
+steps = int(args[args.index("--steps") + 1]) if "--steps" in args else 3
+pause = float(args[args.index("--sleep") + 1]) if "--sleep" in args else 0.0
+if "--stdin" in args:
+    sys.stderr.write(f"read {{len(sys.stdin.buffer.read())}} bytes\\n")
+for step in range(1, steps + 1):
+    time.sleep(pause / steps)
+    print(f"frame={{step * 30}}\\nfps=30.0\\nout_time_us={{step * 1000000}}\\nspeed=1.5x")
+    print("progress=" + ("end" if step == steps else "continue"), flush=True)
+sys.stderr.write("encoder log\\n")
+sys.exit(int(args[args.index("--exit") + 1]) if "--exit" in args else 0)
+"""
+
+
+@pytest.fixture
+def service(tmp_path):
+    binary = tmp_path / "ffmpeg"
+    binary.write_text(FAKE_FFMPEG)
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+    service = FFmpegService(binary=str(binary), max_concurrent=2, timeout=10)
+    yield service
+    service.close()
+
+
+def test_progress_is_parsed():
+    progress = parse_progress({"frame": "90", "out_time_ms": "1500000", "speed": "2x", "progress": "continue"}, 6)
+    assert progress["frame"] == 90 and progress["out_time"] == 1.5
+    assert progress["percent"] == 25.0 and not progress["done"]
+    assert parse_progress({"out_time_us": "N/A", "progress": "end"})["out_time"] is None
+
+
+def test_run_reports_progress_and_result(service):
+    snapshots = []
+    result = service.run_sync(["--steps", "3"], duration=3, on_progress=snapshots.append)
+
+    assert result.success and "encoder log" in result.stderr
+    assert [snapshot["percent"] for snapshot in snapshots] == [33.3, 66.7, 100.0]
+    assert result.progress["done"]
+
+    failed = service.run_sync(["--exit", "1"])
+    assert failed.returncode == 1 and not failed.success
+    assert service.get_stats()["failed"] == 1
+
+
+def test_jobs_beyond_the_limit_are_queued(service):
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(service.run_sync(["--sleep", "0.6"])))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.3)
+    stats = service.get_stats()
+    for thread in threads:
+        thread.join()
+
+    assert stats["running"] == 2 and stats["queue_depth"] == 2
+    assert all(result.success for result in results)
+    assert service.get_stats()["completed"] == 4
+
+
+def test_frames_are_streamed_to_stdin(service):
+    frames = (bytes([i]) * 12 for i in range(5))
+    result = service.run_sync(["--stdin"], frames=frames)
+    assert result.success and "read 60 bytes" in result.stderr
+
+    def broken():
+        yield b"\0" * 12
+        raise ValueError("no image")
+
+    failed = service.run_sync(["--stdin"], frames=broken())
+    assert not failed.success and "Frame source failed: no image" in failed.stderr
+
+
+def test_timeouts_kill_the_process(service):
+    started = time.monotonic()
+    result = service.run_sync(["--sleep", "5"], timeout=0.3)
+
+    assert result.timed_out and not result.success
+    assert time.monotonic() - started < 2
+    assert service.get_stats()["timed_out"] == 1
+
+
+def test_jobs_can_be_cancelled(service):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(service.run_sync(["--sleep", "5"], job_id="job-1")))
+    thread.start()
+    time.sleep(0.3)
+    assert service.cancel("job-1")
+    thread.join(timeout=2)
+
+    assert results and results[0].cancelled
+    assert not service.cancel("job-1")
+
+    # Cancelling the awaiting task kills the process as well
+    async def cancelled_run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(service.run(["--sleep", "5"]), 0.3)
+
+    asyncio.run(cancelled_run())
+    time.sleep(0.2)
+    assert service.get_stats()["running"] == 0
+    assert service.get_stats()["cancelled"] == 2
+
+
+def test_workspaces_are_separate_and_removed(monkeypatch, tmp_path):
+    monkeypatch.setattr(module.settings, "RENDER_TMP_DIR", str(tmp_path / "render"))
+    with render_workspace() as first, render_workspace() as second:
+        assert first != second
+        assert os.path.dirname(first) == str(tmp_path / "render")
+        open(os.path.join(first, "frame.jpg"), "wb").close()
+
+    assert not os.path.exists(first) and not os.path.exists(second)
+
+
+
+def test_bundled_binary_is_used_without_ffmpeg_on_path(monkeypatch, tmp_path):
+    import imageio_ffmpeg
+    monkeypatch.setattr(module.shutil, "which", lambda name: None)
+    monkeypatch.setattr(imageio_ffmpeg, "get_ffmpeg_exe", lambda: str(tmp_path / "bundled"))
+
+    assert FFmpegService().binary == str(tmp_path / "bundled")
+    assert resolve_ffmpeg_binary("/opt/ffmpeg") == "/opt/ffmpeg"
+
+    monkeypatch.setattr(module.shutil, "which", lambda name: "/usr/bin/ffmpeg")
+    assert resolve_ffmpeg_binary() == "/usr/bin/ffmpeg"
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests for the semantic Q&A answer cache
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from app.services.qa_answer_cache import SemanticAnswerCache
+
+
+def test_returns_nearest_answer_above_threshold():
+    """Close questions reuse the answer, unrelated ones miss"""
+    cache = SemanticAnswerCache()
+    scope = cache.make_scope("org-1", "project-1", "kb-v1")
+    cache.add(scope, [1.0, 0.0, 0.0], {"answer": "Cycle 1 is about growth", "interaction_id": "i1"})
+    cache.add(scope, [0.0, 1.0, 0.0], {"answer": "Cycle 2 is about rest", "interaction_id": "i2"})
+
+    hit = cache.find(scope, [0.99, 0.05, 0.0], threshold=0.95)
+    assert hit["interaction_id"] == "i1"
+    assert hit["similarity"] > 0.95
+
+    assert cache.find(scope, [0.6, 0.6, 0.5], threshold=0.95) is None
+    assert cache.get_stats()["hits"] == 1
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_scopes_isolate_tenants_and_kb_versions():
+    """Other tenants and reindexed knowledge bases never see old answers"""
+    cache = SemanticAnswerCache()
+    scope = cache.make_scope("org-1", None, "kb-v1")
+    cache.add(scope, [1.0, 0.0], {"answer": "org-1 answer"})
+
+    assert cache.find(cache.make_scope("org-2", None, "kb-v1"), [1.0, 0.0], 0.9) is None
+    assert cache.find(cache.make_scope("org-1", None, "kb-v2"), [1.0, 0.0], 0.9) is None
+
+    assert cache.invalidate("org-1") == 1
+    assert cache.find(scope, [1.0, 0.0], 0.9) is None
+
+
+def test_warm_load_and_bounded_entries():
+    """Warm-loaded entries are searchable and the oldest are dropped past the limit"""
+    cache = SemanticAnswerCache(max_entries_per_scope=2)
+    scope = cache.make_scope("org-1", None, "kb-v1")
+    assert not cache.is_loaded(scope)
+
+    cache.load(scope, [
+        {"embedding": [1.0, 0.0, 0.0], "answer": "oldest"},
+        {"embedding": [0.0, 1.0, 0.0], "answer": "middle"},
+        {"embedding": [0.0, 0.0, 1.0], "answer": "newest"},
+        {"embedding": [], "answer": "no embedding"}
+    ])
+
+    assert cache.is_loaded(scope)
+    assert cache.get_stats()["entries"] == 2
+    assert cache.find(scope, [1.0, 0.0, 0.0], 0.9) is None
+    assert cache.find(scope, [0.0, 0.0, 1.0], 0.9)["answer"] == "newest"
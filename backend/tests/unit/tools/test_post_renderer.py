@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the picture post renderer
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from app.tools.post_renderer import PostRenderer, fit_cover, load_font
+
+PERIOD_COLORS = {"Energie": "#F44336", "Umsicht": "#9C27B0"}
+TEXT = "Energie ist die Kraft, die dich jeden Tag weiterbringt"
+
+
+def _background(width=1080, height=1350):
+    return Image.new("RGB", (width, height), (30, 60, 90))
+
+
+def test_every_template_renders_an_rgb_canvas():
+    renderer = PostRenderer(PERIOD_COLORS)
+    for template in PostRenderer.TEMPLATES + ("unknown",):
+        image = renderer.render(_background(), template, TEXT, "Energie")
+        assert image.mode == "RGB" and image.size == (1080, 1350)
+
+
+def test_gradient_matches_line_by_line_drawing():
+    width, height = 20, 1350
+    layer = PostRenderer._gradient_layer((244, 67, 54), width, height).image
+
+    expected = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(expected)
+    for y in range(height):
+        if y < height // 3:
+            alpha = int(127 * (1 - y / (height // 3)))
+        elif y > 2 * height // 3:
+            alpha = int(127 * (y - 2 * height // 3) / (height // 3))
+        else:
+            alpha = 51
+        draw.line([(0, y), (width, y)], fill=(244, 67, 54, alpha))
+
+    assert np.array_equal(np.asarray(layer), np.asarray(expected))
+
+
+def test_overlays_are_cached_per_period_and_size():
+    renderer = PostRenderer(PERIOD_COLORS, max_cached_overlays=2)
+    renderer.render(_background(), "gradient", TEXT, "Energie")
+    renderer.render(_background(), "gradient", "Anderer Text", "Energie")
+    renderer.render(_background(1080, 1920), "gradient", TEXT, "Energie")
+    renderer.render(_background(), "quote_card", TEXT, "Umsicht")
+
+    stats = renderer.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 3
+    assert stats["cached_overlays"] == 2
+
+
+def test_text_is_blended_once_over_the_tint():
+    renderer = PostRenderer(PERIOD_COLORS)
+    image = renderer.render(_background(), "minimal", "Hallo", "Energie")
+
+    # Same result as compositing full-canvas tint and text layers
+    tint = Image.new("RGBA", (1080, 1350), (244, 67, 54, 76))
+    text = Image.new("RGBA", (1080, 1350), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(text)
+    font = load_font(64)
+    bbox = draw.textbbox((0, 0), "Hallo", font=font)
+    x, y = (1080 - (bbox[2] - bbox[0])) // 2, (1350 - 74) // 2
+    draw.text((x + 3, y + 3), "Hallo", font=font, fill=(0, 0, 0, 128))
+    draw.text((x, y), "Hallo", font=font, fill=(255, 255, 255, 255))
+    expected = Image.alpha_composite(Image.alpha_composite(_background().convert("RGBA"), tint), text).convert("RGB")
+
+    difference = np.abs(np.asarray(image, dtype=int) - np.asarray(expected, dtype=int))
+    assert difference.max() <= 2
+
+
+def test_fit_cover_crops_to_the_target_ratio():
+    wide = Image.new("RGB", (1880, 1300), (255, 0, 0))
+    wide.paste((0, 0, 255), (0, 0, 100, 1300))  # left edge is cropped away
+
+    image = fit_cover(wide, 1080, 1920)
+
+    assert image.size == (1080, 1920) and image.mode == "RGB"
+    assert image.getpixel((0, 960)) == (255, 0, 0)
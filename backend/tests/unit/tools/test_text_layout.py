@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared text layout
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+from PIL import Image
+
+from app.tools import text_layout
+from app.tools.post_renderer import PostRenderer
+from app.tools.text_layout import (
+    fit_font_size, layout_cache_info, load_font, text_width, wrap_text, wrap_words
+)
+
+TEXT = "Energie ist die Kraft, die dich jeden Tag ein Stück näher an deine Ziele bringt"
+
+
+def test_caption_wrapping_counts_characters():
+    assert wrap_words("eins zwei drei vier", 9) == ["eins zwei", "drei vier"]
+    assert wrap_words("Donaudampfschifffahrt ist lang", 10) == ["Donaudampfschifffahrt", "ist lang"]
+    assert wrap_words("", 10) == []
+
+
+def test_lines_fit_the_width_and_keep_the_words():
+    font = load_font(72)
+    lines = wrap_text(TEXT, font, 600)
+
+    assert len(lines) > 1
+    assert " ".join(lines) == TEXT
+    for line in lines:
+        bbox = font.getbbox(line)
+        assert bbox[2] - bbox[0] <= 600
+
+
+def test_glyph_advances_add_up_to_the_line_length():
+    font = load_font(60)
+    assert abs(text_width("Umsicht und Erfolg", font) - font.getlength("Umsicht und Erfolg")) < 2
+
+
+def test_layouts_are_cached():
+    font = load_font(52)
+    wrap_text(TEXT + " (Cache)", font, 700)
+    hits = layout_cache_info()["hits"]
+    wrap_text(TEXT + " (Cache)", font, 700)
+    assert layout_cache_info()["hits"] == hits + 1
+
+
+def test_font_size_is_fitted_to_the_box():
+    size, lines = fit_font_size(TEXT, 930, 1150, 72)
+    assert size == 72
+
+    long_text = " ".join([TEXT] * 8)
+    size, lines = fit_font_size(long_text, 930, 600, 72)
+    assert 24 <= size < 72
+    assert len(lines) * (size + 10) <= 600
+    # One size up would not fit any more
+    assert len(wrap_text(long_text, load_font(size + 1), 930)) * (size + 11) > 600
+
+
+def test_default_font_is_used_without_system_fonts(monkeypatch):
+    monkeypatch.setattr(text_layout, "FONT_PATHS", [])
+    load_font.cache_clear()
+    try:
+        font = load_font(48)
+        assert not isinstance(getattr(font, "path", None), str)
+
+        lines = wrap_text(TEXT, font, 200)
+        assert len(lines) > 1 and " ".join(lines) == TEXT
+        assert fit_font_size(TEXT, 600, 400, 72)[1]
+
+        image = PostRenderer({"Energie": "#F44336"}).render(
+            Image.new("RGB", (1080, 1350)), "default", TEXT, "Energie"
+        )
+        assert image.size == (1080, 1350)
+    finally:
+        load_font.cache_clear()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Tests for raw frame rendering of generated videos
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.core.media_cache import MediaCache
+from app.services.ffmpeg_service import FFmpegResult
+from app.tools import video_template_tools
+from app.tools.video_frames import crossfade_frames, encoder_args, preview_size, rawvideo_input
+from app.tools.video_template_tools import TextLayer, VideoTemplateProcessor
+
+
+def test_rawvideo_input_reads_rgb_from_stdin():
+    args = rawvideo_input(1080, 1920, 30)
+    assert args[args.index('-s') + 1] == "1080x1920"
+    assert args[args.index('-pix_fmt') + 1] == "rgb24"
+    assert args[-2:] == ['-i', 'pipe:0']
+
+
+def test_encoder_presets():
+    final, preview = encoder_args("final"), encoder_args("preview")
+    assert final[final.index('-preset') + 1] == "medium"
+    assert preview[preview.index('-preset') + 1] == "ultrafast"
+    assert int(preview[preview.index('-crf') + 1]) > int(final[final.index('-crf') + 1])
+    with pytest.raises(ValueError):
+        encoder_args("lossless")
+
+
+def test_crossfade_blends_into_the_next_image():
+    black = np.zeros((4, 4, 3), dtype=np.uint8)
+    white = np.full((4, 4, 3), 255, dtype=np.uint8)
+    frames = [frame.copy() for frame in crossfade_frames([black, white], duration=2, fps=10, transition=0.5)]
+
+    assert len(frames) == 20
+    assert frames[0] is not black and not frames[9].any()
+    # Half way through the fade, then the second image itself
+    assert abs(int(frames[12][0, 0, 0]) - 102) <= 1
+    assert (frames[15] == 255).all()
+
+
+def test_preview_sizes_keep_the_aspect_ratio():
+    assert preview_size(1080, 1920) == (270, 480)
+    assert preview_size(1080, 1350) == (270, 338)
+    assert preview_size(200, 200) == (200, 200)
+
+
+class _FFmpeg:
+    def __init__(self, rendered):
+        self.rendered = rendered
+
+    def run_sync(self, cmd, frames=None, **kwargs):
+        self.rendered["cmd"] = cmd
+        self.rendered["frames"] = [frame.copy() for frame in frames]
+        self.rendered["runs"] = self.rendered.get("runs", 0) + 1
+        open(cmd[-1], "wb").close()
+        return FFmpegResult(returncode=0)
+
+
+def _processor(monkeypatch, rendered, cache_dir=None):
+    monkeypatch.setattr(video_template_tools, "ffmpeg_service", _FFmpeg(rendered))
+    if cache_dir:
+        cache = MediaCache(str(cache_dir), 1 << 30)
+        monkeypatch.setattr(video_template_tools, "get_media_cache", lambda: cache)
+    processor = VideoTemplateProcessor()
+    processor.templates["energy_burst"].resolution = (108, 192)
+    return processor
+
+
+REPLACEMENTS = {
+    "background_color": "#000000",
+    "text_main_text": "Energie",
+    "color_primary_overlay": "#FF0000",
+}
+
+
+def test_template_frames_composite_layers(monkeypatch, tmp_path):
+    rendered = {}
+    processor = _processor(monkeypatch, rendered)
+    template = processor.templates["energy_burst"]
+
+    result = processor.create_video_from_template("energy_burst", REPLACEMENTS, str(tmp_path / "reel.mp4"))
+
+    assert result["success"]
+    frames = rendered["frames"]
+    assert len(frames) == template.duration * 30
+    assert rendered["cmd"][rendered["cmd"].index('-s') + 1] == "108x192"
+    # The red overlay is composited over the black background, text is white
+    assert frames[0][:, :, 0].max() > 0 and not frames[0][:, :, 1:].any()
+    assert any(frame.min(axis=2).max() > 200 for frame in frames)
+
+
+def test_static_layers_are_reused_across_renders(monkeypatch, tmp_path):
+    rendered = {}
+    processor = _processor(monkeypatch, rendered)
+
+    processor.create_video_from_template("energy_burst", REPLACEMENTS, str(tmp_path / "first.mp4"))
+    first = rendered["frames"]
+    misses = processor.get_stats()["misses"]
+    processor.create_video_from_template("energy_burst", REPLACEMENTS, str(tmp_path / "second.mp4"),
+                                         quality="preview")
+
+    assert processor.get_stats()["misses"] == misses
+    assert all((a == b).all() for a, b in zip(first, rendered["frames"]))
+    assert rendered["cmd"][rendered["cmd"].index('-preset') + 1] == "ultrafast"
+
+    # Another overlay color only rebuilds what depends on it
+    processor.create_video_from_template("energy_burst", dict(REPLACEMENTS, color_primary_overlay="#0000FF"),
+                                         str(tmp_path / "third.mp4"))
+    assert rendered["frames"][0][:, :, 2].max() > 0 and not rendered["frames"][0][:, :, 0].any()
+    assert processor.get_stats()["misses"] > misses
+
+
+def test_overlay_pulse_stays_cached(monkeypatch, tmp_path):
+    rendered = {}
+    processor = _processor(monkeypatch, rendered)
+
+    processor.create_video_from_template("energy_burst", REPLACEMENTS, str(tmp_path / "first.mp4"))
+    red = [int(frame[0, 0, 0]) for frame in rendered["frames"]]
+
+    # Full opacity every two seconds, half of it in between
+    assert red[0] == red[60] == 76 and red[30] == 37
+    assert red[0] > red[15] > red[30]
+    misses = processor.get_stats()["misses"]
+    processor.create_video_from_template("energy_burst", REPLACEMENTS, str(tmp_path / "second.mp4"))
+    assert processor.get_stats()["misses"] == misses
+
+
+def _text_rows_and_columns(layer, t):
+    frame = np.zeros((100, 100, 3), dtype=np.uint8)
+    layer.draw(frame, t)
+    rows, columns = np.nonzero(frame[:, :, 0])
+    return (rows.min(), rows.max()), (columns.min(), columns.max())
+
+
+def test_text_slides_up_and_zooms_in_during_its_first_second():
+    image = Image.new("RGBA", (40, 10), (255, 255, 255, 255))
+    slide = TextLayer.from_image("subtitle", 1, 5, image, (30, 40), "slide_up")
+    zoom = TextLayer.from_image("period_name", 1, 5, image, (30, 40), "zoom_in")
+
+    # Five pixels below its place half way, at its place after a second
+    assert _text_rows_and_columns(slide, 1.5)[0] == (42, 51)
+    assert _text_rows_and_columns(slide, 2)[0] == (40, 49)
+    assert not slide.settled(1.5) and slide.settled(2)
+
+    (top, bottom), (left, right) = _text_rows_and_columns(zoom, 1.5)
+    assert (bottom - top + 1, right - left + 1) == (8, 30)
+    assert (top + bottom) / 2 == pytest.approx(44.5, abs=0.5)
+    assert _text_rows_and_columns(zoom, 2) == ((40, 49), (30, 69))
+    assert not zoom.settled(1.5) and zoom.settled(2)
+
+
+def test_previews_are_small_and_cached(monkeypatch, tmp_path):
+    rendered = {}
+    processor = _processor(monkeypatch, rendered, tmp_path / "cache")
+    monkeypatch.setattr(video_template_tools.settings, "RENDER_TMP_DIR", str(tmp_path / "render"))
+    processor.templates["energy_burst"].resolution = (1080, 1920)
+
+    preview = processor.create_preview("energy_burst", REPLACEMENTS, str(tmp_path / "previews"))
+
+    assert preview["success"] and preview["source"] == "generated"
+    assert rendered["cmd"][rendered["cmd"].index('-s') + 1] == "270x480"
+    assert rendered["cmd"][rendered["cmd"].index('-preset') + 1] == "ultrafast"
+    assert len(rendered["frames"]) == 15 * 10
+    # The poster shows the main text
+    poster = np.asarray(Image.open(preview["poster_path"]))
+    assert poster.shape == (480, 270, 3) and poster.min(axis=2).max() > 200
+
+    cached = processor.create_preview("energy_burst", REPLACEMENTS, str(tmp_path / "previews"))
+    assert cached["source"] == "cache" and cached["video_path"] == preview["video_path"]
+    assert rendered["runs"] == 1
+    other = processor.create_preview("energy_burst", dict(REPLACEMENTS, text_main_text="Erfolg"),
+                                     str(tmp_path / "previews"))
+    assert other["source"] == "generated" and other["preview_id"] != preview["preview_id"]
+
+    # An edited template doesn't reuse renders of its old definition
+    processor.templates["energy_burst"].color_overlays[0]["opacity"] = 0.6
+    edited = processor.create_preview("energy_burst", REPLACEMENTS, str(tmp_path / "previews"))
+    assert edited["source"] == "generated" and edited["preview_id"] != preview["preview_id"]